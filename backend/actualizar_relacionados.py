@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Actualizar las recomendaciones "se rentan juntos": sumar a los conteos de
+coocurrencia las solicitudes que pasaron a aprobada, en proceso o completada
+(y restar las que salieron de esos estados) y recalcular el top-K de los
+productos afectados. La API lo hace sola tras cada cambio de estado; este
+script sirve para la carga inicial y para reconstruir todo tras cambiar la
+métrica o el K.
+
+Uso (desde backend/):
+    python actualizar_relacionados.py
+    python actualizar_relacionados.py --completo
+"""
+
+import argparse
+import os
+import sys
+import time
+
+# Agregar el directorio raíz al path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.core.database import SessionLocal
+from app.crud import recomendaciones_crud
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Actualizar productos relacionados por coocurrencia")
+    parser.add_argument("--completo", action="store_true", help="Borrar los conteos y recalcular con todas las solicitudes contabilizadas")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        print("🔗 Actualizando productos relacionados" + (" (reconstrucción completa)" if args.completo else "") + "...")
+        inicio = time.perf_counter()
+        resumen = recomendaciones_crud.actualizar_relacionados(db, completo=args.completo)
+        print(f"✅ {resumen['solicitudes']} solicitudes sumadas, {resumen['retiradas']} retiradas, {resumen['pares']} pares actualizados "
+              f"en {time.perf_counter() - inicio:.1f} s")
+        print(f"   {resumen['productos_recalculados']} productos con top-K recalculado")
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Error: {e}")
+        sys.exit(1)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+"""Esquema base
+
+Las tablas de init_db.py, init_solicitudes_db.py e init_pagos_db.py tal como
+estaban antes de usar Alembic, escritas de forma explícita para que esta
+revisión no cambie cuando cambien los modelos. Una base de datos creada con
+esos scripts ya tiene este esquema: se marca con `alembic stamp 0001` y se
+aplica el resto con `alembic upgrade head`. Una base de datos nueva se crea
+completa con `alembic upgrade head`.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# Identificadores de revisión usados por Alembic
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+ESTADOS_SOLICITUD = ("pendiente", "aprobada", "rechazada", "en_proceso", "completada", "cancelada")
+TIPOS_TARJETA = ("credito", "debito")
+MARCAS_TARJETA = ("visa", "mastercard", "amex", "otro")
+TIPOS_PAGO = ("anticipo", "deposito", "pago_final", "devolucion_deposito")
+METODOS_PAGO = ("efectivo", "transferencia", "tarjeta", "paypal")
+ESTADOS_PAGO = ("pendiente", "completado", "fallido", "reembolsado")
+
+# En orden de dependencias (claves foráneas); downgrade las borra al revés
+TABLAS = (
+    "categorias", "usuarios", "administradores", "paquetes", "configuraciones", "productos",
+    "solicitudes", "tarjetas_usuario", "pagos", "solicitud_paquetes", "solicitud_productos",
+)
+
+
+def upgrade() -> None:
+    op.create_table(
+        "categorias",
+        sa.Column("categoria_id", sa.Integer(), primary_key=True),
+        sa.Column("nombre", sa.String(100), nullable=False),
+        sa.Column("descripcion", sa.Text()),
+        sa.Column("imagen_url", sa.String(500)),
+        sa.Column("activo", sa.Boolean()),
+        sa.Column("fecha_creacion", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_index("ix_categorias_activo", "categorias", ["activo"])
+    op.create_index("ix_categorias_categoria_id", "categorias", ["categoria_id"])
+    op.create_index("ix_categorias_nombre", "categorias", ["nombre"], unique=True)
+
+    op.create_table(
+        "usuarios",
+        sa.Column("usuario_id", sa.Integer(), primary_key=True),
+        sa.Column("nombre", sa.String(100), nullable=False),
+        sa.Column("apellido", sa.String(100), nullable=False),
+        sa.Column("email", sa.String(150), nullable=False),
+        sa.Column("password", sa.String(255), nullable=False),
+        sa.Column("telefono", sa.String(20)),
+        sa.Column("direccion", sa.Text()),
+        sa.Column("fecha_registro", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("fecha_actualizacion", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_index("ix_usuarios_email", "usuarios", ["email"], unique=True)
+    op.create_index("ix_usuarios_usuario_id", "usuarios", ["usuario_id"])
+
+    op.create_table(
+        "administradores",
+        sa.Column("admin_id", sa.Integer(), primary_key=True),
+        sa.Column("nombre", sa.String(100), nullable=False),
+        sa.Column("apellido", sa.String(100), nullable=False),
+        sa.Column("email", sa.String(150), nullable=False, unique=True),
+        sa.Column("password", sa.String(255), nullable=False),
+        sa.Column("fecha_creacion", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("fecha_actualizacion", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_index("ix_administradores_admin_id", "administradores", ["admin_id"])
+
+    op.create_table(
+        "paquetes",
+        sa.Column("paquete_id", sa.Integer(), primary_key=True),
+        sa.Column("codigo_paquete", sa.String(50), nullable=False, unique=True),
+        sa.Column("nombre", sa.String(200), nullable=False),
+        sa.Column("descripcion", sa.Text()),
+        sa.Column("precio_por_dia", sa.Numeric(10, 2), nullable=False),
+        sa.Column("descuento_porcentaje", sa.Numeric(5, 2)),
+        sa.Column("imagen_dato", sa.LargeBinary()),
+        sa.Column("capacidad_personas", sa.Integer()),
+        sa.Column("activo", sa.Boolean()),
+        sa.Column("fecha_creacion", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("fecha_actualizacion", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_index("ix_paquetes_activo", "paquetes", ["activo"])
+    op.create_index("ix_paquetes_capacidad_personas", "paquetes", ["capacidad_personas"])
+    op.create_index("ix_paquetes_paquete_id", "paquetes", ["paquete_id"])
+    op.create_index("ix_paquetes_precio_por_dia", "paquetes", ["precio_por_dia"])
+
+    op.create_table(
+        "configuraciones",
+        sa.Column("config_id", sa.Integer(), primary_key=True),
+        sa.Column("clave", sa.String(100), nullable=False),
+        sa.Column("valor", sa.Text(), nullable=False),
+        sa.Column("descripcion", sa.Text()),
+        sa.Column("tipo_dato", sa.String(20)),
+        sa.Column("fecha_actualizacion", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_index("ix_configuraciones_clave", "configuraciones", ["clave"], unique=True)
+    op.create_index("ix_configuraciones_config_id", "configuraciones", ["config_id"])
+
+    op.create_table(
+        "productos",
+        sa.Column("producto_id", sa.Integer(), primary_key=True),
+        sa.Column("categoria_id", sa.Integer(), sa.ForeignKey("categorias.categoria_id"), nullable=False),
+        sa.Column("codigo_producto", sa.String(50), nullable=False, unique=True),
+        sa.Column("nombre", sa.String(200), nullable=False),
+        sa.Column("descripcion", sa.Text()),
+        sa.Column("precio_por_dia", sa.Numeric(10, 2), nullable=False),
+        sa.Column("stock_total", sa.Integer(), nullable=False),
+        sa.Column("stock_disponible", sa.Integer(), nullable=False),
+        sa.Column("estado", sa.String(20)),
+        sa.Column("especificaciones", sa.JSON()),
+        sa.Column("dimensiones", sa.String(100)),
+        sa.Column("peso", sa.Numeric(8, 2)),
+        sa.Column("imagen_dato", sa.LargeBinary()),
+        sa.Column("requiere_deposito", sa.Boolean()),
+        sa.Column("deposito_cantidad", sa.Numeric(10, 2)),
+        sa.Column("fecha_creacion", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("fecha_actualizacion", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_index("ix_productos_producto_id", "productos", ["producto_id"])
+
+    op.create_table(
+        "solicitudes",
+        sa.Column("solicitud_id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("usuario_id", sa.Integer(), sa.ForeignKey("usuarios.usuario_id"), nullable=False),
+        sa.Column("numero_solicitud", sa.String(20), nullable=False),
+        sa.Column("fecha_evento_inicio", sa.Date(), nullable=False),
+        sa.Column("fecha_evento_fin", sa.Date(), nullable=False),
+        sa.Column("direccion_evento", sa.Text()),
+        sa.Column("tipo_evento", sa.String(100)),
+        sa.Column("num_personas_estimado", sa.Integer()),
+        sa.Column("estado", sa.Enum(*ESTADOS_SOLICITUD, name="estadosolicitud")),
+        sa.Column("observaciones_cliente", sa.Text()),
+        sa.Column("observaciones_admin", sa.Text()),
+        sa.Column("subtotal", sa.Numeric(12, 2)),
+        sa.Column("descuento", sa.Numeric(12, 2)),
+        sa.Column("impuestos", sa.Numeric(12, 2)),
+        sa.Column("deposito_total", sa.Numeric(12, 2)),
+        sa.Column("total_cotizacion", sa.Numeric(12, 2)),
+        sa.Column("fecha_solicitud", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("fecha_respuesta", sa.DateTime(timezone=True)),
+        sa.Column("fecha_entrega", sa.DateTime(timezone=True)),
+        sa.Column("fecha_devolucion", sa.DateTime(timezone=True)),
+    )
+    op.create_index("ix_solicitudes_estado", "solicitudes", ["estado"])
+    op.create_index("ix_solicitudes_fecha_evento_inicio", "solicitudes", ["fecha_evento_inicio"])
+    op.create_index("ix_solicitudes_fecha_solicitud", "solicitudes", ["fecha_solicitud"])
+    op.create_index("ix_solicitudes_numero_solicitud", "solicitudes", ["numero_solicitud"], unique=True)
+    op.create_index("ix_solicitudes_solicitud_id", "solicitudes", ["solicitud_id"])
+    op.create_index("ix_solicitudes_usuario_id", "solicitudes", ["usuario_id"])
+
+    op.create_table(
+        "tarjetas_usuario",
+        sa.Column("tarjeta_id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("usuario_id", sa.Integer(), sa.ForeignKey("usuarios.usuario_id"), nullable=False),
+        sa.Column("tipo_tarjeta", sa.Enum(*TIPOS_TARJETA, name="tipotarjeta"), nullable=False),
+        sa.Column("marca", sa.Enum(*MARCAS_TARJETA, name="marcatarjeta"), nullable=False),
+        sa.Column("ultimos_digitos", sa.String(4), nullable=False),
+        sa.Column("nombre_titular", sa.String(200), nullable=False),
+        sa.Column("mes_expiracion", sa.Integer(), nullable=False),
+        sa.Column("anio_expiracion", sa.Integer(), nullable=False),
+        sa.Column("es_predeterminada", sa.Boolean()),
+        sa.Column("token_pasarela", sa.String(255)),
+        sa.Column("fecha_creacion", sa.TIMESTAMP(), server_default=sa.func.current_timestamp()),
+        sa.Column("fecha_actualizacion", sa.TIMESTAMP(), server_default=sa.func.current_timestamp()),
+        sa.Column("activa", sa.Boolean()),
+    )
+    op.create_index("ix_tarjetas_usuario_tarjeta_id", "tarjetas_usuario", ["tarjeta_id"])
+    op.create_index("ix_tarjetas_usuario_usuario_id", "tarjetas_usuario", ["usuario_id"])
+
+    op.create_table(
+        "pagos",
+        sa.Column("pago_id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("solicitud_id", sa.Integer(), sa.ForeignKey("solicitudes.solicitud_id"), nullable=False),
+        sa.Column("usuario_id", sa.Integer(), sa.ForeignKey("usuarios.usuario_id"), nullable=False),
+        sa.Column("numero_transaccion", sa.String(100)),
+        sa.Column("tipo_pago", sa.Enum(*TIPOS_PAGO, name="tipopago"), nullable=False),
+        sa.Column("metodo_pago", sa.Enum(*METODOS_PAGO, name="metodopago"), nullable=False),
+        sa.Column("monto", sa.DECIMAL(12, 2), nullable=False),
+        sa.Column("fecha_pago", sa.TIMESTAMP(), server_default=sa.func.current_timestamp()),
+        sa.Column("estado_pago", sa.Enum(*ESTADOS_PAGO, name="estadopago")),
+        sa.Column("observaciones", sa.Text()),
+    )
+    op.create_index("ix_pagos_estado_pago", "pagos", ["estado_pago"])
+    op.create_index("ix_pagos_fecha_pago", "pagos", ["fecha_pago"])
+    op.create_index("ix_pagos_numero_transaccion", "pagos", ["numero_transaccion"], unique=True)
+    op.create_index("ix_pagos_pago_id", "pagos", ["pago_id"])
+    op.create_index("ix_pagos_solicitud_id", "pagos", ["solicitud_id"])
+    op.create_index("ix_pagos_tipo_pago", "pagos", ["tipo_pago"])
+    op.create_index("ix_pagos_usuario_id", "pagos", ["usuario_id"])
+
+    op.create_table(
+        "solicitud_paquetes",
+        sa.Column("solicitud_paquete_id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("solicitud_id", sa.Integer(), sa.ForeignKey("solicitudes.solicitud_id"), nullable=False),
+        sa.Column("paquete_id", sa.Integer(), sa.ForeignKey("paquetes.paquete_id"), nullable=False),
+        sa.Column("cantidad_solicitada", sa.Integer(), nullable=False),
+        sa.Column("precio_unitario", sa.Numeric(10, 2), nullable=False),
+        sa.Column("dias_renta", sa.Integer(), nullable=False),
+        sa.Column("subtotal", sa.Numeric(12, 2), nullable=False),
+    )
+    op.create_index("ix_solicitud_paquetes_paquete_id", "solicitud_paquetes", ["paquete_id"])
+    op.create_index("ix_solicitud_paquetes_solicitud_id", "solicitud_paquetes", ["solicitud_id"])
+    op.create_index("ix_solicitud_paquetes_solicitud_paquete_id", "solicitud_paquetes", ["solicitud_paquete_id"])
+
+    op.create_table(
+        "solicitud_productos",
+        sa.Column("solicitud_producto_id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("solicitud_id", sa.Integer(), sa.ForeignKey("solicitudes.solicitud_id"), nullable=False),
+        sa.Column("producto_id", sa.Integer(), sa.ForeignKey("productos.producto_id"), nullable=False),
+        sa.Column("cantidad_solicitada", sa.Integer(), nullable=False),
+        sa.Column("precio_unitario", sa.Numeric(10, 2), nullable=False),
+        sa.Column("dias_renta", sa.Integer(), nullable=False),
+        sa.Column("subtotal", sa.Numeric(12, 2), nullable=False),
+        sa.Column("deposito_unitario", sa.Numeric(10, 2)),
+        sa.Column("deposito_total", sa.Numeric(12, 2)),
+    )
+    op.create_index("ix_solicitud_productos_producto_id", "solicitud_productos", ["producto_id"])
+    op.create_index("ix_solicitud_productos_solicitud_id", "solicitud_productos", ["solicitud_id"])
+    op.create_index("ix_solicitud_productos_solicitud_producto_id", "solicitud_productos", ["solicitud_producto_id"])
+
+
+
+def downgrade() -> None:
+    # Borra los índices con sus tablas
+    for tabla in reversed(TABLAS):
+        op.drop_table(tabla)
@@ -0,0 +1,36 @@
+"""Índices para los filtros más frecuentes
+
+- productos.estado y productos.categoria_id (catálogo, dashboard)
+- tarjetas_usuario(usuario_id, activa) (mis tarjetas)
+- solicitudes(usuario_id, fecha_solicitud) (mis solicitudes ordenadas por fecha)
+
+pagos.usuario_id y pagos.solicitud_id ya tienen índice desde 0001.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19
+"""
+from alembic import op
+
+# Identificadores de revisión usados por Alembic
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+INDICES = [
+    ("ix_productos_estado", "productos", ["estado"]),
+    ("ix_productos_categoria_id", "productos", ["categoria_id"]),
+    ("ix_tarjetas_usuario_usuario_activa", "tarjetas_usuario", ["usuario_id", "activa"]),
+    ("ix_solicitudes_usuario_fecha", "solicitudes", ["usuario_id", "fecha_solicitud"]),
+]
+
+
+def upgrade() -> None:
+    for nombre, tabla, columnas in INDICES:
+        op.create_index(nombre, tabla, columnas)
+
+
+def downgrade() -> None:
+    for nombre, tabla, _ in reversed(INDICES):
+        op.drop_index(nombre, table_name=tabla)
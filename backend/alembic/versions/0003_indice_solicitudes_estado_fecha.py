@@ -0,0 +1,26 @@
+"""Índice (estado, fecha_solicitud) para el listado de solicitudes del admin
+
+El listado filtra por estado y ordena por fecha_solicitud; con el índice
+compuesto no hace falta ordenar en memoria.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19
+"""
+from alembic import op
+
+# Identificadores de revisión usados por Alembic
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+NOMBRE = "ix_solicitudes_estado_fecha"
+
+
+def upgrade() -> None:
+    op.create_index(NOMBRE, "solicitudes", ["estado", "fecha_solicitud"])
+
+
+def downgrade() -> None:
+    op.drop_index(NOMBRE, table_name="solicitudes")
@@ -0,0 +1,62 @@
+"""Resumen desnormalizado en solicitudes
+
+Agrega total_productos, total_paquetes, total_pagado y estado_pago, y los
+rellena con UPDATE masivos a partir de las líneas y los pagos existentes.
+Después se mantienen al escribir; backfill_resumen_solicitudes.py verifica
+y corrige desviaciones por lotes.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# Identificadores de revisión usados por Alembic
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+ESTADOS_PAGO = ("pendiente", "parcial", "pagado", "reembolso_pendiente")
+
+
+def upgrade() -> None:
+    op.add_column("solicitudes", sa.Column("total_productos", sa.Integer(), nullable=False, server_default="0"))
+    op.add_column("solicitudes", sa.Column("total_paquetes", sa.Integer(), nullable=False, server_default="0"))
+    op.add_column("solicitudes", sa.Column("total_pagado", sa.Numeric(12, 2), nullable=False, server_default="0"))
+    op.add_column("solicitudes", sa.Column(
+        "estado_pago", sa.Enum(*ESTADOS_PAGO, name="estadopagosolicitud"),
+        nullable=False, server_default="pendiente"
+    ))
+    op.create_index("ix_solicitudes_estado_pago", "solicitudes", ["estado_pago"])
+
+    # Relleno set-based (una sentencia por columna, no fila por fila)
+    op.execute("""
+        UPDATE solicitudes SET
+            total_productos = (SELECT COUNT(*) FROM solicitud_productos sp WHERE sp.solicitud_id = solicitudes.solicitud_id),
+            total_paquetes = (SELECT COUNT(*) FROM solicitud_paquetes sq WHERE sq.solicitud_id = solicitudes.solicitud_id)
+    """)
+    op.execute("""
+        UPDATE solicitudes SET total_pagado = COALESCE((
+            SELECT SUM(CASE WHEN p.tipo_pago = 'devolucion_deposito' THEN -p.monto ELSE p.monto END)
+            FROM pagos p
+            WHERE p.solicitud_id = solicitudes.solicitud_id AND p.estado_pago = 'completado'
+        ), 0)
+    """)
+    op.execute("""
+        UPDATE solicitudes SET estado_pago = CASE
+            WHEN estado IN ('cancelada', 'rechazada') AND total_pagado > 0 THEN 'reembolso_pendiente'
+            WHEN estado IN ('cancelada', 'rechazada') THEN 'pendiente'
+            WHEN total_pagado <= 0 THEN 'pendiente'
+            WHEN total_pagado >= total_cotizacion THEN 'pagado'
+            ELSE 'parcial'
+        END
+    """)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_solicitudes_estado_pago", table_name="solicitudes")
+    with op.batch_alter_table("solicitudes") as batch_op:
+        for columna in ("estado_pago", "total_pagado", "total_paquetes", "total_productos"):
+            batch_op.drop_column(columna)
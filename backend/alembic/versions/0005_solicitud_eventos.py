@@ -0,0 +1,57 @@
+"""Historial de estados de solicitudes (solicitud_eventos)
+
+Crea la tabla append-only y la siembra con las solicitudes existentes: un
+evento de creación en fecha_solicitud y, si ya no están pendientes, un
+evento hacia su estado actual con la mejor fecha disponible
+(actor_tipo = 'sistema', porque no se sabe quién hizo el cambio).
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# Identificadores de revisión usados por Alembic
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+ESTADOS = ("pendiente", "aprobada", "rechazada", "en_proceso", "completada", "cancelada")
+
+
+def upgrade() -> None:
+    op.create_table(
+        "solicitud_eventos",
+        sa.Column("evento_id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("solicitud_id", sa.Integer(), sa.ForeignKey("solicitudes.solicitud_id"), nullable=False),
+        sa.Column("estado_anterior", sa.Enum(*ESTADOS, name="estadosolicitud"), nullable=True),
+        sa.Column("estado_nuevo", sa.Enum(*ESTADOS, name="estadosolicitud"), nullable=False),
+        sa.Column("fecha", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("actor_tipo", sa.String(20), nullable=False),
+        sa.Column("actor_id", sa.Integer()),
+        sa.Column("observaciones", sa.Text()),
+    )
+    op.create_index("ix_solicitud_eventos_evento_id", "solicitud_eventos", ["evento_id"])
+    op.create_index("ix_solicitud_eventos_solicitud_fecha", "solicitud_eventos", ["solicitud_id", "fecha"])
+    op.create_index("ix_solicitud_eventos_estado_fecha", "solicitud_eventos", ["estado_nuevo", "fecha"])
+
+    # Un evento de creación por solicitud y otro hacia su estado actual
+    op.execute("""
+        INSERT INTO solicitud_eventos (solicitud_id, estado_anterior, estado_nuevo, fecha, actor_tipo, actor_id)
+        SELECT s.solicitud_id, NULL, 'pendiente', s.fecha_solicitud, 'sistema', NULL
+        FROM solicitudes s
+    """)
+    op.execute("""
+        INSERT INTO solicitud_eventos (solicitud_id, estado_anterior, estado_nuevo, fecha, actor_tipo, actor_id)
+        SELECT s.solicitud_id, 'pendiente', s.estado,
+               COALESCE(s.fecha_devolucion, s.fecha_entrega, s.fecha_respuesta, s.fecha_solicitud),
+               'sistema', NULL
+        FROM solicitudes s
+        WHERE s.estado <> 'pendiente'
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table("solicitud_eventos")
@@ -0,0 +1,42 @@
+"""Rollups diarios de analítica (producto, categoría y paquete)
+
+Crea las tablas que alimentan el dashboard de administrador. Se llenan con
+backfill_rollups.py y después se mantienen en cada cambio de estado de las
+solicitudes.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# Identificadores de revisión usados por Alembic
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+ROLLUPS = (
+    ("rollup_producto_dia", "producto_id"),
+    ("rollup_categoria_dia", "categoria_id"),
+    ("rollup_paquete_dia", "paquete_id"),
+)
+
+
+def upgrade() -> None:
+    for tabla, clave in ROLLUPS:
+        op.create_table(
+            tabla,
+            sa.Column(clave, sa.Integer(), primary_key=True, autoincrement=False),
+            sa.Column("dia", sa.Date(), primary_key=True),
+            sa.Column("unidades", sa.Integer(), nullable=False, server_default="0"),
+            sa.Column("ingresos", sa.Numeric(14, 2), nullable=False, server_default="0"),
+            sa.Column("solicitudes", sa.Integer(), nullable=False, server_default="0"),
+        )
+        op.create_index(f"ix_{tabla}_dia", tabla, ["dia"])
+
+
+def downgrade() -> None:
+    for tabla, _ in reversed(ROLLUPS):
+        op.drop_table(tabla)
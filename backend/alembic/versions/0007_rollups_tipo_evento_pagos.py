@@ -0,0 +1,42 @@
+"""Rollups diarios por tipo de evento y de pagos
+
+Tablas para /admin/analytics/series. Después de aplicar la migración hay que
+llenarlas con backfill_rollups.py; a partir de ahí se mantienen solas.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# Identificadores de revisión usados por Alembic
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "rollup_tipo_evento_dia",
+        sa.Column("tipo_evento", sa.String(100), primary_key=True),
+        sa.Column("dia", sa.Date(), primary_key=True),
+        sa.Column("unidades", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("ingresos", sa.Numeric(14, 2), nullable=False, server_default="0"),
+        sa.Column("solicitudes", sa.Integer(), nullable=False, server_default="0"),
+    )
+    op.create_index("ix_rollup_tipo_evento_dia_dia", "rollup_tipo_evento_dia", ["dia"])
+    op.create_table(
+        "rollup_pago_dia",
+        sa.Column("tipo_pago", sa.String(30), primary_key=True),
+        sa.Column("dia", sa.Date(), primary_key=True),
+        sa.Column("monto", sa.Numeric(14, 2), nullable=False, server_default="0"),
+        sa.Column("pagos", sa.Integer(), nullable=False, server_default="0"),
+    )
+    op.create_index("ix_rollup_pago_dia_dia", "rollup_pago_dia", ["dia"])
+
+
+def downgrade() -> None:
+    op.drop_table("rollup_pago_dia")
+    op.drop_table("rollup_tipo_evento_dia")
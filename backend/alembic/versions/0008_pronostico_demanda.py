@@ -0,0 +1,31 @@
+"""Tabla de pronóstico de demanda por producto y día
+
+La llena pronosticar_demanda.py; /admin/analytics/pronostico la consulta.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# Identificadores de revisión usados por Alembic
+revision = "0008"
+down_revision = "0007"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "pronostico_demanda",
+        sa.Column("producto_id", sa.Integer(), primary_key=True, autoincrement=False),
+        sa.Column("fecha", sa.Date(), primary_key=True),
+        sa.Column("unidades", sa.Numeric(10, 2), nullable=False),
+        sa.Column("generado_en", sa.DateTime(), nullable=False),
+    )
+    op.create_index("ix_pronostico_demanda_fecha", "pronostico_demanda", ["fecha"])
+
+
+def downgrade() -> None:
+    op.drop_table("pronostico_demanda")
@@ -0,0 +1,37 @@
+"""Tabla de recomendaciones de stock (planeación de capacidad)
+
+La llena planificar_capacidad.py; /admin/analytics/capacidad la consulta.
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# Identificadores de revisión usados por Alembic
+revision = "0009"
+down_revision = "0008"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "recomendacion_stock",
+        sa.Column("producto_id", sa.Integer(), primary_key=True, autoincrement=False),
+        sa.Column("stock_actual", sa.Integer(), nullable=False),
+        sa.Column("stock_recomendado", sa.Integer(), nullable=False),
+        sa.Column("nivel_servicio", sa.Float(), nullable=False),
+        sa.Column("prob_faltante_actual", sa.Float(), nullable=False),
+        sa.Column("pico_p50", sa.Float(), nullable=False),
+        sa.Column("pico_p95", sa.Float(), nullable=False),
+        sa.Column("curva", sa.JSON()),
+        sa.Column("escenarios", sa.Integer(), nullable=False),
+        sa.Column("horizonte_dias", sa.Integer(), nullable=False),
+        sa.Column("generado_en", sa.DateTime(), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("recomendacion_stock")
@@ -0,0 +1,77 @@
+"""Tablas de coocurrencia y productos relacionados
+
+Las llena recomendaciones_crud.actualizar_relacionados (tras los cambios de
+estado de solicitudes y con actualizar_relacionados.py);
+/productos/{id}/relacionados las consulta. También crea la fila de
+configuraciones con el total de solicitudes contadas, que la actualización
+bloquea con FOR UPDATE.
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# Identificadores de revisión usados por Alembic
+revision = "0010"
+down_revision = "0009"
+branch_labels = None
+depends_on = None
+
+
+CLAVE_TOTAL_SOLICITUDES = "relacionados_total_solicitudes"
+
+configuraciones = sa.table(
+    "configuraciones",
+    sa.column("clave", sa.String),
+    sa.column("valor", sa.Text),
+    sa.column("descripcion", sa.Text),
+    sa.column("tipo_dato", sa.String),
+)
+
+
+def upgrade() -> None:
+    op.create_table(
+        "coocurrencia_solicitudes",
+        sa.Column("solicitud_id", sa.Integer(), primary_key=True, autoincrement=False),
+    )
+    op.create_table(
+        "coocurrencia_items",
+        sa.Column("item_tipo", sa.String(10), primary_key=True),
+        sa.Column("item_id", sa.Integer(), primary_key=True, autoincrement=False),
+        sa.Column("conteo", sa.Integer(), nullable=False),
+    )
+    op.create_table(
+        "coocurrencia_pares",
+        sa.Column("producto_id", sa.Integer(), primary_key=True, autoincrement=False),
+        sa.Column("item_tipo", sa.String(10), primary_key=True),
+        sa.Column("item_id", sa.Integer(), primary_key=True, autoincrement=False),
+        sa.Column("conteo", sa.Integer(), nullable=False),
+    )
+    op.create_index("ix_coocurrencia_pares_item", "coocurrencia_pares", ["item_tipo", "item_id"])
+    op.create_table(
+        "productos_relacionados",
+        sa.Column("producto_id", sa.Integer(), primary_key=True, autoincrement=False),
+        sa.Column("posicion", sa.Integer(), primary_key=True, autoincrement=False),
+        sa.Column("item_tipo", sa.String(10), nullable=False),
+        sa.Column("item_id", sa.Integer(), nullable=False),
+        sa.Column("conteo", sa.Integer(), nullable=False),
+        sa.Column("lift", sa.Float(), nullable=False),
+        sa.Column("jaccard", sa.Float(), nullable=False),
+    )
+    op.bulk_insert(configuraciones, [{
+        "clave": CLAVE_TOTAL_SOLICITUDES,
+        "valor": "0",
+        "descripcion": "Solicitudes contadas en productos_relacionados",
+        "tipo_dato": "number",
+    }])
+
+
+def downgrade() -> None:
+    op.execute(configuraciones.delete().where(configuraciones.c.clave == CLAVE_TOTAL_SOLICITUDES))
+    op.drop_table("productos_relacionados")
+    op.drop_index("ix_coocurrencia_pares_item", table_name="coocurrencia_pares")
+    op.drop_table("coocurrencia_pares")
+    op.drop_table("coocurrencia_items")
+    op.drop_table("coocurrencia_solicitudes")
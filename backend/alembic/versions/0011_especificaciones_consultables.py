@@ -0,0 +1,44 @@
+"""Esquema de especificaciones por categoría y atributos indexados de productos
+
+sincronizar_atributos.py --inferir propone el esquema y llena
+producto_atributos con los productos existentes.
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# Identificadores de revisión usados por Alembic
+revision = "0011"
+down_revision = "0010"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "especificaciones_categoria",
+        sa.Column("categoria_id", sa.Integer(), sa.ForeignKey("categorias.categoria_id"), primary_key=True, autoincrement=False),
+        sa.Column("clave", sa.String(50), primary_key=True),
+        sa.Column("tipo", sa.String(10), nullable=False),
+        sa.Column("etiqueta", sa.String(100)),
+        sa.Column("unidad", sa.String(20)),
+    )
+    op.create_table(
+        "producto_atributos",
+        sa.Column("producto_id", sa.Integer(), sa.ForeignKey("productos.producto_id", ondelete="CASCADE"), primary_key=True, autoincrement=False),
+        sa.Column("clave", sa.String(50), primary_key=True),
+        sa.Column("valor_texto", sa.String(100), nullable=False),
+        sa.Column("valor_numero", sa.Float()),
+    )
+    op.create_index("ix_producto_atributos_texto", "producto_atributos", ["clave", "valor_texto", "producto_id"])
+    op.create_index("ix_producto_atributos_numero", "producto_atributos", ["clave", "valor_numero", "producto_id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_producto_atributos_numero", table_name="producto_atributos")
+    op.drop_index("ix_producto_atributos_texto", table_name="producto_atributos")
+    op.drop_table("producto_atributos")
+    op.drop_table("especificaciones_categoria")
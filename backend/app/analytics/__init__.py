@@ -0,0 +1 @@
+# Analytics computations module
\ No newline at end of file
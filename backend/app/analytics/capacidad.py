@@ -0,0 +1,100 @@
+"""
+Planeación de capacidad por Monte Carlo.
+
+Para cada producto se simulan miles de escenarios del horizonte: el número
+de solicitudes es Poisson con la tasa histórica (ajustada por mes), el día
+de inicio se sortea con el peso de cada mes y la cantidad y duración se
+toman de las líneas históricas del producto (bootstrap). La carga diaria de
+todos los escenarios se arma con un arreglo de diferencias y np.cumsum; el
+pico de cada escenario da la probabilidad de faltante para cualquier
+stock_total. El stock recomendado es el menor que cumple el nivel de
+servicio (P(pico <= stock) >= nivel).
+
+Los productos se procesan por lotes y, opcionalmente, en un pool de
+procesos; cada lote recibe su propia semilla derivada para que el resultado
+sea reproducible.
+"""
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+CUANTILES_CURVA = (0.5, 0.75, 0.9, 0.95, 0.98, 0.99, 0.999)
+
+
+def simular_picos(rng, tasa_por_dia: np.ndarray, cantidades: np.ndarray, duraciones: np.ndarray, escenarios: int) -> np.ndarray:
+    """
+    Pico de unidades en uso de cada escenario.
+
+    tasa_por_dia: solicitudes esperadas que empiezan cada día del horizonte.
+    cantidades/duraciones: líneas históricas del producto (duración en días, >= 1).
+    """
+    horizonte = tasa_por_dia.size
+    total_esperado = tasa_por_dia.sum()
+    if total_esperado <= 0 or cantidades.size == 0:
+        return np.zeros(escenarios)
+
+    llegadas = rng.poisson(total_esperado, size=escenarios)
+    n = int(llegadas.sum())
+    if n == 0:
+        return np.zeros(escenarios)
+    escenario = np.repeat(np.arange(escenarios), llegadas)
+    inicio = rng.choice(horizonte, size=n, p=tasa_por_dia / total_esperado)
+    muestra = rng.integers(0, cantidades.size, size=n)
+    cantidad = cantidades[muestra]
+    fin = np.minimum(inicio + duraciones[muestra], horizonte)
+
+    diferencias = np.zeros((escenarios, horizonte + 1))
+    np.add.at(diferencias, (escenario, inicio), cantidad)
+    np.add.at(diferencias, (escenario, fin), -cantidad)
+    return np.cumsum(diferencias, axis=1)[:, :horizonte].max(axis=1)
+
+
+def resumir(picos: np.ndarray, stock_total: int, nivel_servicio: float) -> dict:
+    """Stock recomendado, probabilidad de faltante con el stock actual y curva stock -> P(faltante)"""
+    recomendado = int(np.ceil(np.quantile(picos, nivel_servicio, method="inverted_cdf")))
+    candidatos = np.unique(np.r_[np.ceil(np.quantile(picos, CUANTILES_CURVA, method="inverted_cdf")), stock_total, recomendado])
+    return {
+        "stock_recomendado": recomendado,
+        "prob_faltante_actual": float(np.mean(picos > stock_total)),
+        "pico_p50": float(np.quantile(picos, 0.5)),
+        "pico_p95": float(np.quantile(picos, 0.95)),
+        "curva": [[int(stock), round(float(np.mean(picos > stock)), 4)] for stock in candidatos],
+    }
+
+
+def planificar_lote(productos: list, escenarios: int, nivel_servicio: float, semilla) -> list:
+    """
+    Simular un lote de productos. Cada producto es un dict con producto_id,
+    stock_total, tasa_por_dia, cantidades y duraciones (arreglos numpy).
+    Es una función de módulo para poder enviarse a un proceso del pool.
+    """
+    rng = np.random.default_rng(semilla)
+    resultados = []
+    for producto in productos:
+        picos = simular_picos(rng, producto["tasa_por_dia"], producto["cantidades"], producto["duraciones"], escenarios)
+        resultados.append({"producto_id": producto["producto_id"], **resumir(picos, producto["stock_total"], nivel_servicio)})
+    return resultados
+
+
+def planificar(productos: list, escenarios: int = 5000, nivel_servicio: float = 0.95,
+               procesos: int = 0, tamano_lote: int = 50, semilla: int = 0) -> list:
+    """Simular todos los productos; con procesos > 1 los lotes se reparten en un ProcessPoolExecutor"""
+    lotes = [productos[i:i + tamano_lote] for i in range(0, len(productos), tamano_lote)]
+    semillas = np.random.SeedSequence(semilla).spawn(len(lotes))
+    if procesos and procesos > 1 and len(lotes) > 1:
+        with ProcessPoolExecutor(max_workers=procesos) as pool:
+            partes = pool.map(planificar_lote, lotes, [escenarios] * len(lotes), [nivel_servicio] * len(lotes), semillas)
+            return [resultado for parte in partes for resultado in parte]
+    return [resultado for lote, s in zip(lotes, semillas) for resultado in planificar_lote(lote, escenarios, nivel_servicio, s)]
+
+
+def tasas_por_dia(n_lineas: int, inicios_mes: np.ndarray, meses_horizonte: np.ndarray, historia_dias: int,
+                  reparto_global: np.ndarray, peso_previo: float = 12.0) -> np.ndarray:
+    """
+    Solicitudes esperadas que empiezan cada día del horizonte para un producto.
+    El reparto por mes del producto se suaviza hacia el de todo el catálogo
+    (peso_previo líneas ficticias) para no sobreajustar con poca historia.
+    """
+    conteo = np.bincount(inicios_mes, minlength=12).astype(np.float64)
+    reparto = (conteo + peso_previo * reparto_global) / (conteo.sum() + peso_previo)
+    # tasa diaria del mes m ≈ líneas × fracción del mes / (días de historia / 12)
+    return n_lineas * reparto[meses_horizonte] * 12.0 / historia_dias
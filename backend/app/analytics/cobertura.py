@@ -0,0 +1,71 @@
+"""
+Paquetes que cubren un número de invitados al menor precio.
+
+El índice de capacidad guarda los paquetes activos ordenados por
+capacidad_personas en arreglos de numpy. Con una búsqueda binaria se obtienen los que
+cubren solos el número de personas; para los más chicos se resuelve un
+knapsack 0/1 de cobertura mínima: costo[c] = menor precio para sumar al
+menos c personas (c acotado al objetivo), O(paquetes × personas).
+"""
+import numpy as np
+
+
+def construir_indice(filas) -> dict:
+    """filas: (paquete_id, nombre, capacidad, precio_final) de los paquetes activos con capacidad"""
+    filas = sorted(filas, key=lambda f: (f[2], f[3]))
+    return {
+        "paquete_id": np.array([f[0] for f in filas], dtype=np.int64),
+        "nombre": [f[1] for f in filas],
+        "capacidad": np.array([f[2] for f in filas], dtype=np.int64),
+        "precio": np.array([f[3] for f in filas], dtype=np.float64),
+    }
+
+
+def cobertura_minima(capacidad, precio, personas: int):
+    """
+    Knapsack 0/1: subconjunto de menor precio cuya capacidad suma al menos
+    `personas`. Devuelve los índices elegidos o None si no alcanza.
+    """
+    n = len(capacidad)
+    if n == 0 or int(capacidad.sum()) < personas:
+        return None
+    posiciones = np.arange(personas + 1)
+    costo = np.full(personas + 1, np.inf)
+    costo[0] = 0.0
+    tomado = np.zeros((n, personas + 1), dtype=bool)
+    for i in range(n):
+        # Con el paquete i, cubrir c personas cuesta lo de cubrir c - capacidad
+        con_i = costo[np.maximum(posiciones - capacidad[i], 0)] + precio[i]
+        tomado[i] = con_i < costo
+        costo = np.where(tomado[i], con_i, costo)
+    if not np.isfinite(costo[personas]):
+        return None
+
+    elegidos, c = [], personas
+    for i in range(n - 1, -1, -1):
+        if c > 0 and tomado[i, c]:
+            elegidos.append(i)
+            c = max(c - int(capacidad[i]), 0)
+    return elegidos[::-1]
+
+
+def sugerir(indice: dict, personas: int, disponibles: set, limite: int = 5) -> list:
+    """
+    Opciones ordenadas por precio: los paquetes disponibles que cubren solos a
+    los invitados y la combinación más barata de paquetes más chicos. Cada
+    opción es una lista de posiciones del índice.
+    """
+    disponible = np.array([int(p) in disponibles for p in indice["paquete_id"]], dtype=bool)
+    corte = int(np.searchsorted(indice["capacidad"], personas, side="left"))
+
+    # Paquetes que alcanzan solos (capacidad >= personas)
+    grandes = np.flatnonzero(disponible[corte:]) + corte
+    grandes = grandes[np.argsort(indice["precio"][grandes], kind="stable")][:limite]
+    opciones = [[int(i)] for i in grandes]
+
+    # Combinaciones de paquetes más chicos
+    chicos = np.flatnonzero(disponible[:corte])
+    elegidos = cobertura_minima(indice["capacidad"][chicos], indice["precio"][chicos], personas)
+    if elegidos is not None:
+        opciones.append([int(chicos[i]) for i in elegidos])
+    return sorted(opciones, key=lambda o: float(indice["precio"][o].sum()))[:limite]
@@ -0,0 +1,78 @@
+"""
+Co-ocurrencia de productos y paquetes en las mismas solicitudes.
+
+Cada ítem se codifica como un entero: producto -> id * 2, paquete -> id * 2 + 1.
+A partir de la incidencia (canasta, ítem) se generan todos los pares de
+cada canasta sin bucles de Python y se cuentan como matriz dispersa en
+formato COO (np.unique sobre la clave a * n + b). Las puntuaciones (lift y
+Jaccard) y el top-K por ítem origen también se calculan con arreglos.
+"""
+import numpy as np
+
+PRODUCTO, PAQUETE = 0, 1
+
+
+def codificar(tipo, ids) -> np.ndarray:
+    return np.asarray(ids, dtype=np.int64) * 2 + np.asarray(tipo, dtype=np.int64)
+
+
+def decodificar(codigos):
+    codigos = np.asarray(codigos, dtype=np.int64)
+    return codigos % 2, codigos // 2
+
+
+def canastas_unicas(canasta, item):
+    """Ordenar por canasta y quitar ítems repetidos dentro de la misma canasta"""
+    pares = np.unique(np.stack([np.asarray(canasta, dtype=np.int64), np.asarray(item, dtype=np.int64)]), axis=1)
+    return pares[0], pares[1]
+
+
+def pares_por_canasta(canasta, item):
+    """
+    Todos los pares ordenados (a, b), a != b, de ítems que comparten canasta.
+    canasta/item deben venir de canastas_unicas (ordenados, sin repetidos).
+    """
+    if canasta.size == 0:
+        vacio = np.zeros(0, dtype=np.int64)
+        return vacio, vacio
+    cortes = np.flatnonzero(np.r_[True, canasta[1:] != canasta[:-1]])
+    tamanos = np.diff(np.r_[cortes, canasta.size])
+    tamano_de = np.repeat(tamanos, tamanos)   # tamaño de la canasta de cada elemento
+    inicio_de = np.repeat(cortes, tamanos)    # posición donde empieza su canasta
+
+    izquierda = np.repeat(np.arange(canasta.size), tamano_de)
+    # desplazamiento 0..tamaño-1 dentro de la canasta para cada par generado
+    desplazamiento = np.arange(izquierda.size) - np.repeat(np.cumsum(tamano_de) - tamano_de, tamano_de)
+    derecha = np.repeat(inicio_de, tamano_de) + desplazamiento
+    distintos = izquierda != derecha
+    return item[izquierda[distintos]], item[derecha[distintos]]
+
+
+def contar_pares(a, b):
+    """Conteos dispersos de (a, b): devuelve (a_unicos, b_unicos, conteo)"""
+    if a.size == 0:
+        return a, b, np.zeros(0, dtype=np.int64)
+    base = int(max(a.max(), b.max())) + 1
+    claves, conteo = np.unique(a * base + b, return_counts=True)
+    return claves // base, claves % base, conteo
+
+
+def puntuar(conteo_ab, conteo_a, conteo_b, total: int):
+    """Lift = P(a,b) / (P(a) P(b)) y Jaccard = |a∩b| / |a∪b|"""
+    conteo_ab = np.asarray(conteo_ab, dtype=np.float64)
+    conteo_a = np.asarray(conteo_a, dtype=np.float64)
+    conteo_b = np.asarray(conteo_b, dtype=np.float64)
+    lift = np.divide(conteo_ab * total, conteo_a * conteo_b, out=np.zeros_like(conteo_ab), where=(conteo_a * conteo_b) > 0)
+    union = conteo_a + conteo_b - conteo_ab
+    jaccard = np.divide(conteo_ab, union, out=np.zeros_like(conteo_ab), where=union > 0)
+    return lift, jaccard
+
+
+def top_k(origen, puntuacion, k: int):
+    """Índices de los k vecinos con mayor puntuación de cada origen y su posición (1..k)"""
+    orden = np.lexsort((-puntuacion, origen))
+    origen_ordenado = origen[orden]
+    cortes = np.flatnonzero(np.r_[True, origen_ordenado[1:] != origen_ordenado[:-1]])
+    posicion = np.arange(orden.size) - np.repeat(cortes, np.diff(np.r_[cortes, orden.size])) + 1
+    elegidos = posicion <= k
+    return orden[elegidos], posicion[elegidos]
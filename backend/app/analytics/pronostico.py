@@ -0,0 +1,74 @@
+"""
+Pronóstico de demanda diaria por producto (modelo multiplicativo).
+
+La historia se convierte en un tensor H[tipo_evento, producto, día] de
+unidades comprometidas (arreglo de diferencias + cumsum). Para cada tipo de
+evento se estiman, agregando todos los productos, un factor por mes del año
+(temporada) y uno por día de la semana; el nivel de cada (tipo, producto) es
+el promedio desestacionalizado con más peso en los días recientes. El
+pronóstico de un día es la suma sobre tipos de nivel × factor_mes ×
+factor_dia_semana, calculado para todos los productos con un producto de
+matrices.
+"""
+import numpy as np
+
+
+def meses_y_dias_semana(dias: np.ndarray):
+    """Mes (0-11) y día de la semana (0 = lunes) de cada fecha datetime64[D]"""
+    dias = np.asarray(dias, dtype="datetime64[D]")
+    meses = dias.astype("datetime64[M]").astype(np.int64) % 12
+    dias_semana = (dias.astype(np.int64) + 3) % 7  # 1970-01-01 fue jueves
+    return meses, dias_semana
+
+
+def tensor_demanda(tipo, producto, inicio, fin, cantidad, n_tipos: int, n_productos: int, n_dias: int) -> np.ndarray:
+    """
+    H[tipo, producto, día] con las unidades en uso cada día. `inicio` y `fin`
+    son índices de día (inclusive) ya recortados a [0, n_dias - 1].
+    """
+    diferencias = np.zeros((n_tipos, n_productos, n_dias + 1), dtype=np.float64)
+    np.add.at(diferencias, (tipo, producto, inicio), cantidad)
+    np.add.at(diferencias, (tipo, producto, fin + 1), -np.asarray(cantidad, dtype=np.float64))
+    return np.cumsum(diferencias, axis=2)[:, :, :n_dias]
+
+
+def _factores(totales: np.ndarray, categorias: np.ndarray, n_categorias: int, suavizado: float) -> np.ndarray:
+    """
+    Factor multiplicativo por categoría (mes o día de la semana) y tipo:
+    promedio de la categoría / promedio general, encogido hacia 1 con
+    `suavizado` días de peso para que las categorías con poca historia no
+    se disparen.
+    """
+    n_tipos = totales.shape[0]
+    conteo = np.bincount(categorias, minlength=n_categorias).astype(np.float64)
+    suma = np.zeros((n_tipos, n_categorias))
+    np.add.at(suma, (slice(None), categorias), totales)
+    promedio = totales.mean(axis=1, keepdims=True)
+    crudo = np.divide(suma, conteo * promedio, out=np.ones_like(suma), where=(conteo * promedio) > 0)
+    return (crudo * conteo + suavizado) / (conteo + suavizado)
+
+
+def ajustar(H: np.ndarray, dias: np.ndarray, vida_media: float = 90.0, suavizado: float = 14.0):
+    """
+    Estimar (niveles[tipo, producto], factor_mes[tipo, 12], factor_semana[tipo, 7])
+    a partir del tensor de historia y sus fechas.
+    """
+    meses, dias_semana = meses_y_dias_semana(dias)
+    totales = H.sum(axis=1)  # [tipo, día], todos los productos juntos
+    factor_mes = _factores(totales, meses, 12, suavizado)
+    desestacionalizado = totales / factor_mes[:, meses]
+    factor_semana = _factores(desestacionalizado, dias_semana, 7, suavizado)
+
+    # Nivel: promedio ponderado (más peso a lo reciente) de la demanda sin estacionalidad
+    estacionalidad = factor_mes[:, meses] * factor_semana[:, dias_semana]  # [tipo, día]
+    edad = np.arange(H.shape[2])[::-1]
+    pesos = 0.5 ** (edad / vida_media)
+    niveles = (H / estacionalidad[:, None, :]) @ pesos / pesos.sum()
+    return niveles, factor_mes, factor_semana
+
+
+def pronosticar(niveles: np.ndarray, factor_mes: np.ndarray, factor_semana: np.ndarray, dias_futuros: np.ndarray) -> np.ndarray:
+    """Demanda esperada [producto, día futuro] sumando todos los tipos de evento"""
+    meses, dias_semana = meses_y_dias_semana(dias_futuros)
+    estacionalidad = factor_mes[:, meses] * factor_semana[:, dias_semana]  # [tipo, día]
+    return niveles.T @ estacionalidad
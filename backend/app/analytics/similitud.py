@@ -0,0 +1,102 @@
+"""
+Similitud entre productos a partir de su texto y especificaciones.
+
+Cada producto se convierte en una bolsa de rasgos: palabras del nombre y la
+descripción, pares clave=valor de `especificaciones` y su categoría. Los
+rasgos se asignan a columnas con un hash estable (crc32) en vez de un
+vocabulario, se ponderan con TF-IDF (tf sublineal) y cada fila se normaliza
+a norma 1, así la similitud coseno con todos los productos es un solo
+producto matriz-vector.
+"""
+import json
+import re
+import unicodedata
+import zlib
+import numpy as np
+
+_PALABRA = re.compile(r"[a-z0-9]+")
+
+# Palabras sin contenido que solo agregarían ruido a la similitud
+PALABRAS_VACIAS = {
+    "de", "la", "el", "los", "las", "y", "o", "en", "con", "para", "por", "un", "una",
+    "del", "al", "se", "que", "sin", "su", "sus", "es", "a", "e", "x", "cm", "mts",
+}
+
+# El nombre describe mejor al producto que la descripción libre
+PESO_NOMBRE = 2
+
+
+def normalizar(texto) -> str:
+    """Minúsculas y sin acentos"""
+    texto = unicodedata.normalize("NFKD", str(texto).lower())
+    return "".join(c for c in texto if not unicodedata.combining(c))
+
+
+def palabras(texto) -> list:
+    if not texto:
+        return []
+    return [p for p in _PALABRA.findall(normalizar(texto)) if len(p) > 1 and p not in PALABRAS_VACIAS]
+
+
+def _especificaciones(especificaciones) -> dict:
+    if isinstance(especificaciones, str):
+        try:
+            especificaciones = json.loads(especificaciones)
+        except ValueError:
+            return {"descripcion": especificaciones}
+    return especificaciones if isinstance(especificaciones, dict) else {}
+
+
+def rasgos(nombre, descripcion, especificaciones, categoria_id) -> list:
+    """Rasgos de un producto (con repeticiones, que cuentan como frecuencia)"""
+    lista = palabras(nombre) * PESO_NOMBRE + palabras(descripcion)
+    for clave, valor in _especificaciones(especificaciones).items():
+        clave = normalizar(clave)
+        if isinstance(valor, (dict, list)):
+            continue
+        if clave == "descripcion":
+            lista += palabras(valor)
+            continue
+        # El par completo distingue "color=blanco" de "blanco" en la descripción
+        lista.append(f"{clave}={normalizar(valor)}")
+        lista += palabras(valor)
+    lista.append(f"categoria={categoria_id}")
+    return lista
+
+
+def construir_matriz(documentos: list, dimension: int = 1024) -> np.ndarray:
+    """Matriz densa (productos × dimension) float32 TF-IDF con filas de norma 1"""
+    matriz = np.zeros((len(documentos), dimension), dtype=np.float32)
+    for fila, documento in enumerate(documentos):
+        if documento:
+            columnas = np.fromiter((zlib.crc32(r.encode()) % dimension for r in documento), dtype=np.int64)
+            np.add.at(matriz[fila], columnas, 1.0)
+
+    presentes = matriz > 0
+    matriz[presentes] = 1.0 + np.log(matriz[presentes])
+    frecuencia_documental = presentes.sum(axis=0)
+    idf = np.log((1.0 + len(documentos)) / (1.0 + frecuencia_documental)) + 1.0
+    matriz *= idf.astype(np.float32)
+
+    normas = np.linalg.norm(matriz, axis=1, keepdims=True)
+    np.divide(matriz, normas, out=matriz, where=normas > 0)
+    return matriz
+
+
+def mas_similares(matriz: np.ndarray, fila: int, k: int, candidatos: np.ndarray = None):
+    """
+    Las k filas con mayor similitud coseno a `fila` (sin incluirla).
+    candidatos es una máscara booleana opcional de filas elegibles.
+    Devuelve (filas, similitudes) ordenadas de mayor a menor.
+    """
+    similitud = matriz @ matriz[fila]
+    elegibles = np.ones(len(similitud), dtype=bool) if candidatos is None else candidatos.copy()
+    elegibles[fila] = False
+    similitud = np.where(elegibles & (similitud > 0), similitud, -np.inf)
+
+    k = min(k, int(np.isfinite(similitud).sum()))
+    if k == 0:
+        return np.array([], dtype=np.int64), np.array([], dtype=np.float32)
+    mejores = np.argpartition(-similitud, k - 1)[:k]
+    mejores = mejores[np.argsort(-similitud[mejores], kind="stable")]
+    return mejores, similitud[mejores]
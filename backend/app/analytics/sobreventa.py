@@ -0,0 +1,80 @@
+"""
+Demanda concurrente máxima y sobreventa por producto (sweep-line).
+
+Cada línea de renta aporta dos eventos: +cantidad el día de inicio y
+-cantidad el día siguiente al fin. Ordenando los eventos por (producto, día)
+con np.lexsort y acumulando con np.cumsum se obtiene la carga de cada
+producto en cada día en que cambia: O(n log n) para todos los productos a la
+vez. Los tramos con carga mayor a stock_total son ventanas de conflicto.
+"""
+import numpy as np
+
+UN_DIA = np.timedelta64(1, "D")
+
+
+def barrer(producto, inicio, fin, cantidad):
+    """
+    Carga comprometida por producto a lo largo del tiempo.
+
+    Devuelve (producto, dia, carga) con un registro por cada día en que la
+    carga cambia; la carga se mantiene hasta el siguiente registro del mismo
+    producto.
+    """
+    producto = np.asarray(producto, dtype=np.int64)
+    inicio = np.asarray(inicio, dtype="datetime64[D]")
+    fin = np.asarray(fin, dtype="datetime64[D]")
+    cantidad = np.asarray(cantidad, dtype=np.int64)
+
+    p = np.concatenate([producto, producto])
+    t = np.concatenate([inicio, fin + UN_DIA])
+    delta = np.concatenate([cantidad, -cantidad])
+    orden = np.lexsort((t, p))
+    p, t, delta = p[orden], t[orden], delta[orden]
+
+    # Suma acumulada reiniciada al comenzar cada producto
+    acumulado = np.cumsum(delta)
+    nuevo_producto = np.r_[True, p[1:] != p[:-1]]
+    grupo = np.cumsum(nuevo_producto) - 1
+    base = (acumulado - delta)[nuevo_producto][grupo]
+    carga = acumulado - base
+
+    # Con varios eventos el mismo día vale la carga después del último
+    ultimo_del_dia = np.r_[(p[1:] != p[:-1]) | (t[1:] != t[:-1]), True]
+    return p[ultimo_del_dia], t[ultimo_del_dia], carga[ultimo_del_dia]
+
+
+def ventanas_de_conflicto(p, t, carga, stock_por_producto: dict):
+    """
+    Agrupar los tramos con carga > stock en ventanas [desde, hasta] por
+    producto. Devuelve {producto_id: [(desde, hasta, pico, dia_pico), ...]}.
+    """
+    stock = np.array([stock_por_producto.get(int(x), 0) for x in p], dtype=np.int64)
+    excede = carga > stock
+    # El tramo i dura hasta el día anterior al siguiente cambio del mismo producto
+    mismo_siguiente = np.r_[p[1:] == p[:-1], False]
+    fin_tramo = np.where(mismo_siguiente, np.r_[t[1:], t[-1:]] - UN_DIA, t)
+
+    ventanas = {}
+    for i in np.flatnonzero(excede):
+        producto_id = int(p[i])
+        lista = ventanas.setdefault(producto_id, [])
+        if lista and lista[-1][1] + UN_DIA == t[i]:
+            desde, _, pico, dia_pico = lista[-1]
+            if carga[i] > pico:
+                pico, dia_pico = int(carga[i]), t[i]
+            lista[-1] = (desde, fin_tramo[i], pico, dia_pico)
+        else:
+            lista.append((t[i], fin_tramo[i], int(carga[i]), t[i]))
+    return ventanas
+
+
+def picos(p, t, carga):
+    """Carga máxima y primer día en que se alcanza, por producto: {producto_id: (pico, dia)}"""
+    resultado = {}
+    if p.size == 0:
+        return resultado
+    cortes = np.flatnonzero(np.r_[True, p[1:] != p[:-1]])
+    for inicio, fin in zip(cortes, np.r_[cortes[1:], p.size]):
+        i = inicio + int(np.argmax(carga[inicio:fin]))
+        resultado[int(p[i])] = (int(carga[i]), t[i])
+    return resultado
@@ -0,0 +1,107 @@
+"""
+Versiones asíncronas de los endpoints de lectura más usados.
+
+Se registran antes que las rutas síncronas cuando ASYNC_DB_ENABLED=True, por
+lo que atienden las mismas URLs con la misma forma de respuesta pero sin
+depender del threadpool de FastAPI (~40 hilos).
+"""
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from app.core.database import get_async_db
+from app.core.auth import get_current_user_async
+from app.models.models import Usuario
+from app.schemas.schemas import Categoria
+from app.schemas.solicitud_schemas import SolicitudListResponse
+from app.crud import async_crud, especificaciones_crud
+from app.api.v1.serializers import producto_to_dict, producto_con_categoria_to_dict, solicitud_resumen_to_dict
+
+router = APIRouter()
+
+# ========== ENDPOINTS DE CATEGORÍAS ==========
+@router.get("/categorias", response_model=List[Categoria])
+async def get_categorias(skip: int = 0, limit: int = 100, db: AsyncSession = Depends(get_async_db)):
+    """Obtener todas las categorías activas"""
+    try:
+        return await async_crud.obtener_categorias(db, skip=skip, limit=limit)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error al obtener categorías: {str(e)}")
+
+@router.get("/categorias/{categoria_id}", response_model=Categoria)
+async def get_categoria(categoria_id: int, db: AsyncSession = Depends(get_async_db)):
+    """Obtener categoría por ID"""
+    categoria = await async_crud.obtener_categoria(db, categoria_id)
+    if categoria is None:
+        raise HTTPException(status_code=404, detail="Categoría no encontrada")
+    return categoria
+
+# ========== ENDPOINTS DE PRODUCTOS ==========
+@router.get("/productos")
+async def get_productos(
+    skip: int = 0,
+    limit: int = 100,
+    spec: Optional[List[str]] = Query(None),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Obtener todos los productos disponibles, opcionalmente filtrados por especificaciones"""
+    try:
+        filtros = especificaciones_crud.parsear_filtros(spec)
+        await async_crud.validar_claves_especificacion(db, filtros)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    try:
+        productos = await async_crud.obtener_productos(db, skip=skip, limit=limit, filtros_especificaciones=filtros)
+        return [producto_to_dict(producto) for producto in productos]
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error al obtener productos: {str(e)}")
+
+@router.get("/productos/{producto_id}")
+async def get_producto(producto_id: int, db: AsyncSession = Depends(get_async_db)):
+    """Obtener producto por ID"""
+    producto = await async_crud.obtener_producto(db, producto_id)
+    if producto is None:
+        raise HTTPException(status_code=404, detail="Producto no encontrado")
+
+    result = producto_to_dict(producto)
+    result["categoria_nombre"] = producto.categoria.nombre if producto.categoria else None
+    return result
+
+@router.get("/productos/categoria/{categoria_id}")
+async def get_productos_por_categoria(categoria_id: int, skip: int = 0, limit: int = 100, db: AsyncSession = Depends(get_async_db)):
+    """Obtener productos por categoría"""
+    try:
+        productos = await async_crud.obtener_productos_por_categoria(db, categoria_id, skip=skip, limit=limit)
+        return [producto_to_dict(producto) for producto in productos]
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error al obtener productos por categoría: {str(e)}")
+
+@router.get("/productos-con-categoria")
+async def get_productos_con_categoria(skip: int = 0, limit: int = 100, db: AsyncSession = Depends(get_async_db)):
+    """Obtener productos con información de categoría para el frontend"""
+    try:
+        productos = await async_crud.obtener_productos_con_categoria(db, skip=skip, limit=limit)
+
+        result = [producto_con_categoria_to_dict(row) for row in productos]
+
+        return {
+            "productos": result,
+            "total": len(result)
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error al obtener productos con categoría: {str(e)}")
+
+# ========== ENDPOINTS DE SOLICITUDES ==========
+@router.get("/me/solicitudes", response_model=List[SolicitudListResponse])
+async def get_mis_solicitudes(
+    skip: int = 0,
+    limit: int = 100,
+    current_user: Usuario = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Obtener todas las solicitudes del usuario actual"""
+    try:
+        solicitudes = await async_crud.obtener_solicitudes_usuario(db, current_user.usuario_id, skip, limit)
+
+        return [solicitud_resumen_to_dict(sol) for sol in solicitudes]
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error al obtener solicitudes: {str(e)}")
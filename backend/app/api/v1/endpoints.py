@@ -1,72 +1,33 @@
-from fastapi import APIRouter, Depends, HTTPException, status, File, UploadFile, Form, Request
+from fastapi import APIRouter, Depends, HTTPException, status, File, UploadFile, Form, Request, Query, BackgroundTasks
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from typing import List
-from datetime import timedelta
-import base64
+from typing import List, Optional
+from datetime import timedelta, date, datetime
+import csv
+import io
 import json
-from app.core.database import get_db
+from app.core.database import get_db, get_read_db
 from app.core.auth import authenticate_user, authenticate_admin, create_access_token, get_current_user, get_current_admin
 from app.core.config import settings
 from app.schemas.schemas import (
     Categoria, Producto, ProductoConCategoria, Paquete,
     UsuarioCreate, UsuarioResponse, LoginRequest, LoginResponse, MessageResponse,
     AdministradorCreate, AdministradorResponse, AdminLoginResponse,
-    UsuarioUpdateProfile, UsuarioChangePassword
+    UsuarioUpdateProfile, UsuarioChangePassword, EspecificacionCategoriaBase,
+    ProductosAccionMasiva, PaquetesAccionMasiva
 )
 from app.models.models import Usuario, Administrador, Producto, Paquete
-from app.crud.crud import categorias_crud, productos_crud, usuarios_crud, administradores_crud, paquetes_crud
+from app.crud.crud import categorias_crud, productos_crud, usuarios_crud, paquetes_crud
+from app.crud import analytics_crud, recomendaciones_crud, especificaciones_crud, importacion_crud, operaciones_masivas_crud, exportacion_crud
+from app.core.cache import registrar_cache, invalidar_caches, recalcular_caches, estado_caches
+from app.core import request_metrics
+from app.api.v1.serializers import (
+    convert_image_to_base64, convert_especificaciones_to_string,
+    producto_to_dict, producto_con_categoria_to_dict, solicitud_resumen_to_dict
+)
 
 router = APIRouter()
 
-# Helper function para convertir imagen binaria a base64
-def convert_image_to_base64(imagen_dato):
-    """Convierte datos binarios de imagen a string base64 para el frontend"""
-    if imagen_dato and len(imagen_dato) > 0:
-        try:
-            # Convertir bytes a base64
-            base64_string = base64.b64encode(imagen_dato).decode('utf-8')
-            
-            # Detectar tipo de imagen basado en los primeros bytes (magic numbers)
-            if imagen_dato.startswith(b'\xff\xd8\xff'):
-                mime_type = "image/jpeg"
-            elif imagen_dato.startswith(b'\x89\x50\x4e\x47'):
-                mime_type = "image/png"
-            elif imagen_dato.startswith(b'\x47\x49\x46'):
-                mime_type = "image/gif"
-            elif imagen_dato.startswith(b'\x42\x4d'):
-                mime_type = "image/bmp"
-            else:
-                # Default a JPEG si no se puede detectar
-                mime_type = "image/jpeg"
-            
-            # Retornar como data URL
-            return f"data:{mime_type};base64,{base64_string}"
-        except Exception as e:
-            print(f"Error converting image to base64: {e}")
-            print(f"Image data type: {type(imagen_dato)}, length: {len(imagen_dato) if imagen_dato else 0}")
-            return None
-    return None
-
-# Helper function para convertir especificaciones JSON a string
-def convert_especificaciones_to_string(especificaciones_data):
-    """Convierte datos de especificaciones JSON a string para el frontend"""
-    if especificaciones_data is None:
-        return ""
-    
-    if isinstance(especificaciones_data, str):
-        return especificaciones_data
-    
-    if isinstance(especificaciones_data, dict):
-        # Si es un dict con estructura {"descripcion": "..."}, extraer la descripción
-        if "descripcion" in especificaciones_data:
-            return especificaciones_data["descripcion"]
-        # Si es un dict complejo, convertirlo a string JSON
-        import json
-        return json.dumps(especificaciones_data, ensure_ascii=False)
-    
-    # Para otros tipos, convertir a string
-    return str(especificaciones_data)
-
 # Helper function para manejar booleanos desde FormData
 def parse_form_boolean(value):
     """Convierte string de FormData a boolean"""
@@ -155,9 +116,65 @@ def debug_images(current_admin: Administrador = Depends(get_current_admin), db:
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error en debug: {str(e)}")
 
+# ========== ENDPOINTS DE DIAGNÓSTICO DE BASE DE DATOS ==========
+@router.get("/admin/db/pool")
+def get_pool_metrics(current_admin: Administrador = Depends(get_current_admin)):
+    """Estado del pool de conexiones y histogramas de espera/checkout (solo administradores)"""
+    from app.core.database import engine, replica_engines, async_engine
+    from app.core.pool_metrics import pool_status
+    from app.core.request_metrics import snapshot_totales
+
+    pools = {"primario": pool_status(engine)}
+    for i, replica in enumerate(replica_engines, start=1):
+        pools[f"replica_{i}"] = pool_status(replica)
+    if async_engine is not None:
+        pools["asincrono"] = pool_status(async_engine.sync_engine)
+
+    return {
+        "configuracion": {
+            "pool_size": settings.DB_POOL_SIZE,
+            "max_overflow": settings.DB_MAX_OVERFLOW,
+            "pool_timeout": settings.DB_POOL_TIMEOUT,
+            "pool_recycle": settings.DB_POOL_RECYCLE,
+            "pool_pre_ping": settings.DB_POOL_PRE_PING,
+            "max_conexiones_por_worker": settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW
+        },
+        "pools": pools,
+        "sesiones": snapshot_totales()
+    }
+
+@router.get("/admin/db/consultas-lentas")
+def get_consultas_lentas(
+    limit: int = Query(50, ge=1, le=1000),
+    current_admin: Administrador = Depends(get_current_admin)
+):
+    """Consultas más lentas que SLOW_QUERY_MS, con parámetros, endpoint y plan EXPLAIN (solo administradores)"""
+    from app.core.slow_queries import obtener_registros
+
+    registros = obtener_registros(limit)
+    return {
+        "umbral_ms": settings.SLOW_QUERY_MS,
+        "capacidad_buffer": settings.SLOW_QUERY_BUFFER,
+        "total": len(registros),
+        "consultas": registros
+    }
+
+@router.delete("/admin/db/consultas-lentas")
+def limpiar_consultas_lentas(current_admin: Administrador = Depends(get_current_admin)):
+    """Vaciar el buffer de consultas lentas (solo administradores)"""
+    from app.core.slow_queries import limpiar_registros
+
+    limpiar_registros()
+    return {"message": "Buffer de consultas lentas vaciado"}
+
+@router.get("/admin/cache")
+def get_estado_caches(current_admin: Administrador = Depends(get_current_admin)):
+    """Estado de las cachés en memoria: claves, antigüedad, aciertos y recálculos (solo administradores)"""
+    return estado_caches()
+
 # ========== ENDPOINTS DE CATEGORÍAS ==========
 @router.get("/categorias", response_model=List[Categoria])
-def get_categorias(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+def get_categorias(skip: int = 0, limit: int = 100, db: Session = Depends(get_read_db)):
     """Obtener todas las categorías activas"""
     try:
         categorias = categorias_crud.get_all(db, skip=skip, limit=limit)
@@ -166,150 +183,133 @@ def get_categorias(skip: int = 0, limit: int = 100, db: Session = Depends(get_db
         raise HTTPException(status_code=500, detail=f"Error al obtener categorías: {str(e)}")
 
 @router.get("/categorias/{categoria_id}", response_model=Categoria)
-def get_categoria(categoria_id: int, db: Session = Depends(get_db)):
+def get_categoria(categoria_id: int, db: Session = Depends(get_read_db)):
     """Obtener categoría por ID"""
     categoria = categorias_crud.get_by_id(db, categoria_id=categoria_id)
     if categoria is None:
         raise HTTPException(status_code=404, detail="Categoría no encontrada")
     return categoria
 
+@router.get("/categorias/{categoria_id}/especificaciones")
+def get_especificaciones_categoria(categoria_id: int, db: Session = Depends(get_read_db)):
+    """Especificaciones filtrables de una categoría con sus valores (texto) o rango (numéricas)"""
+    try:
+        return especificaciones_crud.facetas(db, categoria_id)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error al obtener especificaciones: {str(e)}")
+
 # ========== ENDPOINTS DE PRODUCTOS ==========
 @router.get("/productos")
-def get_productos(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    """Obtener todos los productos disponibles"""
+def get_productos(
+    skip: int = 0,
+    limit: int = 100,
+    spec: Optional[List[str]] = Query(None),
+    db: Session = Depends(get_read_db)
+):
+    """
+    Obtener todos los productos disponibles. `spec` filtra por
+    especificaciones declaradas en el esquema de la categoría y se puede
+    repetir: ?spec=material:madera&spec=asientos>=4
+    """
     try:
-        productos = productos_crud.get_all(db, skip=skip, limit=limit)
-        
-        # Convertir a dict para evitar problemas de validación
-        result = []
-        for producto in productos:
-            result.append({
-                "producto_id": producto.producto_id,
-                "categoria_id": producto.categoria_id,
-                "codigo_producto": producto.codigo_producto,
-                "nombre": producto.nombre,
-                "descripcion": producto.descripcion,
-                "precio_por_dia": float(producto.precio_por_dia),
-                "stock_total": producto.stock_total,
-                "stock_disponible": producto.stock_disponible,
-                "estado": producto.estado,
-                "especificaciones": convert_especificaciones_to_string(producto.especificaciones),
-                "dimensiones": producto.dimensiones,
-                "peso": float(producto.peso) if producto.peso else None,
-                "imagen_url": convert_image_to_base64(producto.imagen_dato),
-                "requiere_deposito": bool(producto.requiere_deposito),
-                "deposito_cantidad": float(producto.deposito_cantidad) if producto.deposito_cantidad else None,
-                "fecha_creacion": producto.fecha_creacion.isoformat() if producto.fecha_creacion else None,
-                "fecha_actualizacion": producto.fecha_actualizacion.isoformat() if producto.fecha_actualizacion else None
-            })
+        filtros = especificaciones_crud.parsear_filtros(spec)
+        especificaciones_crud.validar_claves(db, filtros)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    try:
+        productos = productos_crud.get_all(db, skip=skip, limit=limit, filtros_especificaciones=filtros)
         
-        return result
+        return [producto_to_dict(producto) for producto in productos]
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error al obtener productos: {str(e)}")
 
 @router.get("/productos/{producto_id}")
-def get_producto(producto_id: int, db: Session = Depends(get_db)):
+def get_producto(producto_id: int, db: Session = Depends(get_read_db)):
     """Obtener producto por ID"""
-    producto = productos_crud.get_by_id(db, producto_id=producto_id)
+    producto = productos_crud.get_by_id_con_categoria(db, producto_id=producto_id)
     if producto is None:
         raise HTTPException(status_code=404, detail="Producto no encontrado")
     
-    # Obtener nombre de categoría si existe
-    categoria_nombre = None
-    if producto.categoria:
-        categoria_nombre = producto.categoria.nombre
-    
-    # Debug: verificar imagen
-    print(f"\n🔍 DEBUG - Producto ID: {producto.producto_id}")
-    print(f"   Nombre: {producto.nombre}")
-    print(f"   Tiene imagen_dato: {producto.imagen_dato is not None}")
-    if producto.imagen_dato:
-        print(f"   Tamaño imagen: {len(producto.imagen_dato)} bytes")
-    
-    imagen_url = convert_image_to_base64(producto.imagen_dato)
-    print(f"   imagen_url generada: {imagen_url is not None}")
-    if imagen_url:
-        print(f"   Longitud imagen_url: {len(imagen_url)} caracteres\n")
-    
-    return {
-        "producto_id": producto.producto_id,
-        "categoria_id": producto.categoria_id,
-        "categoria_nombre": categoria_nombre,
-        "codigo_producto": producto.codigo_producto,
-        "nombre": producto.nombre,
-        "descripcion": producto.descripcion,
-        "precio_por_dia": float(producto.precio_por_dia),
-        "stock_total": producto.stock_total,
-        "stock_disponible": producto.stock_disponible,
-        "estado": producto.estado,
-        "especificaciones": convert_especificaciones_to_string(producto.especificaciones),
-        "dimensiones": producto.dimensiones,
-        "peso": float(producto.peso) if producto.peso else None,
-        "imagen_url": imagen_url,
-        "requiere_deposito": bool(producto.requiere_deposito),
-        "deposito_cantidad": float(producto.deposito_cantidad) if producto.deposito_cantidad else None,
-        "fecha_creacion": producto.fecha_creacion.isoformat() if producto.fecha_creacion else None,
-        "fecha_actualizacion": producto.fecha_actualizacion.isoformat() if producto.fecha_actualizacion else None
-    }
+    result = producto_to_dict(producto)
+    # Nombre de categoría (ya cargada con joinedload)
+    result["categoria_nombre"] = producto.categoria.nombre if producto.categoria else None
+    return result
+
+@router.get("/productos/{producto_id}/relacionados")
+def get_productos_relacionados(
+    producto_id: int,
+    limit: int = Query(10, ge=1, le=50),
+    db: Session = Depends(get_read_db)
+):
+    """Productos y paquetes que suelen rentarse junto con este producto (precalculados)"""
+    try:
+        return [
+            {
+                "tipo": fila.item_tipo,
+                "id": fila.item_id,
+                "nombre": fila.nombre,
+                "precio_por_dia": float(fila.precio_por_dia) if fila.precio_por_dia is not None else None,
+                "solicitudes_juntos": fila.conteo,
+                "lift": fila.lift,
+                "jaccard": fila.jaccard
+            }
+            for fila in recomendaciones_crud.obtener_relacionados(db, producto_id, limit)
+        ]
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error al obtener productos relacionados: {str(e)}")
+
+similitud_cache = registrar_cache(
+    "similitud", recomendaciones_crud.indice_similitud, settings.SIMILARES_INDICE_SEGUNDOS,
+    max_claves=1, precalcular=[{}]
+)
+
+@router.get("/productos/{producto_id}/similares")
+def get_productos_similares(
+    producto_id: int,
+    limit: int = Query(10, ge=1, le=50),
+    misma_categoria: bool = False,
+    fecha_inicio: Optional[date] = None,
+    fecha_fin: Optional[date] = None,
+    cantidad: int = Query(1, ge=1),
+    db: Session = Depends(get_read_db)
+):
+    """
+    Alternativas parecidas por nombre, descripción y especificaciones
+    (similitud coseno sobre un índice TF-IDF en memoria). Con fechas, solo
+    productos con al menos `cantidad` unidades libres en ese periodo.
+    """
+    if (fecha_inicio is None) != (fecha_fin is None):
+        raise HTTPException(status_code=400, detail="Indica fecha_inicio y fecha_fin, o ninguna")
+    if fecha_inicio and fecha_fin < fecha_inicio:
+        raise HTTPException(status_code=400, detail="La fecha de fin no puede ser anterior a la fecha de inicio")
+    try:
+        indice, _ = similitud_cache.obtener()
+        similares = recomendaciones_crud.productos_similares(
+            db, indice, producto_id, limit, misma_categoria, fecha_inicio, fecha_fin, cantidad
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error al obtener productos similares: {str(e)}")
+    if similares is None:
+        raise HTTPException(status_code=404, detail="Producto no encontrado")
+    return similares
 
 @router.get("/productos/categoria/{categoria_id}")
-def get_productos_por_categoria(categoria_id: int, skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+def get_productos_por_categoria(categoria_id: int, skip: int = 0, limit: int = 100, db: Session = Depends(get_read_db)):
     """Obtener productos por categoría"""
     try:
         productos = productos_crud.get_by_categoria(db, categoria_id=categoria_id, skip=skip, limit=limit)
         
-        # Convertir a dict
-        result = []
-        for producto in productos:
-            result.append({
-                "producto_id": producto.producto_id,
-                "categoria_id": producto.categoria_id,
-                "codigo_producto": producto.codigo_producto,
-                "nombre": producto.nombre,
-                "descripcion": producto.descripcion,
-                "precio_por_dia": float(producto.precio_por_dia),
-                "stock_total": producto.stock_total,
-                "stock_disponible": producto.stock_disponible,
-                "estado": producto.estado,
-                "especificaciones": convert_especificaciones_to_string(producto.especificaciones),
-                "dimensiones": producto.dimensiones,
-                "peso": float(producto.peso) if producto.peso else None,
-                "imagen_url": convert_image_to_base64(producto.imagen_dato),
-                "requiere_deposito": bool(producto.requiere_deposito),
-                "deposito_cantidad": float(producto.deposito_cantidad) if producto.deposito_cantidad else None,
-                "fecha_creacion": producto.fecha_creacion.isoformat() if producto.fecha_creacion else None,
-                "fecha_actualizacion": producto.fecha_actualizacion.isoformat() if producto.fecha_actualizacion else None
-            })
-        
-        return result
+        return [producto_to_dict(producto) for producto in productos]
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error al obtener productos por categoría: {str(e)}")
 
 @router.get("/productos-con-categoria")
-def get_productos_con_categoria(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+def get_productos_con_categoria(skip: int = 0, limit: int = 100, db: Session = Depends(get_read_db)):
     """Obtener productos con información de categoría para el frontend"""
     try:
         productos = productos_crud.get_productos_con_categoria(db, skip=skip, limit=limit)
         
-        # Convertir a formato JSON amigable
-        result = []
-        for row in productos:
-            result.append({
-                "producto_id": row[0],
-                "categoria_id": row[1],
-                "codigo_producto": row[2],
-                "nombre": row[3],
-                "descripcion": row[4],
-                "precio_por_dia": float(row[5]) if row[5] else 0.0,
-                "stock_total": row[6],
-                "stock_disponible": row[7],
-                "estado": row[8],
-                "imagen_url": convert_image_to_base64(row[9]),
-                "requiere_deposito": bool(row[10]),
-                "deposito_cantidad": float(row[11]) if row[11] else 0.0,
-                "categoria_nombre": row[12],
-                "categoria_descripcion": row[13]
-            })
+        result = [producto_con_categoria_to_dict(row) for row in productos]
         
         return {
             "productos": result,
@@ -459,40 +459,272 @@ def get_current_admin_info(current_admin: Administrador = Depends(get_current_ad
         fecha_actualizacion=current_admin.fecha_actualizacion
     )
 
+# Caché del dashboard: la recalcula un hilo de fondo (ver app.core.cache)
+dashboard_cache = registrar_cache("dashboard", analytics_crud.construir_dashboard, settings.DASHBOARD_CACHE_SEGUNDOS)
+
 @router.get("/admin/dashboard")
-def get_admin_dashboard(current_admin: Administrador = Depends(get_current_admin), db: Session = Depends(get_db)):
-    """Obtener datos para el dashboard de administrador"""
+def get_admin_dashboard(
+    dias: int = Query(90, ge=1, le=3650),
+    current_admin: Administrador = Depends(get_current_admin)
+):
+    """
+    Obtener datos para el dashboard de administrador. Se sirven desde la
+    caché en memoria que un hilo de fondo recalcula cada
+    DASHBOARD_CACHE_SEGUNDOS; generated_at indica cuándo se calcularon.
+    """
     try:
-        stats = administradores_crud.get_admin_stats(db)
-        
+        datos, generado_en = dashboard_cache.obtener(dias=dias)
+        return {**datos, "generated_at": generado_en.isoformat()}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error al obtener datos del dashboard: {str(e)}")
+
+# ========== ANALÍTICA (ADMIN) ==========
+@router.get("/admin/analytics/series")
+def get_serie_analitica(
+    metrica: str = Query("ingresos", description="ingresos, unidades, solicitudes o cobrado (pagos)"),
+    bucket: str = Query("mes", description="dia, semana o mes"),
+    desde: Optional[date] = None,
+    hasta: Optional[date] = None,
+    agrupar_por: str = Query("ninguno", description="ninguno, categoria, tipo_evento, producto, paquete (tipo_pago para cobrado)"),
+    top: int = Query(10, ge=0, le=100, description="Grupos con mayor total; el resto se suma en 'otros' (0 = todos)"),
+    current_admin: Administrador = Depends(get_current_admin),
+    db: Session = Depends(get_read_db)
+):
+    """
+    Serie de tiempo de ingresos/demanda leída de los rollups diarios.
+    Las solicitudes se cuentan por fecha de evento y los pagos por fecha de pago.
+    ingresos son los subtotales de línea antes de IVA y sin depósitos; sin
+    agrupar (y por tipo_evento) incluyen productos y paquetes, por producto o
+    categoría solo productos y por paquete solo paquetes.
+    """
+    from app.analytics import series
+
+    if metrica not in analytics_crud.METRICAS_SERIE:
+        raise HTTPException(status_code=400, detail=f"Métrica inválida; usa: {', '.join(analytics_crud.METRICAS_SERIE)}")
+    if bucket not in series.BUCKETS:
+        raise HTTPException(status_code=400, detail=f"Bucket inválido; usa: {', '.join(series.BUCKETS)}")
+    if agrupar_por not in analytics_crud.agrupaciones_validas(metrica):
+        raise HTTPException(
+            status_code=400,
+            detail=f"Agrupación inválida para {metrica}; usa: {', '.join(analytics_crud.agrupaciones_validas(metrica))}"
+        )
+    hasta = hasta or date.today()
+    desde = desde or hasta - timedelta(days=365)
+    if desde > hasta:
+        raise HTTPException(status_code=400, detail="'desde' debe ser anterior a 'hasta'")
+
+    try:
+        dias, grupos, valores = analytics_crud.datos_serie(db, metrica, agrupar_por, desde, hasta)
+        inicios, claves, matriz = series.agrupar_serie(dias, grupos, valores, desde, hasta, bucket)
+        claves, matriz, hay_otros = series.top_grupos(claves, matriz, top)
+        nombres = analytics_crud.nombres_grupos(db, agrupar_por, claves.tolist())
+
+        decimales = 2 if metrica in ("ingresos", "cobrado") else 0
+        etiquetas = claves.tolist() + (["otros"] if hay_otros else [])
         return {
-            "stats_generales": {
-                "total_productos": stats['stats_generales'][0] if stats['stats_generales'] else 0,
-                "total_categorias": stats['stats_generales'][1] if stats['stats_generales'] else 0,
-                "total_paquetes": stats['stats_generales'][2] if stats['stats_generales'] else 0,
-                "total_usuarios": stats['stats_generales'][3] if stats['stats_generales'] else 0,
-                "total_pedidos": stats['stats_generales'][4] if stats['stats_generales'] else 0
-            },
-            "productos_populares": [
+            "metrica": metrica,
+            "bucket": bucket,
+            "agrupar_por": agrupar_por,
+            "desde": desde.isoformat(),
+            "hasta": hasta.isoformat(),
+            "periodos": [str(inicio) for inicio in inicios],
+            "series": [
                 {
-                    "producto_id": row[0],
-                    "nombre": row[1],
-                    "categoria_id": row[2],
-                    "categoria_nombre": row[3],
-                    "veces_pedido": row[4]
-                } for row in stats['productos_populares']
+                    "grupo": grupo,
+                    "nombre": nombres.get(grupo, grupo),
+                    "valores": series.como_lista(fila, decimales),
+                    "total": series.como_lista(fila.sum(), decimales)
+                } for grupo, fila in zip(etiquetas, matriz)
             ],
-            "categorias_populares": [
-                {
-                    "categoria_id": row[0],
-                    "nombre": row[1],
-                    "total_productos": row[2],
-                    "total_pedidos": row[3]
-                } for row in stats['categorias_populares']
-            ]
+            "total": series.como_lista(matriz.sum(), decimales)
         }
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error al obtener datos del dashboard: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error al obtener la serie: {str(e)}")
+
+# Reporte de utilización: se recalcula en segundo plano por cada periodo consultado
+utilizacion_cache = registrar_cache("utilizacion", analytics_crud.reporte_utilizacion, settings.UTILIZACION_CACHE_SEGUNDOS)
+
+def _periodo_utilizacion(desde: Optional[date], hasta: Optional[date]):
+    hasta = hasta or date.today()
+    desde = desde or hasta - timedelta(days=89)
+    if desde > hasta:
+        raise HTTPException(status_code=400, detail="'desde' debe ser anterior a 'hasta'")
+    return desde, hasta
+
+@router.get("/admin/analytics/utilizacion")
+def get_utilizacion_productos(
+    desde: Optional[date] = None,
+    hasta: Optional[date] = None,
+    current_admin: Administrador = Depends(get_current_admin)
+):
+    """
+    Utilización por producto (unidades × días rentados / unidades × días en
+    propiedad) en el periodo; por defecto los últimos 90 días.
+    """
+    desde, hasta = _periodo_utilizacion(desde, hasta)
+    try:
+        productos, generado_en = utilizacion_cache.obtener(desde=desde, hasta=hasta)
+        return {
+            "desde": desde.isoformat(),
+            "hasta": hasta.isoformat(),
+            "generated_at": generado_en.isoformat(),
+            "total": len(productos),
+            "productos": productos
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error al obtener la utilización: {str(e)}")
+
+@router.get("/admin/analytics/utilizacion.csv")
+def exportar_utilizacion_productos(
+    desde: Optional[date] = None,
+    hasta: Optional[date] = None,
+    current_admin: Administrador = Depends(get_current_admin)
+):
+    """Mismo reporte de utilización como CSV, enviado por bloques"""
+    desde, hasta = _periodo_utilizacion(desde, hasta)
+    try:
+        productos, _ = utilizacion_cache.obtener(desde=desde, hasta=hasta)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error al obtener la utilización: {str(e)}")
+
+    def _filas_csv(lote: int = 500):
+        buffer = io.StringIO()
+        escritor = csv.DictWriter(buffer, fieldnames=analytics_crud.COLUMNAS_UTILIZACION)
+        escritor.writeheader()
+        for inicio in range(0, len(productos), lote):
+            escritor.writerows(productos[inicio:inicio + lote])
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+        if buffer.tell():
+            yield buffer.getvalue()
+
+    return StreamingResponse(
+        _filas_csv(),
+        media_type="text/csv",
+        headers={"Content-Disposition": f'attachment; filename="utilizacion_{desde}_{hasta}.csv"'}
+    )
+
+# Detector de sobreventa: corre al arrancar y cada SOBREVENTA_INTERVALO_SEGUNDOS
+sobreventa_cache = registrar_cache(
+    "sobreventa", analytics_crud.detectar_sobreventa, settings.SOBREVENTA_INTERVALO_SEGUNDOS,
+    precalcular=[{"dias": settings.SOBREVENTA_DIAS, "solo_conflictos": True}]
+)
+
+@router.get("/admin/analytics/sobreventa")
+def get_sobreventa(
+    dias: int = Query(settings.SOBREVENTA_DIAS, ge=1, le=730),
+    solo_conflictos: bool = True,
+    current_admin: Administrador = Depends(get_current_admin)
+):
+    """
+    Pico de unidades comprometidas (solicitudes pendientes, aprobadas y en
+    proceso) por producto en los próximos `dias` días, con las ventanas en
+    que se supera stock_total y los numero_solicitud que lo provocan.
+    """
+    try:
+        resultado, generado_en = sobreventa_cache.obtener(dias=dias, solo_conflictos=solo_conflictos)
+        return {**resultado, "generated_at": generado_en.isoformat()}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error al detectar sobreventa: {str(e)}")
+
+@router.get("/admin/analytics/pronostico")
+def get_pronostico_demanda(
+    desde: Optional[date] = None,
+    hasta: Optional[date] = None,
+    producto_id: Optional[int] = None,
+    solo_faltantes: bool = False,
+    current_admin: Administrador = Depends(get_current_admin),
+    db: Session = Depends(get_read_db)
+):
+    """
+    Demanda diaria pronosticada por producto (la genera pronosticar_demanda.py),
+    con el pico esperado y los días en que supera stock_total.
+    Por defecto, las próximas 4 semanas.
+    """
+    desde = desde or date.today()
+    hasta = hasta or desde + timedelta(weeks=4)
+    if desde > hasta:
+        raise HTTPException(status_code=400, detail="'desde' debe ser anterior a 'hasta'")
+    try:
+        productos = analytics_crud.obtener_pronostico(db, desde, hasta, producto_id, solo_faltantes)
+        return {
+            "desde": desde.isoformat(),
+            "hasta": hasta.isoformat(),
+            "total": len(productos),
+            "productos": productos
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error al obtener el pronóstico: {str(e)}")
+
+@router.get("/admin/analytics/capacidad")
+def get_recomendaciones_stock(
+    solo_insuficientes: bool = False,
+    skip: int = 0,
+    limit: int = Query(100, ge=1, le=1000),
+    current_admin: Administrador = Depends(get_current_admin),
+    db: Session = Depends(get_read_db)
+):
+    """
+    stock_total recomendado por producto según la simulación Monte Carlo de
+    planificar_capacidad.py, con la probabilidad de faltante del stock actual.
+    """
+    try:
+        filas = analytics_crud.obtener_recomendaciones_stock(db, solo_insuficientes, skip=skip, limit=limit)
+        return [
+            {
+                "producto_id": recomendacion.producto_id,
+                "codigo_producto": codigo,
+                "nombre": nombre,
+                "stock_actual": recomendacion.stock_actual,
+                "stock_recomendado": recomendacion.stock_recomendado,
+                "diferencia": recomendacion.stock_recomendado - recomendacion.stock_actual,
+                "nivel_servicio": recomendacion.nivel_servicio,
+                "prob_faltante_actual": recomendacion.prob_faltante_actual,
+                "pico_p50": recomendacion.pico_p50,
+                "pico_p95": recomendacion.pico_p95,
+                "curva": recomendacion.curva,
+                "escenarios": recomendacion.escenarios,
+                "horizonte_dias": recomendacion.horizonte_dias,
+                "generado_en": recomendacion.generado_en.isoformat()
+            } for recomendacion, codigo, nombre in filas
+        ]
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error al obtener recomendaciones de stock: {str(e)}")
+
+# ========== EXPORTACIONES (ADMIN) ==========
+@router.get("/admin/exportar/{tabla}")
+def exportar_tabla(
+    tabla: str,
+    formato: str = Query("ndjson", description="ndjson o csv"),
+    gzip: bool = False,
+    incluir_imagenes: bool = False,
+    lote: int = Query(1000, ge=100, le=10000),
+    current_admin: Administrador = Depends(get_current_admin)
+):
+    """
+    Descargar una tabla completa (categorias, productos, paquetes, usuarios,
+    solicitudes o pagos) en streaming; la memoria no crece con el tamaño de
+    la tabla. Las imágenes se omiten salvo incluir_imagenes=true y las
+    contraseñas nunca se exportan (solo administradores).
+    """
+    if tabla not in exportacion_crud.EXPORTACIONES:
+        raise HTTPException(status_code=404, detail=f"Tabla no exportable: usa {', '.join(exportacion_crud.EXPORTACIONES)}")
+    if formato not in exportacion_crud.FORMATOS_EXPORTACION:
+        raise HTTPException(status_code=400, detail="El formato debe ser 'ndjson' o 'csv'")
+
+    nombre = f"{tabla}_{datetime.now():%Y%m%d_%H%M%S}.{formato}"
+    media_type = exportacion_crud.TIPOS_CONTENIDO[formato]
+    if gzip:
+        nombre += ".gz"
+        media_type = "application/gzip"
+    return StreamingResponse(
+        request_metrics.medir_streaming(
+            exportacion_crud.generar_exportacion(tabla, formato, incluir_imagenes, gzip, lote)
+        ),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{nombre}"', request_metrics.CABECERA_STREAMING: "1"}
+    )
 
 # ========== ENDPOINTS DE GESTIÓN DE USUARIOS (ADMIN) ==========
 @router.get("/admin/usuarios")
@@ -637,6 +869,7 @@ def create_producto(
             raise HTTPException(status_code=400, detail="Ya existe un producto con este código")
         
         nuevo_producto = productos_crud.create_producto(db, producto_data)
+        recalcular_caches("similitud")
         return {
             "producto_id": nuevo_producto.producto_id,
             "categoria_id": nuevo_producto.categoria_id,
@@ -659,6 +892,84 @@ def create_producto(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error al crear producto: {str(e)}")
 
+@router.post("/admin/productos/importar")
+def importar_productos(
+    archivo: UploadFile = File(...),
+    formato: Optional[str] = Form(None),
+    dry_run: bool = Form(False),
+    lote: int = Form(1000),
+    current_admin: Administrador = Depends(get_current_admin),
+    db: Session = Depends(get_db)
+):
+    """
+    Importar productos desde un archivo CSV (con encabezados) o NDJSON con las
+    mismas columnas que POST /admin/productos. Devuelve el reporte de errores
+    por fila; con dry_run solo se valida (solo administradores).
+    """
+    try:
+        formato = importacion_crud.formato_de_archivo(archivo.filename, formato)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not 1 <= lote <= 5000:
+        raise HTTPException(status_code=400, detail="El lote debe estar entre 1 y 5000")
+    try:
+        # Se decodifica línea a línea sin cargar todo el archivo en memoria
+        lineas = io.TextIOWrapper(archivo.file, encoding="utf-8-sig", newline="")
+        reporte = importacion_crud.importar_productos(
+            db, importacion_crud.leer_filas(lineas, formato), lote=lote, dry_run=dry_run
+        )
+        if reporte["insertados"]:
+            recalcular_caches("similitud")
+            invalidar_caches("dashboard")
+        return reporte
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="El archivo debe estar codificado en UTF-8")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error al importar productos: {str(e)}")
+
+@router.post("/admin/productos/masivo")
+def operacion_masiva_productos(
+    operacion: ProductosAccionMasiva,
+    current_admin: Administrador = Depends(get_current_admin),
+    db: Session = Depends(get_db)
+):
+    """
+    Aplicar una operación a muchos productos (por ids o por categoria_id) con
+    UPDATE/DELETE por conjunto (solo administradores):
+    precio (precio_por_dia o porcentaje), estado, categoria (nueva_categoria_id) o eliminar.
+    """
+    try:
+        masivo = operaciones_masivas_crud
+        seleccion = {"producto_ids": operacion.producto_ids, "categoria_id": operacion.categoria_id}
+        if operacion.accion == "precio":
+            resultado = {"actualizados": masivo.ajustar_precio_productos(
+                db, precio_por_dia=operacion.precio_por_dia, porcentaje=operacion.porcentaje, **seleccion
+            )}
+        elif operacion.accion == "estado":
+            resultado = {"actualizados": masivo.cambiar_estado_productos(db, operacion.estado, **seleccion)}
+        elif operacion.accion == "categoria":
+            if operacion.nueva_categoria_id is None:
+                raise HTTPException(status_code=400, detail="Indica nueva_categoria_id")
+            resultado = {"actualizados": masivo.mover_categoria_productos(db, operacion.nueva_categoria_id, **seleccion)}
+        elif operacion.accion == "eliminar":
+            if operacion.categoria_id is not None:
+                raise HTTPException(status_code=400, detail="La eliminación masiva solo admite producto_ids")
+            resultado = masivo.eliminar_productos(db, operacion.producto_ids)
+        else:
+            raise HTTPException(status_code=400, detail="La acción debe ser 'precio', 'estado', 'categoria' o 'eliminar'")
+        
+        # Una sola invalidación para toda la operación
+        if operacion.accion != "precio":
+            recalcular_caches("similitud")
+            invalidar_caches("dashboard")
+        return {"accion": operacion.accion, **resultado}
+    except HTTPException:
+        raise
+    except operaciones_masivas_crud.OperacionInvalida as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error al actualizar productos: {str(e)}")
+
 @router.put("/admin/productos/{producto_id}")
 def update_producto(
     producto_id: int,
@@ -690,6 +1001,9 @@ def update_producto(
             raise HTTPException(status_code=400, detail="El stock disponible no puede ser mayor al stock total")
         
         updated_producto = productos_crud.update_producto(db, producto_id, producto_data)
+        recalcular_caches("similitud")
+        if 'categoria_id' in producto_data:
+            invalidar_caches("dashboard")
         
         return {
             "producto_id": updated_producto.producto_id,
@@ -732,6 +1046,7 @@ def delete_producto(
         success = productos_crud.delete_producto_permanently(db, producto_id)
         if not success:
             raise HTTPException(status_code=500, detail="No se pudo eliminar el producto")
+        recalcular_caches("similitud")
         
         return {
             "message": f"Producto '{producto_nombre}' eliminado permanentemente",
@@ -810,6 +1125,23 @@ def update_categoria(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error al actualizar categoría: {str(e)}")
 
+@router.put("/admin/categorias/{categoria_id}/especificaciones")
+def update_especificaciones_categoria(
+    categoria_id: int,
+    especificaciones: List[EspecificacionCategoriaBase],
+    current_admin: Administrador = Depends(get_current_admin),
+    db: Session = Depends(get_db)
+):
+    """Reemplazar el esquema de especificaciones de una categoría y reindexar sus productos (solo administradores)"""
+    if categorias_crud.get_by_id(db, categoria_id) is None:
+        raise HTTPException(status_code=404, detail="Categoría no encontrada")
+    try:
+        return especificaciones_crud.guardar_esquema(db, categoria_id, [e.model_dump() for e in especificaciones])
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error al guardar especificaciones: {str(e)}")
+
 @router.delete("/admin/categorias/{categoria_id}")
 def delete_categoria(
     categoria_id: int,
@@ -830,7 +1162,7 @@ def delete_categoria(
 
 # ========== ENDPOINTS DE PAQUETES ==========
 @router.get("/paquetes/activos")
-def get_paquetes_activos(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+def get_paquetes_activos(skip: int = 0, limit: int = 100, db: Session = Depends(get_read_db)):
     """Obtener paquetes activos para el frontend público"""
     try:
         paquetes = paquetes_crud.get_all(db, skip=skip, limit=limit)
@@ -862,7 +1194,7 @@ def get_paquetes_activos(skip: int = 0, limit: int = 100, db: Session = Depends(
         raise HTTPException(status_code=500, detail=f"Error al obtener paquetes activos: {str(e)}")
 
 @router.get("/paquetes")
-def get_paquetes(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+def get_paquetes(skip: int = 0, limit: int = 100, db: Session = Depends(get_read_db)):
     """Obtener todos los paquetes activos"""
     try:
         paquetes = paquetes_crud.get_all(db, skip=skip, limit=limit)
@@ -888,8 +1220,40 @@ def get_paquetes(skip: int = 0, limit: int = 100, db: Session = Depends(get_db))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error al obtener paquetes: {str(e)}")
 
+paquetes_capacidad_cache = registrar_cache(
+    "paquetes_capacidad", recomendaciones_crud.indice_paquetes, settings.PAQUETES_INDICE_SEGUNDOS,
+    max_claves=1, precalcular=[{}]
+)
+
+@router.get("/paquetes/sugeridos")
+def get_paquetes_sugeridos(
+    personas: int = Query(..., ge=1, le=5000),
+    fecha_inicio: date = Query(...),
+    fecha_fin: date = Query(...),
+    limite: int = Query(5, ge=1, le=20),
+    db: Session = Depends(get_read_db)
+):
+    """
+    Paquetes o combinaciones de paquetes que cubren el número de invitados al
+    menor precio, solo con paquetes libres en esas fechas. El índice de
+    capacidad vive en memoria y se reconstruye al modificar paquetes.
+    """
+    if fecha_fin < fecha_inicio:
+        raise HTTPException(status_code=400, detail="La fecha de fin no puede ser anterior a la fecha de inicio")
+    try:
+        indice, generado_en = paquetes_capacidad_cache.obtener()
+        return {
+            "personas": personas,
+            "fecha_inicio": fecha_inicio.isoformat(),
+            "fecha_fin": fecha_fin.isoformat(),
+            "sugerencias": recomendaciones_crud.sugerir_paquetes(db, indice, personas, fecha_inicio, fecha_fin, limite),
+            "indice_generado_en": generado_en.isoformat()
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error al sugerir paquetes: {str(e)}")
+
 @router.get("/paquetes/{paquete_id}")
-def get_paquete(paquete_id: int, db: Session = Depends(get_db)):
+def get_paquete(paquete_id: int, db: Session = Depends(get_read_db)):
     """Obtener paquete por ID"""
     paquete = paquetes_crud.get_by_id(db, paquete_id=paquete_id)
     if paquete is None:
@@ -971,6 +1335,7 @@ def create_paquete(
             raise HTTPException(status_code=400, detail="Ya existe un paquete con este código")
         
         nuevo_paquete = paquetes_crud.create_paquete(db, paquete_data)
+        recalcular_caches("paquetes_capacidad")
         return {
             "paquete_id": nuevo_paquete.paquete_id,
             "codigo_paquete": nuevo_paquete.codigo_paquete,
@@ -987,6 +1352,37 @@ def create_paquete(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error al crear paquete: {str(e)}")
 
+@router.post("/admin/paquetes/masivo")
+def operacion_masiva_paquetes(
+    operacion: PaquetesAccionMasiva,
+    current_admin: Administrador = Depends(get_current_admin),
+    db: Session = Depends(get_db)
+):
+    """Ajustar precio, activar, desactivar o eliminar muchos paquetes con UPDATE/DELETE por conjunto (solo administradores)"""
+    try:
+        masivo = operaciones_masivas_crud
+        if operacion.accion == "precio":
+            resultado = {"actualizados": masivo.ajustar_precio_paquetes(
+                db, operacion.paquete_ids, operacion.precio_por_dia, operacion.porcentaje
+            )}
+        elif operacion.accion in ("activar", "desactivar"):
+            resultado = {"actualizados": masivo.activar_paquetes(db, operacion.paquete_ids, operacion.accion == "activar")}
+        elif operacion.accion == "eliminar":
+            resultado = masivo.eliminar_paquetes(db, operacion.paquete_ids)
+        else:
+            raise HTTPException(status_code=400, detail="La acción debe ser 'precio', 'activar', 'desactivar' o 'eliminar'")
+        recalcular_caches("paquetes_capacidad")
+        # Igual que en la operación masiva de productos: el precio no cambia el dashboard
+        if operacion.accion != "precio":
+            invalidar_caches("dashboard")
+        return {"accion": operacion.accion, **resultado}
+    except HTTPException:
+        raise
+    except operaciones_masivas_crud.OperacionInvalida as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error al actualizar paquetes: {str(e)}")
+
 @router.put("/admin/paquetes/{paquete_id}")
 def update_paquete(
     paquete_id: int,
@@ -1015,6 +1411,7 @@ def update_paquete(
                 raise HTTPException(status_code=400, detail="La capacidad de personas debe ser mayor a 0")
         
         updated_paquete = paquetes_crud.update_paquete(db, paquete_id, paquete_data)
+        recalcular_caches("paquetes_capacidad")
         
         return {
             "paquete_id": updated_paquete.paquete_id,
@@ -1051,6 +1448,7 @@ def delete_paquete(
         success = paquetes_crud.delete_paquete_permanently(db, paquete_id)
         if not success:
             raise HTTPException(status_code=500, detail="No se pudo eliminar el paquete")
+        recalcular_caches("paquetes_capacidad")
         
         return {
             "message": f"Paquete '{paquete_nombre}' eliminado permanentemente",
@@ -1144,6 +1542,7 @@ async def create_producto_form(
         }
         
         nuevo_producto = productos_crud.create_producto(db, producto_dict)
+        recalcular_caches("similitud")
         
         return {
             "message": "Producto creado exitosamente",
@@ -1263,6 +1662,9 @@ async def update_producto_form(
             updated_producto = productos_crud.update_producto(db, producto_id, update_data)
             if not updated_producto:
                 raise HTTPException(status_code=404, detail="No se pudo actualizar el producto")
+            recalcular_caches("similitud")
+            if categoria_id is not None:
+                invalidar_caches("dashboard")
         else:
             updated_producto = existing_product
         
@@ -1350,6 +1752,7 @@ async def create_paquete_form(
         }
         
         nuevo_paquete = paquetes_crud.create_paquete(db, paquete_dict)
+        recalcular_caches("paquetes_capacidad")
         
         return {
             "message": "Paquete creado exitosamente",
@@ -1441,6 +1844,7 @@ async def update_paquete_form(
         
         # Actualizar paquete
         updated_paquete = paquetes_crud.update_paquete(db, paquete_id, update_data)
+        recalcular_caches("paquetes_capacidad")
         
         return {
             "message": "Paquete actualizado exitosamente",
@@ -1653,10 +2057,11 @@ def change_my_password(
 
 
 # ========== ENDPOINTS DE SOLICITUDES (EVENTOS) ==========
-from app.models.solicitud_models import Solicitud, SolicitudProducto, SolicitudPaquete
+from app.models.solicitud_models import Solicitud, SolicitudProducto, SolicitudPaquete, EstadoSolicitud
 from app.schemas.solicitud_schemas import (
     SolicitudCreate, SolicitudUpdate, SolicitudResponse, SolicitudListResponse,
-    SolicitudProductoResponse, SolicitudPaqueteResponse
+    SolicitudProductoResponse, SolicitudPaqueteResponse,
+    SolicitudCambioEstado, SolicitudAccionMasiva
 )
 from app.crud import solicitud_crud
 
@@ -1665,29 +2070,13 @@ def get_mis_solicitudes(
     skip: int = 0,
     limit: int = 100,
     current_user: Usuario = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Obtener todas las solicitudes del usuario actual"""
     try:
         solicitudes = solicitud_crud.obtener_solicitudes_usuario(db, current_user.usuario_id, skip, limit)
         
-        result = []
-        for sol in solicitudes:
-            result.append({
-                "solicitud_id": sol.solicitud_id,
-                "numero_solicitud": sol.numero_solicitud,
-                "fecha_evento_inicio": sol.fecha_evento_inicio,
-                "fecha_evento_fin": sol.fecha_evento_fin,
-                "tipo_evento": sol.tipo_evento,
-                "num_personas_estimado": sol.num_personas_estimado,
-                "estado": sol.estado.value if hasattr(sol.estado, 'value') else sol.estado,
-                "total_cotizacion": float(sol.total_cotizacion),
-                "fecha_solicitud": sol.fecha_solicitud,
-                "total_productos": len(sol.solicitud_productos),
-                "total_paquetes": len(sol.solicitud_paquetes)
-            })
-        
-        return result
+        return [solicitud_resumen_to_dict(sol) for sol in solicitudes]
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error al obtener solicitudes: {str(e)}")
 
@@ -1695,7 +2084,7 @@ def get_mis_solicitudes(
 def get_mi_solicitud(
     solicitud_id: int,
     current_user: Usuario = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Obtener detalle de una solicitud específica del usuario"""
     try:
@@ -1780,11 +2169,9 @@ def crear_mi_solicitud(
         if solicitud_data.fecha_evento_fin < solicitud_data.fecha_evento_inicio:
             raise HTTPException(status_code=400, detail="La fecha de fin no puede ser anterior a la fecha de inicio")
         
-        # Crear solicitud
-        nueva_solicitud = solicitud_crud.crear_solicitud(db, solicitud_data, current_user.usuario_id)
-        
-        # Recargar con relaciones
-        solicitud = solicitud_crud.obtener_solicitud_por_id(db, nueva_solicitud.solicitud_id, current_user.usuario_id)
+        # Crear solicitud (regresa con sus productos y paquetes ya cargados)
+        solicitud = solicitud_crud.crear_solicitud(db, solicitud_data, current_user.usuario_id)
+        invalidar_caches("sobreventa")
         
         # Construir respuesta
         productos_response = []
@@ -1843,12 +2230,15 @@ def crear_mi_solicitud(
         }
     except HTTPException:
         raise
+    except solicitud_crud.ItemsNoEncontrados as e:
+        raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error al crear solicitud: {str(e)}")
 
 @router.put("/me/solicitudes/{solicitud_id}/cancelar")
 def cancelar_mi_solicitud(
     solicitud_id: int,
+    background_tasks: BackgroundTasks,
     current_user: Usuario = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -1859,6 +2249,8 @@ def cancelar_mi_solicitud(
         if not solicitud:
             raise HTTPException(status_code=404, detail="Solicitud no encontrada o no se puede cancelar")
         
+        invalidar_caches("dashboard", "sobreventa")
+        background_tasks.add_task(recomendaciones_crud.actualizar_relacionados_en_fondo)
         return {
             "message": "Solicitud cancelada exitosamente",
             "solicitud_id": solicitud.solicitud_id,
@@ -1875,12 +2267,23 @@ def cancelar_mi_solicitud(
 def get_todas_solicitudes(
     skip: int = 0,
     limit: int = 100,
+    estado: Optional[EstadoSolicitud] = None,
+    usuario_id: Optional[int] = None,
+    fecha_desde: Optional[date] = Query(None, description="Fecha de solicitud desde (inclusive)"),
+    fecha_hasta: Optional[date] = Query(None, description="Fecha de solicitud hasta (inclusive)"),
+    evento_desde: Optional[date] = Query(None, description="Inicio del evento desde (inclusive)"),
+    evento_hasta: Optional[date] = Query(None, description="Inicio del evento hasta (inclusive)"),
     current_admin: Administrador = Depends(get_current_admin),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
-    """Obtener todas las solicitudes (solo administradores)"""
+    """Obtener todas las solicitudes con filtros opcionales (solo administradores)"""
     try:
-        solicitudes = solicitud_crud.obtener_todas_solicitudes(db, skip, limit)
+        solicitudes = solicitud_crud.obtener_todas_solicitudes(
+            db, skip, limit,
+            estado=estado, usuario_id=usuario_id,
+            fecha_desde=fecha_desde, fecha_hasta=fecha_hasta,
+            evento_desde=evento_desde, evento_hasta=evento_hasta
+        )
         
         result = []
         for sol in solicitudes:
@@ -1895,14 +2298,173 @@ def get_todas_solicitudes(
                 "estado": sol.estado.value if hasattr(sol.estado, 'value') else sol.estado,
                 "total_cotizacion": float(sol.total_cotizacion),
                 "fecha_solicitud": sol.fecha_solicitud.isoformat() if sol.fecha_solicitud else None,
-                "total_productos": len(sol.solicitud_productos),
-                "total_paquetes": len(sol.solicitud_paquetes)
+                "total_productos": sol.total_productos,
+                "total_paquetes": sol.total_paquetes,
+                "total_pagado": float(sol.total_pagado),
+                "estado_pago": sol.estado_pago.value if hasattr(sol.estado_pago, 'value') else sol.estado_pago
             })
         
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error al obtener solicitudes: {str(e)}")
 
+def _resumen_cambio_estado(solicitud):
+    """Respuesta común de los endpoints de cambio de estado"""
+    return {
+        "solicitud_id": solicitud.solicitud_id,
+        "numero_solicitud": solicitud.numero_solicitud,
+        "estado": solicitud.estado.value if hasattr(solicitud.estado, 'value') else solicitud.estado,
+        "estado_pago": solicitud.estado_pago.value if hasattr(solicitud.estado_pago, 'value') else solicitud.estado_pago,
+        "fecha_respuesta": solicitud.fecha_respuesta,
+        "fecha_entrega": solicitud.fecha_entrega,
+        "fecha_devolucion": solicitud.fecha_devolucion,
+        "observaciones_admin": solicitud.observaciones_admin
+    }
+
+@router.put("/admin/solicitudes/{solicitud_id}/estado")
+def cambiar_estado_solicitud(
+    solicitud_id: int,
+    cambio: SolicitudCambioEstado,
+    background_tasks: BackgroundTasks,
+    current_admin: Administrador = Depends(get_current_admin),
+    db: Session = Depends(get_db)
+):
+    """Mover una solicitud por el flujo pendiente → aprobada → en_proceso → completada (solo administradores)"""
+    try:
+        try:
+            nuevo_estado = EstadoSolicitud(cambio.estado)
+        except ValueError:
+            raise HTTPException(status_code=400, detail=f"Estado inválido: {cambio.estado}")
+        
+        solicitud = solicitud_crud.cambiar_estado_solicitud(
+            db, solicitud_id, nuevo_estado, cambio.observaciones_admin, admin_id=current_admin.admin_id
+        )
+        if not solicitud:
+            raise HTTPException(status_code=404, detail="Solicitud no encontrada")
+        
+        # Los rollups y las reservas cambiaron: se recalculan en segundo plano
+        invalidar_caches("dashboard", "sobreventa")
+        background_tasks.add_task(recomendaciones_crud.actualizar_relacionados_en_fondo)
+        return _resumen_cambio_estado(solicitud)
+    except HTTPException:
+        raise
+    except solicitud_crud.TransicionInvalida as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except solicitud_crud.StockInsuficiente as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error al cambiar estado de la solicitud: {str(e)}")
+
+@router.post("/admin/solicitudes/masivo")
+def cambiar_estado_solicitudes_masivo(
+    accion: SolicitudAccionMasiva,
+    background_tasks: BackgroundTasks,
+    current_admin: Administrador = Depends(get_current_admin),
+    db: Session = Depends(get_db)
+):
+    """Aprobar o rechazar varias solicitudes pendientes en una sola transacción (solo administradores)"""
+    try:
+        estados = {"aprobar": EstadoSolicitud.aprobada, "rechazar": EstadoSolicitud.rechazada}
+        if accion.accion not in estados:
+            raise HTTPException(status_code=400, detail="La acción debe ser 'aprobar' o 'rechazar'")
+        
+        actualizadas, omitidas = solicitud_crud.cambiar_estado_masivo(
+            db, accion.solicitud_ids, estados[accion.accion], accion.observaciones_admin,
+            admin_id=current_admin.admin_id
+        )
+        if actualizadas:
+            invalidar_caches("dashboard", "sobreventa")
+            background_tasks.add_task(recomendaciones_crud.actualizar_relacionados_en_fondo)
+        return {
+            "message": f"{len(actualizadas)} solicitudes actualizadas",
+            "estado": estados[accion.accion].value,
+            "actualizadas": actualizadas,
+            "omitidas": omitidas
+        }
+    except HTTPException:
+        raise
+    except solicitud_crud.StockInsuficiente as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error al actualizar solicitudes: {str(e)}")
+
+def _linea_de_tiempo(eventos):
+    """Eventos y proyección del estado para las respuestas de historial"""
+    proyeccion = solicitud_crud.proyectar_estado(eventos)
+    return {
+        "eventos": [
+            {
+                "evento_id": ev.evento_id,
+                "estado_anterior": ev.estado_anterior.value if hasattr(ev.estado_anterior, 'value') else ev.estado_anterior,
+                "estado_nuevo": ev.estado_nuevo.value if hasattr(ev.estado_nuevo, 'value') else ev.estado_nuevo,
+                "fecha": ev.fecha,
+                "actor_tipo": ev.actor_tipo,
+                "actor_id": ev.actor_id,
+                "observaciones": ev.observaciones
+            } for ev in eventos
+        ],
+        "proyeccion": {
+            **proyeccion,
+            "estado": proyeccion["estado"].value if proyeccion["estado"] else None
+        }
+    }
+
+def _horas(segundos):
+    return round(segundos / 3600, 2) if segundos is not None else None
+
+@router.get("/admin/solicitudes/metricas/tiempo-aprobacion")
+def get_tiempo_aprobacion(
+    desde: Optional[date] = Query(None, description="Aprobadas desde (inclusive)"),
+    hasta: Optional[date] = Query(None, description="Aprobadas hasta (inclusive)"),
+    current_admin: Administrador = Depends(get_current_admin),
+    db: Session = Depends(get_read_db)
+):
+    """Percentiles del tiempo entre la creación y la aprobación de solicitudes (solo administradores)"""
+    try:
+        tiempos = solicitud_crud.tiempos_hasta_aprobacion(db, desde, hasta)
+        return {
+            "total_aprobadas": tiempos["total"],
+            "promedio_horas": _horas(tiempos["promedio"]),
+            "minimo_horas": _horas(tiempos["minimo"]),
+            "maximo_horas": _horas(tiempos["maximo"]),
+            "percentiles_horas": {clave: _horas(valor) for clave, valor in tiempos["percentiles"].items()}
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error al calcular tiempos de aprobación: {str(e)}")
+
+@router.get("/admin/solicitudes/{solicitud_id}/eventos")
+def get_eventos_solicitud(
+    solicitud_id: int,
+    current_admin: Administrador = Depends(get_current_admin),
+    db: Session = Depends(get_read_db)
+):
+    """Historial de estados de una solicitud y estado reconstruido a partir de él (solo administradores)"""
+    try:
+        eventos = solicitud_crud.obtener_eventos(db, solicitud_id)
+        if not eventos:
+            raise HTTPException(status_code=404, detail="Solicitud no encontrada o sin historial")
+        return {"solicitud_id": solicitud_id, **_linea_de_tiempo(eventos)}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error al obtener historial: {str(e)}")
+
+@router.get("/me/solicitudes/{solicitud_id}/eventos")
+def get_mis_eventos_solicitud(
+    solicitud_id: int,
+    current_user: Usuario = Depends(get_current_user),
+    db: Session = Depends(get_read_db)
+):
+    """Historial de estados de una solicitud del usuario actual"""
+    try:
+        if not solicitud_crud.solicitud_pertenece_a_usuario(db, solicitud_id, current_user.usuario_id):
+            raise HTTPException(status_code=404, detail="Solicitud no encontrada")
+        eventos = solicitud_crud.obtener_eventos(db, solicitud_id)
+        return {"solicitud_id": solicitud_id, **_linea_de_tiempo(eventos)}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error al obtener historial: {str(e)}")
 
 # ============================================
 # ENDPOINTS PARA PAGOS Y TARJETAS
@@ -2131,8 +2693,7 @@ def crear_pago(
     try:
         # Verificar que la solicitud pertenece al usuario
         from app.crud import solicitud_crud
-        solicitud = solicitud_crud.obtener_solicitud_por_id(db, pago_data.solicitud_id, current_user.usuario_id)
-        if not solicitud:
+        if not solicitud_crud.solicitud_pertenece_a_usuario(db, pago_data.solicitud_id, current_user.usuario_id):
             raise HTTPException(status_code=404, detail="Solicitud no encontrada")
         
         # Si el método es tarjeta, verificar que la tarjeta existe
@@ -0,0 +1,118 @@
+"""
+Serialización compartida por los routers síncrono y asíncrono.
+
+Ambos routers atienden las mismas URLs y deben devolver exactamente la misma
+forma de respuesta, así que los dicts para el frontend se construyen aquí.
+"""
+import base64
+import json
+
+# Helper function para convertir imagen binaria a base64
+def convert_image_to_base64(imagen_dato):
+    """Convierte datos binarios de imagen a string base64 para el frontend"""
+    if imagen_dato and len(imagen_dato) > 0:
+        try:
+            # Convertir bytes a base64
+            base64_string = base64.b64encode(imagen_dato).decode('utf-8')
+            
+            # Detectar tipo de imagen basado en los primeros bytes (magic numbers)
+            if imagen_dato.startswith(b'\xff\xd8\xff'):
+                mime_type = "image/jpeg"
+            elif imagen_dato.startswith(b'\x89\x50\x4e\x47'):
+                mime_type = "image/png"
+            elif imagen_dato.startswith(b'\x47\x49\x46'):
+                mime_type = "image/gif"
+            elif imagen_dato.startswith(b'\x42\x4d'):
+                mime_type = "image/bmp"
+            else:
+                # Default a JPEG si no se puede detectar
+                mime_type = "image/jpeg"
+            
+            # Retornar como data URL
+            return f"data:{mime_type};base64,{base64_string}"
+        except Exception as e:
+            print(f"Error converting image to base64: {e}")
+            print(f"Image data type: {type(imagen_dato)}, length: {len(imagen_dato) if imagen_dato else 0}")
+            return None
+    return None
+
+# Helper function para convertir especificaciones JSON a string
+def convert_especificaciones_to_string(especificaciones_data):
+    """Convierte datos de especificaciones JSON a string para el frontend"""
+    if especificaciones_data is None:
+        return ""
+    
+    if isinstance(especificaciones_data, str):
+        return especificaciones_data
+    
+    if isinstance(especificaciones_data, dict):
+        # Si es un dict con estructura {"descripcion": "..."}, extraer la descripción
+        if "descripcion" in especificaciones_data:
+            return especificaciones_data["descripcion"]
+        # Si es un dict complejo, convertirlo a string JSON
+        return json.dumps(especificaciones_data, ensure_ascii=False)
+    
+    # Para otros tipos, convertir a string
+    return str(especificaciones_data)
+
+# Helper para serializar un producto
+def producto_to_dict(producto):
+    """Convierte un Producto a dict para el frontend"""
+    return {
+        "producto_id": producto.producto_id,
+        "categoria_id": producto.categoria_id,
+        "codigo_producto": producto.codigo_producto,
+        "nombre": producto.nombre,
+        "descripcion": producto.descripcion,
+        "precio_por_dia": float(producto.precio_por_dia),
+        "stock_total": producto.stock_total,
+        "stock_disponible": producto.stock_disponible,
+        "estado": producto.estado,
+        "especificaciones": convert_especificaciones_to_string(producto.especificaciones),
+        "dimensiones": producto.dimensiones,
+        "peso": float(producto.peso) if producto.peso else None,
+        "imagen_url": convert_image_to_base64(producto.imagen_dato),
+        "requiere_deposito": bool(producto.requiere_deposito),
+        "deposito_cantidad": float(producto.deposito_cantidad) if producto.deposito_cantidad else None,
+        "fecha_creacion": producto.fecha_creacion.isoformat() if producto.fecha_creacion else None,
+        "fecha_actualizacion": producto.fecha_actualizacion.isoformat() if producto.fecha_actualizacion else None
+    }
+
+# Helper para serializar una fila de la consulta de productos con categoría
+def producto_con_categoria_to_dict(row):
+    """Convierte una fila (producto + categoría) a dict para el frontend"""
+    return {
+        "producto_id": row[0],
+        "categoria_id": row[1],
+        "codigo_producto": row[2],
+        "nombre": row[3],
+        "descripcion": row[4],
+        "precio_por_dia": float(row[5]) if row[5] else 0.0,
+        "stock_total": row[6],
+        "stock_disponible": row[7],
+        "estado": row[8],
+        "imagen_url": convert_image_to_base64(row[9]),
+        "requiere_deposito": bool(row[10]),
+        "deposito_cantidad": float(row[11]) if row[11] else 0.0,
+        "categoria_nombre": row[12],
+        "categoria_descripcion": row[13]
+    }
+
+# Helper para serializar una solicitud en el listado del usuario
+def solicitud_resumen_to_dict(sol):
+    """Convierte una Solicitud al formato de SolicitudListResponse"""
+    return {
+        "solicitud_id": sol.solicitud_id,
+        "numero_solicitud": sol.numero_solicitud,
+        "fecha_evento_inicio": sol.fecha_evento_inicio,
+        "fecha_evento_fin": sol.fecha_evento_fin,
+        "tipo_evento": sol.tipo_evento,
+        "num_personas_estimado": sol.num_personas_estimado,
+        "estado": sol.estado.value if hasattr(sol.estado, 'value') else sol.estado,
+        "total_cotizacion": float(sol.total_cotizacion),
+        "fecha_solicitud": sol.fecha_solicitud,
+        "total_productos": sol.total_productos,
+        "total_paquetes": sol.total_paquetes,
+        "total_pagado": float(sol.total_pagado),
+        "estado_pago": sol.estado_pago.value if hasattr(sol.estado_pago, 'value') else sol.estado_pago
+    }
@@ -7,9 +7,11 @@ from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import HTTPException, status, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from sqlalchemy import select
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.config import settings
-from app.core.database import get_db
+from app.core.database import get_db, get_async_db
 from app.models.models import Usuario, Administrador
 
 # Configuración para el hash de contraseñas
@@ -49,29 +51,53 @@ def verify_token(token: str) -> Optional[dict]:
     except JWTError:
         return None
 
-async def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
-) -> Usuario:
-    """Obtener usuario actual desde el token"""
-    credentials_exception = HTTPException(
+def credenciales_invalidas() -> HTTPException:
+    """Error 401 común a todas las dependencias de autenticación"""
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    
+
+def email_del_token(token: str, tipo: Optional[str] = None) -> str:
+    """
+    Decodifica el token y devuelve su email (sub). Con `tipo`, exige además
+    ese tipo de cuenta (los tokens sin tipo son de usuario). Lanza 401 si no
+    es válido; lo comparten las dependencias síncronas y asíncronas.
+    """
     try:
-        payload = jwt.decode(credentials.credentials, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        email: str = payload.get("sub")
-        if email is None:
-            raise credentials_exception
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
     except JWTError:
-        raise credentials_exception
-    
-    user = db.query(Usuario).filter(Usuario.email == email).first()
+        raise credenciales_invalidas()
+    email: str = payload.get("sub")
+    if email is None or (tipo is not None and payload.get("type", "user") != tipo):
+        raise credenciales_invalidas()
+    return email
+
+def consulta_usuario_por_email(email: str):
+    """SELECT del usuario por email, ejecutable con sesión síncrona o asíncrona"""
+    return select(Usuario).where(Usuario.email == email)
+
+async def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db)
+) -> Usuario:
+    """Obtener usuario actual desde el token"""
+    email = email_del_token(credentials.credentials)
+    user = db.execute(consulta_usuario_por_email(email)).scalars().first()
     if user is None:
-        raise credentials_exception
-    
+        raise credenciales_invalidas()
+    return user
+
+async def get_current_user_async(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_async_db)
+) -> Usuario:
+    """Obtener usuario actual desde el token usando la sesión asíncrona"""
+    email = email_del_token(credentials.credentials)
+    user = (await db.execute(consulta_usuario_por_email(email))).scalars().first()
+    if user is None:
+        raise credenciales_invalidas()
     return user
 
 def authenticate_user(db: Session, email: str, password: str) -> Optional[Usuario]:
@@ -142,24 +168,8 @@ async def get_current_admin(
     db: Session = Depends(get_db)
 ) -> Administrador:
     """Obtener administrador actual desde el token"""
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
-    
-    try:
-        payload = jwt.decode(credentials.credentials, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        email: str = payload.get("sub")
-        user_type: str = payload.get("type", "user")
-        
-        if email is None or user_type != "admin":
-            raise credentials_exception
-    except JWTError:
-        raise credentials_exception
-    
+    email = email_del_token(credentials.credentials, tipo="admin")
     admin = db.query(Administrador).filter(Administrador.email == email).first()
     if admin is None:
-        raise credentials_exception
-    
-    return admin
\ No newline at end of file
+        raise credenciales_invalidas()
+    return admin
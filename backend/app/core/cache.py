@@ -0,0 +1,230 @@
+"""
+Cachés en memoria para resultados costosos (agregaciones del dashboard).
+
+Cada CacheCalculada guarda el último valor bueno por clave de parámetros y
+un hilo de fondo lo recalcula cada `intervalo` segundos. Los requests nunca
+esperan un recálculo si ya hay un valor: se sirve el último aunque esté
+vencido (stale-while-revalidate) y, si nadie lo está recalculando, se
+dispara uno en segundo plano. Solo hay un cálculo en curso por clave
+(single-flight), así que varios administradores abriendo el dashboard a la
+vez no repiten la misma consulta. Las claves de `precalcular` se calculan al
+arrancar, así la caché funciona también como tarea programada.
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from app.core.database import SessionLocal
+
+logger = logging.getLogger("kabe.cache")
+
+
+class _Entrada:
+    """Valor de una clave y su estado de cálculo"""
+
+    def __init__(self):
+        self.valor = None
+        self.generado_en = None      # datetime del último cálculo exitoso
+        self.calculado_ts = 0.0      # time.monotonic() del último cálculo exitoso
+        self.vencida = False         # invalidada explícitamente
+        self.lock = threading.Lock() # single-flight: un cálculo a la vez
+        self.ultimo_error = None
+
+
+class CacheCalculada:
+    """
+    Resultado de `calcular(db, **parametros)` cacheado por parámetros.
+
+        dashboard_cache = CacheCalculada("dashboard", construir_dashboard, intervalo=60)
+        valor, generado_en = dashboard_cache.obtener(dias=90)
+    """
+
+    def __init__(self, nombre: str, calcular, intervalo: int, max_claves: int = 16, precalcular: list = None):
+        self.nombre = nombre
+        self.precalcular = precalcular or []  # parámetros que se calculan al arrancar, sin esperar un request
+        self.calcular = calcular
+        self.intervalo = intervalo
+        self.max_claves = max_claves
+        self._entradas = OrderedDict()
+        self._entradas_lock = threading.Lock()
+        self._detener = threading.Event()
+        self._hilo = None
+        self.calculos = 0
+        self.aciertos = 0
+        self.vencidos_servidos = 0
+
+    # ---------- cálculo ----------
+    def _entrada(self, clave) -> _Entrada:
+        with self._entradas_lock:
+            entrada = self._entradas.get(clave)
+            if entrada is None:
+                entrada = self._entradas[clave] = _Entrada()
+                # Las claves menos usadas salen primero
+                while len(self._entradas) > self.max_claves:
+                    self._entradas.popitem(last=False)
+            else:
+                self._entradas.move_to_end(clave)
+            return entrada
+
+    def _recalcular(self, clave, entrada: _Entrada):
+        """Ejecutar el cálculo con una sesión de solo lectura. Debe llamarse con entrada.lock tomado."""
+        db = SessionLocal(info={"solo_lectura": True})
+        try:
+            valor = self.calcular(db, **dict(clave))
+            entrada.valor = valor
+            entrada.generado_en = datetime.now()
+            entrada.calculado_ts = time.monotonic()
+            entrada.vencida = False
+            entrada.ultimo_error = None
+            self.calculos += 1
+        except Exception as e:
+            entrada.ultimo_error = str(e)
+            raise
+        finally:
+            db.close()
+
+    def _recalcular_en_fondo(self, clave, entrada: _Entrada):
+        try:
+            self._recalcular(clave, entrada)
+        except Exception as e:
+            logger.warning("No se pudo recalcular la caché %s %s: %s", self.nombre, dict(clave), e)
+        finally:
+            entrada.lock.release()
+
+    def _disparar_recalculo(self, clave, entrada: _Entrada):
+        """Lanzar un recálculo en segundo plano si no hay otro en curso"""
+        if entrada.lock.acquire(blocking=False):
+            threading.Thread(
+                target=self._recalcular_en_fondo, args=(clave, entrada),
+                name=f"cache-{self.nombre}", daemon=True
+            ).start()
+
+    def _esta_vencida(self, entrada: _Entrada) -> bool:
+        return entrada.vencida or time.monotonic() - entrada.calculado_ts > self.intervalo
+
+    # ---------- API ----------
+    def obtener(self, **parametros):
+        """
+        Devolver (valor, generado_en). Solo el primer request de una clave
+        espera el cálculo; los que llegan mientras tanto esperan ese mismo
+        resultado en vez de lanzar otra consulta.
+        """
+        clave = tuple(sorted(parametros.items()))
+        entrada = self._entrada(clave)
+
+        if entrada.valor is None:
+            with entrada.lock:
+                if entrada.valor is None:
+                    self._recalcular(clave, entrada)
+            return entrada.valor, entrada.generado_en
+
+        if self._esta_vencida(entrada):
+            self.vencidos_servidos += 1
+            self._disparar_recalculo(clave, entrada)
+        else:
+            self.aciertos += 1
+        return entrada.valor, entrada.generado_en
+
+    def invalidar(self):
+        """Marcar todas las claves como vencidas; se siguen sirviendo hasta que se recalculen"""
+        with self._entradas_lock:
+            for entrada in self._entradas.values():
+                entrada.vencida = True
+
+    def recalcular(self):
+        """Invalidar y lanzar ya el recálculo de las claves conocidas, sin esperar al siguiente request"""
+        with self._entradas_lock:
+            claves = list(self._entradas.items())
+        for clave, entrada in claves:
+            entrada.vencida = True
+            self._disparar_recalculo(clave, entrada)
+
+    def refrescar_todo(self):
+        """Recalcular las claves conocidas que estén vencidas (lo llama el hilo de fondo)"""
+        with self._entradas_lock:
+            claves = list(self._entradas.items())
+        for clave, entrada in claves:
+            if entrada.valor is not None and not self._esta_vencida(entrada):
+                continue
+            if entrada.lock.acquire(blocking=False):
+                self._recalcular_en_fondo(clave, entrada)
+
+    def iniciar(self):
+        """Arrancar el hilo que recalcula la caché cada `intervalo` segundos"""
+        if self._hilo is not None and self._hilo.is_alive():
+            return
+        self._detener.clear()
+
+        def _ciclo():
+            for parametros in self.precalcular:
+                clave = tuple(sorted(parametros.items()))
+                entrada = self._entrada(clave)
+                if entrada.lock.acquire(blocking=False):
+                    self._recalcular_en_fondo(clave, entrada)
+            while not self._detener.wait(self.intervalo):
+                self.refrescar_todo()
+
+        self._hilo = threading.Thread(target=_ciclo, name=f"cache-{self.nombre}-refresco", daemon=True)
+        self._hilo.start()
+
+    def detener(self):
+        self._detener.set()
+
+    def estado(self) -> dict:
+        with self._entradas_lock:
+            claves = list(self._entradas.items())
+        return {
+            "intervalo_segundos": self.intervalo,
+            "refresco_activo": self._hilo is not None and self._hilo.is_alive(),
+            "calculos": self.calculos,
+            "aciertos": self.aciertos,
+            "vencidos_servidos": self.vencidos_servidos,
+            "claves": [
+                {
+                    "parametros": dict(clave),
+                    "generado_en": entrada.generado_en.isoformat() if entrada.generado_en else None,
+                    "vencida": self._esta_vencida(entrada),
+                    "recalculando": entrada.lock.locked(),
+                    "ultimo_error": entrada.ultimo_error,
+                } for clave, entrada in claves
+            ],
+        }
+
+
+# ========== REGISTRO DE CACHÉS ==========
+_caches = {}
+
+
+def registrar_cache(nombre: str, calcular, intervalo: int, max_claves: int = 16, precalcular: list = None) -> CacheCalculada:
+    cache = CacheCalculada(nombre, calcular, intervalo, max_claves, precalcular)
+    _caches[nombre] = cache
+    return cache
+
+
+def invalidar_caches(*nombres: str):
+    """Vencer las cachés indicadas (todas si no se indica ninguna)"""
+    for nombre, cache in _caches.items():
+        if not nombres or nombre in nombres:
+            cache.invalidar()
+
+
+def recalcular_caches(*nombres: str):
+    """Recalcular en segundo plano las cachés indicadas (para índices pequeños que deben reflejar un cambio enseguida)"""
+    for nombre in nombres:
+        if nombre in _caches:
+            _caches[nombre].recalcular()
+
+
+def iniciar_refrescadores():
+    for cache in _caches.values():
+        cache.iniciar()
+
+
+def detener_refrescadores():
+    for cache in _caches.values():
+        cache.detener()
+
+
+def estado_caches() -> dict:
+    return {nombre: cache.estado() for nombre, cache in _caches.items()}
@@ -14,6 +14,50 @@ class Settings(BaseSettings):
     DB_PASSWORD: str = os.getenv("DB_PASSWORD", "password")
     DB_NAME: str = os.getenv("DB_NAME", "kabe_rental_system")
     
+    # Réplicas de lectura (URLs separadas por comas) y ventana de lectura-tras-escritura
+    DATABASE_REPLICA_URLS: str = os.getenv("DATABASE_REPLICA_URLS", "")
+    DB_REPLICA_STICKY_SECONDS: int = int(os.getenv("DB_REPLICA_STICKY_SECONDS", "10"))
+    
+    # Perfil del pool de conexiones (por proceso/worker)
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "10"))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+    DB_POOL_TIMEOUT: int = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+    DB_POOL_RECYCLE: int = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+    # True: ping antes de cada checkout (pesimista). False: confiar en recycle e invalidar al fallar (optimista)
+    DB_POOL_PRE_PING: bool = os.getenv("DB_POOL_PRE_PING", "True").lower() == "true"
+    # Log de cada sentencia SQL, independiente de DEBUG
+    DB_ECHO: bool = os.getenv("DB_ECHO", "False").lower() == "true"
+    # Avisar (posible N+1) cuando una misma sentencia se repite este número de veces en un request
+    DB_N1_UMBRAL: int = int(os.getenv("DB_N1_UMBRAL", "5"))
+    
+    # Log de consultas lentas: umbral, tamaño del buffer en memoria y archivo rotativo ("" = sin archivo)
+    SLOW_QUERY_MS: int = int(os.getenv("SLOW_QUERY_MS", "500"))
+    SLOW_QUERY_BUFFER: int = int(os.getenv("SLOW_QUERY_BUFFER", "200"))
+    SLOW_QUERY_EXPLAIN: bool = os.getenv("SLOW_QUERY_EXPLAIN", "True").lower() == "true"
+    SLOW_QUERY_LOG_FILE: str = os.getenv("SLOW_QUERY_LOG_FILE", "logs/slow_queries.log")
+    
+    # Cachés en memoria recalculadas en segundo plano (dashboard de administrador)
+    CACHE_REFRESCO_ACTIVO: bool = os.getenv("CACHE_REFRESCO_ACTIVO", "True").lower() == "true"
+    DASHBOARD_CACHE_SEGUNDOS: int = int(os.getenv("DASHBOARD_CACHE_SEGUNDOS", "60"))
+    UTILIZACION_CACHE_SEGUNDOS: int = int(os.getenv("UTILIZACION_CACHE_SEGUNDOS", "900"))
+    # Detector de sobreventa: cada cuánto se ejecuta y cuántos días hacia adelante revisa
+    SOBREVENTA_INTERVALO_SEGUNDOS: int = int(os.getenv("SOBREVENTA_INTERVALO_SEGUNDOS", "600"))
+    SOBREVENTA_DIAS: int = int(os.getenv("SOBREVENTA_DIAS", "90"))
+    
+    # Productos relacionados ("se rentan juntos"): vecinos por producto, métrica (lift o jaccard) y soporte mínimo
+    RELACIONADOS_TOP_K: int = int(os.getenv("RELACIONADOS_TOP_K", "10"))
+    RELACIONADOS_METRICA: str = os.getenv("RELACIONADOS_METRICA", "lift")
+    RELACIONADOS_MIN_SOPORTE: int = int(os.getenv("RELACIONADOS_MIN_SOPORTE", "2"))
+    # Índice de capacidad de paquetes para /paquetes/sugeridos (también se reconstruye al modificar paquetes)
+    PAQUETES_INDICE_SEGUNDOS: int = int(os.getenv("PAQUETES_INDICE_SEGUNDOS", "3600"))
+    # Índice TF-IDF de productos similares: columnas de la matriz (hashing) y cada cuánto se reconstruye
+    SIMILARES_DIMENSION: int = int(os.getenv("SIMILARES_DIMENSION", "1024"))
+    SIMILARES_INDICE_SEGUNDOS: int = int(os.getenv("SIMILARES_INDICE_SEGUNDOS", "3600"))
+    
+    # Motor asíncrono opcional (requiere aiomysql, o aiosqlite para pruebas locales)
+    ASYNC_DB_ENABLED: bool = os.getenv("ASYNC_DB_ENABLED", "False").lower() == "true"
+    ASYNC_DATABASE_URL: str = os.getenv("ASYNC_DATABASE_URL", "")
+    
     # Configuración de seguridad
     SECRET_KEY: str = os.getenv("SECRET_KEY", "tu_clave_secreta_muy_segura_aqui")
     ALGORITHM: str = os.getenv("ALGORITHM", "HS256")
@@ -52,6 +96,23 @@ class Settings(BaseSettings):
     VERSION: str = "1.0.0"
     DESCRIPTION: str = "API para sistema de renta de mobiliario para eventos"
 
+    @property
+    def replica_urls(self) -> List[str]:
+        """Lista de URLs de réplicas de lectura"""
+        return [url.strip() for url in self.DATABASE_REPLICA_URLS.split(",") if url.strip()]
+
+    @property
+    def async_database_url(self) -> str:
+        """URL del motor asíncrono; si no se define se deriva de DATABASE_URL"""
+        if self.ASYNC_DATABASE_URL:
+            return self.ASYNC_DATABASE_URL
+        url = self.DATABASE_URL
+        if url.startswith("mysql+pymysql://"):
+            return url.replace("mysql+pymysql://", "mysql+aiomysql://", 1)
+        if url.startswith("sqlite://"):
+            return url.replace("sqlite://", "sqlite+aiosqlite://", 1)
+        return url
+
     class Config:
         env_file = ".env"
         case_sensitive = True
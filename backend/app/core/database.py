@@ -1,26 +1,189 @@
+import hashlib
+import itertools
+import threading
+import time
+from fastapi import Request
 from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import sessionmaker, Session
 from app.core.config import settings
+from app.core.pool_metrics import TimedQueuePool
+from app.core import request_metrics, slow_queries
 
-# Crear el motor de la base de datos
-engine = create_engine(
-    settings.DATABASE_URL,
-    pool_pre_ping=True,
-    pool_recycle=300,
-    echo=settings.DEBUG
-)
+def _crear_engine(url: str):
+    """Crear un engine con el perfil de pool definido en Settings"""
+    return create_engine(
+        url,
+        poolclass=TimedQueuePool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        echo=settings.DB_ECHO
+    )
+
+# Crear el motor de la base de datos (primario: lecturas y escrituras)
+engine = _crear_engine(settings.DATABASE_URL)
+
+# Motores de las réplicas de lectura (vacío si no hay réplicas configuradas)
+replica_engines = [_crear_engine(url) for url in settings.replica_urls]
+
+for _engine in [engine] + replica_engines:
+    request_metrics.instrumentar_engine(_engine)
+    slow_queries.instrumentar_engine(_engine)
+
+_replicas_ciclo = itertools.cycle(replica_engines) if replica_engines else None
+_replicas_lock = threading.Lock()
+
+def _siguiente_replica():
+    """Elegir la siguiente réplica en round-robin"""
+    with _replicas_lock:
+        return next(_replicas_ciclo)
+
+class RoutingSession(Session):
+    """
+    Sesión que envía las lecturas a una réplica cuando se abre con
+    info={"solo_lectura": True}. Los flush (INSERT/UPDATE/DELETE) y las
+    sesiones normales siempre van al primario.
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if self._flushing or not self.info.get("solo_lectura") or not replica_engines:
+            return engine
+        # Fijar una réplica por sesión para tener una vista consistente
+        if "replica" not in self.info:
+            self.info["replica"] = _siguiente_replica()
+        return self.info["replica"]
 
 # Crear la sesión de la base de datos
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine, class_=RoutingSession)
+
+# Motor asíncrono opcional para endpoints de solo lectura.
+# Solo se crea si ASYNC_DB_ENABLED=True, así el driver async no es obligatorio.
+async_engine = None
+AsyncSessionLocal = None
+
+if settings.ASYNC_DB_ENABLED:
+    from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+    from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+    async_engine = create_async_engine(
+        settings.async_database_url,
+        poolclass=AsyncAdaptedQueuePool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        echo=settings.DB_ECHO
+    )
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+    request_metrics.instrumentar_engine(async_engine.sync_engine)
+    slow_queries.instrumentar_engine(async_engine.sync_engine, engine_explain=engine)
 
 # Base para los modelos
 Base = declarative_base()
 
+# ========== LECTURA-TRAS-ESCRITURA ==========
+# Tras una escritura de un cliente, sus lecturas van al primario durante
+# DB_REPLICA_STICKY_SECONDS para que vea sus propios cambios aunque las
+# réplicas tengan retraso. El registro es por proceso (por worker).
+_escrituras_recientes = {}
+_escrituras_lock = threading.Lock()
+
+def _clave_cliente(request: Request):
+    """Identificar al cliente por su token (o None si es anónimo)"""
+    authorization = request.headers.get("authorization")
+    if not authorization:
+        return None
+    return hashlib.sha1(authorization.encode("utf-8")).hexdigest()
+
+def registrar_escritura(request: Request):
+    """Marcar que el cliente acaba de escribir, para fijar sus lecturas al primario"""
+    if not replica_engines:
+        return
+    clave = _clave_cliente(request)
+    if clave is None:
+        return
+    ahora = time.monotonic()
+    with _escrituras_lock:
+        _escrituras_recientes[clave] = ahora + settings.DB_REPLICA_STICKY_SECONDS
+        # Purgar entradas vencidas para que el registro no crezca sin límite
+        if len(_escrituras_recientes) > 10000:
+            for k in [k for k, hasta in _escrituras_recientes.items() if hasta < ahora]:
+                del _escrituras_recientes[k]
+
+def requiere_primario(request: Request) -> bool:
+    """True si el cliente escribió hace menos de DB_REPLICA_STICKY_SECONDS"""
+    clave = _clave_cliente(request)
+    if clave is None:
+        return False
+    with _escrituras_lock:
+        hasta = _escrituras_recientes.get(clave)
+    return hasta is not None and hasta > time.monotonic()
+
+# ========== SESIÓN PEREZOSA ==========
+class LazySession:
+    """
+    Proxy de Session que no crea la sesión real hasta el primer uso.
+
+    Un request que se resuelve sin tocar la base de datos (caché, ETag, 304,
+    validación fallida) no construye la Session ni pide conexión al pool.
+    Cualquier atributo (query, execute, add, commit...) se delega a la sesión real.
+    """
+
+    def __init__(self, factory=None, **kwargs):
+        self._factory = factory or SessionLocal
+        self._kwargs = kwargs
+        self._session = None
+        request_metrics.registrar_sesion_solicitada()
+
+    @property
+    def session(self) -> Session:
+        """Sesión real; se crea en el primer acceso"""
+        if self._session is None:
+            self._session = self._factory(**self._kwargs)
+            request_metrics.registrar_sesion_abierta()
+        return self._session
+
+    @property
+    def abierta(self) -> bool:
+        return self._session is not None
+
+    def close(self):
+        if self._session is not None:
+            self._session.close()
+
+    def __getattr__(self, name):
+        return getattr(self.session, name)
+
+    def __setattr__(self, name, value):
+        if name.startswith("_"):
+            object.__setattr__(self, name, value)
+        else:
+            setattr(self.session, name, value)
+
 # Dependencia para obtener la sesión de la base de datos
 def get_db():
-    db = SessionLocal()
+    db = LazySession()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+# Dependencia para endpoints de solo lectura: usa una réplica si hay alguna
+# configurada y el cliente no escribió recientemente
+def get_read_db(request: Request):
+    db = LazySession(info={"solo_lectura": not requiere_primario(request)})
+    try:
+        yield db
+    finally:
+        db.close()
+
+# Dependencia para obtener una sesión asíncrona (requiere ASYNC_DB_ENABLED)
+async def get_async_db():
+    if AsyncSessionLocal is None:
+        raise RuntimeError("El motor asíncrono no está habilitado (ASYNC_DB_ENABLED=False)")
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,38 @@
+"""
+Utilidades para obtener el plan de ejecución (EXPLAIN) de una sentencia ya
+compilada por el driver y detectar recorridos completos de tabla.
+
+Se usan en index_advisor.py y en el log de consultas lentas.
+Soporta MySQL (EXPLAIN) y SQLite (EXPLAIN QUERY PLAN) para pruebas locales.
+"""
+from typing import List
+
+
+def explicar(conn, statement: str, parameters=None) -> List[dict]:
+    """Ejecutar EXPLAIN sobre una sentencia con el paramstyle del driver"""
+    prefijo = "EXPLAIN QUERY PLAN " if conn.dialect.name == "sqlite" else "EXPLAIN "
+    result = conn.exec_driver_sql(prefijo + statement, parameters if parameters else ())
+    columnas = list(result.keys())
+    return [dict(zip(columnas, row)) for row in result.fetchall()]
+
+
+def full_scans(plan: List[dict], dialect: str) -> List[str]:
+    """Tablas que el plan recorre completas (sin usar índice)"""
+    tablas = []
+    for fila in plan:
+        if dialect == "sqlite":
+            detalle = str(fila.get("detail", ""))
+            if detalle.startswith("SCAN ") and "INDEX" not in detalle and "CONSTANT ROW" not in detalle:
+                tabla = detalle.split()[1]
+                if not tabla.startswith("anon_"):  # subconsultas materializadas
+                    tablas.append(tabla)
+        elif str(fila.get("type", "")).upper() == "ALL":
+            tabla = str(fila.get("table"))
+            if not tabla.startswith("<"):  # <derived2>, <subquery3>...
+                tablas.append(f"{tabla} (~{fila.get('rows')} filas)")
+    return tablas
+
+
+def es_explicable(statement: str) -> bool:
+    """Solo se explican SELECT (no INSERT/UPDATE ni los propios EXPLAIN)"""
+    return statement.lstrip().upper().startswith("SELECT")
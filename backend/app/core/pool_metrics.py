@@ -0,0 +1,135 @@
+"""
+Métricas del pool de conexiones.
+
+TimedQueuePool es un QueuePool que mide cuánto espera cada checkout por una
+conexión libre y cuánto tarda el checkout completo (incluido el pre-ping).
+Los valores se acumulan en histogramas para dimensionar el pool según el
+número de workers.
+"""
+import threading
+import time
+from sqlalchemy import exc
+from sqlalchemy.pool import QueuePool
+
+# Límites superiores (ms) de los buckets de los histogramas
+BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+class Histograma:
+    """Histograma acumulativo con buckets fijos en milisegundos"""
+
+    def __init__(self, buckets=BUCKETS_MS):
+        self.buckets = buckets
+        self.conteos = [0] * (len(buckets) + 1)
+        self.total = 0
+        self.suma_ms = 0.0
+        self.max_ms = 0.0
+
+    def observar(self, ms: float):
+        """Registrar una observación"""
+        indice = len(self.buckets)
+        for i, limite in enumerate(self.buckets):
+            if ms <= limite:
+                indice = i
+                break
+        self.conteos[indice] += 1
+        self.total += 1
+        self.suma_ms += ms
+        if ms > self.max_ms:
+            self.max_ms = ms
+
+    def to_dict(self) -> dict:
+        """Representación para el endpoint de métricas"""
+        limites = [str(b) for b in self.buckets] + ["+Inf"]
+        return {
+            "total": self.total,
+            "promedio_ms": round(self.suma_ms / self.total, 3) if self.total else 0.0,
+            "max_ms": round(self.max_ms, 3),
+            "buckets": [
+                {"hasta_ms": limite, "conteo": conteo}
+                for limite, conteo in zip(limites, self.conteos)
+            ]
+        }
+
+
+class PoolMetrics:
+    """Métricas acumuladas de un pool"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.espera = Histograma()
+        self.checkout = Histograma()
+        self.timeouts = 0
+
+    def observar_espera(self, ms: float):
+        with self._lock:
+            self.espera.observar(ms)
+
+    def observar_checkout(self, ms: float):
+        with self._lock:
+            self.checkout.observar(ms)
+
+    def registrar_timeout(self):
+        with self._lock:
+            self.timeouts += 1
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            return {
+                "timeouts": self.timeouts,
+                "espera": self.espera.to_dict(),
+                "checkout": self.checkout.to_dict()
+            }
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool que registra tiempos de espera y de checkout"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+
+    def connect(self):
+        inicio = time.perf_counter()
+        try:
+            return super().connect()
+        finally:
+            self.metrics.observar_checkout((time.perf_counter() - inicio) * 1000)
+
+    def _do_get(self):
+        inicio = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            self.metrics.registrar_timeout()
+            raise
+        finally:
+            self.metrics.observar_espera((time.perf_counter() - inicio) * 1000)
+
+    def recreate(self):
+        # Conservar las métricas cuando el engine recrea el pool (dispose/invalidate)
+        nuevo = super().recreate()
+        nuevo.metrics = self.metrics
+        return nuevo
+
+
+def pool_status(engine) -> dict:
+    """Estado actual y métricas del pool de un engine"""
+    pool = engine.pool
+    status = {
+        "url": engine.url.render_as_string(hide_password=True),
+        "pool": pool.__class__.__name__,
+    }
+    if isinstance(pool, QueuePool):
+        status.update({
+            "tamano": pool.size(),
+            "conexiones_en_uso": pool.checkedout(),
+            "conexiones_libres": pool.checkedin(),
+            "overflow": max(pool.overflow(), 0),
+            "max_overflow": pool._max_overflow,
+            "timeout_s": pool.timeout(),
+        })
+    metrics = getattr(pool, "metrics", None)
+    if metrics is not None:
+        status["metricas"] = metrics.to_dict()
+    return status
@@ -0,0 +1,209 @@
+"""
+Métricas de base de datos por request.
+
+Cada request HTTP recibe un objeto EstadisticasDB guardado en un ContextVar;
+las sesiones perezosas y los listeners del engine lo actualizan para saber
+cuántas sesiones se abrieron realmente, cuántas conexiones se pidieron al
+pool, cuántas sentencias se ejecutaron y cuánto tiempo pasaron en la base de
+datos. Las sentencias idénticas repetidas se marcan como posible N+1.
+También se llevan totales por proceso para /admin/db/pool.
+"""
+import logging
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from sqlalchemy import event
+
+
+class EstadisticasDB:
+    """Contadores de base de datos de un request"""
+
+    def __init__(self, endpoint: str = None):
+        self.endpoint = endpoint
+        self.sesiones_solicitadas = 0
+        self.sesiones_abiertas = 0
+        self.checkouts = 0
+        self.queries = 0
+        self.tiempo_db_ms = 0.0
+        self.sentencias = Counter()
+
+    def repetidas(self, umbral: int) -> dict:
+        """Sentencias ejecutadas al menos `umbral` veces (candidatas a N+1)"""
+        return {sql: n for sql, n in self.sentencias.items() if n >= umbral}
+
+
+_estadisticas: ContextVar = ContextVar("estadisticas_db", default=None)
+
+logger = logging.getLogger("kabe.db")
+
+# Cabecera de las respuestas cuyo cuerpo consulta la base de datos después de
+# enviarse las cabeceras X-DB-*: esas cabeceras no incluyen el cuerpo
+CABECERA_STREAMING = "X-DB-Streaming"
+
+# Totales desde que arrancó el proceso
+_totales_lock = threading.Lock()
+totales = {
+    "requests": 0,
+    "requests_sin_pool": 0,
+    "requests_con_repetidas": 0,
+    "sesiones_solicitadas": 0,
+    "sesiones_abiertas": 0,
+    "checkouts": 0,
+    "queries": 0,
+}
+
+
+def _incrementar(campo: str):
+    with _totales_lock:
+        totales[campo] += 1
+    estadisticas = _estadisticas.get()
+    if estadisticas is not None:
+        setattr(estadisticas, campo, getattr(estadisticas, campo) + 1)
+
+
+def iniciar_request(endpoint: str = None):
+    """Crear las estadísticas del request actual; devuelve (estadisticas, token)"""
+    estadisticas = EstadisticasDB(endpoint)
+    return estadisticas, _estadisticas.set(estadisticas)
+
+
+def finalizar_request(estadisticas: EstadisticasDB, token, umbral_repetidas: int = None):
+    """Cerrar las estadísticas del request y acumular los totales"""
+    _estadisticas.reset(token)
+    with _totales_lock:
+        totales["requests"] += 1
+        if estadisticas.checkouts == 0:
+            totales["requests_sin_pool"] += 1
+        if umbral_repetidas and estadisticas.repetidas(umbral_repetidas):
+            totales["requests_con_repetidas"] += 1
+
+
+def estadisticas_actuales():
+    """Estadísticas del request en curso (None fuera de un request)"""
+    return _estadisticas.get()
+
+
+def medir_streaming(bloques):
+    """
+    Envolver el generador del cuerpo de un StreamingResponse para medir sus
+    sentencias. El cuerpo se consume después de que el middleware escribió
+    las cabeceras X-DB-*, así que lleva sus propias estadísticas (activas en
+    cada next(), que Starlette puede correr en hilos distintos) y registra
+    el total en el log al terminar o al cortarse la descarga.
+    """
+    actual = _estadisticas.get()
+    estadisticas = EstadisticasDB(actual.endpoint if actual else None)
+    inicio = time.perf_counter()
+    try:
+        while True:
+            token = _estadisticas.set(estadisticas)
+            try:
+                bloque = next(bloques)
+            except StopIteration:
+                return
+            finally:
+                _estadisticas.reset(token)
+            yield bloque
+    finally:
+        bloques.close()
+        logger.info(
+            "Streaming de %s terminado en %.1f ms: %d checkouts, %d queries, %.1f ms en base de datos",
+            estadisticas.endpoint, (time.perf_counter() - inicio) * 1000, estadisticas.checkouts,
+            estadisticas.queries, estadisticas.tiempo_db_ms
+        )
+
+
+def registrar_sesion_solicitada():
+    _incrementar("sesiones_solicitadas")
+
+
+def registrar_sesion_abierta():
+    _incrementar("sesiones_abiertas")
+
+
+def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+    _incrementar("checkouts")
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("inicio_query", []).append(time.perf_counter())
+
+
+def _registrar_sentencia(conn, statement: str):
+    """Cerrar la medición de la sentencia en curso de la conexión"""
+    inicio = conn.info["inicio_query"].pop()
+    _incrementar("queries")
+    estadisticas = _estadisticas.get()
+    if estadisticas is not None:
+        estadisticas.tiempo_db_ms += (time.perf_counter() - inicio) * 1000
+        # Se agrupa por texto SQL (sin parámetros): la misma sentencia con
+        # distintos ids es justamente el patrón N+1
+        estadisticas.sentencias[statement] += 1
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    _registrar_sentencia(conn, statement)
+
+
+def _handle_error(contexto):
+    # Una sentencia que falla no llega a after_cursor_execute: se cuenta
+    # igual (con su tiempo) y se retira su inicio para no desalinear la pila
+    conn = contexto.connection
+    if conn is not None and conn.info.get("inicio_query"):
+        _registrar_sentencia(conn, contexto.statement)
+
+
+def instrumentar_engine(engine):
+    """Contar checkouts del pool, sentencias y tiempo en base de datos de un engine"""
+    event.listen(engine, "checkout", _on_checkout)
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+
+def snapshot_totales() -> dict:
+    with _totales_lock:
+        return dict(totales)
+
+
+# ========== AYUDAS PARA PRUEBAS ==========
+@contextmanager
+def contar_queries():
+    """
+    Contar las sentencias ejecutadas dentro del bloque (mismo hilo/contexto).
+
+        with contar_queries() as stats:
+            productos_crud.get_by_id(db, 1)
+        assert stats.queries == 1
+    """
+    estadisticas, token = iniciar_request()
+    try:
+        yield estadisticas
+    finally:
+        _estadisticas.reset(token)
+
+
+def assert_max_queries(response, maximo: int):
+    """
+    Verificar que un endpoint no ejecutó más de `maximo` sentencias, usando la
+    cabecera X-DB-Queries que agrega el middleware. Sirve con TestClient:
+
+        assert_max_queries(client.get("/api/v1/productos/1"), 1)
+
+    No aplica a las respuestas en streaming (cabecera X-DB-Streaming): sus
+    cabeceras no cuentan las sentencias del cuerpo.
+    """
+    if response.headers.get(CABECERA_STREAMING):
+        raise AssertionError(
+            f"{response.request.method} {response.request.url.path} responde en streaming: "
+            "X-DB-Queries no incluye las sentencias del cuerpo"
+        )
+    queries = int(response.headers.get("X-DB-Queries", "0"))
+    if queries > maximo:
+        raise AssertionError(
+            f"{response.request.method} {response.request.url.path} ejecutó "
+            f"{queries} queries (máximo {maximo}); repetidas: "
+            f"{response.headers.get('X-DB-Repetidas', '0')}"
+        )
@@ -0,0 +1,152 @@
+"""
+Log de consultas lentas.
+
+Un listener del engine mide cada sentencia; las que superan SLOW_QUERY_MS se
+guardan con sus parámetros y el endpoint que las originó en un buffer
+circular en memoria (expuesto en /admin/db/consultas-lentas) y en un archivo
+rotativo. El plan EXPLAIN de los SELECT se captura en un hilo aparte para no
+alargar el request que ya fue lento. Las sentencias que fallan también se
+miden y, si fueron lentas, se guardan con el error.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from logging.handlers import RotatingFileHandler
+from sqlalchemy import event
+from app.core.config import settings
+from app.core.explain import explicar, full_scans, es_explicable
+from app.core.request_metrics import estadisticas_actuales
+
+_registros = deque(maxlen=settings.SLOW_QUERY_BUFFER)
+_registros_lock = threading.Lock()
+
+# Un solo hilo: los EXPLAIN se hacen uno a la vez y nunca compiten con los requests
+_explain_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="slow-query-explain")
+
+logger = logging.getLogger("kabe.slow_queries")
+logger.propagate = False
+
+
+def configurar_archivo():
+    """
+    Abrir el archivo rotativo SLOW_QUERY_LOG_FILE. Se llama desde el arranque
+    de la aplicación (no al importar el módulo), así los scripts y Alembic no
+    crean logs/ ni archivos. Llamarla más de una vez no duplica el handler.
+    """
+    if not settings.SLOW_QUERY_LOG_FILE or logger.handlers:
+        return
+    directorio = os.path.dirname(settings.SLOW_QUERY_LOG_FILE)
+    if directorio:
+        os.makedirs(directorio, exist_ok=True)
+    handler = RotatingFileHandler(settings.SLOW_QUERY_LOG_FILE, maxBytes=5 * 1024 * 1024, backupCount=5, encoding="utf-8")
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+
+
+def _parametros_legibles(parameters):
+    """Representación de los parámetros sin volcar binarios (imágenes)"""
+    def _valor(v):
+        if isinstance(v, (bytes, bytearray, memoryview)):
+            return f"<{len(v)} bytes>"
+        return v if isinstance(v, (int, float, str, type(None))) else str(v)
+
+    if isinstance(parameters, dict):
+        return {k: _valor(v) for k, v in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [_valor(v) for v in parameters]
+    return str(parameters)
+
+
+def _escribir(registro: dict):
+    if logger.handlers:
+        logger.info(json.dumps(registro, ensure_ascii=False, default=str))
+
+
+def _capturar_plan(engine, registro: dict, statement: str, parameters):
+    """Obtener el EXPLAIN en segundo plano y completar el registro"""
+    try:
+        with engine.connect() as conn:
+            plan = explicar(conn, statement, parameters)
+        campos = {"plan": plan, "full_scans": full_scans(plan, engine.dialect.name)}
+    except Exception as e:
+        campos = {"plan_error": str(e)}
+    # El registro ya está en el buffer: se completa bajo el mismo lock con el
+    # que obtener_registros lo copia
+    with _registros_lock:
+        registro.update(campos)
+        copia = dict(registro)
+    _escribir(copia)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("inicio_lenta", []).append(time.perf_counter())
+
+
+def _registrar_si_lenta(engine_explain, conn, statement, parameters, executemany, error: str = None):
+    duracion_ms = (time.perf_counter() - conn.info["inicio_lenta"].pop()) * 1000
+    if duracion_ms < settings.SLOW_QUERY_MS or statement.lstrip().upper().startswith("EXPLAIN"):
+        return
+
+    estadisticas = estadisticas_actuales()
+    registro = {
+        "fecha": datetime.now().isoformat(timespec="seconds"),
+        "duracion_ms": round(duracion_ms, 1),
+        "endpoint": estadisticas.endpoint if estadisticas else None,
+        "sql": " ".join(statement.split()),
+        "parametros": _parametros_legibles(parameters),
+        "executemany": executemany,
+        "plan": None,
+        "full_scans": None,
+        "error": error,
+    }
+    with _registros_lock:
+        _registros.append(registro)
+
+    if settings.SLOW_QUERY_EXPLAIN and not executemany and not error and es_explicable(statement):
+        _explain_executor.submit(_capturar_plan, engine_explain, registro, statement, parameters)
+    else:
+        _escribir(registro)
+
+
+def instrumentar_engine(engine, engine_explain=None):
+    """
+    Registrar en el log de consultas lentas las sentencias de un engine.
+    El EXPLAIN se corre en el engine de la conexión que ejecutó la sentencia
+    (la réplica, si fue una lectura enviada a una réplica). engine_explain lo
+    reemplaza por un engine síncrono equivalente, necesario para el motor
+    asíncrono, que no puede usarse desde otro hilo.
+    """
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        _registrar_si_lenta(engine_explain or conn.engine, conn, statement, parameters, executemany)
+
+    def _handle_error(contexto):
+        # Una sentencia que falla (p. ej. por un timeout de bloqueo) no llega
+        # a after_cursor_execute: se retira su inicio y, si fue lenta, se
+        # registra con el error y sin EXPLAIN
+        conn = contexto.connection
+        if conn is not None and conn.info.get("inicio_lenta"):
+            executemany = bool(contexto.execution_context and contexto.execution_context.executemany)
+            _registrar_si_lenta(engine_explain or conn.engine, conn, contexto.statement or "",
+                                contexto.parameters, executemany, error=str(contexto.original_exception))
+
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+
+def obtener_registros(limit: int = 50) -> list:
+    """Consultas lentas más recientes primero"""
+    # Copias: los EXPLAIN en curso siguen completando los registros del buffer
+    with _registros_lock:
+        return [dict(registro) for registro in list(reversed(_registros))[:limit]]
+
+
+def limpiar_registros():
+    with _registros_lock:
+        _registros.clear()
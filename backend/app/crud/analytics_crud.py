@@ -0,0 +1,860 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import func, delete, insert, select, union_all
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+import logging
+import threading
+from app.models.analytics_models import RollupProductoDia, RollupCategoriaDia, RollupPaqueteDia, RollupTipoEventoDia, RollupPagoDia, PronosticoDemanda, RecomendacionStock
+from app.models.solicitud_models import Solicitud, SolicitudProducto, SolicitudPaquete, EstadoSolicitud
+from app.models.pago_models import Pago, TipoPago, EstadoPago
+from app.models.models import Producto, Categoria, Paquete, Usuario
+
+logger = logging.getLogger("kabe.analytics")
+
+# Estados que cuentan como renta efectiva en los rollups
+ESTADOS_CONTABILIZADOS = (EstadoSolicitud.aprobada, EstadoSolicitud.en_proceso, EstadoSolicitud.completada)
+
+# Clave del rollup por tipo de evento cuando la solicitud no lo indica
+TIPO_EVENTO_VACIO = "sin_tipo"
+
+# ========== AGREGADOS DESDE LAS LÍNEAS DE SOLICITUD ==========
+# Base común de todos los rollups: "ingresos" es la suma de los subtotales de
+# línea (precio × cantidad × días), antes de IVA y sin depósitos, y
+# "unidades" la suma de cantidades. Producto y categoría cuentan las líneas
+# de productos, paquete las de paquetes y tipo de evento ambas, así que
+# categorías + paquetes = tipos de evento = total.
+def _agregados_productos(db: Session, filtro):
+    """(producto_id, dia, unidades, ingresos, solicitudes) para las solicitudes del filtro"""
+    return db.query(
+        SolicitudProducto.producto_id,
+        Solicitud.fecha_evento_inicio,
+        func.sum(SolicitudProducto.cantidad_solicitada),
+        func.sum(SolicitudProducto.subtotal),
+        func.count(func.distinct(Solicitud.solicitud_id))
+    ).join(Solicitud, Solicitud.solicitud_id == SolicitudProducto.solicitud_id).filter(
+        filtro
+    ).group_by(SolicitudProducto.producto_id, Solicitud.fecha_evento_inicio).all()
+
+def _agregados_categorias(db: Session, filtro):
+    """(categoria_id, dia, unidades, ingresos, solicitudes); una solicitud cuenta una vez por categoría"""
+    return db.query(
+        Producto.categoria_id,
+        Solicitud.fecha_evento_inicio,
+        func.sum(SolicitudProducto.cantidad_solicitada),
+        func.sum(SolicitudProducto.subtotal),
+        func.count(func.distinct(Solicitud.solicitud_id))
+    ).join(Solicitud, Solicitud.solicitud_id == SolicitudProducto.solicitud_id).join(
+        Producto, Producto.producto_id == SolicitudProducto.producto_id
+    ).filter(filtro).group_by(Producto.categoria_id, Solicitud.fecha_evento_inicio).all()
+
+def _agregados_paquetes(db: Session, filtro):
+    """(paquete_id, dia, unidades, ingresos, solicitudes) para las solicitudes del filtro"""
+    return db.query(
+        SolicitudPaquete.paquete_id,
+        Solicitud.fecha_evento_inicio,
+        func.sum(SolicitudPaquete.cantidad_solicitada),
+        func.sum(SolicitudPaquete.subtotal),
+        func.count(func.distinct(Solicitud.solicitud_id))
+    ).join(Solicitud, Solicitud.solicitud_id == SolicitudPaquete.solicitud_id).filter(
+        filtro
+    ).group_by(SolicitudPaquete.paquete_id, Solicitud.fecha_evento_inicio).all()
+
+def _agregados_tipos_evento(db: Session, filtro):
+    """(tipo_evento, dia, unidades, ingresos, solicitudes) con las líneas de productos y de paquetes"""
+    lineas = union_all(
+        select(SolicitudProducto.solicitud_id, SolicitudProducto.cantidad_solicitada.label("cantidad"),
+               SolicitudProducto.subtotal.label("subtotal")),
+        select(SolicitudPaquete.solicitud_id, SolicitudPaquete.cantidad_solicitada.label("cantidad"),
+               SolicitudPaquete.subtotal.label("subtotal"))
+    ).subquery()
+    tipo_evento = func.coalesce(Solicitud.tipo_evento, TIPO_EVENTO_VACIO)
+    return db.query(
+        tipo_evento,
+        Solicitud.fecha_evento_inicio,
+        func.sum(lineas.c.cantidad),
+        func.sum(lineas.c.subtotal),
+        func.count(func.distinct(Solicitud.solicitud_id))
+    ).join(lineas, lineas.c.solicitud_id == Solicitud.solicitud_id).filter(
+        filtro
+    ).group_by(tipo_evento, Solicitud.fecha_evento_inicio).all()
+
+ROLLUPS = (
+    (RollupProductoDia, "producto_id", _agregados_productos),
+    (RollupCategoriaDia, "categoria_id", _agregados_categorias),
+    (RollupPaqueteDia, "paquete_id", _agregados_paquetes),
+    (RollupTipoEventoDia, "tipo_evento", _agregados_tipos_evento),
+)
+
+COLUMNAS_ROLLUP = ("unidades", "ingresos", "solicitudes")
+
+def _filas(clave: str, agregados, signo: int = 1) -> list:
+    return [
+        {
+            clave: entidad_id,
+            "dia": dia,
+            "unidades": signo * int(unidades or 0),
+            "ingresos": signo * Decimal(str(ingresos or 0)),
+            "solicitudes": signo * int(solicitudes or 0)
+        }
+        for entidad_id, dia, unidades, ingresos, solicitudes in agregados
+    ]
+
+def upsert_incrementos(db: Session, modelo, claves: tuple, filas: list, columnas: tuple = COLUMNAS_ROLLUP):
+    """
+    Sumar las filas al rollup en un solo INSERT multi-fila; si la fila ya existe
+    se incrementa (ON DUPLICATE KEY UPDATE en MySQL, ON CONFLICT en SQLite).
+    """
+    if not filas:
+        return
+    dialecto = db.get_bind().dialect.name
+    if dialecto == "mysql":
+        from sqlalchemy.dialects.mysql import insert as dialect_insert
+        stmt = dialect_insert(modelo).values(filas)
+        stmt = stmt.on_duplicate_key_update(
+            {columna: getattr(modelo, columna) + getattr(stmt.inserted, columna) for columna in columnas}
+        )
+    else:
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        stmt = dialect_insert(modelo).values(filas)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(claves),
+            set_={columna: getattr(modelo, columna) + getattr(stmt.excluded, columna) for columna in columnas}
+        )
+    db.execute(stmt)
+
+# ========== MANTENIMIENTO INCREMENTAL ==========
+def aplicar_solicitudes(db: Session, solicitud_ids: list, signo: int):
+    """
+    Sumar (signo=1) o restar (signo=-1) a los rollups las líneas de las
+    solicitudes indicadas. Se llama dentro de la transacción del cambio de
+    estado, sin hacer commit.
+    """
+    if not solicitud_ids:
+        return
+    filtro = Solicitud.solicitud_id.in_(solicitud_ids)
+    for modelo, clave, agregados in ROLLUPS:
+        upsert_incrementos(db, modelo, (clave, "dia"), _filas(clave, agregados(db, filtro), signo))
+
+def registrar_pago(db: Session, tipo_pago: TipoPago, monto: Decimal, dia: date = None):
+    """Acumular un pago completado en rollup_pago_dia (monto negativo para devoluciones). No hace commit."""
+    upsert_incrementos(db, RollupPagoDia, ("tipo_pago", "dia"), [{
+        "tipo_pago": TipoPago(tipo_pago).value,
+        "dia": dia or date.today(),
+        "monto": monto,
+        "pagos": 1
+    }], columnas=("monto", "pagos"))
+
+def _como_fecha(valor) -> date:
+    """DATE(...) y MIN/MAX de TIMESTAMP llegan como date, datetime o texto según el driver"""
+    if isinstance(valor, datetime):
+        return valor.date()
+    if isinstance(valor, date):
+        return valor
+    return date.fromisoformat(str(valor)[:10])
+
+def _monto_con_signo(tipo_pago, monto):
+    return -monto if TipoPago(tipo_pago) == TipoPago.devolucion_deposito else monto
+
+def efecto_transicion(anterior: EstadoSolicitud, nuevo: EstadoSolicitud) -> int:
+    """1 si la solicitud empieza a contar en los rollups, -1 si deja de contar, 0 si no cambia"""
+    antes = anterior in ESTADOS_CONTABILIZADOS
+    despues = nuevo in ESTADOS_CONTABILIZADOS
+    return int(despues) - int(antes)
+
+# ========== RECONSTRUCCIÓN (BACKFILL) ==========
+def reconstruir_rollups(db: Session, desde: date, hasta: date):
+    """
+    Recalcular desde cero los rollups de los días [desde, hasta] en una sola
+    transacción: DELETE del rango e INSERT multi-fila de los agregados.
+    Devuelve el número de filas escritas por rollup.
+    """
+    filtro = (
+        Solicitud.estado.in_(ESTADOS_CONTABILIZADOS)
+        & (Solicitud.fecha_evento_inicio >= desde)
+        & (Solicitud.fecha_evento_inicio <= hasta)
+    )
+    escritas = {}
+    try:
+        for modelo, clave, agregados in ROLLUPS:
+            db.execute(delete(modelo).where(modelo.dia >= desde, modelo.dia <= hasta))
+            filas = _filas(clave, agregados(db, filtro))
+            if filas:
+                db.execute(insert(modelo), filas)
+            escritas[modelo.__tablename__] = len(filas)
+
+        # Pagos completados por fecha de pago
+        dia_pago = func.date(Pago.fecha_pago)
+        pagos = db.query(
+            Pago.tipo_pago, dia_pago, func.sum(Pago.monto), func.count(Pago.pago_id)
+        ).filter(
+            Pago.estado_pago == EstadoPago.completado,
+            Pago.fecha_pago >= desde,
+            Pago.fecha_pago < hasta + timedelta(days=1)
+        ).group_by(Pago.tipo_pago, dia_pago).all()
+        db.execute(delete(RollupPagoDia).where(RollupPagoDia.dia >= desde, RollupPagoDia.dia <= hasta))
+        filas = [{
+            "tipo_pago": TipoPago(tipo_pago).value,
+            "dia": _como_fecha(dia),
+            "monto": _monto_con_signo(tipo_pago, Decimal(str(monto or 0))),
+            "pagos": int(cantidad)
+        } for tipo_pago, dia, monto, cantidad in pagos]
+        if filas:
+            db.execute(insert(RollupPagoDia), filas)
+        escritas[RollupPagoDia.__tablename__] = len(filas)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return escritas
+
+def reconstruir_rollup_categorias(db: Session, producto_ids: list, categoria_ids: list) -> int:
+    """
+    Recalcular rollup_categoria_dia de las categorías indicadas en el rango
+    de días con rentas contabilizadas de los productos (tras moverlos de
+    categoría, para que el historial quede con la categoría actual, igual que
+    en reconstruir_rollups). No hace commit. Devuelve las filas escritas.
+    """
+    desde, hasta = db.query(
+        func.min(Solicitud.fecha_evento_inicio), func.max(Solicitud.fecha_evento_inicio)
+    ).join(SolicitudProducto, SolicitudProducto.solicitud_id == Solicitud.solicitud_id).filter(
+        Solicitud.estado.in_(ESTADOS_CONTABILIZADOS),
+        SolicitudProducto.producto_id.in_(producto_ids)
+    ).one()
+    if desde is None:
+        return 0
+    db.execute(delete(RollupCategoriaDia).where(
+        RollupCategoriaDia.categoria_id.in_(categoria_ids),
+        RollupCategoriaDia.dia >= desde,
+        RollupCategoriaDia.dia <= hasta
+    ))
+    filtro = (
+        Solicitud.estado.in_(ESTADOS_CONTABILIZADOS)
+        & (Solicitud.fecha_evento_inicio >= desde)
+        & (Solicitud.fecha_evento_inicio <= hasta)
+        & Producto.categoria_id.in_(categoria_ids)
+    )
+    filas = _filas("categoria_id", _agregados_categorias(db, filtro))
+    if filas:
+        db.execute(insert(RollupCategoriaDia), filas)
+    return len(filas)
+
+def rango_historial(db: Session):
+    """Primer y último día con datos: fechas de evento contabilizadas y fechas de pago"""
+    eventos = db.query(func.min(Solicitud.fecha_evento_inicio), func.max(Solicitud.fecha_evento_inicio)).filter(
+        Solicitud.estado.in_(ESTADOS_CONTABILIZADOS)
+    ).one()
+    pagos = db.query(func.min(Pago.fecha_pago), func.max(Pago.fecha_pago)).filter(
+        Pago.estado_pago == EstadoPago.completado
+    ).one()
+    fechas = [_como_fecha(f) for f in (*eventos, *pagos) if f is not None]
+    if not fechas:
+        return None, None
+    return min(fechas), max(fechas)
+
+# ========== LECTURAS PARA EL DASHBOARD ==========
+def get_dashboard_stats(db: Session, dias: int = 90, limite: int = 10):
+    """
+    Datos del dashboard leídos de los rollups de los últimos `dias` días
+    (más los próximos, porque las rentas se cuentan por fecha de evento).
+    Del catálogo solo se leen los nombres de los top-N y conteos indexados.
+    """
+    desde = date.today() - timedelta(days=dias)
+
+    productos = db.query(
+        RollupProductoDia.producto_id,
+        func.sum(RollupProductoDia.unidades).label("unidades"),
+        func.sum(RollupProductoDia.ingresos).label("ingresos"),
+        func.sum(RollupProductoDia.solicitudes).label("solicitudes")
+    ).filter(RollupProductoDia.dia >= desde).group_by(
+        RollupProductoDia.producto_id
+    ).order_by(func.sum(RollupProductoDia.unidades).desc()).limit(limite).all()
+
+    categorias = db.query(
+        RollupCategoriaDia.categoria_id,
+        func.sum(RollupCategoriaDia.unidades).label("unidades"),
+        func.sum(RollupCategoriaDia.ingresos).label("ingresos"),
+        func.sum(RollupCategoriaDia.solicitudes).label("solicitudes")
+    ).filter(RollupCategoriaDia.dia >= desde).group_by(
+        RollupCategoriaDia.categoria_id
+    ).order_by(func.sum(RollupCategoriaDia.unidades).desc()).limit(limite).all()
+
+    paquetes = db.query(
+        RollupPaqueteDia.paquete_id,
+        func.sum(RollupPaqueteDia.unidades).label("unidades"),
+        func.sum(RollupPaqueteDia.ingresos).label("ingresos"),
+        func.sum(RollupPaqueteDia.solicitudes).label("solicitudes")
+    ).filter(RollupPaqueteDia.dia >= desde).group_by(
+        RollupPaqueteDia.paquete_id
+    ).order_by(func.sum(RollupPaqueteDia.unidades).desc()).limit(limite).all()
+
+    # Unidades de productos (como "total_pedidos" antes de los rollups) e
+    # ingresos de productos y paquetes, igual que la serie sin agrupar
+    unidades_productos = db.query(
+        func.coalesce(func.sum(RollupCategoriaDia.unidades), 0)
+    ).filter(RollupCategoriaDia.dia >= desde).scalar()
+    ingresos = db.query(
+        func.coalesce(func.sum(RollupTipoEventoDia.ingresos), 0)
+    ).filter(RollupTipoEventoDia.dia >= desde).scalar()
+    totales = (unidades_productos, ingresos)
+
+    # Nombres de los top-N por clave primaria
+    producto_ids = [fila.producto_id for fila in productos]
+    categoria_ids = [fila.categoria_id for fila in categorias]
+    paquete_ids = [fila.paquete_id for fila in paquetes]
+    nombres_productos = {
+        pid: (nombre, categoria_id) for pid, nombre, categoria_id in db.query(
+            Producto.producto_id, Producto.nombre, Producto.categoria_id
+        ).filter(Producto.producto_id.in_(producto_ids))
+    } if producto_ids else {}
+    categoria_ids_nombres = set(categoria_ids) | {cid for _, cid in nombres_productos.values()}
+    nombres_categorias = dict(db.query(Categoria.categoria_id, Categoria.nombre).filter(
+        Categoria.categoria_id.in_(categoria_ids_nombres)
+    )) if categoria_ids_nombres else {}
+    # producto_id -> (nombre, categoria_id, categoria_nombre)
+    nombres_productos = {
+        pid: (nombre, cid, nombres_categorias.get(cid)) for pid, (nombre, cid) in nombres_productos.items()
+    }
+    productos_por_categoria = dict(db.query(Producto.categoria_id, func.count(Producto.producto_id)).filter(
+        Producto.categoria_id.in_(categoria_ids), Producto.estado == "disponible"
+    ).group_by(Producto.categoria_id)) if categoria_ids else {}
+    nombres_paquetes = dict(db.query(Paquete.paquete_id, Paquete.nombre).filter(
+        Paquete.paquete_id.in_(paquete_ids)
+    )) if paquete_ids else {}
+
+    # Conteos del catálogo: COUNT sobre columnas indexadas (estado, activo), sin subconsultas por fila
+    total_productos = db.query(func.count(Producto.producto_id)).filter(Producto.estado == "disponible").scalar()
+    total_categorias = db.query(func.count(Categoria.categoria_id)).filter(Categoria.activo == True).scalar()
+    total_paquetes = db.query(func.count(Paquete.paquete_id)).filter(Paquete.activo == True).scalar()
+    total_usuarios = db.query(func.count(Usuario.usuario_id)).scalar()
+
+    return {
+        "desde": desde,
+        "productos": productos,
+        "categorias": categorias,
+        "paquetes": paquetes,
+        "totales": totales,
+        "nombres_productos": nombres_productos,
+        "nombres_categorias": nombres_categorias,
+        "nombres_paquetes": nombres_paquetes,
+        "productos_por_categoria": productos_por_categoria,
+        "catalogo": (total_productos, total_categorias, total_paquetes, total_usuarios)
+    }
+
+def construir_dashboard(db: Session, dias: int = 90):
+    """Respuesta del dashboard de administrador (la sirve la caché de app.core.cache)"""
+    stats = get_dashboard_stats(db, dias=dias)
+    total_productos, total_categorias, total_paquetes, total_usuarios = stats['catalogo']
+    unidades_totales, ingresos_totales = stats['totales']
+
+    return {
+        "desde": stats['desde'].isoformat(),
+        "stats_generales": {
+            "total_productos": total_productos,
+            "total_categorias": total_categorias,
+            "total_paquetes": total_paquetes,
+            "total_usuarios": total_usuarios,
+            "total_pedidos": int(unidades_totales or 0),
+            "ingresos": float(ingresos_totales or 0)
+        },
+        "productos_populares": [
+            {
+                "producto_id": row.producto_id,
+                "nombre": nombre,
+                "categoria_id": categoria_id,
+                "categoria_nombre": categoria_nombre,
+                "veces_pedido": int(row.unidades or 0),
+                "solicitudes": int(row.solicitudes or 0),
+                "ingresos": float(row.ingresos or 0)
+            } for row in stats['productos']
+            for nombre, categoria_id, categoria_nombre in [stats['nombres_productos'].get(row.producto_id, (None, None, None))]
+        ],
+        "categorias_populares": [
+            {
+                "categoria_id": row.categoria_id,
+                "nombre": stats['nombres_categorias'].get(row.categoria_id),
+                "total_productos": stats['productos_por_categoria'].get(row.categoria_id, 0),
+                "total_pedidos": int(row.unidades or 0),
+                "solicitudes": int(row.solicitudes or 0),
+                "ingresos": float(row.ingresos or 0)
+            } for row in stats['categorias']
+        ],
+        "paquetes_populares": [
+            {
+                "paquete_id": row.paquete_id,
+                "nombre": stats['nombres_paquetes'].get(row.paquete_id),
+                "veces_pedido": int(row.unidades or 0),
+                "solicitudes": int(row.solicitudes or 0),
+                "ingresos": float(row.ingresos or 0)
+            } for row in stats['paquetes']
+        ]
+    }
+
+# ========== SERIES DE TIEMPO ==========
+# agrupar_por -> (rollup, columna de grupo). "ninguno" lee el rollup por tipo
+# de evento, el único con productos y paquetes: su total por día coincide con
+# tipo_evento y con categoria + paquete (producto/categoria solo suman
+# productos y paquete solo paquetes).
+FUENTES_SERIE = {
+    "ninguno": (RollupTipoEventoDia, None),
+    "tipo_evento": (RollupTipoEventoDia, "tipo_evento"),
+    "categoria": (RollupCategoriaDia, "categoria_id"),
+    "producto": (RollupProductoDia, "producto_id"),
+    "paquete": (RollupPaqueteDia, "paquete_id"),
+}
+FUENTES_COBRADO = {
+    "ninguno": (RollupPagoDia, None),
+    "tipo_pago": (RollupPagoDia, "tipo_pago"),
+}
+METRICAS_SERIE = ("ingresos", "unidades", "solicitudes", "cobrado")
+
+def agrupaciones_validas(metrica: str) -> tuple:
+    return tuple(FUENTES_COBRADO if metrica == "cobrado" else FUENTES_SERIE)
+
+def datos_serie(db: Session, metrica: str, agrupar_por: str, desde: date, hasta: date):
+    """
+    Leer del rollup correspondiente, en una sola consulta, las columnas
+    (dia, grupo, valor) del rango. Devuelve tres listas paralelas.
+    """
+    modelo, columna_grupo = (FUENTES_COBRADO if metrica == "cobrado" else FUENTES_SERIE)[agrupar_por]
+    valor = modelo.monto if metrica == "cobrado" else getattr(modelo, metrica)
+    filtro = (modelo.dia >= desde, modelo.dia <= hasta)
+    if columna_grupo is None:
+        filas = db.execute(
+            select(modelo.dia, func.sum(valor)).where(*filtro).group_by(modelo.dia)
+        ).all()
+        return [fila[0] for fila in filas], ["total"] * len(filas), [fila[1] or 0 for fila in filas]
+    filas = db.execute(select(modelo.dia, getattr(modelo, columna_grupo), valor).where(*filtro)).all()
+    if not filas:
+        return [], [], []
+    dias, grupos, valores = zip(*filas)
+    return list(dias), list(grupos), [v or 0 for v in valores]
+
+def nombres_grupos(db: Session, agrupar_por: str, claves: list) -> dict:
+    """Nombres legibles de los grupos de una serie (ids de catálogo)"""
+    modelos = {
+        "categoria": (Categoria.categoria_id, Categoria.nombre),
+        "producto": (Producto.producto_id, Producto.nombre),
+        "paquete": (Paquete.paquete_id, Paquete.nombre),
+    }
+    if agrupar_por not in modelos or not claves:
+        return {clave: clave for clave in claves}
+    columna_id, columna_nombre = modelos[agrupar_por]
+    return dict(db.query(columna_id, columna_nombre).filter(columna_id.in_(claves)))
+
+# ========== UTILIZACIÓN DE PRODUCTOS ==========
+COLUMNAS_UTILIZACION = (
+    "producto_id", "codigo_producto", "nombre", "categoria_id", "estado", "stock_total",
+    "dias_propiedad", "unidades_dia_propias", "unidades_dia_rentadas", "rentas", "utilizacion"
+)
+
+def reporte_utilizacion(db: Session, desde: date, hasta: date) -> list:
+    """
+    Utilización por producto en [desde, hasta]: dos consultas (catálogo sin
+    imágenes y líneas de renta que tocan el periodo) y el cálculo vectorizado
+    de app.analytics.utilizacion. Ordenado de mayor a menor utilización.
+    """
+    from app.analytics.utilizacion import calcular_utilizacion
+
+    productos = db.execute(
+        select(
+            Producto.producto_id, Producto.codigo_producto, Producto.nombre, Producto.categoria_id,
+            Producto.estado, Producto.stock_total, Producto.fecha_creacion
+        ).order_by(Producto.producto_id)
+    ).all()
+    lineas = db.execute(
+        select(
+            SolicitudProducto.producto_id, Solicitud.fecha_evento_inicio,
+            Solicitud.fecha_evento_fin, SolicitudProducto.cantidad_solicitada
+        ).join(Solicitud, Solicitud.solicitud_id == SolicitudProducto.solicitud_id).where(
+            Solicitud.estado.in_(ESTADOS_CONTABILIZADOS),
+            Solicitud.fecha_evento_inicio <= hasta,
+            Solicitud.fecha_evento_fin >= desde
+        )
+    ).all()
+    if not productos:
+        return []
+
+    linea_producto, linea_inicio, linea_fin, linea_cantidad = zip(*lineas) if lineas else ((), (), (), ())
+    resultado = calcular_utilizacion(
+        [p.producto_id for p in productos],
+        [p.stock_total or 0 for p in productos],
+        [_como_fecha(p.fecha_creacion) if p.fecha_creacion else None for p in productos],
+        linea_producto, linea_inicio, linea_fin, linea_cantidad,
+        desde, hasta
+    )
+    reporte = [
+        {
+            "producto_id": p.producto_id,
+            "codigo_producto": p.codigo_producto,
+            "nombre": p.nombre,
+            "categoria_id": p.categoria_id,
+            "estado": p.estado,
+            "stock_total": p.stock_total,
+            "dias_propiedad": int(resultado["dias_propiedad"][i]),
+            "unidades_dia_propias": int(resultado["unidades_dia_propias"][i]),
+            "unidades_dia_rentadas": int(resultado["unidades_dia_rentadas"][i]),
+            "rentas": int(resultado["rentas"][i]),
+            "utilizacion": round(float(resultado["utilizacion"][i]), 4)
+        } for i, p in enumerate(productos)
+    ]
+    reporte.sort(key=lambda fila: fila["utilizacion"], reverse=True)
+    return reporte
+
+# ========== DEMANDA CONCURRENTE Y SOBREVENTA ==========
+# Reservas que comprometen unidades: las pendientes también, porque pueden aprobarse
+ESTADOS_COMPROMETIDOS = (EstadoSolicitud.pendiente, EstadoSolicitud.aprobada, EstadoSolicitud.en_proceso)
+
+def detectar_sobreventa(db: Session, dias: int = 90, solo_conflictos: bool = True) -> dict:
+    """
+    Pico de unidades comprometidas por producto desde hoy hasta `dias` días
+    adelante y ventanas en que se supera stock_total. En cada ventana las
+    solicitudes activas el día pico se ordenan por fecha de solicitud; las
+    que quedan por encima del stock se marcan como excedentes.
+    """
+    from app.analytics.sobreventa import barrer, ventanas_de_conflicto, picos
+
+    desde = date.today()
+    hasta = desde + timedelta(days=dias)
+    # Una fila por (solicitud, producto): si una solicitud tiene varias líneas
+    # del mismo producto sus cantidades se suman y aparece una sola vez
+    columnas = (
+        SolicitudProducto.producto_id, Solicitud.solicitud_id, Solicitud.numero_solicitud,
+        Solicitud.estado, Solicitud.fecha_solicitud, Solicitud.fecha_evento_inicio, Solicitud.fecha_evento_fin
+    )
+    lineas = db.execute(
+        select(
+            *columnas, func.sum(SolicitudProducto.cantidad_solicitada).label("cantidad_solicitada")
+        ).join(Solicitud, Solicitud.solicitud_id == SolicitudProducto.solicitud_id).where(
+            Solicitud.estado.in_(ESTADOS_COMPROMETIDOS),
+            Solicitud.fecha_evento_inicio <= hasta,
+            Solicitud.fecha_evento_fin >= desde
+        ).group_by(*columnas)
+    ).all()
+    resultado = {"desde": desde.isoformat(), "hasta": hasta.isoformat(), "productos": []}
+    if not lineas:
+        return resultado
+
+    producto_ids = {linea.producto_id for linea in lineas}
+    productos = {
+        fila.producto_id: fila for fila in db.execute(
+            select(Producto.producto_id, Producto.codigo_producto, Producto.nombre, Producto.stock_total)
+            .where(Producto.producto_id.in_(producto_ids))
+        ).all()
+    }
+    stock = {producto_id: fila.stock_total or 0 for producto_id, fila in productos.items()}
+
+    p, t, carga = barrer(
+        [linea.producto_id for linea in lineas],
+        [linea.fecha_evento_inicio for linea in lineas],
+        [linea.fecha_evento_fin for linea in lineas],
+        [linea.cantidad_solicitada for linea in lineas]
+    )
+    maximos = picos(p, t, carga)
+    ventanas = ventanas_de_conflicto(p, t, carga, stock)
+
+    lineas_por_producto = {}
+    for linea in lineas:
+        if linea.producto_id in ventanas:
+            lineas_por_producto.setdefault(linea.producto_id, []).append(linea)
+
+    for producto_id, (pico, dia_pico) in maximos.items():
+        conflictos = []
+        for ventana_desde, ventana_hasta, pico_ventana, dia_pico_ventana in ventanas.get(producto_id, []):
+            ventana_desde, ventana_hasta, dia_pico_ventana = ventana_desde.item(), ventana_hasta.item(), dia_pico_ventana.item()
+            activas = [
+                linea for linea in lineas_por_producto[producto_id]
+                if linea.fecha_evento_inicio <= ventana_hasta and linea.fecha_evento_fin >= ventana_desde
+            ]
+            # Orden de llegada: en el día pico, las últimas en pedir son las que rebasan el stock
+            activas.sort(key=lambda linea: (linea.fecha_solicitud or datetime.min, linea.solicitud_id))
+            excedentes = set()
+            acumulado = 0
+            for linea in activas:
+                if linea.fecha_evento_inicio <= dia_pico_ventana <= linea.fecha_evento_fin:
+                    acumulado += linea.cantidad_solicitada
+                    if acumulado > stock.get(producto_id, 0):
+                        excedentes.add(linea.solicitud_id)
+            solicitudes = [{
+                "solicitud_id": linea.solicitud_id,
+                "numero_solicitud": linea.numero_solicitud,
+                "estado": EstadoSolicitud(linea.estado).value,
+                "fecha_evento_inicio": linea.fecha_evento_inicio.isoformat(),
+                "fecha_evento_fin": linea.fecha_evento_fin.isoformat(),
+                "cantidad": linea.cantidad_solicitada,
+                "excedente": linea.solicitud_id in excedentes
+            } for linea in activas]
+            conflictos.append({
+                "desde": ventana_desde.isoformat(),
+                "hasta": ventana_hasta.isoformat(),
+                "pico": pico_ventana,
+                "fecha_pico": dia_pico_ventana.isoformat(),
+                "exceso": pico_ventana - stock.get(producto_id, 0),
+                "solicitudes": solicitudes
+            })
+        if solo_conflictos and not conflictos:
+            continue
+        producto = productos.get(producto_id)
+        resultado["productos"].append({
+            "producto_id": producto_id,
+            "codigo_producto": producto.codigo_producto if producto else None,
+            "nombre": producto.nombre if producto else None,
+            "stock_total": stock.get(producto_id, 0),
+            "pico": pico,
+            "fecha_pico": dia_pico.item().isoformat(),
+            "conflictos": conflictos
+        })
+    resultado["productos"].sort(key=lambda fila: fila["pico"] - fila["stock_total"], reverse=True)
+    _avisar_conflictos_nuevos(dias, resultado)
+    return resultado
+
+# Ventanas de conflicto ya avisadas en la ejecución anterior, por horizonte
+# de días (el detector corre periódicamente y no debe repetir el aviso)
+_conflictos_avisados = {}
+_conflictos_lock = threading.Lock()
+
+def _avisar_conflictos_nuevos(dias: int, resultado: dict):
+    actuales = {
+        (fila["producto_id"], conflicto["desde"], conflicto["hasta"]): fila["codigo_producto"]
+        for fila in resultado["productos"] for conflicto in fila["conflictos"]
+    }
+    with _conflictos_lock:
+        anteriores = _conflictos_avisados.get(dias, {})
+        _conflictos_avisados[dias] = actuales
+    nuevos = sorted({codigo for clave, codigo in actuales.items() if clave not in anteriores}, key=str)
+    if nuevos:
+        logger.warning(
+            "Sobreventa nueva entre %s y %s en %d productos: %s",
+            resultado["desde"], resultado["hasta"], len(nuevos), ", ".join(map(str, nuevos[:20]))
+        )
+
+# ========== PRONÓSTICO DE DEMANDA ==========
+# La demanda incluye las pendientes: son pedidos reales aunque no estén aprobados
+ESTADOS_DEMANDA = (EstadoSolicitud.pendiente,) + ESTADOS_CONTABILIZADOS
+
+def historia_demanda(db: Session, desde: date, hasta: date):
+    """
+    Líneas de renta que tocan [desde, hasta] como columnas paralelas:
+    (producto_id, tipo_evento, inicio, fin, cantidad). Una sola consulta.
+    """
+    filas = db.execute(
+        select(
+            SolicitudProducto.producto_id,
+            func.coalesce(Solicitud.tipo_evento, TIPO_EVENTO_VACIO),
+            Solicitud.fecha_evento_inicio,
+            Solicitud.fecha_evento_fin,
+            SolicitudProducto.cantidad_solicitada
+        ).join(Solicitud, Solicitud.solicitud_id == SolicitudProducto.solicitud_id).where(
+            Solicitud.estado.in_(ESTADOS_DEMANDA),
+            Solicitud.fecha_evento_inicio <= hasta,
+            Solicitud.fecha_evento_fin >= desde
+        )
+    ).all()
+    if not filas:
+        return [], [], [], [], []
+    return tuple(list(columna) for columna in zip(*filas))
+
+def generar_pronostico(db: Session, semanas: int = 8, historia_dias: int = 730, max_tipos: int = 8, lote: int = 5000) -> dict:
+    """
+    Ajustar el modelo de app.analytics.pronostico con la historia de
+    `historia_dias` días y reemplazar en pronostico_demanda los días
+    futuros de todos los productos. Los tipos de evento menos frecuentes
+    se agrupan en "otros" para que el tensor no crezca sin control.
+    """
+    import numpy as np
+    from app.analytics.pronostico import tensor_demanda, ajustar, pronosticar
+
+    hoy = date.today()
+    inicio_historia = hoy - timedelta(days=historia_dias)
+    dias = np.arange(np.datetime64(inicio_historia, "D"), np.datetime64(hoy, "D"))
+    dias_futuros = np.arange(np.datetime64(hoy, "D"), np.datetime64(hoy + timedelta(weeks=semanas), "D"))
+
+    producto_ids = np.array(db.execute(select(Producto.producto_id).order_by(Producto.producto_id)).scalars().all(), dtype=np.int64)
+    lineas_producto, lineas_tipo, lineas_inicio, lineas_fin, lineas_cantidad = historia_demanda(
+        db, inicio_historia, hoy - timedelta(days=1)
+    )
+    generado_en = datetime.now()
+    if producto_ids.size == 0:
+        return {"productos": 0, "dias": 0, "filas": 0, "tipos_evento": []}
+
+    # Tipos de evento: los más frecuentes por unidades, el resto en "otros"
+    cantidades = np.asarray(lineas_cantidad, dtype=np.float64)
+    tipos, tipo_idx = np.unique(np.asarray(lineas_tipo, dtype=object), return_inverse=True)
+    volumen = np.bincount(tipo_idx, weights=cantidades, minlength=tipos.size)
+    orden = np.argsort(-volumen, kind="stable")
+    principales = orden[:max_tipos]
+    remapeo = np.full(tipos.size, len(principales), dtype=np.int64)
+    remapeo[principales] = np.arange(len(principales))
+    tipo_idx = remapeo[tipo_idx] if tipos.size else np.zeros(0, dtype=np.int64)
+    nombres_tipos = [str(t) for t in tipos[principales]] + (["otros"] if tipos.size > max_tipos else [])
+    n_tipos = max(len(nombres_tipos), 1)
+
+    # Índices de producto y de día (recortados a la ventana de historia)
+    linea_producto = np.asarray(lineas_producto, dtype=np.int64)
+    posiciones = np.searchsorted(producto_ids, linea_producto)
+    validas = (posiciones < producto_ids.size) & (producto_ids[np.minimum(posiciones, producto_ids.size - 1)] == linea_producto)
+    inicio = np.clip((np.asarray(lineas_inicio, dtype="datetime64[D]") - dias[0]).astype(np.int64), 0, dias.size - 1)
+    fin = np.clip((np.asarray(lineas_fin, dtype="datetime64[D]") - dias[0]).astype(np.int64), 0, dias.size - 1)
+
+    H = tensor_demanda(
+        tipo_idx[validas], posiciones[validas], inicio[validas], fin[validas], cantidades[validas],
+        n_tipos, producto_ids.size, dias.size
+    )
+    niveles, factor_mes, factor_semana = ajustar(H, dias)
+    pronostico = np.round(pronosticar(niveles, factor_mes, factor_semana, dias_futuros), 2)
+
+    # Reemplazar los días futuros en lotes con INSERT multi-fila
+    fechas = [dia.item() for dia in dias_futuros]
+    filas_escritas = 0
+    try:
+        db.execute(delete(PronosticoDemanda).where(PronosticoDemanda.fecha >= hoy))
+        filas = (
+            {"producto_id": int(producto_id), "fecha": fecha, "unidades": float(valor), "generado_en": generado_en}
+            for producto_id, fila in zip(producto_ids, pronostico)
+            for fecha, valor in zip(fechas, fila)
+        )
+        lote_actual = []
+        for fila in filas:
+            lote_actual.append(fila)
+            if len(lote_actual) >= lote:
+                db.execute(insert(PronosticoDemanda), lote_actual)
+                filas_escritas += len(lote_actual)
+                lote_actual = []
+        if lote_actual:
+            db.execute(insert(PronosticoDemanda), lote_actual)
+            filas_escritas += len(lote_actual)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return {
+        "productos": int(producto_ids.size),
+        "dias": len(fechas),
+        "filas": filas_escritas,
+        "tipos_evento": nombres_tipos,
+        "factor_mes": {nombre: factor_mes[i].round(3).tolist() for i, nombre in enumerate(nombres_tipos)},
+        "factor_dia_semana": {nombre: factor_semana[i].round(3).tolist() for i, nombre in enumerate(nombres_tipos)}
+    }
+
+def obtener_pronostico(db: Session, desde: date, hasta: date, producto_id: int = None, solo_faltantes: bool = False):
+    """
+    Pronóstico guardado por producto, con el pico esperado del periodo y los
+    días en que supera stock_total. Devuelve una lista ordenada por mayor
+    faltante.
+    """
+    consulta = select(
+        PronosticoDemanda.producto_id, PronosticoDemanda.fecha, PronosticoDemanda.unidades,
+        PronosticoDemanda.generado_en
+    ).where(PronosticoDemanda.fecha >= desde, PronosticoDemanda.fecha <= hasta)
+    if producto_id is not None:
+        consulta = consulta.where(PronosticoDemanda.producto_id == producto_id)
+    filas = db.execute(consulta.order_by(PronosticoDemanda.producto_id, PronosticoDemanda.fecha)).all()
+
+    por_producto = {}
+    for fila in filas:
+        por_producto.setdefault(fila.producto_id, []).append(fila)
+    catalogo = {
+        fila.producto_id: fila for fila in db.execute(
+            select(Producto.producto_id, Producto.codigo_producto, Producto.nombre, Producto.stock_total)
+            .where(Producto.producto_id.in_(list(por_producto)))
+        ).all()
+    } if por_producto else {}
+
+    resultado = []
+    for pid, dias in por_producto.items():
+        producto = catalogo.get(pid)
+        stock_total = producto.stock_total if producto else 0
+        pico = max(dias, key=lambda fila: fila.unidades)
+        dias_faltante = [fila.fecha.isoformat() for fila in dias if fila.unidades > stock_total]
+        if solo_faltantes and not dias_faltante:
+            continue
+        resultado.append({
+            "producto_id": pid,
+            "codigo_producto": producto.codigo_producto if producto else None,
+            "nombre": producto.nombre if producto else None,
+            "stock_total": stock_total,
+            "pico_esperado": float(pico.unidades),
+            "fecha_pico": pico.fecha.isoformat(),
+            "dias_con_faltante": dias_faltante,
+            "generado_en": dias[0].generado_en.isoformat() if dias[0].generado_en else None,
+            "pronostico": [{"fecha": fila.fecha.isoformat(), "unidades": float(fila.unidades)} for fila in dias]
+        })
+    resultado.sort(key=lambda fila: fila["pico_esperado"] - fila["stock_total"], reverse=True)
+    return resultado
+
+# ========== PLANEACIÓN DE CAPACIDAD (MONTE CARLO) ==========
+def planificar_capacidad(db: Session, semanas: int = 8, historia_dias: int = 730, escenarios: int = 5000,
+                         nivel_servicio: float = 0.95, procesos: int = 0, semilla: int = 0) -> dict:
+    """
+    Simular la demanda de las próximas `semanas` para todo el catálogo con
+    app.analytics.capacidad y reemplazar la tabla recomendacion_stock.
+    La historia se lee en una sola consulta (la misma del pronóstico).
+    """
+    import numpy as np
+    from app.analytics.capacidad import planificar, tasas_por_dia
+
+    hoy = date.today()
+    inicio_historia = hoy - timedelta(days=historia_dias)
+    productos = db.execute(select(Producto.producto_id, Producto.stock_total).order_by(Producto.producto_id)).all()
+    lineas_producto, _, lineas_inicio, lineas_fin, lineas_cantidad = historia_demanda(db, inicio_historia, hoy - timedelta(days=1))
+    generado_en = datetime.now()
+
+    linea_producto = np.asarray(lineas_producto, dtype=np.int64)
+    inicio = np.asarray(lineas_inicio, dtype="datetime64[D]")
+    duracion = (np.asarray(lineas_fin, dtype="datetime64[D]") - inicio).astype(np.int64) + 1
+    cantidad = np.asarray(lineas_cantidad, dtype=np.float64)
+    mes_inicio = inicio.astype("datetime64[M]").astype(np.int64) % 12
+    reparto_global = (np.bincount(mes_inicio, minlength=12) + 1.0) / (mes_inicio.size + 12.0)
+
+    horizonte = np.arange(np.datetime64(hoy, "D"), np.datetime64(hoy + timedelta(weeks=semanas), "D"))
+    meses_horizonte = horizonte.astype("datetime64[M]").astype(np.int64) % 12
+
+    # Líneas agrupadas por producto con un solo argsort
+    orden = np.argsort(linea_producto, kind="stable")
+    ids_ordenados = linea_producto[orden]
+    entradas = []
+    for producto in productos:
+        desde_i, hasta_i = np.searchsorted(ids_ordenados, [producto.producto_id, producto.producto_id + 1])
+        indices = orden[desde_i:hasta_i]
+        entradas.append({
+            "producto_id": producto.producto_id,
+            "stock_total": producto.stock_total or 0,
+            "tasa_por_dia": tasas_por_dia(indices.size, mes_inicio[indices], meses_horizonte, historia_dias, reparto_global),
+            "cantidades": cantidad[indices],
+            "duraciones": duracion[indices],
+        })
+
+    resultados = planificar(entradas, escenarios=escenarios, nivel_servicio=nivel_servicio, procesos=procesos, semilla=semilla)
+    stock_por_producto = {entrada["producto_id"]: entrada["stock_total"] for entrada in entradas}
+    try:
+        db.execute(delete(RecomendacionStock))
+        if resultados:
+            db.execute(insert(RecomendacionStock), [{
+                **resultado,
+                "stock_actual": stock_por_producto[resultado["producto_id"]],
+                "nivel_servicio": nivel_servicio,
+                "escenarios": escenarios,
+                "horizonte_dias": int(horizonte.size),
+                "generado_en": generado_en
+            } for resultado in resultados])
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    faltan = [r for r in resultados if r["stock_recomendado"] > stock_por_producto[r["producto_id"]]]
+    return {
+        "productos": len(resultados),
+        "con_stock_insuficiente": len(faltan),
+        "unidades_a_comprar": sum(r["stock_recomendado"] - stock_por_producto[r["producto_id"]] for r in faltan),
+        "horizonte_dias": int(horizonte.size),
+        "generado_en": generado_en
+    }
+
+def obtener_recomendaciones_stock(db: Session, solo_insuficientes: bool = False, skip: int = 0, limit: int = 100):
+    """Recomendaciones guardadas con código y nombre del producto, mayor déficit primero"""
+    deficit = RecomendacionStock.stock_recomendado - RecomendacionStock.stock_actual
+    consulta = db.query(RecomendacionStock, Producto.codigo_producto, Producto.nombre).outerjoin(
+        Producto, Producto.producto_id == RecomendacionStock.producto_id
+    )
+    if solo_insuficientes:
+        consulta = consulta.filter(deficit > 0)
+    return consulta.order_by(deficit.desc(), RecomendacionStock.prob_faltante_actual.desc()).offset(skip).limit(limit).all()
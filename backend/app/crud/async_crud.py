@@ -0,0 +1,107 @@
+"""
+Operaciones de solo lectura sobre la sesión asíncrona.
+
+Replican las consultas de crud.py y solicitud_crud.py que usan los endpoints
+de catálogo y de "mis solicitudes", para que puedan atenderse sin ocupar un
+hilo del threadpool mientras esperan a la base de datos.
+"""
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
+from typing import List, Optional
+from app.models.models import Categoria, Producto
+from app.crud.solicitud_crud import consulta_resumen_solicitudes
+from app.crud.especificaciones_crud import condiciones_filtros, consulta_claves_declaradas, verificar_claves
+
+
+# ========== CATEGORÍAS ==========
+
+async def obtener_categorias(db: AsyncSession, skip: int = 0, limit: int = 100) -> List[Categoria]:
+    """Obtener todas las categorías activas"""
+    result = await db.execute(
+        select(Categoria).where(Categoria.activo == True).offset(skip).limit(limit)
+    )
+    return result.scalars().all()
+
+
+async def obtener_categoria(db: AsyncSession, categoria_id: int) -> Optional[Categoria]:
+    """Obtener categoría por ID"""
+    result = await db.execute(select(Categoria).where(Categoria.categoria_id == categoria_id))
+    return result.scalars().first()
+
+
+# ========== PRODUCTOS ==========
+
+async def obtener_productos(db: AsyncSession, skip: int = 0, limit: int = 100, filtros_especificaciones: list = None) -> List[Producto]:
+    """Obtener todos los productos disponibles (filtros: ver especificaciones_crud.parsear_filtros)"""
+    result = await db.execute(
+        select(Producto).where(
+            Producto.estado == "disponible",
+            *condiciones_filtros(filtros_especificaciones or [])
+        ).offset(skip).limit(limit)
+    )
+    return result.scalars().all()
+
+
+async def validar_claves_especificacion(db: AsyncSession, filtros: list) -> None:
+    """Lanza ValueError si algún filtro usa una clave que ningún esquema declara"""
+    if filtros:
+        result = await db.execute(consulta_claves_declaradas(filtros))
+        verificar_claves(filtros, result.scalars())
+
+
+async def obtener_producto(db: AsyncSession, producto_id: int) -> Optional[Producto]:
+    """Obtener producto por ID junto con su categoría"""
+    result = await db.execute(
+        select(Producto)
+        .options(joinedload(Producto.categoria))
+        .where(Producto.producto_id == producto_id)
+    )
+    return result.scalars().first()
+
+
+async def obtener_productos_por_categoria(db: AsyncSession, categoria_id: int, skip: int = 0, limit: int = 100) -> List[Producto]:
+    """Obtener productos por categoría"""
+    result = await db.execute(
+        select(Producto)
+        .where(Producto.categoria_id == categoria_id, Producto.estado == "disponible")
+        .offset(skip).limit(limit)
+    )
+    return result.scalars().all()
+
+
+async def obtener_productos_con_categoria(db: AsyncSession, skip: int = 0, limit: int = 100):
+    """Obtener productos con información de categoría"""
+    query = text("""
+        SELECT
+            p.producto_id,
+            p.categoria_id,
+            p.codigo_producto,
+            p.nombre,
+            p.descripcion,
+            p.precio_por_dia,
+            p.stock_total,
+            p.stock_disponible,
+            p.estado,
+            p.imagen_dato,
+            p.requiere_deposito,
+            p.deposito_cantidad,
+            c.nombre as categoria_nombre,
+            c.descripcion as categoria_descripcion
+        FROM productos p
+        INNER JOIN categorias c ON p.categoria_id = c.categoria_id
+        WHERE p.estado = 'disponible' AND c.activo = 1
+        ORDER BY c.nombre, p.nombre
+        LIMIT :limit OFFSET :skip
+    """)
+
+    result = await db.execute(query, {"skip": skip, "limit": limit})
+    return result.fetchall()
+
+
+# ========== SOLICITUDES ==========
+
+async def obtener_solicitudes_usuario(db: AsyncSession, usuario_id: int, skip: int = 0, limit: int = 100):
+    """Obtiene el listado resumido de las solicitudes de un usuario"""
+    result = await db.execute(consulta_resumen_solicitudes(usuario_id=usuario_id, skip=skip, limit=limit))
+    return result.all()
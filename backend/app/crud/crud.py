@@ -1,7 +1,8 @@
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload
 from sqlalchemy import text
 from app.models.models import Categoria, Producto, Usuario, Administrador, Paquete
 from app.core.auth import hash_password
+from app.crud import especificaciones_crud, analytics_crud
 from typing import List, Optional
 import json
 
@@ -51,9 +52,12 @@ class CategoriasCRUD:
         return True
 
 class ProductosCRUD:
-    def get_all(self, db: Session, skip: int = 0, limit: int = 100) -> List[Producto]:
-        """Obtener todos los productos disponibles"""
-        return db.query(Producto).filter(Producto.estado == "disponible").offset(skip).limit(limit).all()
+    def get_all(self, db: Session, skip: int = 0, limit: int = 100, filtros_especificaciones: list = None) -> List[Producto]:
+        """Obtener todos los productos disponibles (filtros: ver especificaciones_crud.parsear_filtros)"""
+        return db.query(Producto).filter(
+            Producto.estado == "disponible",
+            *especificaciones_crud.condiciones_filtros(filtros_especificaciones or [])
+        ).offset(skip).limit(limit).all()
     
     def get_all_admin(self, db: Session, skip: int = 0, limit: int = 100) -> List[Producto]:
         """Obtener todos los productos (para administrador)"""
@@ -70,6 +74,10 @@ class ProductosCRUD:
         """Obtener producto por ID"""
         return db.query(Producto).filter(Producto.producto_id == producto_id).first()
     
+    def get_by_id_con_categoria(self, db: Session, producto_id: int) -> Optional[Producto]:
+        """Obtener producto por ID con su categoría en la misma consulta"""
+        return db.query(Producto).options(joinedload(Producto.categoria)).filter(Producto.producto_id == producto_id).first()
+    
     def create_producto(self, db: Session, producto_data: dict) -> Producto:
         """Crear nuevo producto"""
         try:
@@ -86,6 +94,8 @@ class ProductosCRUD:
             
             db_producto = Producto(**producto_data)
             db.add(db_producto)
+            db.flush()
+            especificaciones_crud.sincronizar_atributos(db, [db_producto.producto_id])
             db.commit()
             db.refresh(db_producto)
             return db_producto
@@ -98,6 +108,7 @@ class ProductosCRUD:
         db_producto = self.get_by_id(db, producto_id)
         if not db_producto:
             return None
+        categoria_anterior = db_producto.categoria_id
         
         # Actualizar solo los campos que se proporcionan
         for key, value in producto_data.items():
@@ -120,6 +131,14 @@ class ProductosCRUD:
                     setattr(db_producto, key, value)
         
         try:
+            if 'especificaciones' in producto_data or 'categoria_id' in producto_data:
+                db.flush()
+                especificaciones_crud.sincronizar_atributos(db, [producto_id])
+            if db_producto.categoria_id != categoria_anterior:
+                # Las rentas ya contabilizadas pasan a la nueva categoría en los rollups
+                analytics_crud.reconstruir_rollup_categorias(
+                    db, [producto_id], [categoria_anterior, db_producto.categoria_id]
+                )
             db.commit()
             db.refresh(db_producto)
             return db_producto
@@ -275,48 +294,6 @@ class AdministradoresCRUD:
     def email_exists(self, db: Session, email: str) -> bool:
         """Verificar si un email de administrador ya existe"""
         return db.query(Administrador).filter(Administrador.email == email).first() is not None
-    
-    def get_admin_stats(self, db: Session):
-        """Obtener estadísticas para el dashboard de administrador"""
-        # Productos más pedidos (simulado por ahora)
-        productos_populares = text("""
-            SELECT p.producto_id, p.nombre, p.categoria_id, c.nombre as categoria_nombre,
-                   p.stock_total - p.stock_disponible as veces_pedido
-            FROM productos p
-            INNER JOIN categorias c ON p.categoria_id = c.categoria_id
-            WHERE p.estado = 'disponible'
-            ORDER BY veces_pedido DESC
-            LIMIT 10
-        """)
-        
-        # Categorías más populares
-        categorias_populares = text("""
-            SELECT c.categoria_id, c.nombre, 
-                   COUNT(p.producto_id) as total_productos,
-                   SUM(p.stock_total - p.stock_disponible) as total_pedidos
-            FROM categorias c
-            LEFT JOIN productos p ON c.categoria_id = p.categoria_id
-            WHERE c.activo = 1 AND p.estado = 'disponible'
-            GROUP BY c.categoria_id, c.nombre
-            ORDER BY total_pedidos DESC
-            LIMIT 10
-        """)
-        
-        # Estadísticas generales incluyendo paquetes
-        stats_generales = text("""
-            SELECT 
-                (SELECT COUNT(*) FROM productos WHERE estado = 'disponible') as total_productos,
-                (SELECT COUNT(*) FROM categorias WHERE activo = 1) as total_categorias,
-                (SELECT COUNT(*) FROM paquetes WHERE activo = 1) as total_paquetes,
-                (SELECT COUNT(*) FROM usuarios) as total_usuarios,
-                (SELECT SUM(stock_total - stock_disponible) FROM productos) as total_pedidos
-        """)
-        
-        return {
-            'productos_populares': db.execute(productos_populares).fetchall(),
-            'categorias_populares': db.execute(categorias_populares).fetchall(),
-            'stats_generales': db.execute(stats_generales).fetchone()
-        }
 
 class PaquetesCRUD:
     def get_all(self, db: Session, skip: int = 0, limit: int = 100) -> List[Paquete]:
@@ -0,0 +1,282 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import select, func, delete, insert
+from typing import List, Optional
+import json
+import logging
+import re
+from app.models.models import Producto
+from app.models.especificacion_models import EspecificacionCategoria, ProductoAtributo
+from app.analytics.similitud import normalizar
+
+logger = logging.getLogger("kabe.especificaciones")
+
+TIPOS_ESPECIFICACION = ("texto", "numero", "booleano")
+
+_NUMERO = re.compile(r"-?\d+(?:[.,]\d+)?")
+_VERDADEROS = {"true", "si", "1", "yes", "x"}
+_FALSOS = {"false", "no", "0"}
+
+# Filtro de la query string: clave:valor, clave=valor, clave>=n, clave<=n
+_FILTRO = re.compile(r"^\s*([\w.\- ]+?)\s*(>=|<=|:|=)\s*(.+?)\s*$")
+
+# ========== NORMALIZACIÓN DE VALORES ==========
+def normalizar_clave(clave: str) -> str:
+    return re.sub(r"\s+", "_", normalizar(clave).strip())[:50]
+
+def _texto_numero(numero: float) -> str:
+    """4.0 -> "4", 1.5 -> "1.5" (forma canónica para igualdad)"""
+    return str(int(numero)) if float(numero).is_integer() else repr(float(numero))
+
+def coercionar(valor, tipo: str):
+    """
+    (valor_texto, valor_numero) de un valor según el tipo declarado, o None si
+    no se puede interpretar. "120 cm" es 120 para una clave numérica.
+    """
+    if valor is None or isinstance(valor, (dict, list)):
+        return None
+    if tipo == "numero":
+        if isinstance(valor, bool):
+            return None
+        if isinstance(valor, (int, float)):
+            numero = float(valor)
+        else:
+            encontrado = _NUMERO.search(str(valor))
+            if not encontrado:
+                return None
+            numero = float(encontrado.group().replace(",", "."))
+        return _texto_numero(numero), numero
+    if tipo == "booleano":
+        texto = valor if isinstance(valor, bool) else normalizar(valor).strip()
+        if texto is True or texto in _VERDADEROS:
+            return "true", 1.0
+        if texto is False or texto in _FALSOS:
+            return "false", 0.0
+        return None
+    texto = normalizar(valor).strip()[:100]
+    return (texto, None) if texto else None
+
+def _como_dict(especificaciones) -> dict:
+    if isinstance(especificaciones, str):
+        try:
+            especificaciones = json.loads(especificaciones)
+        except ValueError:
+            return {}
+    return especificaciones if isinstance(especificaciones, dict) else {}
+
+def extraer_atributos(producto_id: int, especificaciones, esquema: dict) -> list:
+    """Filas de producto_atributos para las claves del esquema {clave: tipo}"""
+    filas = []
+    for clave, valor in _como_dict(especificaciones).items():
+        clave = normalizar_clave(clave)
+        tipo = esquema.get(clave)
+        if tipo is None:
+            continue
+        convertido = coercionar(valor, tipo)
+        if convertido is None:
+            logger.debug("Producto %s: '%s' no es un %s válido para %s", producto_id, valor, tipo, clave)
+            continue
+        filas.append({"producto_id": producto_id, "clave": clave, "valor_texto": convertido[0], "valor_numero": convertido[1]})
+    return filas
+
+# ========== ESQUEMA POR CATEGORÍA ==========
+def obtener_esquema(db: Session, categoria_id: int) -> List[EspecificacionCategoria]:
+    return db.query(EspecificacionCategoria).filter(
+        EspecificacionCategoria.categoria_id == categoria_id
+    ).order_by(EspecificacionCategoria.clave).all()
+
+def _esquemas(db: Session, categoria_ids) -> dict:
+    """{categoria_id: {clave: tipo}} en una sola consulta"""
+    esquemas = {}
+    for fila in db.execute(
+        select(EspecificacionCategoria.categoria_id, EspecificacionCategoria.clave, EspecificacionCategoria.tipo)
+        .where(EspecificacionCategoria.categoria_id.in_(list(categoria_ids)))
+    ).all():
+        esquemas.setdefault(fila.categoria_id, {})[fila.clave] = fila.tipo
+    return esquemas
+
+def sincronizar_atributos(db: Session, producto_ids: Optional[list] = None, categoria_id: int = None,
+                          lote: int = 500, nuevos: bool = False) -> int:
+    """
+    Reescribir producto_atributos de los productos indicados (por ids, por
+    categoría o todos si no se indica nada). Con nuevos=True (productos
+    recién insertados) no se borran atributos previos. No hace commit.
+    """
+    consulta = select(Producto.producto_id, Producto.categoria_id, Producto.especificaciones)
+    if producto_ids is not None:
+        consulta = consulta.where(Producto.producto_id.in_(producto_ids))
+    if categoria_id is not None:
+        consulta = consulta.where(Producto.categoria_id == categoria_id)
+    productos = db.execute(consulta.order_by(Producto.producto_id)).all()
+
+    esquemas = _esquemas(db, {p.categoria_id for p in productos})
+    escritos = 0
+    for inicio in range(0, len(productos), lote):
+        bloque = productos[inicio:inicio + lote]
+        if not nuevos:
+            db.execute(delete(ProductoAtributo).where(ProductoAtributo.producto_id.in_([p.producto_id for p in bloque])))
+        filas = []
+        for producto in bloque:
+            filas += extraer_atributos(producto.producto_id, producto.especificaciones, esquemas.get(producto.categoria_id, {}))
+        if filas:
+            db.execute(insert(ProductoAtributo), filas)
+            escritos += len(filas)
+    return escritos
+
+def guardar_esquema(db: Session, categoria_id: int, claves: list) -> dict:
+    """Reemplazar el esquema de una categoría y volver a extraer los atributos de sus productos"""
+    vistas = set()
+    for definicion in claves:
+        clave = normalizar_clave(definicion["clave"])
+        if not clave:
+            raise ValueError("La clave de una especificación no puede estar vacía")
+        if definicion.get("tipo", "texto") not in TIPOS_ESPECIFICACION:
+            raise ValueError(f"Tipo inválido para '{clave}': usa {', '.join(TIPOS_ESPECIFICACION)}")
+        if clave in vistas:
+            raise ValueError(f"La clave '{clave}' está repetida")
+        vistas.add(clave)
+
+    try:
+        db.execute(delete(EspecificacionCategoria).where(EspecificacionCategoria.categoria_id == categoria_id))
+        if claves:
+            db.execute(insert(EspecificacionCategoria), [{
+                "categoria_id": categoria_id,
+                "clave": normalizar_clave(d["clave"]),
+                "tipo": d.get("tipo", "texto"),
+                "etiqueta": d.get("etiqueta") or d["clave"],
+                "unidad": d.get("unidad")
+            } for d in claves])
+        atributos = sincronizar_atributos(db, categoria_id=categoria_id)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return {"claves": len(claves), "atributos": atributos}
+
+def inferir_esquema(db: Session, categoria_id: int, min_frecuencia: float = 0.3) -> list:
+    """
+    Proponer un esquema con las claves escalares presentes en al menos
+    `min_frecuencia` de los productos de la categoría. Es numérica si todos
+    sus valores son números y booleana si todos son true/false.
+    """
+    productos = db.execute(
+        select(Producto.especificaciones).where(Producto.categoria_id == categoria_id)
+    ).scalars().all()
+    apariciones, tipos = {}, {}
+    for especificaciones in productos:
+        for clave, valor in _como_dict(especificaciones).items():
+            clave = normalizar_clave(clave)
+            if clave == "descripcion" or valor is None or isinstance(valor, (dict, list)):
+                continue
+            apariciones[clave] = apariciones.get(clave, 0) + 1
+            if isinstance(valor, bool):
+                tipo = "booleano"
+            elif isinstance(valor, (int, float)):
+                tipo = "numero"
+            else:
+                tipo = "texto"
+            tipos.setdefault(clave, set()).add(tipo)
+    minimo = max(1, int(len(productos) * min_frecuencia))
+    return [
+        {"clave": clave, "tipo": tipos[clave].pop() if len(tipos[clave]) == 1 else "texto"}
+        for clave, veces in sorted(apariciones.items()) if veces >= minimo
+    ]
+
+# ========== FILTROS ==========
+def parsear_filtros(filtros: Optional[List[str]]) -> list:
+    """
+    ["material:madera", "asientos>=4"] -> [(clave, operador, valor)].
+    Lanza ValueError si algún filtro no tiene la forma clave:valor o clave>=n.
+    Que la clave exista en algún esquema se comprueba aparte (validar_claves).
+    """
+    resultado = []
+    for filtro in filtros or []:
+        encontrado = _FILTRO.match(filtro)
+        if not encontrado:
+            raise ValueError(f"Filtro de especificación inválido: '{filtro}'")
+        clave, operador, valor = encontrado.groups()
+        clave = normalizar_clave(clave)
+        if operador in (">=", "<="):
+            try:
+                valor = float(valor.replace(",", "."))
+            except ValueError:
+                raise ValueError(f"'{filtro}': los filtros >= y <= requieren un número")
+        else:
+            operador = "="
+            convertido = coercionar(valor, "numero") if _NUMERO.fullmatch(valor.strip()) else None
+            valor = convertido[0] if convertido else normalizar(valor).strip()
+        resultado.append((clave, operador, valor))
+    return resultado
+
+def consulta_claves_declaradas(filtros: list):
+    """SELECT de las claves de los filtros que alguna categoría declara en su esquema"""
+    return select(EspecificacionCategoria.clave).distinct().where(
+        EspecificacionCategoria.clave.in_({clave for clave, _, _ in filtros})
+    )
+
+def verificar_claves(filtros: list, declaradas) -> None:
+    """Lanza ValueError si algún filtro usa una clave que ningún esquema declara"""
+    desconocidas = sorted({clave for clave, _, _ in filtros} - set(declaradas))
+    if desconocidas:
+        raise ValueError(f"Especificación no declarada en ninguna categoría: {', '.join(desconocidas)}")
+
+def validar_claves(db: Session, filtros: list) -> None:
+    if filtros:
+        verificar_claves(filtros, db.execute(consulta_claves_declaradas(filtros)).scalars())
+
+def condiciones_filtros(filtros: list) -> list:
+    """
+    Condiciones WHERE sobre Producto para los filtros parseados. Cada una es un
+    IN (semijoin) sobre producto_atributos que se resuelve solo con los índices
+    (clave, valor_texto, producto_id) o (clave, valor_numero, producto_id).
+    """
+    condiciones = []
+    for clave, operador, valor in filtros:
+        if operador == "=":
+            valor_ok = ProductoAtributo.valor_texto == valor
+        elif operador == ">=":
+            valor_ok = ProductoAtributo.valor_numero >= valor
+        else:
+            valor_ok = ProductoAtributo.valor_numero <= valor
+        condiciones.append(Producto.producto_id.in_(
+            select(ProductoAtributo.producto_id).where(ProductoAtributo.clave == clave, valor_ok)
+        ))
+    return condiciones
+
+def facetas(db: Session, categoria_id: int) -> list:
+    """Esquema de la categoría con los valores presentes (texto) o el rango (numéricos)"""
+    esquema = obtener_esquema(db, categoria_id)
+    if not esquema:
+        return []
+    de_la_categoria = select(Producto.producto_id).where(
+        Producto.categoria_id == categoria_id, Producto.estado == "disponible"
+    )
+    valores = db.execute(
+        select(ProductoAtributo.clave, ProductoAtributo.valor_texto, func.count().label("productos"),
+               func.min(ProductoAtributo.valor_numero), func.max(ProductoAtributo.valor_numero))
+        .where(ProductoAtributo.producto_id.in_(de_la_categoria))
+        .group_by(ProductoAtributo.clave, ProductoAtributo.valor_texto)
+    ).all()
+    por_clave = {}
+    for clave, valor_texto, productos, minimo, maximo in valores:
+        por_clave.setdefault(clave, []).append((valor_texto, productos, minimo, maximo))
+
+    resultado = []
+    for definicion in esquema:
+        filas = por_clave.get(definicion.clave, [])
+        faceta = {
+            "clave": definicion.clave,
+            "tipo": definicion.tipo,
+            "etiqueta": definicion.etiqueta,
+            "unidad": definicion.unidad
+        }
+        if definicion.tipo == "numero":
+            numeros = [f[2] for f in filas if f[2] is not None]
+            faceta["minimo"] = min(numeros) if numeros else None
+            faceta["maximo"] = max(f[3] for f in filas if f[3] is not None) if numeros else None
+        else:
+            faceta["valores"] = [
+                {"valor": valor, "productos": productos}
+                for valor, productos, _, _ in sorted(filas, key=lambda f: -f[1])
+            ]
+        resultado.append(faceta)
+    return resultado
@@ -0,0 +1,118 @@
+"""
+Exportación de tablas completas en NDJSON o CSV sin cargarlas en memoria.
+
+La consulta se ejecuta con yield_per (cursor del lado del servidor con
+pymysql) y cada partición de `lote` filas se serializa y se entrega como un
+bloque de bytes, opcionalmente comprimido en gzip de forma incremental, para
+enviarse con un StreamingResponse. La memoria usada depende del lote y no
+del tamaño de la tabla.
+"""
+from sqlalchemy import select
+from datetime import date, datetime
+from decimal import Decimal
+import base64
+import csv
+import enum
+import io
+import json
+import zlib
+from app.core.database import SessionLocal
+from app.models.models import Categoria, Producto, Paquete, Usuario
+from app.models.solicitud_models import Solicitud
+from app.models.pago_models import Pago
+
+FORMATOS_EXPORTACION = ("ndjson", "csv")
+
+# tabla: (modelo, columnas que nunca se exportan, columnas de imagen)
+EXPORTACIONES = {
+    "categorias": (Categoria, (), ()),
+    "productos": (Producto, (), ("imagen_dato",)),
+    "paquetes": (Paquete, (), ("imagen_dato",)),
+    "usuarios": (Usuario, ("password",), ()),
+    "solicitudes": (Solicitud, (), ()),
+    "pagos": (Pago, (), ()),
+}
+
+TIPOS_CONTENIDO = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+def columnas_exportables(tabla: str, incluir_imagenes: bool = False) -> list:
+    modelo, excluidas, imagenes = EXPORTACIONES[tabla]
+    if not incluir_imagenes:
+        excluidas = excluidas + imagenes
+    return [columna for columna in modelo.__table__.columns if columna.key not in excluidas]
+
+
+def _valor(valor, formato: str):
+    """Valor serializable: fechas ISO, decimales como texto exacto, enums por valor, binarios en base64"""
+    if isinstance(valor, enum.Enum):
+        return valor.value
+    if isinstance(valor, (datetime, date)):
+        return valor.isoformat()
+    if isinstance(valor, Decimal):
+        return str(valor)
+    if isinstance(valor, (bytes, bytearray, memoryview)):
+        return base64.b64encode(bytes(valor)).decode()
+    if formato == "csv" and isinstance(valor, (dict, list)):
+        return json.dumps(valor, ensure_ascii=False)
+    return valor
+
+
+def _bloque_ndjson(filas, nombres: list) -> str:
+    return "".join(
+        json.dumps({nombre: _valor(v, "ndjson") for nombre, v in zip(nombres, fila)}, ensure_ascii=False) + "\n"
+        for fila in filas
+    )
+
+
+def _vaciar(buffer: io.StringIO) -> str:
+    texto = buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate()
+    return texto
+
+
+def _bloque_csv(filas, escritor, buffer: io.StringIO) -> str:
+    escritor.writerows([_valor(v, "csv") for v in fila] for fila in filas)
+    return _vaciar(buffer)
+
+
+def generar_exportacion(tabla: str, formato: str = "ndjson", incluir_imagenes: bool = False,
+                        comprimir: bool = False, lote: int = 1000):
+    """
+    Generador de bloques de bytes con la tabla completa, en orden de clave
+    primaria. Abre su propia sesión de solo lectura porque se consume
+    mientras se envía la respuesta, después de que el endpoint retorna.
+    """
+    modelo = EXPORTACIONES[tabla][0]
+    columnas = columnas_exportables(tabla, incluir_imagenes)
+    nombres = [columna.key for columna in columnas]
+    # wbits=31: formato gzip (cabecera y CRC), no zlib
+    compresor = zlib.compressobj(6, zlib.DEFLATED, 31) if comprimir else None
+
+    def _salida(texto: str) -> bytes:
+        datos = texto.encode("utf-8")
+        return compresor.compress(datos) if compresor else datos
+
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+    db = SessionLocal(info={"solo_lectura": True})
+    try:
+        if formato == "csv":
+            escritor.writerow(nombres)
+            cabecera = _salida(_vaciar(buffer))
+            if cabecera:
+                yield cabecera
+        resultado = db.execute(
+            select(*columnas).order_by(*modelo.__table__.primary_key.columns)
+            .execution_options(yield_per=lote)
+        )
+        for filas in resultado.partitions():
+            texto = _bloque_csv(filas, escritor, buffer) if formato == "csv" else _bloque_ndjson(filas, nombres)
+            datos = _salida(texto)
+            if datos:
+                yield datos
+        if compresor:
+            yield compresor.flush()
+    finally:
+        db.close()
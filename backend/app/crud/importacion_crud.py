@@ -0,0 +1,217 @@
+"""
+Importación masiva de productos desde CSV o NDJSON.
+
+Las filas se leen una a una del archivo, se validan con las mismas reglas
+que POST /admin/productos y los códigos repetidos se detectan con una sola
+consulta por cada 1000 códigos (no un SELECT por producto). Las filas
+válidas se insertan con INSERT de varias filas, en transacciones de `lote`
+productos: si un lote falla, solo ese lote se reporta como error.
+"""
+from sqlalchemy.orm import Session
+from sqlalchemy import select, insert
+from decimal import Decimal, InvalidOperation
+from typing import Iterable, Iterator, Tuple
+import csv
+import json
+import logging
+from app.models.models import Categoria, Producto
+from app.crud import especificaciones_crud
+
+logger = logging.getLogger("kabe.importacion")
+
+FORMATOS_IMPORTACION = ("csv", "ndjson")
+CAMPOS_REQUERIDOS = ("codigo_producto", "nombre", "precio_por_dia", "stock_total")
+ESTADOS_PRODUCTO = ("disponible", "mantenimiento", "inactivo")
+# Longitud de las columnas de texto acotadas (se reporta el exceso, no se recorta)
+LONGITUD_MAXIMA = {campo: Producto.__table__.c[campo].type.length for campo in ("codigo_producto", "nombre", "dimensiones")}
+
+# Máximo de errores que se devuelven en el reporte (el conteo sí es total)
+MAX_ERRORES_REPORTE = 1000
+
+# ========== LECTURA ==========
+def formato_de_archivo(nombre: str, formato: str = None) -> str:
+    """Formato explícito o deducido de la extensión (.csv, .ndjson/.jsonl)"""
+    if formato:
+        formato = formato.lower()
+    elif nombre and nombre.lower().endswith(".csv"):
+        formato = "csv"
+    elif nombre and nombre.lower().endswith((".ndjson", ".jsonl")):
+        formato = "ndjson"
+    if formato not in FORMATOS_IMPORTACION:
+        raise ValueError(f"Formato no soportado: usa {' o '.join(FORMATOS_IMPORTACION)}")
+    return formato
+
+def leer_filas(lineas: Iterable[str], formato: str) -> Iterator[Tuple[int, object]]:
+    """(número de fila, dict) por registro; si una línea NDJSON no es válida se entrega el mensaje de error"""
+    if formato == "csv":
+        for numero, fila in enumerate(csv.DictReader(lineas), start=2):  # la fila 1 es el encabezado
+            yield numero, {k.strip(): v for k, v in fila.items() if k}
+        return
+    for numero, linea in enumerate(lineas, start=1):
+        if not linea.strip():
+            continue
+        try:
+            registro = json.loads(linea)
+        except ValueError as e:
+            yield numero, f"JSON inválido: {e}"
+            continue
+        yield numero, registro if isinstance(registro, dict) else "Cada línea debe ser un objeto JSON"
+
+# ========== VALIDACIÓN ==========
+def _vacio(valor) -> bool:
+    return valor is None or str(valor).strip() == ""
+
+def _decimal(valor):
+    return Decimal(str(valor).strip().replace(",", "."))
+
+def _booleano(valor) -> bool:
+    return valor if isinstance(valor, bool) else str(valor).strip().lower() in ("true", "1", "yes", "si", "sí", "on")
+
+def validar_fila(fila: dict, categorias: dict) -> Tuple[dict, list]:
+    """
+    Convertir una fila del archivo al dict de columnas de Producto.
+    categorias: {categoria_id: categoria_id, nombre_en_minúsculas: categoria_id}.
+    Devuelve (producto, errores); producto es None si hay errores.
+    """
+    errores = [f"El campo {campo} es requerido" for campo in CAMPOS_REQUERIDOS if _vacio(fila.get(campo))]
+
+    categoria = fila.get("categoria_id")
+    if _vacio(categoria):
+        categoria = fila.get("categoria")
+    categoria_id = None
+    if _vacio(categoria):
+        errores.append("El campo categoria_id (o categoria) es requerido")
+    else:
+        clave = str(categoria).strip()
+        # isdigit() también acepta dígitos no ASCII como '²', que int() rechaza
+        categoria_id = categorias.get(int(clave)) if clave.isascii() and clave.isdigit() else categorias.get(clave.lower())
+        if categoria_id is None:
+            errores.append(f"La categoría '{clave}' no existe")
+    if errores:
+        return None, errores
+
+    producto = {
+        "categoria_id": categoria_id,
+        "codigo_producto": str(fila["codigo_producto"]).strip(),
+        "nombre": str(fila["nombre"]).strip(),
+        "descripcion": None if _vacio(fila.get("descripcion")) else str(fila["descripcion"]),
+        "dimensiones": None if _vacio(fila.get("dimensiones")) else str(fila["dimensiones"]),
+        "estado": "disponible" if _vacio(fila.get("estado")) else str(fila["estado"]).strip().lower(),
+        "requiere_deposito": False if _vacio(fila.get("requiere_deposito")) else _booleano(fila["requiere_deposito"]),
+    }
+    for campo, maximo in LONGITUD_MAXIMA.items():
+        if producto[campo] is not None and len(producto[campo]) > maximo:
+            errores.append(f"El campo {campo} admite como máximo {maximo} caracteres")
+    if producto["estado"] not in ESTADOS_PRODUCTO:
+        errores.append(f"Estado inválido: usa {', '.join(ESTADOS_PRODUCTO)}")
+
+    try:
+        producto["precio_por_dia"] = _decimal(fila["precio_por_dia"])
+        if producto["precio_por_dia"] <= 0:
+            errores.append("El precio por día debe ser mayor a 0")
+    except InvalidOperation:
+        errores.append("precio_por_dia debe ser un número")
+    for campo in ("peso", "deposito_cantidad"):
+        try:
+            producto[campo] = None if _vacio(fila.get(campo)) else _decimal(fila[campo])
+        except InvalidOperation:
+            errores.append(f"{campo} debe ser un número")
+
+    try:
+        producto["stock_total"] = int(str(fila["stock_total"]).strip())
+        disponible = fila.get("stock_disponible")
+        producto["stock_disponible"] = producto["stock_total"] if _vacio(disponible) else int(str(disponible).strip())
+        if producto["stock_total"] < 0:
+            errores.append("El stock total no puede ser negativo")
+        if producto["stock_disponible"] < 0:
+            errores.append("El stock disponible no puede ser negativo")
+        if producto["stock_disponible"] > producto["stock_total"]:
+            errores.append("El stock disponible no puede ser mayor al stock total")
+    except ValueError:
+        errores.append("stock_total y stock_disponible deben ser enteros")
+
+    # Mismo formato que create_producto: JSON tal cual, texto plano como {"descripcion": ...}
+    especificaciones = fila.get("especificaciones")
+    if isinstance(especificaciones, dict) or _vacio(especificaciones):
+        producto["especificaciones"] = especificaciones or None
+    else:
+        try:
+            producto["especificaciones"] = json.loads(especificaciones)
+        except (ValueError, TypeError):
+            producto["especificaciones"] = {"descripcion": str(especificaciones)}
+
+    return (None, errores) if errores else (producto, [])
+
+def _codigos_existentes(db: Session, codigos: list, bloque: int = 1000) -> set:
+    existentes = set()
+    for inicio in range(0, len(codigos), bloque):
+        existentes.update(db.execute(
+            select(Producto.codigo_producto).where(Producto.codigo_producto.in_(codigos[inicio:inicio + bloque]))
+        ).scalars())
+    return existentes
+
+# ========== IMPORTACIÓN ==========
+def importar_productos(db: Session, filas: Iterable[Tuple[int, object]], lote: int = 1000, dry_run: bool = False) -> dict:
+    """
+    Validar todas las filas y luego insertar las válidas por lotes, un commit
+    por lote. Con dry_run solo se valida. Devuelve el reporte por fila.
+    """
+    categorias = {}
+    for categoria_id, nombre in db.execute(select(Categoria.categoria_id, Categoria.nombre)).all():
+        categorias[categoria_id] = categoria_id
+        categorias[nombre.strip().lower()] = categoria_id
+
+    reporte = {"filas": 0, "validas": 0, "insertados": 0, "con_errores": 0, "dry_run": dry_run, "errores": []}
+
+    def _error(numero, codigo, errores):
+        reporte["con_errores"] += 1
+        if len(reporte["errores"]) < MAX_ERRORES_REPORTE:
+            reporte["errores"].append({"fila": numero, "codigo_producto": codigo, "errores": errores})
+
+    validas, numeros, vistos = [], [], {}
+    for numero, fila in filas:
+        reporte["filas"] += 1
+        if isinstance(fila, str):
+            _error(numero, None, [fila])
+            continue
+        producto, errores = validar_fila(fila, categorias)
+        codigo = producto["codigo_producto"] if producto else (fila.get("codigo_producto") or None)
+        if producto and codigo in vistos:
+            errores = [f"Código repetido en el archivo (fila {vistos[codigo]})"]
+        if errores:
+            _error(numero, codigo, errores)
+            continue
+        vistos[codigo] = numero
+        validas.append(producto)
+        numeros.append(numero)
+
+    # Unicidad contra la base de datos en una consulta por bloque de códigos
+    existentes = _codigos_existentes(db, [p["codigo_producto"] for p in validas])
+    if existentes:
+        pendientes = []
+        for producto, numero in zip(validas, numeros):
+            if producto["codigo_producto"] in existentes:
+                _error(numero, producto["codigo_producto"], ["Ya existe un producto con este código"])
+            else:
+                pendientes.append((producto, numero))
+        validas, numeros = [p for p, _ in pendientes], [n for _, n in pendientes]
+    reporte["validas"] = len(validas)
+    if dry_run:
+        db.rollback()
+        return reporte
+
+    for inicio in range(0, len(validas), lote):
+        bloque = validas[inicio:inicio + lote]
+        try:
+            db.execute(insert(Producto), bloque)
+            codigos = [p["codigo_producto"] for p in bloque]
+            nuevos = db.execute(select(Producto.producto_id).where(Producto.codigo_producto.in_(codigos))).scalars().all()
+            especificaciones_crud.sincronizar_atributos(db, nuevos, nuevos=True)
+            db.commit()
+            reporte["insertados"] += len(bloque)
+        except Exception as e:
+            db.rollback()
+            logger.warning("Lote de importación %d-%d rechazado: %s", inicio, inicio + len(bloque), e)
+            for producto, numero in zip(bloque, numeros[inicio:inicio + lote]):
+                _error(numero, producto["codigo_producto"], [f"Lote rechazado por la base de datos: {str(e)[:200]}"])
+    return reporte
@@ -0,0 +1,179 @@
+"""
+Operaciones masivas de administración sobre productos y paquetes.
+
+Cada operación se resuelve con unas pocas sentencias UPDATE/DELETE ... WHERE
+id IN (...) en una sola transacción, en lugar de un SELECT, un UPDATE de la
+fila completa y un commit por elemento. Las funciones devuelven conteos y
+quien las llama invalida las cachés una sola vez.
+"""
+from sqlalchemy.orm import Session
+from sqlalchemy import select, update, delete, func
+from typing import List, Optional
+from app.models.models import Categoria, Producto, Paquete
+from app.models.solicitud_models import SolicitudProducto, SolicitudPaquete
+from app.models.especificacion_models import ProductoAtributo
+from app.models.analytics_models import PronosticoDemanda, RecomendacionStock
+from app.crud import especificaciones_crud, recomendaciones_crud, analytics_crud
+from app.crud.importacion_crud import ESTADOS_PRODUCTO
+
+
+class OperacionInvalida(ValueError):
+    """Parámetros incompatibles con la operación pedida"""
+
+
+def _condicion(columna_id, ids: Optional[List[int]], columna_categoria=None, categoria_id: int = None):
+    """WHERE de la selección: lista de ids, todos los de una categoría, o ambos"""
+    if not ids and categoria_id is None:
+        raise OperacionInvalida("Indica los ids o la categoría a la que se aplica la operación")
+    condiciones = []
+    if ids:
+        condiciones.append(columna_id.in_(list(dict.fromkeys(ids))))
+    if categoria_id is not None:
+        condiciones.append(columna_categoria == categoria_id)
+    return condiciones
+
+
+def _nuevo_precio(columna, precio_por_dia: float = None, porcentaje: float = None):
+    """Expresión SET para precio absoluto o ajuste porcentual (redondeado a centavos)"""
+    if (precio_por_dia is None) == (porcentaje is None):
+        raise OperacionInvalida("Indica precio_por_dia o porcentaje (solo uno)")
+    if precio_por_dia is not None:
+        if precio_por_dia <= 0:
+            raise OperacionInvalida("El precio por día debe ser mayor a 0")
+        return precio_por_dia
+    if porcentaje <= -100:
+        raise OperacionInvalida("El porcentaje debe ser mayor a -100")
+    return func.round(columna * (1 + porcentaje / 100), 2)
+
+
+def _ejecutar(db: Session, sentencia) -> int:
+    try:
+        resultado = db.execute(sentencia.execution_options(synchronize_session=False))
+        db.commit()
+        return resultado.rowcount
+    except Exception:
+        db.rollback()
+        raise
+
+
+# ========== PRODUCTOS ==========
+def ajustar_precio_productos(db: Session, producto_ids: list = None, categoria_id: int = None,
+                             precio_por_dia: float = None, porcentaje: float = None) -> int:
+    return _ejecutar(db, update(Producto).where(
+        *_condicion(Producto.producto_id, producto_ids, Producto.categoria_id, categoria_id)
+    ).values(precio_por_dia=_nuevo_precio(Producto.precio_por_dia, precio_por_dia, porcentaje)))
+
+
+def cambiar_estado_productos(db: Session, estado: str, producto_ids: list = None, categoria_id: int = None) -> int:
+    if estado not in ESTADOS_PRODUCTO:
+        raise OperacionInvalida(f"Estado inválido: usa {', '.join(ESTADOS_PRODUCTO)}")
+    return _ejecutar(db, update(Producto).where(
+        *_condicion(Producto.producto_id, producto_ids, Producto.categoria_id, categoria_id),
+        Producto.estado != estado
+    ).values(estado=estado))
+
+
+def mover_categoria_productos(db: Session, nueva_categoria_id: int, producto_ids: list = None, categoria_id: int = None) -> int:
+    """
+    Cambiar de categoría, volver a extraer los atributos según el esquema de
+    la nueva y recalcular rollup_categoria_dia de las categorías de origen y
+    destino, así la analítica por categoría usa la categoría actual
+    """
+    if db.get(Categoria, nueva_categoria_id) is None:
+        raise OperacionInvalida("La categoría destino no existe")
+    try:
+        filas = db.execute(select(Producto.producto_id, Producto.categoria_id).where(
+            *_condicion(Producto.producto_id, producto_ids, Producto.categoria_id, categoria_id),
+            Producto.categoria_id != nueva_categoria_id
+        )).all()
+        if not filas:
+            db.rollback()
+            return 0
+        ids = [fila.producto_id for fila in filas]
+        categorias = {fila.categoria_id for fila in filas} | {nueva_categoria_id}
+        db.execute(
+            update(Producto).where(Producto.producto_id.in_(ids))
+            .values(categoria_id=nueva_categoria_id)
+            .execution_options(synchronize_session=False)
+        )
+        especificaciones_crud.sincronizar_atributos(db, ids)
+        analytics_crud.reconstruir_rollup_categorias(db, ids, list(categorias))
+        db.commit()
+        return len(ids)
+    except Exception:
+        db.rollback()
+        raise
+
+
+def eliminar_productos(db: Session, producto_ids: list) -> dict:
+    """
+    Eliminar permanentemente, junto con sus atributos, pronósticos,
+    recomendaciones de stock y apariciones en productos relacionados (como
+    origen o como vecino). Los productos que aparecen en solicitudes se
+    omiten (el historial los referencia); conviene marcarlos inactivos.
+    """
+    ids = list(dict.fromkeys(producto_ids or []))
+    if not ids:
+        raise OperacionInvalida("Indica los productos a eliminar")
+    try:
+        existentes = set(db.execute(select(Producto.producto_id).where(Producto.producto_id.in_(ids))).scalars())
+        con_solicitudes = set(db.execute(
+            select(SolicitudProducto.producto_id).distinct().where(SolicitudProducto.producto_id.in_(ids))
+        ).scalars())
+        eliminables = sorted(existentes - con_solicitudes)
+        if eliminables:
+            db.execute(delete(ProductoAtributo).where(ProductoAtributo.producto_id.in_(eliminables)))
+            db.execute(delete(PronosticoDemanda).where(PronosticoDemanda.producto_id.in_(eliminables)))
+            db.execute(delete(RecomendacionStock).where(RecomendacionStock.producto_id.in_(eliminables)))
+            recomendaciones_crud.quitar_items(db, "producto", eliminables)
+            db.execute(delete(Producto).where(Producto.producto_id.in_(eliminables)).execution_options(synchronize_session=False))
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return {
+        "eliminados": len(eliminables),
+        "con_solicitudes": sorted(con_solicitudes & existentes),
+        "no_encontrados": sorted(set(ids) - existentes)
+    }
+
+
+# ========== PAQUETES ==========
+def ajustar_precio_paquetes(db: Session, paquete_ids: list, precio_por_dia: float = None, porcentaje: float = None) -> int:
+    return _ejecutar(db, update(Paquete).where(
+        *_condicion(Paquete.paquete_id, paquete_ids)
+    ).values(precio_por_dia=_nuevo_precio(Paquete.precio_por_dia, precio_por_dia, porcentaje)))
+
+
+def activar_paquetes(db: Session, paquete_ids: list, activo: bool) -> int:
+    return _ejecutar(db, update(Paquete).where(
+        *_condicion(Paquete.paquete_id, paquete_ids), Paquete.activo != activo
+    ).values(activo=activo))
+
+
+def eliminar_paquetes(db: Session, paquete_ids: list) -> dict:
+    """
+    Eliminar permanentemente, también de productos relacionados; los
+    paquetes que aparecen en solicitudes se omiten
+    """
+    ids = list(dict.fromkeys(paquete_ids or []))
+    if not ids:
+        raise OperacionInvalida("Indica los paquetes a eliminar")
+    try:
+        existentes = set(db.execute(select(Paquete.paquete_id).where(Paquete.paquete_id.in_(ids))).scalars())
+        con_solicitudes = set(db.execute(
+            select(SolicitudPaquete.paquete_id).distinct().where(SolicitudPaquete.paquete_id.in_(ids))
+        ).scalars())
+        eliminables = sorted(existentes - con_solicitudes)
+        if eliminables:
+            recomendaciones_crud.quitar_items(db, "paquete", eliminables)
+            db.execute(delete(Paquete).where(Paquete.paquete_id.in_(eliminables)).execution_options(synchronize_session=False))
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return {
+        "eliminados": len(eliminables),
+        "con_solicitudes": sorted(con_solicitudes & existentes),
+        "no_encontrados": sorted(set(ids) - existentes)
+    }
@@ -5,6 +5,7 @@ from datetime import datetime, date
 import secrets
 from ..models.pago_models import Pago, TarjetaUsuario, TipoPago, MetodoPago, EstadoPago
 from ..schemas.pago_schemas import PagoCreate, TarjetaCreate, TarjetaUpdate
+from . import solicitud_crud, analytics_crud
 
 
 # ============================================
@@ -32,6 +33,10 @@ def crear_pago(db: Session, pago_data: PagoCreate, usuario_id: int) -> Pago:
     )
     
     db.add(nuevo_pago)
+    # Actualizar el resumen de pagos de la solicitud en la misma transacción
+    monto = -pago_data.monto if pago_data.tipo_pago == TipoPago.devolucion_deposito else pago_data.monto
+    solicitud_crud.registrar_pago_en_solicitud(db, pago_data.solicitud_id, monto)
+    analytics_crud.registrar_pago(db, pago_data.tipo_pago, monto)
     db.commit()
     db.refresh(nuevo_pago)
     return nuevo_pago
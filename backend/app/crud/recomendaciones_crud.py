@@ -0,0 +1,441 @@
+from sqlalchemy.orm import Session, aliased
+from sqlalchemy import select, func, delete, insert, union_all, and_
+from datetime import date
+import logging
+import threading
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.models import Producto, Paquete, Configuracion
+from app.models.solicitud_models import Solicitud, SolicitudProducto, SolicitudPaquete
+from app.models.recomendacion_models import CoocurrenciaItem, CoocurrenciaPar, CoocurrenciaSolicitud, ProductoRelacionado
+from app.crud.analytics_crud import upsert_incrementos, ESTADOS_COMPROMETIDOS, ESTADOS_CONTABILIZADOS
+
+logger = logging.getLogger("kabe.recomendaciones")
+
+# Fila de configuraciones con el número de solicitudes contadas. Se crea en
+# la migración 0010 para que el FOR UPDATE siempre tenga una fila que
+# bloquear y dos actualizaciones no se intercalen.
+CLAVE_TOTAL_SOLICITUDES = "relacionados_total_solicitudes"
+
+TIPOS_ITEM = ("producto", "paquete")  # índice = código % 2 (ver app.analytics.coocurrencia)
+
+# ========== CONFIGURACIÓN ==========
+def _leer_config(db: Session, clave: str, bloquear: bool = False) -> int:
+    consulta = db.query(Configuracion).filter(Configuracion.clave == clave)
+    if bloquear:
+        consulta = consulta.with_for_update()
+    config = consulta.first()
+    return int(config.valor) if config else 0
+
+def _guardar_config(db: Session, clave: str, valor: int, descripcion: str):
+    config = db.query(Configuracion).filter(Configuracion.clave == clave).first()
+    if config:
+        config.valor = str(valor)
+    else:
+        db.add(Configuracion(clave=clave, valor=str(valor), descripcion=descripcion, tipo_dato="number"))
+
+# ========== CONTEOS INCREMENTALES ==========
+def _en_lotes(filas: list, lote: int = 1000):
+    for inicio in range(0, len(filas), lote):
+        yield filas[inicio:inicio + lote]
+
+def _canastas(db: Session, solicitud_ids: list):
+    """(solicitud_id, código de ítem) de las solicitudes indicadas, en una consulta por lote de ids"""
+    solicitudes, items = [], []
+    for lote in _en_lotes(solicitud_ids):
+        productos = select(
+            SolicitudProducto.solicitud_id, (SolicitudProducto.producto_id * 2).label("item")
+        ).where(SolicitudProducto.solicitud_id.in_(lote))
+        paquetes = select(
+            SolicitudPaquete.solicitud_id, (SolicitudPaquete.paquete_id * 2 + 1).label("item")
+        ).where(SolicitudPaquete.solicitud_id.in_(lote))
+        for solicitud_id, item in db.execute(union_all(productos, paquetes)).all():
+            solicitudes.append(solicitud_id)
+            items.append(item)
+    return solicitudes, items
+
+def _sumar_canastas(db: Session, solicitud_ids: list, signo: int, items_tipo: dict) -> int:
+    """
+    Sumar (signo=1) o restar (signo=-1) a coocurrencia_items y
+    coocurrencia_pares las canastas de las solicitudes. Anota en items_tipo
+    los ítems tocados y devuelve el número de pares actualizados.
+    """
+    import numpy as np
+    from app.analytics.coocurrencia import canastas_unicas, pares_por_canasta, contar_pares, decodificar, PRODUCTO
+
+    canasta, item = canastas_unicas(*_canastas(db, solicitud_ids))
+
+    # Conteo por ítem
+    codigos, conteos = np.unique(item, return_counts=True)
+    tipos, ids = decodificar(codigos)
+    filas_items = [
+        {"item_tipo": TIPOS_ITEM[t], "item_id": int(i), "conteo": signo * int(n)}
+        for t, i, n in zip(tipos, ids, conteos)
+    ]
+    for lote in _en_lotes(filas_items):
+        upsert_incrementos(db, CoocurrenciaItem, ("item_tipo", "item_id"), lote, columnas=("conteo",))
+    for fila in filas_items:
+        items_tipo[fila["item_tipo"]].add(fila["item_id"])
+
+    # Pares con origen producto
+    a, b = pares_por_canasta(canasta, item)
+    es_producto = a % 2 == PRODUCTO
+    a, b, conteo_ab = contar_pares(a[es_producto], b[es_producto])
+    _, origen = decodificar(a)
+    tipos_b, ids_b = decodificar(b)
+    filas_pares = [
+        {"producto_id": int(o), "item_tipo": TIPOS_ITEM[t], "item_id": int(i), "conteo": signo * int(n)}
+        for o, t, i, n in zip(origen, tipos_b, ids_b, conteo_ab)
+    ]
+    for lote in _en_lotes(filas_pares):
+        upsert_incrementos(db, CoocurrenciaPar, ("producto_id", "item_tipo", "item_id"), lote, columnas=("conteo",))
+    return len(filas_pares)
+
+def _productos_afectados(db: Session, productos: set, items_tipo: dict) -> set:
+    """Orígenes cuyo top-K puede cambiar: los productos nuevos y los que tienen como vecino un ítem tocado"""
+    afectados = set(productos)
+    for tipo, ids in items_tipo.items():
+        ids = list(ids)
+        for lote in _en_lotes(ids):
+            afectados.update(db.execute(
+                select(CoocurrenciaPar.producto_id).distinct().where(
+                    CoocurrenciaPar.item_tipo == tipo, CoocurrenciaPar.item_id.in_(lote)
+                )
+            ).scalars())
+    return afectados
+
+def recalcular_top_k(db: Session, producto_ids: list, total_solicitudes: int, top: int = None,
+                     metrica: str = None, min_soporte: int = None) -> int:
+    """Reescribir productos_relacionados de los productos indicados. No hace commit."""
+    import numpy as np
+    from app.analytics.coocurrencia import puntuar, top_k
+
+    top = top or settings.RELACIONADOS_TOP_K
+    metrica = metrica or settings.RELACIONADOS_METRICA
+    min_soporte = settings.RELACIONADOS_MIN_SOPORTE if min_soporte is None else min_soporte
+    conteo_item = {
+        (tipo, item_id): conteo for tipo, item_id, conteo in db.execute(
+            select(CoocurrenciaItem.item_tipo, CoocurrenciaItem.item_id, CoocurrenciaItem.conteo)
+        ).all()
+    }
+
+    escritas = 0
+    for lote in _en_lotes(sorted(producto_ids), 500):
+        pares = db.execute(
+            select(CoocurrenciaPar.producto_id, CoocurrenciaPar.item_tipo, CoocurrenciaPar.item_id, CoocurrenciaPar.conteo)
+            .where(CoocurrenciaPar.producto_id.in_(lote), CoocurrenciaPar.conteo >= min_soporte)
+        ).all()
+        db.execute(delete(ProductoRelacionado).where(ProductoRelacionado.producto_id.in_(lote)))
+        if not pares:
+            continue
+        origen = np.array([p.producto_id for p in pares], dtype=np.int64)
+        conteo_ab = np.array([p.conteo for p in pares])
+        conteo_a = np.array([conteo_item.get(("producto", p.producto_id), 0) for p in pares])
+        conteo_b = np.array([conteo_item.get((p.item_tipo, p.item_id), 0) for p in pares])
+        lift, jaccard = puntuar(conteo_ab, conteo_a, conteo_b, total_solicitudes)
+        indices, posiciones = top_k(origen, lift if metrica == "lift" else jaccard, top)
+        filas = [{
+            "producto_id": int(origen[i]),
+            "posicion": int(posicion),
+            "item_tipo": pares[i].item_tipo,
+            "item_id": pares[i].item_id,
+            "conteo": int(conteo_ab[i]),
+            "lift": round(float(lift[i]), 4),
+            "jaccard": round(float(jaccard[i]), 4)
+        } for i, posicion in zip(indices, posiciones)]
+        db.execute(insert(ProductoRelacionado), filas)
+        escritas += len(filas)
+    return escritas
+
+def actualizar_relacionados(db: Session, completo: bool = False) -> dict:
+    """
+    Sincronizar los conteos con las solicitudes contabilizadas (aprobadas, en
+    proceso o completadas, como los rollups): se suman las que entraron a
+    esos estados desde la última ejecución, se restan las que salieron
+    (p. ej. aprobadas y luego canceladas) y se recalcula el top-K solo de los
+    productos afectados. coocurrencia_solicitudes registra qué solicitudes
+    están sumadas, así no depende del orden en que se confirman los ids.
+    Con completo=True se borra todo y se recalcula desde cero. La fila del
+    total se bloquea (FOR UPDATE) para que dos ejecuciones no se intercalen.
+    """
+    try:
+        total = _leer_config(db, CLAVE_TOTAL_SOLICITUDES, bloquear=True)
+        if completo:
+            db.execute(delete(ProductoRelacionado))
+            db.execute(delete(CoocurrenciaPar))
+            db.execute(delete(CoocurrenciaItem))
+            db.execute(delete(CoocurrenciaSolicitud))
+            total = 0
+
+        contabilizada = Solicitud.estado.in_(ESTADOS_CONTABILIZADOS)
+        entrantes = db.execute(
+            select(Solicitud.solicitud_id).where(
+                contabilizada, Solicitud.solicitud_id.not_in(select(CoocurrenciaSolicitud.solicitud_id))
+            ).order_by(Solicitud.solicitud_id)
+        ).scalars().all()
+        salientes = db.execute(
+            select(CoocurrenciaSolicitud.solicitud_id).outerjoin(
+                Solicitud, Solicitud.solicitud_id == CoocurrenciaSolicitud.solicitud_id
+            ).where(Solicitud.solicitud_id.is_(None) | ~contabilizada).order_by(CoocurrenciaSolicitud.solicitud_id)
+        ).scalars().all()
+        if not entrantes and not salientes:
+            db.rollback()
+            return {"solicitudes": 0, "retiradas": 0, "pares": 0, "productos_recalculados": 0}
+
+        items_tipo = {tipo: set() for tipo in TIPOS_ITEM}
+        pares = 0
+        if entrantes:
+            pares += _sumar_canastas(db, entrantes, 1, items_tipo)
+            for lote in _en_lotes(entrantes):
+                db.execute(insert(CoocurrenciaSolicitud), [{"solicitud_id": sid} for sid in lote])
+        if salientes:
+            pares += _sumar_canastas(db, salientes, -1, items_tipo)
+            for lote in _en_lotes(salientes):
+                db.execute(delete(CoocurrenciaSolicitud).where(CoocurrenciaSolicitud.solicitud_id.in_(lote)))
+            db.execute(delete(CoocurrenciaPar).where(CoocurrenciaPar.conteo <= 0))
+            db.execute(delete(CoocurrenciaItem).where(CoocurrenciaItem.conteo <= 0))
+
+        total += len(entrantes) - len(salientes)
+        _guardar_config(db, CLAVE_TOTAL_SOLICITUDES, total, "Solicitudes contadas en productos_relacionados")
+
+        afectados = _productos_afectados(db, items_tipo["producto"], items_tipo)
+        escritas = recalcular_top_k(db, list(afectados), total)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return {
+        "solicitudes": len(entrantes),
+        "retiradas": len(salientes),
+        "pares": pares,
+        "productos_recalculados": len(afectados),
+        "vecinos_escritos": escritas
+    }
+
+def quitar_items(db: Session, item_tipo: str, item_ids: list) -> int:
+    """
+    Borrar de los conteos y de productos_relacionados los productos o
+    paquetes eliminados, tanto como origen como vecino, y recalcular el top-K
+    de los productos que los tenían de vecino. No hace commit.
+    """
+    if not item_ids:
+        return 0
+    origenes = set(db.execute(
+        select(ProductoRelacionado.producto_id).distinct().where(
+            ProductoRelacionado.item_tipo == item_tipo, ProductoRelacionado.item_id.in_(item_ids)
+        )
+    ).scalars())
+    if item_tipo == "producto":
+        db.execute(delete(ProductoRelacionado).where(ProductoRelacionado.producto_id.in_(item_ids)))
+        db.execute(delete(CoocurrenciaPar).where(CoocurrenciaPar.producto_id.in_(item_ids)))
+        origenes -= set(item_ids)
+    db.execute(delete(CoocurrenciaPar).where(CoocurrenciaPar.item_tipo == item_tipo, CoocurrenciaPar.item_id.in_(item_ids)))
+    db.execute(delete(CoocurrenciaItem).where(CoocurrenciaItem.item_tipo == item_tipo, CoocurrenciaItem.item_id.in_(item_ids)))
+    if origenes:
+        recalcular_top_k(db, list(origenes), _leer_config(db, CLAVE_TOTAL_SOLICITUDES))
+    return len(origenes)
+
+# Una sola actualización a la vez por proceso; si llegan más solicitudes
+# mientras corre, se repite al terminar en lugar de encolar otra ejecución
+_actualizacion_lock = threading.Lock()
+_actualizacion_pendiente = threading.Event()
+
+def actualizar_relacionados_en_fondo():
+    """Tarea de fondo tras un cambio de estado de solicitudes (BackgroundTasks)"""
+    _actualizacion_pendiente.set()
+    if not _actualizacion_lock.acquire(blocking=False):
+        return
+    try:
+        while _actualizacion_pendiente.is_set():
+            _actualizacion_pendiente.clear()
+            db = SessionLocal()
+            try:
+                actualizar_relacionados(db)
+            except Exception as e:
+                logger.warning("No se pudieron actualizar los productos relacionados: %s", e)
+            finally:
+                db.close()
+    finally:
+        _actualizacion_lock.release()
+
+# ========== LECTURA ==========
+def obtener_relacionados(db: Session, producto_id: int, limit: int = 10):
+    """Vecinos precalculados de un producto con nombre y precio, en una sola consulta por clave primaria"""
+    producto = aliased(Producto)
+    paquete = aliased(Paquete)
+    return db.execute(
+        select(
+            ProductoRelacionado.item_tipo, ProductoRelacionado.item_id, ProductoRelacionado.conteo,
+            ProductoRelacionado.lift, ProductoRelacionado.jaccard,
+            func.coalesce(producto.nombre, paquete.nombre).label("nombre"),
+            func.coalesce(producto.precio_por_dia, paquete.precio_por_dia).label("precio_por_dia")
+        ).outerjoin(producto, and_(
+            ProductoRelacionado.item_tipo == "producto", producto.producto_id == ProductoRelacionado.item_id
+        )).outerjoin(paquete, and_(
+            ProductoRelacionado.item_tipo == "paquete", paquete.paquete_id == ProductoRelacionado.item_id
+        )).where(
+            ProductoRelacionado.producto_id == producto_id,
+            # Un vecino eliminado después del último recálculo no se muestra
+            (producto.producto_id.is_not(None)) | (paquete.paquete_id.is_not(None))
+        ).order_by(ProductoRelacionado.posicion).limit(limit)
+    ).all()
+
+# ========== PAQUETES SUGERIDOS POR NÚMERO DE INVITADOS ==========
+def indice_paquetes(db: Session) -> dict:
+    """Índice de capacidad de los paquetes activos (se cachea en memoria, ver /paquetes/sugeridos)"""
+    from app.analytics.cobertura import construir_indice
+
+    filas = db.query(
+        Paquete.paquete_id, Paquete.nombre, Paquete.capacidad_personas,
+        Paquete.precio_por_dia, Paquete.descuento_porcentaje
+    ).filter(Paquete.activo == True, Paquete.capacidad_personas > 0).all()
+    return construir_indice([
+        (p.paquete_id, p.nombre, p.capacidad_personas,
+         float(p.precio_por_dia) * (1 - float(p.descuento_porcentaje or 0) / 100))
+        for p in filas
+    ])
+
+def paquetes_disponibles(db: Session, fecha_inicio: date, fecha_fin: date) -> set:
+    """
+    Paquetes activos sin solicitudes comprometidas que se traslapen con las
+    fechas. Se consulta siempre en la base de datos, así un índice recién
+    invalidado nunca sugiere un paquete desactivado u ocupado.
+    """
+    ocupado = select(SolicitudPaquete.paquete_id).join(
+        Solicitud, Solicitud.solicitud_id == SolicitudPaquete.solicitud_id
+    ).where(
+        SolicitudPaquete.paquete_id == Paquete.paquete_id,
+        Solicitud.estado.in_(ESTADOS_COMPROMETIDOS),
+        Solicitud.fecha_evento_inicio <= fecha_fin,
+        Solicitud.fecha_evento_fin >= fecha_inicio
+    )
+    return set(db.execute(
+        select(Paquete.paquete_id).where(Paquete.activo == True, ~ocupado.exists())
+    ).scalars())
+
+def sugerir_paquetes(db: Session, indice: dict, personas: int, fecha_inicio: date, fecha_fin: date, limite: int = 5) -> list:
+    from app.analytics.cobertura import sugerir
+
+    dias = (fecha_fin - fecha_inicio).days + 1
+    disponibles = paquetes_disponibles(db, fecha_inicio, fecha_fin)
+    sugerencias = []
+    for opcion in sugerir(indice, personas, disponibles, limite):
+        precio_por_dia = round(float(indice["precio"][opcion].sum()), 2)
+        sugerencias.append({
+            "paquetes": [
+                {
+                    "paquete_id": int(indice["paquete_id"][i]),
+                    "nombre": indice["nombre"][i],
+                    "capacidad_personas": int(indice["capacidad"][i]),
+                    "precio_final": round(float(indice["precio"][i]), 2)
+                } for i in opcion
+            ],
+            "capacidad_total": int(indice["capacidad"][opcion].sum()),
+            "precio_por_dia": precio_por_dia,
+            "precio_total": round(precio_por_dia * dias, 2)
+        })
+    return sugerencias
+
+# ========== PRODUCTOS SIMILARES (TEXTO Y ESPECIFICACIONES) ==========
+def indice_similitud(db: Session, dimension: int = None) -> dict:
+    """Matriz TF-IDF de todos los productos, construida por lotes (se cachea en memoria, ver /productos/{id}/similares)"""
+    import numpy as np
+    from app.analytics.similitud import rasgos, construir_matriz
+
+    ids, categorias, disponibles, documentos = [], [], [], []
+    filas = db.execute(
+        select(
+            Producto.producto_id, Producto.categoria_id, Producto.nombre, Producto.descripcion,
+            Producto.especificaciones, Producto.estado
+        ).order_by(Producto.producto_id).execution_options(yield_per=1000)
+    )
+    for fila in filas:
+        ids.append(fila.producto_id)
+        categorias.append(fila.categoria_id)
+        disponibles.append(fila.estado == "disponible")
+        documentos.append(rasgos(fila.nombre, fila.descripcion, fila.especificaciones, fila.categoria_id))
+    return {
+        "producto_id": np.array(ids, dtype=np.int64),
+        "fila": {producto_id: i for i, producto_id in enumerate(ids)},
+        "categoria_id": np.array(categorias, dtype=np.int64),
+        "disponible": np.array(disponibles, dtype=bool),
+        "matriz": construir_matriz(documentos, dimension or settings.SIMILARES_DIMENSION),
+    }
+
+def picos_comprometidos(db: Session, fecha_inicio: date, fecha_fin: date) -> dict:
+    """Máximo de unidades comprometidas en algún día del periodo, por producto"""
+    import numpy as np
+    from app.analytics.sobreventa import barrer, picos
+
+    lineas = db.execute(
+        select(
+            SolicitudProducto.producto_id, Solicitud.fecha_evento_inicio,
+            Solicitud.fecha_evento_fin, SolicitudProducto.cantidad_solicitada
+        ).join(Solicitud, Solicitud.solicitud_id == SolicitudProducto.solicitud_id).where(
+            Solicitud.estado.in_(ESTADOS_COMPROMETIDOS),
+            Solicitud.fecha_evento_inicio <= fecha_fin,
+            Solicitud.fecha_evento_fin >= fecha_inicio
+        )
+    ).all()
+    if not lineas:
+        return {}
+    # Recortar al periodo para que el pico sea el de esas fechas
+    inicio = np.maximum(np.array([l.fecha_evento_inicio for l in lineas], dtype="datetime64[D]"), np.datetime64(fecha_inicio))
+    fin = np.minimum(np.array([l.fecha_evento_fin for l in lineas], dtype="datetime64[D]"), np.datetime64(fecha_fin))
+    p, t, carga = barrer([l.producto_id for l in lineas], inicio, fin, [l.cantidad_solicitada for l in lineas])
+    return {producto_id: pico for producto_id, (pico, _) in picos(p, t, carga).items()}
+
+def productos_similares(db: Session, indice: dict, producto_id: int, limit: int = 10,
+                        misma_categoria: bool = False, fecha_inicio: date = None,
+                        fecha_fin: date = None, cantidad: int = 1):
+    """
+    Productos disponibles más parecidos a `producto_id`. Con fechas, solo los
+    que tienen al menos `cantidad` unidades libres en todo el periodo.
+    Devuelve None si el producto no está en el índice.
+    """
+    from app.analytics.similitud import mas_similares
+
+    fila = indice["fila"].get(producto_id)
+    if fila is None:
+        return None
+    candidatos = indice["disponible"].copy()
+    if misma_categoria:
+        candidatos &= indice["categoria_id"] == indice["categoria_id"][fila]
+
+    # Con fechas se piden más vecinos de los necesarios y se descartan los ocupados
+    pedir = limit * 3 if fecha_inicio else limit
+    filas, similitudes = mas_similares(indice["matriz"], fila, pedir, candidatos)
+    ids = [int(indice["producto_id"][i]) for i in filas]
+    if not ids:
+        return []
+
+    productos = {
+        p.producto_id: p for p in db.execute(
+            select(
+                Producto.producto_id, Producto.categoria_id, Producto.codigo_producto, Producto.nombre,
+                Producto.precio_por_dia, Producto.stock_total, Producto.estado
+            ).where(Producto.producto_id.in_(ids))
+        ).all()
+    }
+    ocupados = picos_comprometidos(db, fecha_inicio, fecha_fin) if fecha_inicio else {}
+
+    resultado = []
+    for producto_id_similar, similitud in zip(ids, similitudes):
+        producto = productos.get(producto_id_similar)
+        if producto is None or producto.estado != "disponible":
+            continue
+        libres = (producto.stock_total or 0) - ocupados.get(producto_id_similar, 0)
+        if fecha_inicio and libres < cantidad:
+            continue
+        resultado.append({
+            "producto_id": producto.producto_id,
+            "categoria_id": producto.categoria_id,
+            "codigo_producto": producto.codigo_producto,
+            "nombre": producto.nombre,
+            "precio_por_dia": float(producto.precio_por_dia),
+            "similitud": round(float(similitud), 4),
+            "unidades_libres": libres if fecha_inicio else None
+        })
+        if len(resultado) == limit:
+            break
+    return resultado
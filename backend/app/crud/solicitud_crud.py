@@ -1,8 +1,10 @@
-from sqlalchemy.orm import Session, joinedload
-from app.models.solicitud_models import Solicitud, SolicitudProducto, SolicitudPaquete
+from sqlalchemy import select, func, update, insert, case, and_, text, literal as sa_literal
+from sqlalchemy.orm import Session, joinedload, load_only, aliased
+from app.models.solicitud_models import Solicitud, SolicitudProducto, SolicitudPaquete, SolicitudEvento, EstadoSolicitud, EstadoPagoSolicitud
 from app.models.models import Producto, Paquete
 from app.schemas.solicitud_schemas import SolicitudCreate, SolicitudUpdate
-from datetime import datetime
+from app.crud import analytics_crud
+from datetime import datetime, date, timedelta
 from decimal import Decimal
 import random
 import string
@@ -13,6 +15,19 @@ def generar_numero_solicitud() -> str:
     random_str = ''.join(random.choices(string.digits, k=4))
     return f"SOL-{timestamp}-{random_str}"
 
+class ItemsNoEncontrados(ValueError):
+    """La solicitud referencia productos o paquetes que no existen"""
+
+    def __init__(self, productos: list, paquetes: list):
+        self.productos = productos
+        self.paquetes = paquetes
+        detalle = []
+        if productos:
+            detalle.append("productos " + ", ".join(str(pid) for pid in productos))
+        if paquetes:
+            detalle.append("paquetes " + ", ".join(str(pid) for pid in paquetes))
+        super().__init__(f"No existen: {'; '.join(detalle)}")
+
 def crear_solicitud(db: Session, solicitud_data: SolicitudCreate, usuario_id: int):
     """Crea una nueva solicitud con sus productos y paquetes"""
     
@@ -51,16 +66,47 @@ def crear_solicitud(db: Session, solicitud_data: SolicitudCreate, usuario_id: in
         subtotal=subtotal,
         impuestos=impuestos,
         deposito_total=deposito_total,
-        total_cotizacion=total_cotizacion
+        total_cotizacion=total_cotizacion,
+        total_productos=len(solicitud_data.productos),
+        total_paquetes=len(solicitud_data.paquetes),
+        total_pagado=Decimal("0.00"),
+        estado_pago=EstadoPagoSolicitud.pendiente
     )
     
+    # Cargar en una sola consulta los productos y paquetes referenciados (solo
+    # nombre y código, sin imágenes) para que la respuesta no haga lazy loads
+    productos_ids = {prod.producto_id for prod in solicitud_data.productos}
+    paquetes_ids = {paq.paquete_id for paq in solicitud_data.paquetes}
+    productos = {}
+    paquetes = {}
+    if productos_ids:
+        productos = {p.producto_id: p for p in db.query(Producto).options(
+            load_only(Producto.producto_id, Producto.nombre, Producto.codigo_producto)
+        ).filter(Producto.producto_id.in_(productos_ids))}
+    if paquetes_ids:
+        paquetes = {p.paquete_id: p for p in db.query(Paquete).options(
+            load_only(Paquete.paquete_id, Paquete.nombre, Paquete.codigo_paquete)
+        ).filter(Paquete.paquete_id.in_(paquetes_ids))}
+    faltantes_productos = sorted(productos_ids - productos.keys())
+    faltantes_paquetes = sorted(paquetes_ids - paquetes.keys())
+    if faltantes_productos or faltantes_paquetes:
+        raise ItemsNoEncontrados(faltantes_productos, faltantes_paquetes)
+    
     db.add(db_solicitud)
-    db.flush()  # Para obtener el solicitud_id
+    db.add(SolicitudEvento(
+        solicitud=db_solicitud,
+        estado_anterior=None,
+        estado_nuevo=EstadoSolicitud.pendiente,
+        fecha=datetime.now(),
+        actor_tipo="usuario",
+        actor_id=usuario_id
+    ))
     
     # Crear productos de la solicitud
     for prod_data in solicitud_data.productos:
         db_solicitud_producto = SolicitudProducto(
-            solicitud_id=db_solicitud.solicitud_id,
+            solicitud=db_solicitud,
+            producto=productos[prod_data.producto_id],
             producto_id=prod_data.producto_id,
             cantidad_solicitada=prod_data.cantidad_solicitada,
             precio_unitario=prod_data.precio_unitario,
@@ -74,7 +120,8 @@ def crear_solicitud(db: Session, solicitud_data: SolicitudCreate, usuario_id: in
     # Crear paquetes de la solicitud
     for paq_data in solicitud_data.paquetes:
         db_solicitud_paquete = SolicitudPaquete(
-            solicitud_id=db_solicitud.solicitud_id,
+            solicitud=db_solicitud,
+            paquete=paquetes[paq_data.paquete_id],
             paquete_id=paq_data.paquete_id,
             cantidad_solicitada=paq_data.cantidad_solicitada,
             precio_unitario=paq_data.precio_unitario,
@@ -83,19 +130,71 @@ def crear_solicitud(db: Session, solicitud_data: SolicitudCreate, usuario_id: in
         )
         db.add(db_solicitud_paquete)
     
-    db.commit()
-    db.refresh(db_solicitud)
+    # Sin expirar al hacer commit: el grafo recién escrito ya está en memoria
+    # y no hace falta volver a leerlo
+    expire_on_commit = db.expire_on_commit
+    db.expire_on_commit = False
+    try:
+        db.commit()
+    finally:
+        db.expire_on_commit = expire_on_commit
+    # Solo fecha_solicitud viene de la base de datos (server_default)
+    db.refresh(db_solicitud, ["fecha_solicitud"])
     
     return db_solicitud
 
+def consulta_resumen_solicitudes(
+    usuario_id: int = None,
+    estado: EstadoSolicitud = None,
+    fecha_desde: date = None,
+    fecha_hasta: date = None,
+    evento_desde: date = None,
+    evento_hasta: date = None,
+    skip: int = 0,
+    limit: int = 100
+):
+    """
+    SELECT del listado de solicitudes. Solo lee la tabla solicitudes: el número
+    de productos y paquetes y el estado de pago están desnormalizados en ella.
+    Sirve tanto para la sesión síncrona como para la asíncrona.
+    """
+    query = select(
+        Solicitud.solicitud_id,
+        Solicitud.usuario_id,
+        Solicitud.numero_solicitud,
+        Solicitud.fecha_evento_inicio,
+        Solicitud.fecha_evento_fin,
+        Solicitud.tipo_evento,
+        Solicitud.num_personas_estimado,
+        Solicitud.estado,
+        Solicitud.total_cotizacion,
+        Solicitud.fecha_solicitud,
+        Solicitud.total_productos,
+        Solicitud.total_paquetes,
+        Solicitud.total_pagado,
+        Solicitud.estado_pago
+    )
+    
+    # Cada filtro usa un índice: (usuario_id, fecha_solicitud), (estado, fecha_solicitud),
+    # fecha_solicitud y fecha_evento_inicio
+    if usuario_id is not None:
+        query = query.where(Solicitud.usuario_id == usuario_id)
+    if estado is not None:
+        query = query.where(Solicitud.estado == estado)
+    if fecha_desde is not None:
+        query = query.where(Solicitud.fecha_solicitud >= fecha_desde)
+    if fecha_hasta is not None:
+        query = query.where(Solicitud.fecha_solicitud < fecha_hasta + timedelta(days=1))
+    if evento_desde is not None:
+        query = query.where(Solicitud.fecha_evento_inicio >= evento_desde)
+    if evento_hasta is not None:
+        query = query.where(Solicitud.fecha_evento_inicio <= evento_hasta)
+    
+    return query.order_by(Solicitud.fecha_solicitud.desc()).offset(skip).limit(limit)
+
 def obtener_solicitudes_usuario(db: Session, usuario_id: int, skip: int = 0, limit: int = 100):
-    """Obtiene todas las solicitudes de un usuario"""
-    return db.query(Solicitud).filter(
-        Solicitud.usuario_id == usuario_id
-    ).options(
-        joinedload(Solicitud.solicitud_productos).joinedload(SolicitudProducto.producto),
-        joinedload(Solicitud.solicitud_paquetes).joinedload(SolicitudPaquete.paquete)
-    ).order_by(Solicitud.fecha_solicitud.desc()).offset(skip).limit(limit).all()
+    """Obtiene el listado resumido de las solicitudes de un usuario"""
+    return db.execute(consulta_resumen_solicitudes(usuario_id=usuario_id, skip=skip, limit=limit)).all()
 
 def obtener_solicitud_por_id(db: Session, solicitud_id: int, usuario_id: int = None):
     """Obtiene una solicitud por ID"""
@@ -109,6 +208,13 @@ def obtener_solicitud_por_id(db: Session, solicitud_id: int, usuario_id: int = N
         joinedload(Solicitud.solicitud_paquetes).joinedload(SolicitudPaquete.paquete)
     ).first()
 
+def solicitud_pertenece_a_usuario(db: Session, solicitud_id: int, usuario_id: int) -> bool:
+    """Verifica que la solicitud exista y sea del usuario sin cargar sus relaciones"""
+    return db.query(Solicitud.solicitud_id).filter(
+        Solicitud.solicitud_id == solicitud_id,
+        Solicitud.usuario_id == usuario_id
+    ).first() is not None
+
 def actualizar_solicitud(db: Session, solicitud_id: int, solicitud_data: SolicitudUpdate, usuario_id: int = None):
     """Actualiza una solicitud existente"""
     query = db.query(Solicitud).filter(Solicitud.solicitud_id == solicitud_id)
@@ -149,15 +255,441 @@ def cancelar_solicitud(db: Session, solicitud_id: int, usuario_id: int):
     if db_solicitud.estado not in ["pendiente", "aprobada"]:
         return None
     
-    db_solicitud.estado = "cancelada"
+    _aplicar_transicion(db, db_solicitud, EstadoSolicitud.cancelada, actor_tipo="usuario", actor_id=usuario_id)
     db.commit()
     db.refresh(db_solicitud)
     
     return db_solicitud
 
-def obtener_todas_solicitudes(db: Session, skip: int = 0, limit: int = 100):
-    """Obtiene todas las solicitudes (para admin)"""
-    return db.query(Solicitud).options(
-        joinedload(Solicitud.solicitud_productos).joinedload(SolicitudProducto.producto),
-        joinedload(Solicitud.solicitud_paquetes).joinedload(SolicitudPaquete.paquete)
-    ).order_by(Solicitud.fecha_solicitud.desc()).offset(skip).limit(limit).all()
+def obtener_todas_solicitudes(db: Session, skip: int = 0, limit: int = 100, **filtros):
+    """Obtiene el listado resumido de todas las solicitudes (para admin), con filtros opcionales"""
+    return db.execute(consulta_resumen_solicitudes(skip=skip, limit=limit, **filtros)).all()
+
+
+# ========== RESUMEN DESNORMALIZADO (totales y estado de pago) ==========
+ESTADOS_SIN_SERVICIO = (EstadoSolicitud.cancelada, EstadoSolicitud.rechazada)
+
+def calcular_estado_pago(total_pagado, total_cotizacion, estado) -> EstadoPagoSolicitud:
+    """Estado de pago a partir de lo pagado, el total y el estado de la solicitud"""
+    total_pagado = Decimal(str(total_pagado or 0))
+    if estado in ESTADOS_SIN_SERVICIO:
+        return EstadoPagoSolicitud.reembolso_pendiente if total_pagado > 0 else EstadoPagoSolicitud.pendiente
+    if total_pagado <= 0:
+        return EstadoPagoSolicitud.pendiente
+    if total_pagado >= Decimal(str(total_cotizacion or 0)):
+        return EstadoPagoSolicitud.pagado
+    return EstadoPagoSolicitud.parcial
+
+def _expresion_estado_pago(total_pagado, estado: EstadoSolicitud = None):
+    """
+    Misma regla que calcular_estado_pago, como expresión SQL. Si se pasa
+    `estado` se usa ese valor en lugar de la columna (para un UPDATE que
+    cambia el estado en la misma sentencia).
+    """
+    if estado is not None:
+        sin_servicio = sa_literal(estado in ESTADOS_SIN_SERVICIO)
+    else:
+        sin_servicio = Solicitud.estado.in_(ESTADOS_SIN_SERVICIO)
+    return case(
+        (and_(sin_servicio, total_pagado > 0), EstadoPagoSolicitud.reembolso_pendiente.value),
+        (sin_servicio, EstadoPagoSolicitud.pendiente.value),
+        (total_pagado <= 0, EstadoPagoSolicitud.pendiente.value),
+        (total_pagado >= Solicitud.total_cotizacion, EstadoPagoSolicitud.pagado.value),
+        else_=EstadoPagoSolicitud.parcial.value
+    )
+
+def registrar_pago_en_solicitud(db: Session, solicitud_id: int, monto):
+    """
+    Sumar un pago (o restar una devolución con monto negativo) al resumen de la
+    solicitud en la misma transacción del pago. Es un UPDATE atómico, así que
+    dos pagos simultáneos no se pisan. No hace commit.
+    """
+    nuevo_total = Solicitud.total_pagado + monto
+    # estado_pago va primero: MySQL evalúa el SET de izquierda a derecha y vería
+    # total_pagado ya actualizado si se asignara antes
+    db.execute(
+        update(Solicitud)
+        .where(Solicitud.solicitud_id == solicitud_id)
+        .ordered_values(
+            (Solicitud.estado_pago, _expresion_estado_pago(nuevo_total)),
+            (Solicitud.total_pagado, nuevo_total)
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+def _resumen_real(db: Session, ids: list) -> dict:
+    """Totales recalculados desde las tablas de líneas y pagos para un lote de solicitudes"""
+    from app.models.pago_models import Pago, TipoPago, EstadoPago
+    
+    resumen = {solicitud_id: {"total_productos": 0, "total_paquetes": 0, "total_pagado": Decimal("0.00")} for solicitud_id in ids}
+    productos = db.query(SolicitudProducto.solicitud_id, func.count()).filter(
+        SolicitudProducto.solicitud_id.in_(ids)
+    ).group_by(SolicitudProducto.solicitud_id)
+    for solicitud_id, total in productos:
+        resumen[solicitud_id]["total_productos"] = total
+    paquetes = db.query(SolicitudPaquete.solicitud_id, func.count()).filter(
+        SolicitudPaquete.solicitud_id.in_(ids)
+    ).group_by(SolicitudPaquete.solicitud_id)
+    for solicitud_id, total in paquetes:
+        resumen[solicitud_id]["total_paquetes"] = total
+    monto_neto = case((Pago.tipo_pago == TipoPago.devolucion_deposito, -Pago.monto), else_=Pago.monto)
+    pagos = db.query(Pago.solicitud_id, func.sum(monto_neto)).filter(
+        Pago.solicitud_id.in_(ids),
+        Pago.estado_pago == EstadoPago.completado
+    ).group_by(Pago.solicitud_id)
+    for solicitud_id, total in pagos:
+        resumen[solicitud_id]["total_pagado"] = Decimal(str(total or 0)).quantize(Decimal("0.01"))
+    return resumen
+
+def verificar_resumen_lote(db: Session, desde_id: int = 0, lote: int = 500, reparar: bool = False):
+    """
+    Revisar un lote de solicitudes (por solicitud_id > desde_id) comparando el
+    resumen desnormalizado con los datos reales. Con reparar=True corrige las
+    diferencias y hace commit del lote.
+    Devuelve (ultimo_id, revisadas, diferencias); ultimo_id es None al terminar.
+    """
+    solicitudes = db.query(Solicitud).options(load_only(
+        Solicitud.solicitud_id, Solicitud.estado, Solicitud.total_cotizacion,
+        Solicitud.total_productos, Solicitud.total_paquetes,
+        Solicitud.total_pagado, Solicitud.estado_pago
+    )).filter(Solicitud.solicitud_id > desde_id).order_by(Solicitud.solicitud_id).limit(lote).all()
+    if not solicitudes:
+        return None, 0, []
+    
+    reales = _resumen_real(db, [sol.solicitud_id for sol in solicitudes])
+    diferencias = []
+    for sol in solicitudes:
+        real = dict(reales[sol.solicitud_id])
+        real["estado_pago"] = calcular_estado_pago(real["total_pagado"], sol.total_cotizacion, sol.estado)
+        actual = {
+            "total_productos": sol.total_productos,
+            "total_paquetes": sol.total_paquetes,
+            "total_pagado": Decimal(str(sol.total_pagado or 0)).quantize(Decimal("0.01")),
+            "estado_pago": sol.estado_pago
+        }
+        cambios = {campo: (actual[campo], valor) for campo, valor in real.items() if actual[campo] != valor}
+        if cambios:
+            diferencias.append({"solicitud_id": sol.solicitud_id, "cambios": cambios})
+            if reparar:
+                for campo, (_, valor) in cambios.items():
+                    setattr(sol, campo, valor)
+    
+    if reparar and diferencias:
+        db.commit()
+    else:
+        db.rollback()
+    return solicitudes[-1].solicitud_id, len(solicitudes), diferencias
+
+
+# ========== FLUJO DE ESTADOS (ADMIN) ==========
+# Transiciones permitidas; completada, rechazada y cancelada son finales
+TRANSICIONES = {
+    EstadoSolicitud.pendiente: {EstadoSolicitud.aprobada, EstadoSolicitud.rechazada, EstadoSolicitud.cancelada},
+    EstadoSolicitud.aprobada: {EstadoSolicitud.en_proceso, EstadoSolicitud.cancelada},
+    EstadoSolicitud.en_proceso: {EstadoSolicitud.completada},
+    EstadoSolicitud.completada: set(),
+    EstadoSolicitud.rechazada: set(),
+    EstadoSolicitud.cancelada: set(),
+}
+
+# Estados en los que la solicitud tiene stock reservado
+ESTADOS_CON_RESERVA = (EstadoSolicitud.aprobada, EstadoSolicitud.en_proceso)
+
+# Fecha que se registra al entrar en cada estado
+FECHA_POR_ESTADO = {
+    EstadoSolicitud.aprobada: "fecha_respuesta",
+    EstadoSolicitud.rechazada: "fecha_respuesta",
+    EstadoSolicitud.en_proceso: "fecha_entrega",
+    EstadoSolicitud.completada: "fecha_devolucion",
+}
+
+class TransicionInvalida(ValueError):
+    """La solicitud no puede pasar al estado pedido"""
+
+class StockInsuficiente(ValueError):
+    """No hay stock disponible para reservar los productos de la solicitud"""
+
+    def __init__(self, faltantes: dict):
+        self.faltantes = faltantes
+        detalle = ", ".join(f"producto {pid}: faltan {n}" for pid, n in faltantes.items())
+        super().__init__(f"Stock insuficiente ({detalle})")
+
+def _cantidades_por_producto(db: Session, solicitud_ids: list) -> dict:
+    """Unidades de cada producto pedidas por un conjunto de solicitudes"""
+    filas = db.query(SolicitudProducto.producto_id, func.sum(SolicitudProducto.cantidad_solicitada)).filter(
+        SolicitudProducto.solicitud_id.in_(solicitud_ids)
+    ).group_by(SolicitudProducto.producto_id).all()
+    return {producto_id: int(cantidad) for producto_id, cantidad in filas}
+
+def _reservar_stock(db: Session, cantidades: dict):
+    """Descontar stock_disponible; falla sin tocar nada si algún producto no alcanza"""
+    if not cantidades:
+        return
+    disponibles = dict(db.query(Producto.producto_id, Producto.stock_disponible).filter(
+        Producto.producto_id.in_(cantidades.keys())
+    ).with_for_update().all())
+    faltantes = {pid: n - disponibles.get(pid, 0) for pid, n in cantidades.items() if disponibles.get(pid, 0) < n}
+    if faltantes:
+        raise StockInsuficiente(faltantes)
+    _ajustar_stock(db, {pid: -n for pid, n in cantidades.items()})
+
+def _liberar_stock(db: Session, cantidades: dict):
+    """Devolver al stock_disponible las unidades reservadas"""
+    _ajustar_stock(db, cantidades)
+
+def _ajustar_stock(db: Session, deltas: dict):
+    """Un solo UPDATE con CASE para todos los productos afectados"""
+    if not deltas:
+        return
+    db.execute(
+        update(Producto)
+        .where(Producto.producto_id.in_(deltas.keys()))
+        .values(stock_disponible=Producto.stock_disponible + case(deltas, value=Producto.producto_id, else_=0))
+        .execution_options(synchronize_session=False)
+    )
+
+def _efecto_stock(anterior: EstadoSolicitud, nuevo: EstadoSolicitud) -> int:
+    """-1 reservar, +1 liberar, 0 sin cambio"""
+    if anterior not in ESTADOS_CON_RESERVA and nuevo in ESTADOS_CON_RESERVA:
+        return -1
+    if anterior in ESTADOS_CON_RESERVA and nuevo not in ESTADOS_CON_RESERVA:
+        return 1
+    return 0
+
+def _aplicar_transicion(
+    db: Session,
+    db_solicitud: Solicitud,
+    nuevo_estado: EstadoSolicitud,
+    observaciones_admin: str = None,
+    actor_tipo: str = "admin",
+    actor_id: int = None
+):
+    """Cambiar el estado de una solicitud cargada: fechas, stock, rollups, estado de pago y evento. No hace commit."""
+    anterior = EstadoSolicitud(db_solicitud.estado)
+    ahora = datetime.now()
+    efecto = _efecto_stock(anterior, nuevo_estado)
+    if efecto:
+        cantidades = _cantidades_por_producto(db, [db_solicitud.solicitud_id])
+        if efecto < 0:
+            _reservar_stock(db, cantidades)
+        else:
+            _liberar_stock(db, cantidades)
+    signo_rollup = analytics_crud.efecto_transicion(anterior, nuevo_estado)
+    if signo_rollup:
+        analytics_crud.aplicar_solicitudes(db, [db_solicitud.solicitud_id], signo_rollup)
+    
+    db_solicitud.estado = nuevo_estado
+    campo_fecha = FECHA_POR_ESTADO.get(nuevo_estado)
+    if campo_fecha:
+        setattr(db_solicitud, campo_fecha, ahora)
+    if observaciones_admin is not None:
+        db_solicitud.observaciones_admin = observaciones_admin
+    db_solicitud.estado_pago = calcular_estado_pago(db_solicitud.total_pagado, db_solicitud.total_cotizacion, nuevo_estado)
+    db.add(SolicitudEvento(
+        solicitud_id=db_solicitud.solicitud_id,
+        estado_anterior=anterior,
+        estado_nuevo=nuevo_estado,
+        fecha=ahora,
+        actor_tipo=actor_tipo,
+        actor_id=actor_id,
+        observaciones=observaciones_admin
+    ))
+
+def cambiar_estado_solicitud(db: Session, solicitud_id: int, nuevo_estado: EstadoSolicitud, observaciones_admin: str = None, admin_id: int = None):
+    """
+    Mover una solicitud al siguiente estado validando TRANSICIONES.
+    Devuelve None si no existe; lanza TransicionInvalida o StockInsuficiente.
+    """
+    db_solicitud = db.query(Solicitud).filter(Solicitud.solicitud_id == solicitud_id).with_for_update().first()
+    if not db_solicitud:
+        return None
+    
+    anterior = EstadoSolicitud(db_solicitud.estado)
+    if nuevo_estado not in TRANSICIONES[anterior]:
+        raise TransicionInvalida(f"No se puede pasar de '{anterior.value}' a '{nuevo_estado.value}'")
+    
+    try:
+        _aplicar_transicion(db, db_solicitud, nuevo_estado, observaciones_admin, actor_tipo="admin", actor_id=admin_id)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    db.refresh(db_solicitud)
+    return db_solicitud
+
+def cambiar_estado_masivo(db: Session, solicitud_ids: list, nuevo_estado: EstadoSolicitud, observaciones_admin: str = None, admin_id: int = None):
+    """
+    Aprobar o rechazar muchas solicitudes pendientes en una sola transacción:
+    una consulta para bloquear las elegibles, la reserva de stock agregada por
+    producto (aprobación) y un único UPDATE ... WHERE solicitud_id IN (...).
+    Las que no están pendientes se omiten. Devuelve (actualizadas, omitidas).
+    """
+    if nuevo_estado not in (EstadoSolicitud.aprobada, EstadoSolicitud.rechazada):
+        raise TransicionInvalida("La operación masiva solo admite aprobar o rechazar")
+    
+    solicitud_ids = list(dict.fromkeys(solicitud_ids))
+    try:
+        elegibles = [fila[0] for fila in db.query(Solicitud.solicitud_id).filter(
+            Solicitud.solicitud_id.in_(solicitud_ids),
+            Solicitud.estado == EstadoSolicitud.pendiente
+        ).with_for_update().all()]
+        elegibles_set = set(elegibles)
+        omitidas = [sid for sid in solicitud_ids if sid not in elegibles_set]
+        if not elegibles:
+            db.rollback()
+            return [], omitidas
+        
+        if _efecto_stock(EstadoSolicitud.pendiente, nuevo_estado) < 0:
+            _reservar_stock(db, _cantidades_por_producto(db, elegibles))
+        signo_rollup = analytics_crud.efecto_transicion(EstadoSolicitud.pendiente, nuevo_estado)
+        if signo_rollup:
+            analytics_crud.aplicar_solicitudes(db, elegibles, signo_rollup)
+        
+        ahora = datetime.now()
+        valores = {
+            "estado": nuevo_estado,
+            FECHA_POR_ESTADO[nuevo_estado]: ahora,
+            "estado_pago": _expresion_estado_pago(Solicitud.total_pagado, nuevo_estado),
+        }
+        if observaciones_admin is not None:
+            valores["observaciones_admin"] = observaciones_admin
+        db.execute(
+            update(Solicitud)
+            .where(Solicitud.solicitud_id.in_(elegibles), Solicitud.estado == EstadoSolicitud.pendiente)
+            .values(**valores)
+            .execution_options(synchronize_session=False)
+        )
+        # Un INSERT multi-fila con los eventos de todas las solicitudes
+        db.execute(insert(SolicitudEvento), [{
+            "solicitud_id": solicitud_id,
+            "estado_anterior": EstadoSolicitud.pendiente,
+            "estado_nuevo": nuevo_estado,
+            "fecha": ahora,
+            "actor_tipo": "admin",
+            "actor_id": admin_id,
+            "observaciones": observaciones_admin
+        } for solicitud_id in elegibles])
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return elegibles, omitidas
+
+
+# ========== HISTORIAL DE ESTADOS (EVENTOS) ==========
+def obtener_eventos(db: Session, solicitud_id: int):
+    """Eventos de una solicitud en orden cronológico"""
+    return db.query(SolicitudEvento).filter(
+        SolicitudEvento.solicitud_id == solicitud_id
+    ).order_by(SolicitudEvento.fecha, SolicitudEvento.evento_id).all()
+
+def proyectar_estado(eventos: list, hasta: datetime = None) -> dict:
+    """
+    Reconstruir el estado de una solicitud a partir de sus eventos: estado
+    actual, fechas de respuesta/entrega/devolución y tiempo en cada estado
+    (en segundos; el estado actual cuenta hasta `hasta` o ahora).
+    """
+    proyeccion = {
+        "estado": None,
+        "fecha_creacion": None,
+        "fecha_respuesta": None,
+        "fecha_entrega": None,
+        "fecha_devolucion": None,
+        "segundos_en_estado": {},
+    }
+    anterior_fecha = None
+    for evento in eventos:
+        if proyeccion["estado"] is not None and anterior_fecha is not None:
+            clave = proyeccion["estado"].value
+            segundos = (evento.fecha - anterior_fecha).total_seconds()
+            proyeccion["segundos_en_estado"][clave] = proyeccion["segundos_en_estado"].get(clave, 0) + segundos
+        if evento.estado_anterior is None:
+            proyeccion["fecha_creacion"] = evento.fecha
+        proyeccion["estado"] = EstadoSolicitud(evento.estado_nuevo)
+        campo_fecha = FECHA_POR_ESTADO.get(proyeccion["estado"])
+        if campo_fecha:
+            proyeccion[campo_fecha] = evento.fecha
+        anterior_fecha = evento.fecha
+    
+    # Un estado final no sigue acumulando tiempo
+    if proyeccion["estado"] is not None and TRANSICIONES[proyeccion["estado"]]:
+        fin = hasta or datetime.now(anterior_fecha.tzinfo)
+        clave = proyeccion["estado"].value
+        proyeccion["segundos_en_estado"][clave] = proyeccion["segundos_en_estado"].get(clave, 0) + (fin - anterior_fecha).total_seconds()
+    return proyeccion
+
+def _segundos_entre(dialecto: str, inicio, fin):
+    """Expresión SQL con los segundos entre dos DATETIME"""
+    if dialecto == "mysql":
+        return func.timestampdiff(text("SECOND"), inicio, fin)
+    if dialecto == "postgresql":
+        return func.extract("epoch", fin - inicio)
+    return (func.julianday(fin) - func.julianday(inicio)) * 86400
+
+def _soporta_ventanas(bind) -> bool:
+    """Funciones de ventana: MySQL 8+, MariaDB 10.2+, SQLite 3.25+ y PostgreSQL"""
+    dialecto = bind.dialect
+    version = dialecto.server_version_info or ()
+    if dialecto.name == "mysql":
+        return version >= ((10, 2) if getattr(dialecto, "is_mariadb", False) else (8, 0))
+    if dialecto.name == "sqlite":
+        return version >= (3, 25)
+    return True
+
+def tiempos_hasta_aprobacion(db: Session, desde: date = None, hasta: date = None, puntos=(50, 90, 95, 99)) -> dict:
+    """
+    Conteo, promedio, mínimo, máximo y percentiles (rango más cercano, sin
+    interpolar) de los segundos entre la creación y la aprobación de las
+    solicitudes aprobadas en el rango. Todo se agrega en la base de datos: las
+    aprobaciones salen del índice (estado_nuevo, fecha) y su evento de
+    creación del índice (solicitud_id, fecha). Los percentiles se calculan con
+    ROW_NUMBER() en la misma consulta; sin funciones de ventana se hace una
+    consulta ORDER BY ... LIMIT 1 OFFSET k por percentil.
+    """
+    bind = db.get_bind()
+    aprobacion = aliased(SolicitudEvento)
+    creacion = aliased(SolicitudEvento)
+    segundos = _segundos_entre(bind.dialect.name, creacion.fecha, aprobacion.fecha)
+    condiciones = [aprobacion.estado_nuevo == EstadoSolicitud.aprobada]
+    if desde is not None:
+        condiciones.append(aprobacion.fecha >= desde)
+    if hasta is not None:
+        condiciones.append(aprobacion.fecha < hasta + timedelta(days=1))
+    base = select(segundos.label("segundos")).select_from(aprobacion).join(
+        creacion,
+        and_(creacion.solicitud_id == aprobacion.solicitud_id, creacion.estado_anterior.is_(None))
+    ).where(*condiciones)
+
+    if _soporta_ventanas(bind):
+        ordenados = base.add_columns(
+            func.row_number().over(order_by=segundos).label("posicion"),
+            func.count().over().label("n")
+        ).subquery()
+        # Rango más cercano: la posición k cumple (k - 1) * 100 < p * n <= k * 100
+        fila = db.execute(select(
+            func.count(), func.avg(ordenados.c.segundos), func.min(ordenados.c.segundos), func.max(ordenados.c.segundos),
+            *[func.max(case(
+                (and_(ordenados.c.posicion * 100 >= p * ordenados.c.n,
+                      (ordenados.c.posicion - 1) * 100 < p * ordenados.c.n), ordenados.c.segundos)
+            )) for p in puntos]
+        )).one()
+        total, promedio, minimo, maximo = fila[:4]
+        valores = fila[4:]
+    else:
+        duraciones = base.subquery()
+        total, promedio, minimo, maximo = db.execute(select(
+            func.count(), func.avg(duraciones.c.segundos), func.min(duraciones.c.segundos), func.max(duraciones.c.segundos)
+        )).one()
+        valores = [
+            db.execute(base.order_by(segundos).limit(1).offset(max(0, -(-p * total // 100) - 1))).scalar()
+            if total else None
+            for p in puntos
+        ]
+
+    return {
+        "total": total,
+        "promedio": float(promedio) if promedio is not None else None,
+        "minimo": float(minimo) if minimo is not None else None,
+        "maximo": float(maximo) if maximo is not None else None,
+        "percentiles": {f"p{p}": float(v) if v is not None else None for p, v in zip(puntos, valores)}
+    }
@@ -9,16 +9,20 @@ Author: K'ABÉ Development Team
 Version: 1.0.0
 """
 
-from fastapi import FastAPI, Depends
+from fastapi import FastAPI, Depends, Request
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy.orm import Session
 from app.core.config import settings
-from app.core.database import engine, get_db
+from app.core.database import engine, get_db, registrar_escritura
+from app.core import request_metrics, slow_queries, cache
 from app.models import models
 from app.models import solicitud_models  # Importar modelos de solicitudes
 from app.api.v1.endpoints import router as api_router
+import logging
 import uvicorn
 
+logger = logging.getLogger("kabe.db")
+
 # Crear las tablas en la base de datos (opcional si usas Alembic)
 # models.Base.metadata.create_all(bind=engine)
 # solicitud_models.Base.metadata.create_all(bind=engine)
@@ -43,9 +47,66 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Contadores de base de datos por request: sesiones abiertas, checkouts del
+# pool, sentencias ejecutadas y tiempo en base de datos. Las sentencias
+# idénticas repetidas DB_N1_UMBRAL veces o más se registran como posible N+1.
+# Las cabeceras se escriben antes de enviar el cuerpo: las exportaciones en
+# streaming (cabecera X-DB-Streaming) consultan después y registran su propio
+# total en el log al terminar (request_metrics.medir_streaming).
+@app.middleware("http")
+async def medir_base_de_datos(request: Request, call_next):
+    estadisticas, token = request_metrics.iniciar_request(f"{request.method} {request.url.path}")
+    try:
+        response = await call_next(request)
+    finally:
+        request_metrics.finalizar_request(estadisticas, token, settings.DB_N1_UMBRAL)
+    repetidas = estadisticas.repetidas(settings.DB_N1_UMBRAL)
+    response.headers["X-DB-Sesiones"] = str(estadisticas.sesiones_abiertas)
+    response.headers["X-DB-Checkouts"] = str(estadisticas.checkouts)
+    response.headers["X-DB-Queries"] = str(estadisticas.queries)
+    response.headers["X-DB-Tiempo-Ms"] = f"{estadisticas.tiempo_db_ms:.1f}"
+    response.headers["X-DB-Repetidas"] = str(len(repetidas))
+    for sql, veces in repetidas.items():
+        logger.warning(
+            "Posible N+1 en %s %s: sentencia repetida %d veces (%d queries, %.1f ms): %s",
+            request.method, request.url.path, veces, estadisticas.queries,
+            estadisticas.tiempo_db_ms, " ".join(sql.split())[:300]
+        )
+    return response
+
+# Lectura-tras-escritura: después de una escritura exitosa, las lecturas del
+# mismo cliente se sirven desde el primario durante DB_REPLICA_STICKY_SECONDS
+@app.middleware("http")
+async def fijar_lecturas_tras_escritura(request: Request, call_next):
+    response = await call_next(request)
+    if request.method in ("POST", "PUT", "PATCH", "DELETE") and response.status_code < 400:
+        registrar_escritura(request)
+    return response
+
+# Rutas de lectura asíncronas: se registran primero para que atiendan las
+# mismas URLs que sus equivalentes síncronos cuando el motor async está activo
+if settings.ASYNC_DB_ENABLED:
+    from app.api.v1.async_endpoints import router as async_api_router
+    app.include_router(async_api_router, prefix="/api/v1", tags=["API v1 (async)"])
+
 # Incluir rutas de la API
 app.include_router(api_router, prefix="/api/v1", tags=["API v1"])
 
+@app.on_event("startup")
+def iniciar_caches():
+    """Arrancar los hilos que recalculan las cachés en memoria (dashboard) y el log de consultas lentas"""
+    slow_queries.configurar_archivo()
+    if settings.CACHE_REFRESCO_ACTIVO:
+        cache.iniciar_refrescadores()
+
+@app.on_event("shutdown")
+async def cerrar_conexiones():
+    """Liberar las conexiones del pool asíncrono al apagar el servidor"""
+    cache.detener_refrescadores()
+    from app.core.database import async_engine
+    if async_engine is not None:
+        await async_engine.dispose()
+
 # Endpoints del sistema
 @app.get("/")
 def read_root():
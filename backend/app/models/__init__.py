@@ -1,4 +1,7 @@
 from .models import *
 from .solicitud_models import *
 from .pago_models import *
+from .analytics_models import *
+from .recomendacion_models import *
+from .especificacion_models import *
 # from .extended_models import *  # Temporalmente comentado hasta que se necesiten
\ No newline at end of file
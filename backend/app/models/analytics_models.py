@@ -0,0 +1,101 @@
+from sqlalchemy import Column, Integer, String, Numeric, Date, DateTime, Float, JSON, Index
+from app.core.database import Base
+
+# Rollups diarios para el dashboard y la analítica. Cuentan las solicitudes
+# aprobadas, en proceso o completadas, por fecha de inicio del evento; se
+# mantienen de forma incremental en cada cambio de estado
+# (ver app/crud/analytics_crud.py) y se reconstruyen con backfill_rollups.py.
+# En todos, ingresos es la suma de subtotales de línea antes de IVA y sin
+# depósitos. Los pagos se acumulan por fecha de pago al registrarse.
+
+# Rollup por producto y día
+class RollupProductoDia(Base):
+    __tablename__ = "rollup_producto_dia"
+    __table_args__ = (
+        Index("ix_rollup_producto_dia_dia", "dia"),
+    )
+
+    producto_id = Column(Integer, primary_key=True)
+    dia = Column(Date, primary_key=True)
+    unidades = Column(Integer, nullable=False, default=0)
+    ingresos = Column(Numeric(14, 2), nullable=False, default=0)
+    solicitudes = Column(Integer, nullable=False, default=0)
+
+# Rollup por categoría y día
+class RollupCategoriaDia(Base):
+    __tablename__ = "rollup_categoria_dia"
+    __table_args__ = (
+        Index("ix_rollup_categoria_dia_dia", "dia"),
+    )
+
+    categoria_id = Column(Integer, primary_key=True)
+    dia = Column(Date, primary_key=True)
+    unidades = Column(Integer, nullable=False, default=0)
+    ingresos = Column(Numeric(14, 2), nullable=False, default=0)
+    solicitudes = Column(Integer, nullable=False, default=0)
+
+# Rollup por paquete y día
+class RollupPaqueteDia(Base):
+    __tablename__ = "rollup_paquete_dia"
+    __table_args__ = (
+        Index("ix_rollup_paquete_dia_dia", "dia"),
+    )
+
+    paquete_id = Column(Integer, primary_key=True)
+    dia = Column(Date, primary_key=True)
+    unidades = Column(Integer, nullable=False, default=0)
+    ingresos = Column(Numeric(14, 2), nullable=False, default=0)
+    solicitudes = Column(Integer, nullable=False, default=0)
+
+# Rollup por tipo de evento y día (líneas de productos y de paquetes)
+class RollupTipoEventoDia(Base):
+    __tablename__ = "rollup_tipo_evento_dia"
+    __table_args__ = (
+        Index("ix_rollup_tipo_evento_dia_dia", "dia"),
+    )
+
+    tipo_evento = Column(String(100), primary_key=True)  # "sin_tipo" si la solicitud no lo indica
+    dia = Column(Date, primary_key=True)
+    unidades = Column(Integer, nullable=False, default=0)
+    ingresos = Column(Numeric(14, 2), nullable=False, default=0)
+    solicitudes = Column(Integer, nullable=False, default=0)
+
+# Rollup de pagos completados por día y tipo de pago (devoluciones en negativo)
+class RollupPagoDia(Base):
+    __tablename__ = "rollup_pago_dia"
+    __table_args__ = (
+        Index("ix_rollup_pago_dia_dia", "dia"),
+    )
+
+    tipo_pago = Column(String(30), primary_key=True)
+    dia = Column(Date, primary_key=True)
+    monto = Column(Numeric(14, 2), nullable=False, default=0)
+    pagos = Column(Integer, nullable=False, default=0)
+
+# Pronóstico de unidades en uso por producto y día (lo escribe pronosticar_demanda.py)
+class PronosticoDemanda(Base):
+    __tablename__ = "pronostico_demanda"
+    __table_args__ = (
+        Index("ix_pronostico_demanda_fecha", "fecha"),
+    )
+
+    producto_id = Column(Integer, primary_key=True)
+    fecha = Column(Date, primary_key=True)
+    unidades = Column(Numeric(10, 2), nullable=False)
+    generado_en = Column(DateTime, nullable=False)
+
+# Recomendación de stock_total por producto (la escribe planificar_capacidad.py)
+class RecomendacionStock(Base):
+    __tablename__ = "recomendacion_stock"
+
+    producto_id = Column(Integer, primary_key=True)
+    stock_actual = Column(Integer, nullable=False)
+    stock_recomendado = Column(Integer, nullable=False)
+    nivel_servicio = Column(Float, nullable=False)
+    prob_faltante_actual = Column(Float, nullable=False)
+    pico_p50 = Column(Float, nullable=False)
+    pico_p95 = Column(Float, nullable=False)
+    curva = Column(JSON)  # [[stock, probabilidad de faltante], ...]
+    escenarios = Column(Integer, nullable=False)
+    horizonte_dias = Column(Integer, nullable=False)
+    generado_en = Column(DateTime, nullable=False)
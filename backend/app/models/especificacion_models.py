@@ -0,0 +1,32 @@
+from sqlalchemy import Column, Integer, String, Float, Index, ForeignKey
+from app.core.database import Base
+
+# Especificaciones consultables. `productos.especificaciones` sigue siendo la
+# fuente (JSON libre); las claves declaradas en el esquema de la categoría se
+# copian tipadas a producto_atributos para filtrar con índices (ver
+# app/crud/especificaciones_crud.py).
+
+# Esquema tipado de especificaciones por categoría
+class EspecificacionCategoria(Base):
+    __tablename__ = "especificaciones_categoria"
+
+    categoria_id = Column(Integer, ForeignKey("categorias.categoria_id"), primary_key=True)
+    clave = Column(String(50), primary_key=True)
+    tipo = Column(String(10), nullable=False, default="texto")  # enum: texto, numero, booleano
+    etiqueta = Column(String(100))
+    unidad = Column(String(20))
+
+# Valor de cada clave declarada por producto. valor_texto es la forma
+# normalizada (minúsculas, sin acentos) y valor_numero solo se llena en
+# claves numéricas y booleanas (1/0), para filtros por rango.
+class ProductoAtributo(Base):
+    __tablename__ = "producto_atributos"
+    __table_args__ = (
+        Index("ix_producto_atributos_texto", "clave", "valor_texto", "producto_id"),
+        Index("ix_producto_atributos_numero", "clave", "valor_numero", "producto_id"),
+    )
+
+    producto_id = Column(Integer, ForeignKey("productos.producto_id", ondelete="CASCADE"), primary_key=True)
+    clave = Column(String(50), primary_key=True)
+    valor_texto = Column(String(100), nullable=False)
+    valor_numero = Column(Float)
@@ -24,14 +24,14 @@ class Producto(Base):
     __tablename__ = "productos"
 
     producto_id = Column(Integer, primary_key=True, index=True)
-    categoria_id = Column(Integer, ForeignKey("categorias.categoria_id"), nullable=False)
+    categoria_id = Column(Integer, ForeignKey("categorias.categoria_id"), nullable=False, index=True)
     codigo_producto = Column(String(50), unique=True, nullable=False)
     nombre = Column(String(200), nullable=False)
     descripcion = Column(Text)
     precio_por_dia = Column(Numeric(10, 2), nullable=False)
     stock_total = Column(Integer, nullable=False)
     stock_disponible = Column(Integer, nullable=False)
-    estado = Column(String(20), default="disponible")  # enum: disponible, mantenimiento, inactivo
+    estado = Column(String(20), default="disponible", index=True)  # enum: disponible, mantenimiento, inactivo
     especificaciones = Column(JSON)  # Campo JSON para especificaciones estructuradas
     dimensiones = Column(String(100))
     peso = Column(Numeric(8, 2))
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Enum, DECIMAL, TIMESTAMP, ForeignKey, Text, Boolean
+from sqlalchemy import Column, Integer, String, Enum, DECIMAL, TIMESTAMP, ForeignKey, Text, Boolean, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
@@ -59,6 +59,9 @@ class MarcaTarjeta(str, enum.Enum):
 
 class TarjetaUsuario(Base):
     __tablename__ = "tarjetas_usuario"
+    __table_args__ = (
+        Index("ix_tarjetas_usuario_usuario_activa", "usuario_id", "activa"),
+    )
     
     tarjeta_id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     usuario_id = Column(Integer, ForeignKey("usuarios.usuario_id"), nullable=False, index=True)
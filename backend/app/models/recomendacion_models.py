@@ -0,0 +1,46 @@
+from sqlalchemy import Column, Integer, String, Float, Index
+from app.core.database import Base
+
+# Tablas de recomendaciones "se rentan juntos". Los conteos se actualizan de
+# forma incremental con las solicitudes que entran o salen de los estados
+# contabilizados (ver app/crud/recomendaciones_crud.py) y el top-K por
+# producto se recalcula solo para los productos afectados. item_tipo es
+# "producto" o "paquete".
+
+# Solicitudes contabilizadas que ya están sumadas en los conteos
+class CoocurrenciaSolicitud(Base):
+    __tablename__ = "coocurrencia_solicitudes"
+
+    solicitud_id = Column(Integer, primary_key=True, autoincrement=False)
+
+# Número de solicitudes en que aparece cada producto o paquete
+class CoocurrenciaItem(Base):
+    __tablename__ = "coocurrencia_items"
+
+    item_tipo = Column(String(10), primary_key=True)
+    item_id = Column(Integer, primary_key=True)
+    conteo = Column(Integer, nullable=False, default=0)
+
+# Solicitudes en que aparecen juntos un producto y otro producto o paquete
+class CoocurrenciaPar(Base):
+    __tablename__ = "coocurrencia_pares"
+    __table_args__ = (
+        Index("ix_coocurrencia_pares_item", "item_tipo", "item_id"),
+    )
+
+    producto_id = Column(Integer, primary_key=True)
+    item_tipo = Column(String(10), primary_key=True)
+    item_id = Column(Integer, primary_key=True)
+    conteo = Column(Integer, nullable=False, default=0)
+
+# Top-K de vecinos por producto, listo para /productos/{id}/relacionados
+class ProductoRelacionado(Base):
+    __tablename__ = "productos_relacionados"
+
+    producto_id = Column(Integer, primary_key=True)
+    posicion = Column(Integer, primary_key=True)
+    item_tipo = Column(String(10), nullable=False)
+    item_id = Column(Integer, nullable=False)
+    conteo = Column(Integer, nullable=False)
+    lift = Column(Float, nullable=False)
+    jaccard = Column(Float, nullable=False)
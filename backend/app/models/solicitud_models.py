@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, Numeric, DateTime, Date, ForeignKey, Enum as SQLEnum
+from sqlalchemy import Column, Integer, String, Text, Numeric, DateTime, Date, ForeignKey, Index, Enum as SQLEnum
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.core.database import Base
@@ -13,9 +13,20 @@ class EstadoSolicitud(str, enum.Enum):
     completada = "completada"
     cancelada = "cancelada"
 
+# Estado de pago de una solicitud (desnormalizado a partir de sus pagos)
+class EstadoPagoSolicitud(str, enum.Enum):
+    pendiente = "pendiente"
+    parcial = "parcial"
+    pagado = "pagado"
+    reembolso_pendiente = "reembolso_pendiente"
+
 # Modelo Solicitud
 class Solicitud(Base):
     __tablename__ = "solicitudes"
+    __table_args__ = (
+        Index("ix_solicitudes_usuario_fecha", "usuario_id", "fecha_solicitud"),
+        Index("ix_solicitudes_estado_fecha", "estado", "fecha_solicitud"),
+    )
 
     solicitud_id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     usuario_id = Column(Integer, ForeignKey("usuarios.usuario_id"), nullable=False, index=True)
@@ -37,6 +48,12 @@ class Solicitud(Base):
     fecha_respuesta = Column(DateTime(timezone=True))
     fecha_entrega = Column(DateTime(timezone=True))
     fecha_devolucion = Column(DateTime(timezone=True))
+    # Resumen desnormalizado para los listados; lo mantienen crear_solicitud,
+    # cancelar_solicitud y crear_pago (ver backfill_resumen_solicitudes.py)
+    total_productos = Column(Integer, nullable=False, default=0, server_default="0")
+    total_paquetes = Column(Integer, nullable=False, default=0, server_default="0")
+    total_pagado = Column(Numeric(12, 2), nullable=False, default=0.00, server_default="0")
+    estado_pago = Column(SQLEnum(EstadoPagoSolicitud), nullable=False, default=EstadoPagoSolicitud.pendiente, server_default="pendiente", index=True)
 
     # Relaciones
     solicitud_paquetes = relationship("SolicitudPaquete", back_populates="solicitud", cascade="all, delete-orphan")
@@ -76,3 +93,23 @@ class SolicitudProducto(Base):
     # Relaciones
     solicitud = relationship("Solicitud", back_populates="solicitud_productos")
     producto = relationship("Producto")
+
+# Modelo SolicitudEvento: historial append-only de cambios de estado
+class SolicitudEvento(Base):
+    __tablename__ = "solicitud_eventos"
+    __table_args__ = (
+        Index("ix_solicitud_eventos_solicitud_fecha", "solicitud_id", "fecha"),
+        Index("ix_solicitud_eventos_estado_fecha", "estado_nuevo", "fecha"),
+    )
+
+    evento_id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    solicitud_id = Column(Integer, ForeignKey("solicitudes.solicitud_id"), nullable=False)
+    estado_anterior = Column(SQLEnum(EstadoSolicitud), nullable=True)  # None en la creación
+    estado_nuevo = Column(SQLEnum(EstadoSolicitud), nullable=False)
+    fecha = Column(DateTime(timezone=True), nullable=False)
+    actor_tipo = Column(String(20), nullable=False)  # usuario, admin, sistema
+    actor_id = Column(Integer)
+    observaciones = Column(Text)
+
+    # Relaciones
+    solicitud = relationship("Solicitud")
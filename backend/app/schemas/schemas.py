@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional, List
 from datetime import datetime
 
@@ -162,3 +162,26 @@ class UsuarioChangePassword(BaseModel):
     
     class Config:
         extra = "ignore"  # Ignorar campos adicionales
+
+# Schema para el esquema de especificaciones de una categoría
+class EspecificacionCategoriaBase(BaseModel):
+    clave: str
+    tipo: str = "texto"  # texto, numero, booleano
+    etiqueta: Optional[str] = None
+    unidad: Optional[str] = None
+
+# Schemas para operaciones masivas de administración
+class ProductosAccionMasiva(BaseModel):
+    accion: str = Field(..., description="precio, estado, categoria o eliminar")
+    producto_ids: Optional[List[int]] = Field(None, min_length=1, max_length=5000)
+    categoria_id: Optional[int] = Field(None, description="Aplicar a todos los productos de esta categoría")
+    precio_por_dia: Optional[float] = None
+    porcentaje: Optional[float] = Field(None, description="Ajuste relativo, p. ej. 10 o -15")
+    estado: Optional[str] = None
+    nueva_categoria_id: Optional[int] = None
+
+class PaquetesAccionMasiva(BaseModel):
+    accion: str = Field(..., description="precio, activar, desactivar o eliminar")
+    paquete_ids: List[int] = Field(..., min_length=1, max_length=5000)
+    precio_por_dia: Optional[float] = None
+    porcentaje: Optional[float] = None
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional, List
 from datetime import datetime, date
 from decimal import Decimal
@@ -101,6 +101,18 @@ class SolicitudListResponse(BaseModel):
     fecha_solicitud: datetime
     total_productos: int = 0
     total_paquetes: int = 0
+    total_pagado: Decimal = Decimal("0.00")
+    estado_pago: Optional[str] = None
 
     class Config:
         from_attributes = True
+
+# Schemas para el flujo de estados (admin)
+class SolicitudCambioEstado(BaseModel):
+    estado: str = Field(..., description="aprobada, rechazada, en_proceso, completada, cancelada")
+    observaciones_admin: Optional[str] = None
+
+class SolicitudAccionMasiva(BaseModel):
+    solicitud_ids: List[int] = Field(..., min_length=1, max_length=1000)
+    accion: str = Field(..., description="aprobar o rechazar")
+    observaciones_admin: Optional[str] = None
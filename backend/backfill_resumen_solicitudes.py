@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Verificar (y opcionalmente reparar) el resumen desnormalizado de solicitudes:
+total_productos, total_paquetes, total_pagado y estado_pago.
+
+Recorre las solicitudes por lotes de solicitud_id y compara contra las
+líneas y los pagos reales; cada lote se corrige en su propia transacción.
+
+Uso (desde backend/):
+    python backfill_resumen_solicitudes.py              # solo reportar
+    python backfill_resumen_solicitudes.py --reparar    # corregir desviaciones
+    python backfill_resumen_solicitudes.py --reparar --lote 1000
+"""
+
+import argparse
+import os
+import sys
+
+# Agregar el directorio raíz al path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.core.database import SessionLocal
+from app.crud import solicitud_crud
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Verificar/reparar el resumen desnormalizado de solicitudes")
+    parser.add_argument("--reparar", action="store_true", help="Corregir las diferencias encontradas")
+    parser.add_argument("--lote", type=int, default=500, help="Solicitudes por lote/transacción")
+    parser.add_argument("--verbose", action="store_true", help="Mostrar cada diferencia")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    total_revisadas = 0
+    total_diferencias = 0
+    desde_id = 0
+    try:
+        print("🔄 Verificando resumen de solicitudes...")
+        while True:
+            ultimo_id, revisadas, diferencias = solicitud_crud.verificar_resumen_lote(
+                db, desde_id=desde_id, lote=args.lote, reparar=args.reparar
+            )
+            if ultimo_id is None:
+                break
+            total_revisadas += revisadas
+            total_diferencias += len(diferencias)
+            if args.verbose:
+                for diferencia in diferencias:
+                    cambios = ", ".join(
+                        f"{campo}: {getattr(antes, 'value', antes)} -> {getattr(despues, 'value', despues)}"
+                        for campo, (antes, despues) in diferencia["cambios"].items()
+                    )
+                    print(f"   solicitud {diferencia['solicitud_id']}: {cambios}")
+            desde_id = ultimo_id
+
+        print(f"✅ {total_revisadas} solicitudes revisadas, {total_diferencias} con diferencias")
+        if total_diferencias and not args.reparar:
+            print("💡 Ejecuta con --reparar para corregirlas")
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Error: {e}")
+        sys.exit(1)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Reconstruir los rollups diarios de analítica (rollup_producto_dia,
+rollup_categoria_dia, rollup_paquete_dia, rollup_tipo_evento_dia y
+rollup_pago_dia) a partir de las solicitudes y los pagos.
+
+Recorre el rango de fechas de evento por meses; cada mes se borra y se
+vuelve a calcular en su propia transacción, así que puede re-ejecutarse
+sin duplicar datos.
+
+Uso (desde backend/):
+    python backfill_rollups.py                                   # todo el historial
+    python backfill_rollups.py --desde 2026-01-01 --hasta 2026-03-31
+"""
+
+import argparse
+import os
+import sys
+from datetime import date, timedelta
+
+# Agregar el directorio raíz al path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.core.database import SessionLocal
+from app.crud import analytics_crud
+
+
+def _meses(desde: date, hasta: date):
+    """Partir [desde, hasta] en tramos que no cruzan de mes"""
+    inicio = desde
+    while inicio <= hasta:
+        siguiente = (inicio.replace(day=1) + timedelta(days=32)).replace(day=1)
+        fin = min(siguiente - timedelta(days=1), hasta)
+        yield inicio, fin
+        inicio = siguiente
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reconstruir los rollups diarios de analítica")
+    parser.add_argument("--desde", type=date.fromisoformat, help="Primer día (YYYY-MM-DD)")
+    parser.add_argument("--hasta", type=date.fromisoformat, help="Último día (YYYY-MM-DD)")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        primero, ultimo = analytics_crud.rango_historial(db)
+        desde = args.desde or primero
+        hasta = args.hasta or ultimo
+        if desde is None or hasta is None:
+            print("ℹ️  No hay solicitudes ni pagos contabilizables; nada que reconstruir")
+            return
+
+        print(f"🔄 Reconstruyendo rollups del {desde} al {hasta}...")
+        for inicio, fin in _meses(desde, hasta):
+            escritas = analytics_crud.reconstruir_rollups(db, inicio, fin)
+            detalle = ", ".join(f"{tabla}: {filas}" for tabla, filas in escritas.items())
+            print(f"   {inicio:%Y-%m}: {detalle}")
+        print("✅ Rollups reconstruidos")
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Error: {e}")
+        sys.exit(1)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
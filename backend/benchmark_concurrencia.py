@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Prueba de carga para comparar endpoints de lectura síncronos vs. asíncronos.
+
+Lanza N peticiones concurrentes contra el servidor y reporta throughput y
+latencias. Ejecutarlo dos veces: con ASYNC_DB_ENABLED=False y con
+ASYNC_DB_ENABLED=True. Con el modo síncrono el throughput deja de crecer
+cerca de los ~40 hilos del threadpool; con el asíncrono sigue escalando
+hasta el límite del pool de conexiones.
+
+Uso:
+    python benchmark_concurrencia.py --path /api/v1/productos --niveles 10 40 80 160 320
+    python benchmark_concurrencia.py --path /api/v1/me/solicitudes --token <JWT>
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+
+import httpx
+
+BASE_URL = "http://localhost:8001"
+
+async def ejecutar_nivel(client, path, concurrencia, total, headers):
+    """Ejecutar `total` peticiones manteniendo `concurrencia` en vuelo"""
+    semaforo = asyncio.Semaphore(concurrencia)
+    latencias = []
+    errores = 0
+
+    async def una_peticion():
+        nonlocal errores
+        async with semaforo:
+            inicio = time.perf_counter()
+            try:
+                response = await client.get(path, headers=headers)
+                if response.status_code >= 400:
+                    errores += 1
+            except Exception:
+                errores += 1
+            latencias.append(time.perf_counter() - inicio)
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*(una_peticion() for _ in range(total)))
+    duracion = time.perf_counter() - inicio
+
+    latencias.sort()
+    return {
+        "concurrencia": concurrencia,
+        "peticiones": total,
+        "errores": errores,
+        "rps": total / duracion if duracion else 0.0,
+        "p50_ms": statistics.median(latencias) * 1000,
+        "p95_ms": latencias[int(len(latencias) * 0.95) - 1] * 1000,
+        "max_ms": latencias[-1] * 1000,
+    }
+
+async def main(args):
+    """Recorrer los niveles de concurrencia e imprimir una tabla de resultados"""
+    headers = {"Authorization": f"Bearer {args.token}"} if args.token else {}
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout) as client:
+        # Calentar el pool de conexiones
+        await client.get(args.path, headers=headers)
+
+        print(f"📊 {args.base_url}{args.path}")
+        print(f"{'conc':>6} {'req':>7} {'err':>5} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9}")
+        for nivel in args.niveles:
+            total = max(args.peticiones, nivel * 4)
+            r = await ejecutar_nivel(client, args.path, nivel, total, headers)
+            print(f"{r['concurrencia']:>6} {r['peticiones']:>7} {r['errores']:>5} {r['rps']:>9.1f} "
+                  f"{r['p50_ms']:>9.1f} {r['p95_ms']:>9.1f} {r['max_ms']:>9.1f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Prueba de carga de endpoints de lectura")
+    parser.add_argument("--base-url", default=BASE_URL)
+    parser.add_argument("--path", default="/api/v1/productos")
+    parser.add_argument("--token", default=None, help="JWT para endpoints autenticados")
+    parser.add_argument("--niveles", type=int, nargs="+", default=[10, 40, 80, 160, 320])
+    parser.add_argument("--peticiones", type=int, default=400, help="Peticiones mínimas por nivel")
+    parser.add_argument("--timeout", type=float, default=60.0)
+
+    try:
+        asyncio.run(main(parser.parse_args()))
+    except KeyboardInterrupt:
+        sys.exit(1)
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Detectar productos con más unidades comprometidas que stock_total en los
+próximos días (solicitudes pendientes, aprobadas y en proceso).
+
+La API ya lo ejecuta en segundo plano cada SOBREVENTA_INTERVALO_SEGUNDOS;
+este script sirve para revisarlo a mano o desde cron. Sale con código 2 si
+encuentra sobreventa.
+
+Uso (desde backend/):
+    python detectar_sobreventa.py
+    python detectar_sobreventa.py --dias 14
+"""
+
+import argparse
+import os
+import sys
+
+# Agregar el directorio raíz al path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.crud import analytics_crud
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Detectar sobreventa de productos")
+    parser.add_argument("--dias", type=int, default=settings.SOBREVENTA_DIAS, help="Días hacia adelante a revisar")
+    args = parser.parse_args()
+
+    db = SessionLocal(info={"solo_lectura": True})
+    try:
+        resultado = analytics_crud.detectar_sobreventa(db, dias=args.dias)
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        sys.exit(1)
+    finally:
+        db.close()
+
+    print(f"🔍 Sobreventa del {resultado['desde']} al {resultado['hasta']}")
+    if not resultado["productos"]:
+        print("✅ Ningún producto supera su stock")
+        return
+    for producto in resultado["productos"]:
+        print(f"\n❌ {producto['codigo_producto']} {producto['nombre']}: pico {producto['pico']} / stock {producto['stock_total']}")
+        for conflicto in producto["conflictos"]:
+            excedentes = [s["numero_solicitud"] for s in conflicto["solicitudes"] if s["excedente"]]
+            print(f"   {conflicto['desde']} a {conflicto['hasta']}: +{conflicto['exceso']} unidades; excedentes: {', '.join(excedentes)}")
+    sys.exit(2)
+
+
+if __name__ == "__main__":
+    main()
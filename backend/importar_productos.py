@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Importar productos desde un archivo CSV (con encabezados) o NDJSON, con las
+mismas columnas y validaciones que POST /admin/productos. Las filas con
+errores se reportan y no detienen la importación del resto.
+
+Uso (desde backend/):
+    python importar_productos.py catalogo.csv
+    python importar_productos.py catalogo.ndjson --dry-run
+    python importar_productos.py catalogo.txt --formato csv --lote 2000 --reporte errores.json
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+# Agregar el directorio raíz al path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.core.database import SessionLocal
+from app.crud import importacion_crud
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Importación masiva de productos (CSV o NDJSON)")
+    parser.add_argument("archivo", help="Ruta del archivo a importar")
+    parser.add_argument("--formato", choices=importacion_crud.FORMATOS_IMPORTACION, help="Por defecto se deduce de la extensión")
+    parser.add_argument("--lote", type=int, default=1000, help="Productos por INSERT/transacción")
+    parser.add_argument("--dry-run", action="store_true", help="Solo validar, sin insertar")
+    parser.add_argument("--reporte", help="Guardar el reporte completo en este archivo JSON")
+    args = parser.parse_args()
+
+    try:
+        formato = importacion_crud.formato_de_archivo(args.archivo, args.formato)
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+    db = SessionLocal()
+    try:
+        inicio = time.perf_counter()
+        with open(args.archivo, encoding="utf-8-sig", newline="") as lineas:
+            reporte = importacion_crud.importar_productos(
+                db, importacion_crud.leer_filas(lineas, formato), lote=args.lote, dry_run=args.dry_run
+            )
+        print(f"✅ {reporte['filas']} filas leídas en {time.perf_counter() - inicio:.1f} s: "
+              f"{reporte['validas']} válidas, {reporte['insertados']} insertadas")
+        if reporte["con_errores"]:
+            print(f"⚠️  {reporte['con_errores']} filas con errores")
+            for error in reporte["errores"][:20]:
+                print(f"   fila {error['fila']} ({error['codigo_producto']}): {'; '.join(error['errores'])}")
+        if args.reporte:
+            with open(args.reporte, "w", encoding="utf-8") as salida:
+                json.dump(reporte, salida, ensure_ascii=False, indent=2)
+            print(f"📝 Reporte guardado en {args.reporte}")
+        if reporte["con_errores"]:
+            sys.exit(2)
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Error: {e}")
+        sys.exit(1)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
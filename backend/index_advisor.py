@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Asesor de índices: ejecuta las consultas de lectura que realmente emite la
+capa CRUD, captura el SQL generado y corre EXPLAIN sobre cada sentencia para
+reportar recorridos completos de tabla (full scans).
+
+Uso (desde backend/):
+    python index_advisor.py
+    python index_advisor.py --plan     # mostrar también el plan completo
+"""
+
+import argparse
+import os
+import sys
+
+# Agregar el directorio raíz al path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import event, text
+from app.core.database import SessionLocal, engine
+from app.core.explain import explicar, full_scans, es_explicable
+from app.crud.crud import categorias_crud, productos_crud, paquetes_crud
+from app.crud import solicitud_crud, pago_crud, analytics_crud
+
+
+def _primer_id(db, tabla, columna):
+    """Tomar un id real de la tabla para que los planes sean representativos"""
+    fila = db.execute(text(f"SELECT {columna} FROM {tabla} LIMIT 1")).fetchone()
+    return fila[0] if fila else 1
+
+
+# Consultas de lectura de la capa CRUD que usan los endpoints más frecuentes
+CONSULTAS = [
+    ("categorias_crud.get_all", lambda db, ids: categorias_crud.get_all(db)),
+    ("productos_crud.get_all", lambda db, ids: productos_crud.get_all(db)),
+    ("productos_crud.get_by_categoria", lambda db, ids: productos_crud.get_by_categoria(db, ids["categoria_id"])),
+    ("productos_crud.get_by_id_con_categoria", lambda db, ids: productos_crud.get_by_id_con_categoria(db, ids["producto_id"])),
+    ("productos_crud.get_productos_con_categoria", lambda db, ids: productos_crud.get_productos_con_categoria(db)),
+    ("paquetes_crud.get_all", lambda db, ids: paquetes_crud.get_all(db)),
+    ("analytics_crud.get_dashboard_stats", lambda db, ids: analytics_crud.get_dashboard_stats(db)),
+    ("solicitud_crud.obtener_solicitudes_usuario", lambda db, ids: solicitud_crud.obtener_solicitudes_usuario(db, ids["usuario_id"])),
+    ("solicitud_crud.obtener_todas_solicitudes", lambda db, ids: solicitud_crud.obtener_todas_solicitudes(db)),
+    ("pago_crud.obtener_pagos_usuario", lambda db, ids: pago_crud.obtener_pagos_usuario(db, ids["usuario_id"])),
+    ("pago_crud.obtener_pagos_solicitud", lambda db, ids: pago_crud.obtener_pagos_solicitud(db, ids["solicitud_id"], ids["usuario_id"])),
+    ("pago_crud.obtener_tarjetas_usuario", lambda db, ids: pago_crud.obtener_tarjetas_usuario(db, ids["usuario_id"])),
+]
+
+
+def capturar_sentencias(db, ids):
+    """Ejecutar cada consulta CRUD y devolver [(nombre, sql, parametros)]"""
+    capturadas = []
+    actual = {"nombre": None}
+
+    def _capturar(conn, cursor, statement, parameters, context, executemany):
+        if not executemany and es_explicable(statement):
+            capturadas.append((actual["nombre"], statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", _capturar)
+    try:
+        for nombre, consulta in CONSULTAS:
+            actual["nombre"] = nombre
+            try:
+                consulta(db, ids)
+            except Exception as e:
+                print(f"⚠️  {nombre}: no se pudo ejecutar ({e})")
+                db.rollback()
+    finally:
+        event.remove(engine, "before_cursor_execute", _capturar)
+    return capturadas
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reportar full scans en las consultas de la capa CRUD")
+    parser.add_argument("--plan", action="store_true", help="Mostrar el plan completo de cada sentencia")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        ids = {
+            "categoria_id": _primer_id(db, "categorias", "categoria_id"),
+            "producto_id": _primer_id(db, "productos", "producto_id"),
+            "usuario_id": _primer_id(db, "usuarios", "usuario_id"),
+            "solicitud_id": _primer_id(db, "solicitudes", "solicitud_id"),
+        }
+        sentencias = capturar_sentencias(db, ids)
+
+        print("=" * 70)
+        print(f"🔍 ASESOR DE ÍNDICES ({engine.dialect.name}) - {len(sentencias)} sentencias")
+        print("=" * 70)
+
+        total_full_scans = 0
+        vistas = set()
+        conn = db.connection()
+        for nombre, statement, parameters in sentencias:
+            if statement in vistas:
+                continue
+            vistas.add(statement)
+            plan = explicar(conn, statement, parameters)
+            tablas = full_scans(plan, engine.dialect.name)
+            if tablas:
+                total_full_scans += 1
+                print(f"\n❌ {nombre}: full scan en {', '.join(tablas)}")
+                print(f"   {' '.join(statement.split())[:200]}")
+            else:
+                print(f"\n✅ {nombre}: usa índices")
+            if args.plan:
+                for fila in plan:
+                    print(f"   {fila}")
+
+        print("\n" + "=" * 70)
+        if total_full_scans:
+            print(f"⚠️  {total_full_scans} sentencias con full scan. Las tablas pequeñas")
+            print("   (categorias, paquetes) pueden ignorarse; revisa las demás.")
+        else:
+            print("✅ Ninguna sentencia recorre tablas completas")
+        print("=" * 70)
+    finally:
+        db.rollback()
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
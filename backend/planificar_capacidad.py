@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Recomendar stock_total por producto con una simulación Monte Carlo de la
+demanda de las próximas semanas y guardar el resultado en recomendacion_stock.
+
+Uso (desde backend/):
+    python planificar_capacidad.py
+    python planificar_capacidad.py --escenarios 10000 --nivel 0.98 --procesos 4
+"""
+
+import argparse
+import os
+import sys
+import time
+
+# Agregar el directorio raíz al path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.core.database import SessionLocal
+from app.crud import analytics_crud
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Planeación de capacidad (Monte Carlo)")
+    parser.add_argument("--semanas", type=int, default=8, help="Horizonte a simular")
+    parser.add_argument("--historia", type=int, default=730, help="Días de historia de donde se muestrea")
+    parser.add_argument("--escenarios", type=int, default=5000, help="Escenarios por producto")
+    parser.add_argument("--nivel", type=float, default=0.95, help="Nivel de servicio objetivo (0-1)")
+    parser.add_argument("--procesos", type=int, default=0, help="Procesos del pool (0 = en este proceso)")
+    parser.add_argument("--semilla", type=int, default=0, help="Semilla para resultados reproducibles")
+    args = parser.parse_args()
+
+    if not 0 < args.nivel < 1:
+        print("❌ --nivel debe estar entre 0 y 1")
+        sys.exit(1)
+
+    db = SessionLocal()
+    try:
+        print(f"🎲 Simulando {args.escenarios} escenarios de {args.semanas} semanas por producto...")
+        inicio = time.perf_counter()
+        resumen = analytics_crud.planificar_capacidad(
+            db, semanas=args.semanas, historia_dias=args.historia, escenarios=args.escenarios,
+            nivel_servicio=args.nivel, procesos=args.procesos, semilla=args.semilla
+        )
+        print(f"✅ {resumen['productos']} productos en {time.perf_counter() - inicio:.1f} s")
+        print(f"   {resumen['con_stock_insuficiente']} por debajo del nivel de servicio "
+              f"({resumen['unidades_a_comprar']} unidades a comprar)")
+        for recomendacion, codigo, nombre in analytics_crud.obtener_recomendaciones_stock(db, solo_insuficientes=True, limit=10):
+            print(f"   {codigo} {nombre}: {recomendacion.stock_actual} -> {recomendacion.stock_recomendado} "
+                  f"(faltante actual {recomendacion.prob_faltante_actual:.1%})")
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Error: {e}")
+        sys.exit(1)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
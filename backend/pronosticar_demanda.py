@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Pronosticar la demanda diaria (unidades en uso) de cada producto para las
+próximas semanas y guardarla en pronostico_demanda.
+
+Usa la historia de solicitudes pendientes, aprobadas, en proceso y
+completadas con efectos de temporada (mes), día de la semana y tipo de
+evento. Pensado para correr una vez al día desde cron.
+
+Uso (desde backend/):
+    python pronosticar_demanda.py
+    python pronosticar_demanda.py --semanas 12 --historia 1095
+"""
+
+import argparse
+import os
+import sys
+import time
+
+# Agregar el directorio raíz al path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.core.database import SessionLocal
+from app.crud import analytics_crud
+
+DIAS_SEMANA = ("lun", "mar", "mié", "jue", "vie", "sáb", "dom")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pronosticar demanda diaria por producto")
+    parser.add_argument("--semanas", type=int, default=8, help="Semanas a pronosticar")
+    parser.add_argument("--historia", type=int, default=730, help="Días de historia para ajustar el modelo")
+    parser.add_argument("--max-tipos", type=int, default=8, help="Tipos de evento modelados por separado (el resto va a 'otros')")
+    parser.add_argument("--verbose", action="store_true", help="Mostrar los factores estimados")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        print(f"🔄 Pronosticando {args.semanas} semanas con {args.historia} días de historia...")
+        inicio = time.perf_counter()
+        resumen = analytics_crud.generar_pronostico(
+            db, semanas=args.semanas, historia_dias=args.historia, max_tipos=args.max_tipos
+        )
+        print(f"✅ {resumen['productos']} productos × {resumen['dias']} días = {resumen['filas']} filas "
+              f"en {time.perf_counter() - inicio:.1f} s")
+        print(f"   Tipos de evento: {', '.join(resumen['tipos_evento']) or '(sin historia)'}")
+        if args.verbose:
+            for tipo in resumen["tipos_evento"]:
+                meses = " ".join(f"{f:.2f}" for f in resumen["factor_mes"][tipo])
+                semana = " ".join(f"{d}={f:.2f}" for d, f in zip(DIAS_SEMANA, resumen["factor_dia_semana"][tipo]))
+                print(f"   {tipo}: meses [{meses}] | {semana}")
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Error: {e}")
+        sys.exit(1)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
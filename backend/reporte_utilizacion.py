@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Generar el reporte de utilización de productos (unidades × días rentados
+entre unidades × días en propiedad) de un periodo y guardarlo como CSV.
+
+Uso (desde backend/):
+    python reporte_utilizacion.py                                  # últimos 90 días
+    python reporte_utilizacion.py --desde 2026-01-01 --hasta 2026-06-30 --salida utilizacion.csv
+"""
+
+import argparse
+import csv
+import os
+import sys
+from datetime import date, timedelta
+
+# Agregar el directorio raíz al path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.core.database import SessionLocal
+from app.crud import analytics_crud
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reporte de utilización de productos")
+    parser.add_argument("--desde", type=date.fromisoformat, help="Primer día (YYYY-MM-DD)")
+    parser.add_argument("--hasta", type=date.fromisoformat, help="Último día (YYYY-MM-DD)")
+    parser.add_argument("--salida", default="utilizacion.csv", help="Archivo CSV de salida")
+    parser.add_argument("--top", type=int, default=10, help="Productos a mostrar en consola (más y menos usados)")
+    args = parser.parse_args()
+
+    hasta = args.hasta or date.today()
+    desde = args.desde or hasta - timedelta(days=89)
+
+    db = SessionLocal(info={"solo_lectura": True})
+    try:
+        print(f"🔄 Calculando utilización del {desde} al {hasta}...")
+        reporte = analytics_crud.reporte_utilizacion(db, desde, hasta)
+        with open(args.salida, "w", newline="", encoding="utf-8") as archivo:
+            escritor = csv.DictWriter(archivo, fieldnames=analytics_crud.COLUMNAS_UTILIZACION)
+            escritor.writeheader()
+            escritor.writerows(reporte)
+
+        print(f"✅ {len(reporte)} productos guardados en {args.salida}")
+        if reporte:
+            print(f"\n📈 Más utilizados:")
+            for fila in reporte[:args.top]:
+                print(f"   {fila['utilizacion']:>7.1%}  {fila['codigo_producto']}  {fila['nombre']}")
+            print(f"\n📉 Menos utilizados:")
+            for fila in reporte[-args.top:][::-1]:
+                print(f"   {fila['utilizacion']:>7.1%}  {fila['codigo_producto']}  {fila['nombre']}")
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        sys.exit(1)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Llenar producto_atributos a partir de productos.especificaciones según el
+esquema de cada categoría. Con --inferir, primero propone el esquema de las
+categorías que no tienen uno (claves presentes en al menos --min-frecuencia
+de sus productos).
+
+Uso (desde backend/):
+    python sincronizar_atributos.py
+    python sincronizar_atributos.py --inferir --min-frecuencia 0.3
+    python sincronizar_atributos.py --inferir --dry-run
+"""
+
+import argparse
+import os
+import sys
+
+# Agregar el directorio raíz al path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.core.database import SessionLocal
+from app.models.models import Categoria
+from app.crud import especificaciones_crud
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Extraer especificaciones consultables de los productos")
+    parser.add_argument("--inferir", action="store_true", help="Proponer el esquema de las categorías sin esquema")
+    parser.add_argument("--min-frecuencia", type=float, default=0.3, help="Fracción mínima de productos con la clave")
+    parser.add_argument("--dry-run", action="store_true", help="Solo mostrar los esquemas inferidos")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        if args.inferir:
+            for categoria in db.query(Categoria).order_by(Categoria.categoria_id).all():
+                if especificaciones_crud.obtener_esquema(db, categoria.categoria_id):
+                    continue
+                esquema = especificaciones_crud.inferir_esquema(db, categoria.categoria_id, args.min_frecuencia)
+                if not esquema:
+                    continue
+                claves = ", ".join(f"{c['clave']} ({c['tipo']})" for c in esquema)
+                print(f"🔎 {categoria.nombre}: {claves}")
+                if not args.dry_run:
+                    especificaciones_crud.guardar_esquema(db, categoria.categoria_id, esquema)
+        if args.dry_run:
+            return
+
+        print("🔄 Extrayendo atributos de todos los productos...")
+        atributos = especificaciones_crud.sincronizar_atributos(db)
+        db.commit()
+        print(f"✅ {atributos} atributos indexados")
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Error: {e}")
+        sys.exit(1)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+Configuración común de las pruebas.
+
+Cada prueba recibe una base de datos SQLite temporal recién creada a partir
+de los modelos, con datos mínimos (dos categorías, seis productos, cuatro
+paquetes, un usuario y un administrador), y un TestClient de la API. Las
+variables de entorno se fijan antes de importar la app para que nunca se
+use la base de datos configurada en .env.
+"""
+import os
+import sys
+import tempfile
+from datetime import date, timedelta
+
+_DIRECTORIO = tempfile.mkdtemp(prefix="kabe-pruebas-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_DIRECTORIO, 'pruebas.db')}"
+os.environ["DATABASE_REPLICA_URLS"] = ""
+os.environ["ASYNC_DB_ENABLED"] = "False"
+os.environ["CACHE_REFRESCO_ACTIVO"] = "False"
+os.environ["SLOW_QUERY_LOG_FILE"] = ""
+os.environ["DEBUG"] = "False"
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.core import cache
+from app.core.auth import create_access_token, hash_password
+from app.core.database import Base, engine, SessionLocal
+from app.models.models import Categoria, Producto, Paquete, Usuario, Administrador
+
+PASSWORD = "secret1"
+_PASSWORD_HASH = hash_password(PASSWORD)
+
+
+def _vaciar_caches():
+    """Olvidar los valores de las cachés en memoria de la prueba anterior"""
+    for cache_calculada in cache._caches.values():
+        with cache_calculada._entradas_lock:
+            cache_calculada._entradas.clear()
+
+
+@pytest.fixture
+def db():
+    """Sesión sobre un esquema recién creado con los datos mínimos"""
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    _vaciar_caches()
+
+    sesion = SessionLocal()
+    sesion.add_all([
+        Categoria(nombre="Sillas", descripcion="Sillas para eventos", activo=True),
+        Categoria(nombre="Mesas", descripcion="Mesas para eventos", activo=True),
+    ])
+    sesion.flush()
+    for i in range(6):
+        sesion.add(Producto(
+            categoria_id=1 + i % 2, codigo_producto=f"P{i}", nombre=f"Producto {i}",
+            descripcion="silla de madera blanca" if i % 2 == 0 else "mesa redonda de plástico",
+            precio_por_dia=10 + i, stock_total=20, stock_disponible=20, estado="disponible",
+            especificaciones={"material": "madera" if i % 2 == 0 else "plastico", "color": "blanco", "asientos": 4 + i}
+        ))
+    for i in range(4):
+        sesion.add(Paquete(
+            codigo_paquete=f"K{i}", nombre=f"Paquete {i}", precio_por_dia=100 * (i + 1),
+            capacidad_personas=25 * (i + 1), activo=True, descuento_porcentaje=0
+        ))
+    sesion.add(Usuario(nombre="Usuario", apellido="Prueba", email="usuario@kabe.test", password=_PASSWORD_HASH))
+    sesion.add(Administrador(nombre="Admin", apellido="Prueba", email="admin@kabe.test", password=_PASSWORD_HASH))
+    sesion.commit()
+    try:
+        yield sesion
+    finally:
+        sesion.close()
+
+
+@pytest.fixture
+def client(db):
+    with TestClient(app) as cliente:
+        yield cliente
+
+
+@pytest.fixture
+def headers_usuario():
+    return {"Authorization": "Bearer " + create_access_token({"sub": "usuario@kabe.test"})}
+
+
+@pytest.fixture
+def headers_admin():
+    return {"Authorization": "Bearer " + create_access_token({"sub": "admin@kabe.test", "type": "admin"})}
+
+
+@pytest.fixture
+def crear_solicitud(client, headers_usuario):
+    """
+    Crear una solicitud del usuario de prueba por la API. Por defecto renta
+    `cantidad` unidades del producto 1, dos del producto 2 y un paquete 1.
+    """
+    def _crear(inicio: date = None, dias: int = 3, tipo_evento: str = "boda", cantidad: int = 5,
+               productos: list = None, paquetes: list = None):
+        inicio = inicio or date.today() + timedelta(days=30)
+        fin = inicio + timedelta(days=dias - 1)
+        if productos is None:
+            productos = [(1, cantidad), (2, 2)]
+        if paquetes is None:
+            paquetes = [(1, 1)]
+        respuesta = client.post("/api/v1/me/solicitudes", headers=headers_usuario, json={
+            "fecha_evento_inicio": inicio.isoformat(),
+            "fecha_evento_fin": fin.isoformat(),
+            "tipo_evento": tipo_evento,
+            "productos": [
+                {"producto_id": pid, "cantidad_solicitada": cant, "precio_unitario": 10,
+                 "dias_renta": dias, "subtotal": 10 * cant * dias}
+                for pid, cant in productos
+            ],
+            "paquetes": [
+                {"paquete_id": pid, "cantidad_solicitada": cant, "precio_unitario": 100,
+                 "dias_renta": dias, "subtotal": 100 * cant * dias}
+                for pid, cant in paquetes
+            ],
+        })
+        assert respuesta.status_code == 200, respuesta.text
+        return respuesta.json()
+    return _crear
+
+
+@pytest.fixture
+def cambiar_estado(client, headers_admin):
+    """Cambiar el estado de una solicitud como administrador"""
+    def _cambiar(solicitud_id: int, estado: str):
+        respuesta = client.put(
+            f"/api/v1/admin/solicitudes/{solicitud_id}/estado", headers=headers_admin, json={"estado": estado}
+        )
+        assert respuesta.status_code == 200, respuesta.text
+        return respuesta.json()
+    return _cambiar
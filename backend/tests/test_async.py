@@ -0,0 +1,80 @@
+"""
+Ruta de lectura asíncrona: las consultas de async_crud serializadas con los
+mismos helpers deben dar exactamente lo que responden los endpoints
+síncronos, y la autenticación comparte la decodificación del token.
+"""
+import pytest
+import pytest_asyncio
+from fastapi import HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from app.api.v1.serializers import producto_to_dict, producto_con_categoria_to_dict, solicitud_resumen_to_dict
+from app.core.auth import create_access_token, email_del_token, get_current_user_async
+from app.core.config import settings
+from app.crud import async_crud
+from app.schemas.solicitud_schemas import SolicitudListResponse
+
+
+@pytest_asyncio.fixture
+async def sesion_async(db):
+    motor = create_async_engine(settings.async_database_url)
+    sesion = async_sessionmaker(motor, expire_on_commit=False)()
+    try:
+        yield sesion
+    finally:
+        await sesion.close()
+        await motor.dispose()
+
+
+@pytest.mark.asyncio
+async def test_productos_iguales_a_la_ruta_sincrona(client, sesion_async):
+    productos = await async_crud.obtener_productos(sesion_async)
+    assert [producto_to_dict(p) for p in productos] == client.get("/api/v1/productos").json()
+
+    producto = await async_crud.obtener_producto(sesion_async, 1)
+    detalle = {**producto_to_dict(producto), "categoria_nombre": producto.categoria.nombre}
+    assert detalle == client.get("/api/v1/productos/1").json()
+
+    filas = await async_crud.obtener_productos_con_categoria(sesion_async)
+    assert [producto_con_categoria_to_dict(f) for f in filas] == client.get("/api/v1/productos-con-categoria").json()["productos"]
+
+
+@pytest.mark.asyncio
+async def test_mis_solicitudes_iguales_a_la_ruta_sincrona(client, headers_usuario, crear_solicitud, sesion_async):
+    crear_solicitud()
+    crear_solicitud(tipo_evento="fiesta", cantidad=3)
+
+    filas = await async_crud.obtener_solicitudes_usuario(sesion_async, 1)
+    asincronas = [SolicitudListResponse(**solicitud_resumen_to_dict(f)).model_dump(mode="json") for f in filas]
+    assert asincronas == client.get("/api/v1/me/solicitudes", headers=headers_usuario).json()
+
+
+@pytest.mark.asyncio
+async def test_usuario_actual_async(sesion_async):
+    token = create_access_token({"sub": "usuario@kabe.test"})
+    usuario = await get_current_user_async(HTTPAuthorizationCredentials(scheme="Bearer", credentials=token), sesion_async)
+    assert usuario.usuario_id == 1
+
+    desconocido = create_access_token({"sub": "nadie@kabe.test"})
+    with pytest.raises(HTTPException) as error:
+        await get_current_user_async(HTTPAuthorizationCredentials(scheme="Bearer", credentials=desconocido), sesion_async)
+    assert error.value.status_code == 401
+
+
+def test_email_del_token():
+    assert email_del_token(create_access_token({"sub": "usuario@kabe.test"})) == "usuario@kabe.test"
+    assert email_del_token(create_access_token({"sub": "admin@kabe.test", "type": "admin"}), tipo="admin") == "admin@kabe.test"
+
+    for token, tipo in (
+        ("no-es-un-jwt", None),
+        (create_access_token({"nombre": "sin sub"}), None),
+        (create_access_token({"sub": "usuario@kabe.test"}), "admin"),
+    ):
+        with pytest.raises(HTTPException) as error:
+            email_del_token(token, tipo=tipo)
+        assert error.value.status_code == 401
+
+
+def test_token_de_usuario_no_sirve_como_admin(client, headers_usuario, headers_admin):
+    assert client.get("/api/v1/admin/dashboard", headers=headers_usuario).status_code == 401
+    assert client.get("/api/v1/admin/dashboard", headers=headers_admin).status_code == 200
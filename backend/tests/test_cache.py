@@ -0,0 +1,140 @@
+"""Cachés en memoria: single-flight, stale-while-revalidate, invalidación y límite de claves"""
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import time
+import pytest
+from app.core.cache import CacheCalculada
+
+
+def _esperar(condicion, segundos: float = 5):
+    limite = time.monotonic() + segundos
+    while not condicion():
+        assert time.monotonic() < limite, "la condición no se cumplió a tiempo"
+        time.sleep(0.01)
+
+
+class _Calculo:
+    """Función de cálculo que cuenta sus llamadas y puede quedarse bloqueada"""
+
+    def __init__(self):
+        self.llamadas = 0
+        self.liberar = threading.Event()
+        self.liberar.set()
+        self.falla = False
+
+    def __call__(self, db, **parametros):
+        self.llamadas += 1
+        self.liberar.wait(5)
+        if self.falla:
+            raise RuntimeError("fallo de cálculo")
+        return {"llamada": self.llamadas, **parametros}
+
+
+def test_single_flight_en_el_primer_calculo():
+    calculo = _Calculo()
+    calculo.liberar.clear()
+    cache = CacheCalculada("prueba", calculo, intervalo=60)
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        futuros = [pool.submit(cache.obtener, dias=90) for _ in range(8)]
+        _esperar(lambda: calculo.llamadas == 1)
+        calculo.liberar.set()
+        resultados = [futuro.result() for futuro in futuros]
+
+    assert calculo.llamadas == 1
+    assert cache.calculos == 1
+    assert {id(valor) for valor, _ in resultados} == {id(resultados[0][0])}
+    assert resultados[0][0] == {"llamada": 1, "dias": 90}
+
+
+def test_claves_por_parametros():
+    calculo = _Calculo()
+    cache = CacheCalculada("prueba", calculo, intervalo=60)
+
+    assert cache.obtener(dias=30)[0] == {"llamada": 1, "dias": 30}
+    assert cache.obtener(dias=90)[0] == {"llamada": 2, "dias": 90}
+    assert cache.obtener(dias=30)[0] == {"llamada": 1, "dias": 30}
+    assert cache.aciertos == 1
+
+
+def test_vencida_sirve_el_valor_anterior_y_recalcula_en_fondo():
+    calculo = _Calculo()
+    cache = CacheCalculada("prueba", calculo, intervalo=0)
+    primero, generado_en = cache.obtener()
+
+    calculo.liberar.clear()
+    # Vencida: se devuelve el valor anterior sin esperar y se lanza un solo recálculo
+    assert cache.obtener() == (primero, generado_en)
+    assert cache.obtener() == (primero, generado_en)
+    _esperar(lambda: calculo.llamadas == 2)
+    assert cache.vencidos_servidos == 2
+    calculo.liberar.set()
+
+    _esperar(lambda: cache.calculos == 2)
+    cache.intervalo = 60
+    valor, nuevo_generado_en = cache.obtener()
+    assert valor == {"llamada": 2}
+    assert nuevo_generado_en >= generado_en
+
+
+def test_invalidar_marca_vencida_sin_borrar():
+    calculo = _Calculo()
+    cache = CacheCalculada("prueba", calculo, intervalo=60)
+    valor, _ = cache.obtener()
+
+    calculo.liberar.clear()
+    cache.invalidar()
+    assert cache.estado()["claves"][0]["vencida"] is True
+    assert cache.obtener()[0] is valor
+    calculo.liberar.set()
+    _esperar(lambda: cache.calculos == 2)
+    assert cache.estado()["claves"][0]["vencida"] is False
+    assert cache.obtener()[0] == {"llamada": 2}
+
+
+def test_errores():
+    calculo = _Calculo()
+    calculo.falla = True
+    cache = CacheCalculada("prueba", calculo, intervalo=60)
+
+    # Sin valor previo el error llega al request
+    with pytest.raises(RuntimeError):
+        cache.obtener()
+    assert cache.estado()["claves"][0]["ultimo_error"] == "fallo de cálculo"
+
+    # Con valor previo un recálculo fallido conserva el último valor bueno
+    calculo.falla = False
+    valor, _ = cache.obtener()
+    calculo.falla = True
+    cache.invalidar()
+    cache.obtener()
+    _esperar(lambda: calculo.llamadas == 3 and not cache.estado()["claves"][0]["recalculando"])
+    assert cache.obtener()[0] is valor
+    assert cache.estado()["claves"][0]["ultimo_error"] == "fallo de cálculo"
+
+
+def test_max_claves_descarta_la_menos_usada():
+    calculo = _Calculo()
+    cache = CacheCalculada("prueba", calculo, intervalo=60, max_claves=2)
+    cache.obtener(dias=1)
+    cache.obtener(dias=2)
+    cache.obtener(dias=1)
+    cache.obtener(dias=3)
+
+    assert [clave["parametros"] for clave in cache.estado()["claves"]] == [{"dias": 1}, {"dias": 3}]
+
+
+def test_dashboard_se_actualiza_tras_un_cambio_de_estado(client, headers_admin, crear_solicitud, cambiar_estado):
+    solicitud_id = crear_solicitud(cantidad=3)["solicitud_id"]
+    antes = client.get("/api/v1/admin/dashboard", headers=headers_admin).json()
+    assert antes["stats_generales"]["total_pedidos"] == 0
+
+    cambiar_estado(solicitud_id, "aprobada")
+
+    def _actualizado():
+        return client.get("/api/v1/admin/dashboard", headers=headers_admin).json()["stats_generales"]["total_pedidos"] == 5
+    _esperar(_actualizado)
+
+    estado = client.get("/api/v1/admin/cache", headers=headers_admin).json()
+    assert estado["dashboard"]["calculos"] >= 2
+    assert estado["dashboard"]["vencidos_servidos"] >= 1
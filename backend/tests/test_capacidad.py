@@ -0,0 +1,131 @@
+"""Planeación de capacidad: simulación Monte Carlo de picos, resumen por nivel de servicio y recomendaciones"""
+from datetime import date, timedelta
+import numpy as np
+import pytest
+from app.analytics import capacidad
+from app.crud import analytics_crud
+from app.models.solicitud_models import Solicitud
+
+HOY = date.today()
+
+
+def _picos_fila_por_fila(semilla, tasa_por_dia, cantidades, duraciones, escenarios):
+    """Referencia: mismos sorteos que simular_picos, carga sumada día a día por escenario"""
+    rng = np.random.default_rng(semilla)
+    horizonte = tasa_por_dia.size
+    total = tasa_por_dia.sum()
+    llegadas = rng.poisson(total, size=escenarios)
+    n = int(llegadas.sum())
+    inicio = rng.choice(horizonte, size=n, p=tasa_por_dia / total)
+    muestra = rng.integers(0, cantidades.size, size=n)
+    escenario = np.repeat(np.arange(escenarios), llegadas)
+    carga = np.zeros((escenarios, horizonte))
+    for e, i, m in zip(escenario, inicio, muestra):
+        carga[e, i:i + duraciones[m]] += cantidades[m]
+    return carga.max(axis=1)
+
+
+def test_simular_picos_igual_a_fila_por_fila():
+    tasa = np.linspace(0.1, 0.6, 28)
+    cantidades = np.array([2.0, 5.0, 9.0])
+    duraciones = np.array([1, 3, 10])
+
+    picos = capacidad.simular_picos(np.random.default_rng(11), tasa, cantidades, duraciones, 400)
+    np.testing.assert_allclose(picos, _picos_fila_por_fila(11, tasa, cantidades, duraciones, 400))
+
+
+def test_simular_picos_sin_demanda():
+    rng = np.random.default_rng(0)
+    assert capacidad.simular_picos(rng, np.zeros(14), np.array([3.0]), np.array([2]), 50).tolist() == [0] * 50
+    assert capacidad.simular_picos(rng, np.ones(14), np.array([]), np.array([], dtype=np.int64), 50).tolist() == [0] * 50
+
+
+def test_simular_picos_poisson():
+    # Líneas de una unidad que duran todo el horizonte: el pico es el número de llegadas
+    tasa = np.full(10, 0.3)
+    picos = capacidad.simular_picos(np.random.default_rng(1), tasa, np.array([1.0]), np.array([10]), 20000)
+    assert picos.mean() == pytest.approx(3.0, rel=0.03)
+    assert np.mean(picos == 0) == pytest.approx(np.exp(-3.0), rel=0.1)
+
+
+def test_resumir():
+    resumen = capacidad.resumir(np.arange(1, 101, dtype=np.float64), stock_total=90, nivel_servicio=0.95)
+
+    assert resumen["stock_recomendado"] == 95
+    assert resumen["prob_faltante_actual"] == 0.1
+    assert resumen["pico_p50"] == pytest.approx(50.5)
+    stocks = [stock for stock, _ in resumen["curva"]]
+    probabilidades = [prob for _, prob in resumen["curva"]]
+    assert {90, 95} <= set(stocks)
+    assert stocks == sorted(stocks)
+    assert probabilidades == sorted(probabilidades, reverse=True)
+    assert dict(resumen["curva"])[95] == 0.05
+
+
+def test_tasas_por_dia():
+    meses_horizonte = np.arange(np.datetime64(HOY, "D"), np.datetime64(HOY, "D") + 365).astype("datetime64[M]").astype(np.int64) % 12
+    uniforme = np.full(12, 1 / 12)
+
+    tasas = capacidad.tasas_por_dia(24, np.repeat(np.arange(12), 2), meses_horizonte, 730, uniforme)
+    assert tasas.sum() == pytest.approx(24 * 365 / 730, rel=0.01)
+
+    # Historia concentrada en diciembre: diciembre pesa más, pero el previo deja tasa en los demás meses
+    concentrada = capacidad.tasas_por_dia(24, np.full(24, 11), meses_horizonte, 730, uniforme)
+    assert concentrada[meses_horizonte == 11].min() > 5 * concentrada[meses_horizonte == 5].max() > 0
+
+
+def test_planificar_reproducible_y_en_paralelo():
+    rng = np.random.default_rng(2)
+    productos = [{
+        "producto_id": i,
+        "stock_total": 10,
+        "tasa_por_dia": np.full(28, rng.uniform(0.05, 0.5)),
+        "cantidades": rng.integers(1, 10, 6).astype(np.float64),
+        "duraciones": rng.integers(1, 5, 6),
+    } for i in range(7)]
+
+    secuencial = capacidad.planificar(productos, escenarios=500, tamano_lote=3, semilla=4)
+    assert [r["producto_id"] for r in secuencial] == list(range(7))
+    assert capacidad.planificar(productos, escenarios=500, tamano_lote=3, semilla=4) == secuencial
+    assert capacidad.planificar(productos, escenarios=500, tamano_lote=3, semilla=4, procesos=2) == secuencial
+    assert capacidad.planificar(productos, escenarios=500, tamano_lote=3, semilla=5) != secuencial
+
+
+# ========== RECOMENDACIONES GUARDADAS ==========
+@pytest.fixture
+def historia(db, crear_solicitud):
+    """30 rentas de 8 unidades del producto 1, de 5 días, repartidas en los últimos 60 días"""
+    for k in range(30):
+        solicitud_id = crear_solicitud(productos=[(1, 8)], paquetes=[])["solicitud_id"]
+        sol = db.get(Solicitud, solicitud_id)
+        sol.fecha_evento_inicio = HOY - timedelta(days=60 - 2 * k)
+        sol.fecha_evento_fin = sol.fecha_evento_inicio + timedelta(days=4)
+    db.commit()
+
+
+def test_planificar_capacidad(db, client, headers_admin, historia):
+    resumen = analytics_crud.planificar_capacidad(db, semanas=4, historia_dias=60, escenarios=2000, semilla=1)
+
+    assert resumen["productos"] == 6
+    assert resumen["con_stock_insuficiente"] == 1
+    assert resumen["horizonte_dias"] == 28
+
+    respuesta = client.get("/api/v1/admin/analytics/capacidad", headers=headers_admin)
+    assert respuesta.status_code == 200
+    recomendaciones = {r["producto_id"]: r for r in respuesta.json()}
+    # Unas 14 llegadas de 5 días en 28 días: ~20 unidades en uso en promedio, picos por encima del stock
+    assert recomendaciones[1]["stock_recomendado"] > 20
+    assert recomendaciones[1]["diferencia"] == resumen["unidades_a_comprar"]
+    assert recomendaciones[1]["prob_faltante_actual"] > 0.05
+    assert all(recomendaciones[p]["stock_recomendado"] == 0 for p in range(2, 7))
+    assert all(recomendaciones[p]["prob_faltante_actual"] == 0 for p in range(2, 7))
+
+    insuficientes = client.get("/api/v1/admin/analytics/capacidad", headers=headers_admin,
+                               params={"solo_insuficientes": True}).json()
+    assert [r["producto_id"] for r in insuficientes] == [1]
+
+    # Reejecutar reemplaza la tabla y con la misma semilla da lo mismo
+    analytics_crud.planificar_capacidad(db, semanas=4, historia_dias=60, escenarios=2000, semilla=1)
+    assert client.get("/api/v1/admin/analytics/capacidad", headers=headers_admin).json()[0]["stock_recomendado"] == \
+        recomendaciones[1]["stock_recomendado"]
+    assert len(client.get("/api/v1/admin/analytics/capacidad", headers=headers_admin).json()) == 6
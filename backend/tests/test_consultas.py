@@ -0,0 +1,115 @@
+"""
+Presupuesto de sentencias SQL de los endpoints más usados.
+
+Los límites se verifican con la cabecera X-DB-Queries del middleware de
+métricas; si un cambio introduce un N+1 o una consulta extra, estas pruebas
+fallan con el número de sentencias ejecutadas.
+"""
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from app.core.request_metrics import assert_max_queries, contar_queries
+from app.crud import solicitud_crud
+from app.crud.crud import productos_crud
+from app.models.solicitud_models import Solicitud
+
+
+def test_listado_de_productos_en_una_consulta(client):
+    respuesta = client.get("/api/v1/productos")
+    assert respuesta.status_code == 200
+    assert len(respuesta.json()) == 6
+    assert_max_queries(respuesta, 1)
+
+
+def test_filtro_de_especificaciones_no_agrega_consultas_por_producto(client, headers_admin):
+    client.put("/api/v1/admin/categorias/1/especificaciones", headers=headers_admin,
+               json=[{"clave": "material", "tipo": "texto"}])
+    respuesta = client.get("/api/v1/productos", params={"spec": "material:madera"})
+    assert respuesta.status_code == 200
+    # Validar las claves declaradas y el listado filtrado
+    assert_max_queries(respuesta, 2)
+
+
+def test_detalle_de_producto_con_categoria_en_una_consulta(client):
+    respuesta = client.get("/api/v1/productos/1")
+    assert respuesta.status_code == 200
+    assert respuesta.json()["categoria_nombre"] == "Sillas"
+    assert_max_queries(respuesta, 1)
+
+
+def test_mis_solicitudes_no_crece_con_el_numero_de_solicitudes(client, headers_usuario, crear_solicitud):
+    crear_solicitud()
+    una = client.get("/api/v1/me/solicitudes", headers=headers_usuario)
+    for _ in range(4):
+        crear_solicitud()
+    cinco = client.get("/api/v1/me/solicitudes", headers=headers_usuario)
+
+    assert len(cinco.json()) == 5
+    # Usuario del token y listado con sus totales
+    assert_max_queries(una, 2)
+    assert_max_queries(cinco, 2)
+    assert cinco.headers["X-DB-Repetidas"] == "0"
+
+
+def test_dashboard_se_sirve_desde_la_cache(client, headers_admin, crear_solicitud, cambiar_estado):
+    for i in range(3):
+        cambiar_estado(crear_solicitud(cantidad=1, tipo_evento=f"evento {i}")["solicitud_id"], "aprobada")
+
+    fria = client.get("/api/v1/admin/dashboard", headers=headers_admin)
+    caliente = client.get("/api/v1/admin/dashboard", headers=headers_admin)
+
+    assert fria.status_code == caliente.status_code == 200
+    assert fria.json()["stats_generales"]["total_pedidos"] == 9
+    # Un número fijo de agregaciones sobre los rollups, sin importar cuántas solicitudes haya
+    assert_max_queries(fria, 14)
+    # Con la caché calculada solo se busca al administrador del token
+    assert_max_queries(caliente, 1)
+
+
+def test_assert_max_queries_reporta_el_exceso(client):
+    respuesta = client.get("/api/v1/productos")
+    try:
+        assert_max_queries(respuesta, 0)
+    except AssertionError as e:
+        assert "GET /api/v1/productos ejecutó 1 queries (máximo 0)" in str(e)
+    else:
+        raise AssertionError("assert_max_queries no detectó el exceso")
+
+
+def test_contar_queries_en_crud(db, crear_solicitud):
+    for _ in range(3):
+        crear_solicitud()
+
+    with contar_queries() as stats:
+        solicitudes = solicitud_crud.obtener_solicitudes_usuario(db, 1, 0, 100)
+        [s.total_cotizacion for s in solicitudes]
+    assert len(solicitudes) == 3
+    assert stats.queries == 1
+
+    with contar_queries() as stats:
+        producto = productos_crud.get_by_id_con_categoria(db, producto_id=1)
+        producto.categoria.nombre
+    assert stats.queries == 1
+
+
+def test_sentencia_fallida_se_cuenta(db):
+    with contar_queries() as stats:
+        with pytest.raises(OperationalError):
+            db.execute(text("SELECT * FROM tabla_inexistente"))
+        db.rollback()
+        productos_crud.get_by_id(db, 1)
+    assert stats.queries == 2
+    assert sum(stats.sentencias.values()) == 2
+    assert db.connection().info["inicio_query"] == []
+
+
+def test_crear_solicitud_con_ids_inexistentes(db, client, headers_usuario):
+    linea = {"cantidad_solicitada": 1, "precio_unitario": 10, "dias_renta": 1, "subtotal": 10}
+    respuesta = client.post("/api/v1/me/solicitudes", headers=headers_usuario, json={
+        "fecha_evento_inicio": "2030-01-10", "fecha_evento_fin": "2030-01-10",
+        "productos": [{"producto_id": 1, **linea}, {"producto_id": 99, **linea}],
+        "paquetes": [{"paquete_id": 77, **linea}],
+    })
+    assert respuesta.status_code == 404
+    assert respuesta.json()["detail"] == "No existen: productos 99; paquetes 77"
+    assert db.query(Solicitud).count() == 0
@@ -0,0 +1,98 @@
+"""Log de consultas lentas: buffer en memoria, EXPLAIN en segundo plano y archivo rotativo"""
+import json
+import pytest
+from app.core import slow_queries
+from app.core.config import settings
+
+
+@pytest.fixture
+def todo_es_lento(monkeypatch):
+    monkeypatch.setattr(settings, "SLOW_QUERY_MS", 0)
+    monkeypatch.setattr(settings, "SLOW_QUERY_EXPLAIN", True)
+    slow_queries.limpiar_registros()
+    yield
+    slow_queries.limpiar_registros()
+
+
+def _esperar_planes():
+    """El EXPLAIN corre en un executor de un solo hilo: basta con encolar una tarea vacía"""
+    slow_queries._explain_executor.submit(lambda: None).result(timeout=10)
+
+
+def test_registra_endpoint_parametros_y_plan(client, todo_es_lento):
+    client.get("/api/v1/productos/3")
+    _esperar_planes()
+
+    registros = [r for r in slow_queries.obtener_registros(100) if r["endpoint"] == "GET /api/v1/productos/3"]
+    assert len(registros) == 1
+    registro = registros[0]
+    assert registro["sql"].startswith("SELECT")
+    assert 3 in registro["parametros"]
+    assert registro["plan"] and registro["full_scans"] == []
+
+
+def test_no_explica_escrituras(todo_es_lento, db):
+    from app.models.models import Categoria
+    db.add(Categoria(nombre="Carpas", activo=True))
+    db.commit()
+    _esperar_planes()
+
+    insert = [r for r in slow_queries.obtener_registros(100) if r["sql"].startswith("INSERT")]
+    assert insert and insert[0]["plan"] is None
+
+
+def test_sentencia_fallida_se_registra_con_el_error(todo_es_lento, db):
+    from sqlalchemy import text
+    from sqlalchemy.exc import OperationalError
+    with pytest.raises(OperationalError):
+        db.execute(text("SELECT * FROM tabla_inexistente"))
+    db.rollback()
+    _esperar_planes()
+
+    registro, = [r for r in slow_queries.obtener_registros(100) if "tabla_inexistente" in r["sql"]]
+    assert "no such table" in registro["error"]
+    assert registro["plan"] is None
+    assert db.connection().info["inicio_lenta"] == []
+
+
+def test_obtener_registros_devuelve_copias(client, todo_es_lento):
+    client.get("/api/v1/productos/3")
+    _esperar_planes()
+    registro = slow_queries.obtener_registros(1)[0]
+    registro["plan"] = "modificado"
+    assert slow_queries.obtener_registros(1)[0]["plan"] != "modificado"
+
+
+def test_binarios_no_se_vuelcan():
+    assert slow_queries._parametros_legibles((1, b"\x89PNG....")) == [1, "<8 bytes>"]
+    assert slow_queries._parametros_legibles({"imagen": bytearray(3)}) == {"imagen": "<3 bytes>"}
+
+
+def test_endpoint_devuelve_los_mas_recientes_primero(client, headers_admin, todo_es_lento):
+    client.get("/api/v1/productos/1")
+    client.get("/api/v1/productos/2")
+    _esperar_planes()
+
+    datos = client.get("/api/v1/admin/db/consultas-lentas", params={"limit": 5}, headers=headers_admin).json()
+    assert datos["umbral_ms"] == 0
+    endpoints = [c["endpoint"] for c in datos["consultas"]]
+    assert endpoints.index("GET /api/v1/productos/2") < endpoints.index("GET /api/v1/productos/1")
+
+    assert client.delete("/api/v1/admin/db/consultas-lentas", headers=headers_admin).status_code == 200
+    assert slow_queries.obtener_registros() == []
+
+
+def test_configurar_archivo_es_idempotente(monkeypatch, tmp_path, todo_es_lento, client):
+    archivo = tmp_path / "logs" / "lentas.log"
+    monkeypatch.setattr(settings, "SLOW_QUERY_LOG_FILE", str(archivo))
+    monkeypatch.setattr(slow_queries.logger, "handlers", [])
+    slow_queries.configurar_archivo()
+    slow_queries.configurar_archivo()
+    assert len(slow_queries.logger.handlers) == 1
+
+    client.get("/api/v1/productos/1")
+    _esperar_planes()
+    slow_queries.logger.handlers[0].flush()
+    lineas = [json.loads(l) for l in archivo.read_text(encoding="utf-8").splitlines()]
+    assert any(l["endpoint"] == "GET /api/v1/productos/1" for l in lineas)
+    slow_queries.logger.handlers[0].close()
@@ -0,0 +1,112 @@
+"""Especificaciones tipadas por categoría: conversión de valores, atributos indexados y filtros ?spec="""
+import pytest
+from app.crud import especificaciones_crud
+from app.crud.crud import productos_crud
+from app.models.especificacion_models import ProductoAtributo
+
+# Productos de la fixture: ids impares de la categoría 1 con material madera,
+# ids pares de la categoría 2 con material plástico; asientos = 3 + id
+
+
+@pytest.mark.parametrize("valor, tipo, esperado", [
+    ("120 cm", "numero", ("120", 120.0)),
+    ("1,5 m", "numero", ("1.5", 1.5)),
+    (4, "numero", ("4", 4.0)),
+    (True, "numero", None),
+    ("grande", "numero", None),
+    ("Sí", "booleano", ("true", 1.0)),
+    (False, "booleano", ("false", 0.0)),
+    ("quizá", "booleano", None),
+    ("  Plástico ", "texto", ("plastico", None)),
+    ({"alto": 1}, "texto", None),
+    (None, "texto", None),
+])
+def test_coercionar(valor, tipo, esperado):
+    assert especificaciones_crud.coercionar(valor, tipo) == esperado
+
+
+def test_parsear_filtros():
+    assert especificaciones_crud.parsear_filtros(["Material:Plástico", "asientos>=4", "alto <= 1,5", "peso=7.0"]) == [
+        ("material", "=", "plastico"), ("asientos", ">=", 4.0), ("alto", "<=", 1.5), ("peso", "=", "7")
+    ]
+    assert especificaciones_crud.parsear_filtros(None) == []
+    for invalido in ("material", "asientos>=muchos", ":madera"):
+        with pytest.raises(ValueError):
+            especificaciones_crud.parsear_filtros([invalido])
+
+
+def test_inferir_esquema(db):
+    assert especificaciones_crud.inferir_esquema(db, 1) == [
+        {"clave": "asientos", "tipo": "numero"},
+        {"clave": "color", "tipo": "texto"},
+        {"clave": "material", "tipo": "texto"},
+    ]
+
+
+# ========== API ==========
+@pytest.fixture
+def esquemas(client, headers_admin):
+    """Categoría 1 declara material y asientos; categoría 2 solo material"""
+    for categoria_id, claves in ((1, [{"clave": "Material"}, {"clave": "asientos", "tipo": "numero", "unidad": "personas"}]),
+                                 (2, [{"clave": "material"}])):
+        respuesta = client.put(f"/api/v1/admin/categorias/{categoria_id}/especificaciones", headers=headers_admin, json=claves)
+        assert respuesta.status_code == 200, respuesta.text
+
+
+def _ids(client, *spec):
+    respuesta = client.get("/api/v1/productos", params={"spec": list(spec)})
+    assert respuesta.status_code == 200, respuesta.text
+    return sorted(p["producto_id"] for p in respuesta.json())
+
+
+def test_guardar_esquema_extrae_atributos(db, esquemas):
+    filas = {(f.producto_id, f.clave): (f.valor_texto, f.valor_numero) for f in db.query(ProductoAtributo)}
+    assert filas[(1, "material")] == ("madera", None)
+    assert filas[(3, "asientos")] == ("6", 6.0)
+    # Las claves no declaradas (color) y los asientos de la categoría 2 no se indexan
+    assert not any(clave == "color" for _, clave in filas)
+    assert (2, "asientos") not in filas
+    assert len(filas) == 6 + 3
+
+
+def test_filtros(client, esquemas):
+    assert _ids(client) == [1, 2, 3, 4, 5, 6]
+    assert _ids(client, "material:Madera") == [1, 3, 5]
+    assert _ids(client, "material=plástico") == [2, 4, 6]
+    assert _ids(client, "asientos>=6") == [3, 5]
+    assert _ids(client, "asientos<=6", "material:madera") == [1, 3]
+    assert _ids(client, "asientos:8") == [5]
+    assert _ids(client, "material:vidrio") == []
+
+
+@pytest.mark.parametrize("spec", ["color:blanco", "asientos>=muchos", "material"])
+def test_filtros_invalidos(client, esquemas, spec):
+    respuesta = client.get("/api/v1/productos", params={"spec": [spec]})
+    assert respuesta.status_code == 400
+
+
+def test_esquema_invalido(client, headers_admin):
+    url = "/api/v1/admin/categorias/1/especificaciones"
+    assert client.put(url, headers=headers_admin, json=[{"clave": "alto", "tipo": "fecha"}]).status_code == 400
+    assert client.put(url, headers=headers_admin, json=[{"clave": "Alto"}, {"clave": "alto"}]).status_code == 400
+    assert client.put("/api/v1/admin/categorias/99/especificaciones", headers=headers_admin, json=[]).status_code == 404
+
+
+def test_facetas(client, esquemas):
+    respuesta = client.get("/api/v1/categorias/1/especificaciones")
+    assert respuesta.status_code == 200
+    facetas = {f["clave"]: f for f in respuesta.json()}
+    assert facetas["asientos"]["minimo"] == 4 and facetas["asientos"]["maximo"] == 8
+    assert facetas["asientos"]["unidad"] == "personas"
+    assert facetas["material"]["valores"] == [{"valor": "madera", "productos": 3}]
+
+
+def test_actualizar_producto_reindexa(db, client, esquemas):
+    productos_crud.update_producto(db, 1, {"especificaciones": {"material": "metal", "asientos": "10 personas"}})
+    assert _ids(client, "material:metal") == [1]
+    assert _ids(client, "asientos>=9") == [1]
+
+    # Al cambiar de categoría se indexa con el esquema de la nueva
+    productos_crud.update_producto(db, 1, {"categoria_id": 2})
+    assert _ids(client, "asientos>=9") == []
+    assert _ids(client, "material:metal") == [1]
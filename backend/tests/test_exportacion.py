@@ -0,0 +1,111 @@
+"""Exportación en streaming: NDJSON/CSV por lotes, gzip incremental y columnas excluidas"""
+import base64
+import csv
+import gzip
+import io
+import json
+import logging
+import pytest
+from app.core.request_metrics import assert_max_queries
+from app.crud import exportacion_crud
+from app.models.models import Producto
+
+
+def _exportar(tabla, **opciones):
+    return list(exportacion_crud.generar_exportacion(tabla, **opciones))
+
+
+def _registros(bloques):
+    return [json.loads(linea) for linea in b"".join(bloques).decode("utf-8").splitlines()]
+
+
+def test_columnas_exportables():
+    assert "password" not in [c.key for c in exportacion_crud.columnas_exportables("usuarios")]
+    assert "imagen_dato" not in [c.key for c in exportacion_crud.columnas_exportables("productos")]
+    assert "imagen_dato" in [c.key for c in exportacion_crud.columnas_exportables("productos", incluir_imagenes=True)]
+
+
+def test_ndjson_por_lotes(db):
+    bloques = _exportar("productos", lote=2)
+
+    # Un bloque por partición de 2 filas
+    assert len(bloques) == 3
+    registros = _registros(bloques)
+    assert [r["producto_id"] for r in registros] == [1, 2, 3, 4, 5, 6]
+    assert registros[0]["codigo_producto"] == "P0"
+    assert registros[0]["precio_por_dia"] == "10.00"
+    assert registros[0]["especificaciones"] == {"material": "madera", "color": "blanco", "asientos": 4}
+    assert "imagen_dato" not in registros[0]
+    assert registros == _registros(_exportar("productos", lote=1000))
+
+
+def test_imagenes_en_base64(db):
+    db.get(Producto, 1).imagen_dato = b"\x89PNG\x00"
+    db.commit()
+    registro = _registros(_exportar("productos", incluir_imagenes=True))[0]
+    assert base64.b64decode(registro["imagen_dato"]) == b"\x89PNG\x00"
+    assert _registros(_exportar("productos", incluir_imagenes=True))[1]["imagen_dato"] is None
+
+
+def test_csv(db):
+    texto = b"".join(_exportar("productos", formato="csv", lote=4)).decode("utf-8")
+    filas = list(csv.DictReader(io.StringIO(texto)))
+    assert [f["codigo_producto"] for f in filas] == ["P0", "P1", "P2", "P3", "P4", "P5"]
+    assert json.loads(filas[1]["especificaciones"])["material"] == "plastico"
+    assert filas[0]["stock_total"] == "20"
+
+
+def test_usuarios_sin_password(db):
+    registros = _registros(_exportar("usuarios"))
+    assert [r["email"] for r in registros] == ["usuario@kabe.test"]
+    assert not any("password" in r for r in registros)
+
+
+@pytest.mark.parametrize("formato", ["ndjson", "csv"])
+def test_gzip_igual_a_sin_comprimir(db, formato):
+    comprimido = b"".join(_exportar("productos", formato=formato, comprimir=True, lote=2))
+    assert comprimido[:2] == b"\x1f\x8b"
+    assert gzip.decompress(comprimido) == b"".join(_exportar("productos", formato=formato))
+
+
+def test_solicitudes_con_enums_y_fechas(db, crear_solicitud):
+    solicitud = crear_solicitud()
+    registro = _registros(_exportar("solicitudes"))[0]
+    assert registro["solicitud_id"] == solicitud["solicitud_id"]
+    assert registro["estado"] == "pendiente"
+    assert registro["fecha_evento_inicio"] == solicitud["fecha_evento_inicio"][:10]
+
+
+# ========== ENDPOINT ==========
+def test_endpoint(client, headers_admin):
+    respuesta = client.get("/api/v1/admin/exportar/categorias", headers=headers_admin)
+    assert respuesta.status_code == 200
+    assert respuesta.headers["content-type"].startswith("application/x-ndjson")
+    assert 'filename="categorias_' in respuesta.headers["content-disposition"]
+    assert [r["nombre"] for r in _registros([respuesta.content])] == ["Sillas", "Mesas"]
+
+    respuesta = client.get("/api/v1/admin/exportar/productos", headers=headers_admin,
+                           params={"formato": "csv", "gzip": True, "lote": 100})
+    assert respuesta.headers["content-type"] == "application/gzip"
+    assert respuesta.headers["content-disposition"].endswith('.csv.gz"')
+    assert len(list(csv.DictReader(io.StringIO(gzip.decompress(respuesta.content).decode("utf-8"))))) == 6
+
+
+def test_endpoint_registra_las_queries_del_cuerpo(client, headers_admin, caplog):
+    with caplog.at_level(logging.INFO, logger="kabe.db"):
+        respuesta = client.get("/api/v1/admin/exportar/productos", headers=headers_admin, params={"lote": 100})
+    assert respuesta.headers["X-DB-Streaming"] == "1"
+    mensaje, = [r.getMessage() for r in caplog.records if r.name == "kabe.db" and "Streaming" in r.getMessage()]
+    assert mensaje.startswith("Streaming de GET /api/v1/admin/exportar/productos terminado")
+    assert "1 checkouts, 1 queries" in mensaje
+
+    # Las cabeceras X-DB-* no incluyen el cuerpo: el presupuesto no aplica
+    with pytest.raises(AssertionError, match="streaming"):
+        assert_max_queries(respuesta, 100)
+
+
+def test_endpoint_errores(client, headers_admin, headers_usuario):
+    assert client.get("/api/v1/admin/exportar/administradores", headers=headers_admin).status_code == 404
+    assert client.get("/api/v1/admin/exportar/productos", headers=headers_admin, params={"formato": "xml"}).status_code == 400
+    assert client.get("/api/v1/admin/exportar/productos", headers=headers_admin, params={"lote": 10}).status_code == 422
+    assert client.get("/api/v1/admin/exportar/productos", headers=headers_usuario).status_code in (401, 403)
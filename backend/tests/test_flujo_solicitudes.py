@@ -0,0 +1,117 @@
+"""Flujo de estados de solicitudes: transiciones válidas, reservas de stock y operación masiva"""
+import pytest
+from app.crud import solicitud_crud
+from app.models.models import Producto
+from app.models.solicitud_models import EstadoSolicitud, Solicitud, SolicitudEvento
+
+
+def _stock(db, producto_id):
+    db.expire_all()
+    return db.get(Producto, producto_id).stock_disponible
+
+
+@pytest.mark.parametrize("anterior, nuevo", [
+    (anterior, nuevo)
+    for anterior in EstadoSolicitud
+    for nuevo in EstadoSolicitud
+    if nuevo not in solicitud_crud.TRANSICIONES[anterior]
+])
+def test_transiciones_no_permitidas(db, crear_solicitud, anterior, nuevo):
+    solicitud_id = crear_solicitud(cantidad=1)["solicitud_id"]
+    db.get(Solicitud, solicitud_id).estado = anterior
+    db.commit()
+
+    with pytest.raises(solicitud_crud.TransicionInvalida):
+        solicitud_crud.cambiar_estado_solicitud(db, solicitud_id, nuevo)
+
+
+def test_flujo_completo_reserva_y_libera_stock(db, client, headers_admin, crear_solicitud, cambiar_estado):
+    solicitud_id = crear_solicitud(cantidad=5)["solicitud_id"]
+    assert _stock(db, 1) == 20
+
+    cambiar_estado(solicitud_id, "aprobada")
+    assert _stock(db, 1) == 15
+    cambiar_estado(solicitud_id, "en_proceso")
+    assert _stock(db, 1) == 15
+    respuesta = cambiar_estado(solicitud_id, "completada")
+    assert respuesta["estado"] == "completada"
+    assert _stock(db, 1) == 20
+
+    sol = db.get(Solicitud, solicitud_id)
+    assert sol.fecha_respuesta and sol.fecha_entrega and sol.fecha_devolucion
+    eventos = db.query(SolicitudEvento).filter_by(solicitud_id=solicitud_id).order_by(SolicitudEvento.evento_id).all()
+    assert [e.estado_nuevo for e in eventos] == [
+        EstadoSolicitud.pendiente, EstadoSolicitud.aprobada, EstadoSolicitud.en_proceso, EstadoSolicitud.completada
+    ]
+    assert {e.actor_tipo for e in eventos[1:]} == {"admin"}
+
+    otra = client.put(f"/api/v1/admin/solicitudes/{solicitud_id}/estado", headers=headers_admin, json={"estado": "aprobada"})
+    assert otra.status_code == 400
+
+
+def test_cancelar_una_aprobada_libera_stock(db, crear_solicitud, cambiar_estado):
+    solicitud_id = crear_solicitud(cantidad=4)["solicitud_id"]
+    cambiar_estado(solicitud_id, "aprobada")
+    assert _stock(db, 1) == 16
+    cambiar_estado(solicitud_id, "cancelada")
+    assert _stock(db, 1) == 20
+
+
+def test_aprobar_sin_stock_responde_409_sin_cambios(db, client, headers_admin, crear_solicitud):
+    solicitud_id = crear_solicitud(cantidad=25)["solicitud_id"]
+    respuesta = client.put(f"/api/v1/admin/solicitudes/{solicitud_id}/estado", headers=headers_admin, json={"estado": "aprobada"})
+    assert respuesta.status_code == 409
+    assert "producto 1: faltan 5" in respuesta.json()["detail"]
+    assert _stock(db, 1) == 20
+    db.expire_all()
+    assert db.get(Solicitud, solicitud_id).estado == EstadoSolicitud.pendiente
+
+
+def test_estado_desconocido_y_solicitud_inexistente(client, headers_admin, crear_solicitud):
+    solicitud_id = crear_solicitud()["solicitud_id"]
+    assert client.put(f"/api/v1/admin/solicitudes/{solicitud_id}/estado", headers=headers_admin,
+                      json={"estado": "archivada"}).status_code == 400
+    assert client.put("/api/v1/admin/solicitudes/999/estado", headers=headers_admin,
+                      json={"estado": "aprobada"}).status_code == 404
+
+
+def test_aprobacion_masiva_omite_las_no_pendientes(db, client, headers_admin, crear_solicitud, cambiar_estado):
+    ids = [crear_solicitud(cantidad=3)["solicitud_id"] for _ in range(3)]
+    cambiar_estado(ids[2], "rechazada")
+
+    respuesta = client.post("/api/v1/admin/solicitudes/masivo", headers=headers_admin, json={
+        "accion": "aprobar", "solicitud_ids": ids + [ids[0], 999], "observaciones_admin": "ok"
+    })
+    assert respuesta.status_code == 200, respuesta.text
+    datos = respuesta.json()
+    assert datos["actualizadas"] == ids[:2]
+    assert datos["omitidas"] == [ids[2], 999]
+    # La reserva se suma por producto: 2 solicitudes x 3 unidades
+    assert _stock(db, 1) == 14
+
+    db.expire_all()
+    for solicitud_id in ids[:2]:
+        sol = db.get(Solicitud, solicitud_id)
+        assert sol.estado == EstadoSolicitud.aprobada
+        assert sol.observaciones_admin == "ok"
+        assert sol.fecha_respuesta is not None
+    assert db.query(SolicitudEvento).filter(SolicitudEvento.estado_nuevo == EstadoSolicitud.aprobada).count() == 2
+
+
+def test_aprobacion_masiva_sin_stock_no_aprueba_ninguna(db, client, headers_admin, crear_solicitud):
+    ids = [crear_solicitud(cantidad=8)["solicitud_id"] for _ in range(3)]
+    respuesta = client.post("/api/v1/admin/solicitudes/masivo", headers=headers_admin, json={
+        "accion": "aprobar", "solicitud_ids": ids
+    })
+    assert respuesta.status_code == 409
+    assert _stock(db, 1) == 20
+    assert db.query(Solicitud).filter(Solicitud.estado == EstadoSolicitud.aprobada).count() == 0
+
+
+def test_masivo_solo_admite_aprobar_o_rechazar(db, client, headers_admin, crear_solicitud):
+    solicitud_id = crear_solicitud()["solicitud_id"]
+    assert client.post("/api/v1/admin/solicitudes/masivo", headers=headers_admin, json={
+        "accion": "completar", "solicitud_ids": [solicitud_id]
+    }).status_code == 400
+    with pytest.raises(solicitud_crud.TransicionInvalida):
+        solicitud_crud.cambiar_estado_masivo(db, [solicitud_id], EstadoSolicitud.cancelada)
@@ -0,0 +1,120 @@
+"""Historial de estados: eventos, proyección del estado y percentiles del tiempo hasta la aprobación"""
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+import pytest
+from app.crud import solicitud_crud
+from app.models.solicitud_models import EstadoSolicitud
+
+BASE = datetime(2026, 1, 5, 9, 0)
+
+
+def _evento(anterior, nuevo, horas):
+    return SimpleNamespace(
+        estado_anterior=EstadoSolicitud(anterior) if anterior else None,
+        estado_nuevo=EstadoSolicitud(nuevo),
+        fecha=BASE + timedelta(hours=horas)
+    )
+
+
+def test_proyectar_estado_reconstruye_fechas_y_tiempos():
+    eventos = [
+        _evento(None, "pendiente", 0),
+        _evento("pendiente", "aprobada", 2),
+        _evento("aprobada", "en_proceso", 5),
+        _evento("en_proceso", "completada", 29),
+    ]
+    proyeccion = solicitud_crud.proyectar_estado(eventos)
+
+    assert proyeccion["estado"] == EstadoSolicitud.completada
+    assert proyeccion["fecha_creacion"] == BASE
+    assert proyeccion["fecha_respuesta"] == BASE + timedelta(hours=2)
+    assert proyeccion["fecha_entrega"] == BASE + timedelta(hours=5)
+    assert proyeccion["fecha_devolucion"] == BASE + timedelta(hours=29)
+    # El estado final no acumula tiempo
+    assert proyeccion["segundos_en_estado"] == {"pendiente": 7200, "aprobada": 10800, "en_proceso": 86400}
+
+
+def test_proyectar_estado_abierto_cuenta_hasta_el_corte():
+    eventos = [_evento(None, "pendiente", 0), _evento("pendiente", "aprobada", 1)]
+    proyeccion = solicitud_crud.proyectar_estado(eventos, hasta=BASE + timedelta(hours=4))
+
+    assert proyeccion["estado"] == EstadoSolicitud.aprobada
+    assert proyeccion["fecha_entrega"] is None
+    assert proyeccion["segundos_en_estado"] == {"pendiente": 3600, "aprobada": 10800}
+
+
+def test_eventos_por_api(client, headers_usuario, headers_admin, crear_solicitud, cambiar_estado):
+    solicitud_id = crear_solicitud(cantidad=1)["solicitud_id"]
+    cambiar_estado(solicitud_id, "aprobada")
+    cambiar_estado(solicitud_id, "en_proceso")
+
+    respuesta = client.get(f"/api/v1/admin/solicitudes/{solicitud_id}/eventos", headers=headers_admin)
+    assert respuesta.status_code == 200
+    datos = respuesta.json()
+    assert [(e["estado_anterior"], e["estado_nuevo"]) for e in datos["eventos"]] == [
+        (None, "pendiente"), ("pendiente", "aprobada"), ("aprobada", "en_proceso")
+    ]
+    assert [e["actor_tipo"] for e in datos["eventos"]] == ["usuario", "admin", "admin"]
+    assert datos["proyeccion"]["estado"] == "en_proceso"
+
+    propios = client.get(f"/api/v1/me/solicitudes/{solicitud_id}/eventos", headers=headers_usuario)
+    assert propios.status_code == 200
+    assert propios.json()["eventos"] == datos["eventos"]
+
+    assert client.get("/api/v1/admin/solicitudes/999/eventos", headers=headers_admin).status_code == 404
+    assert client.get("/api/v1/me/solicitudes/999/eventos", headers=headers_usuario).status_code == 404
+
+
+@pytest.fixture
+def aprobadas_con_duraciones(db, crear_solicitud, cambiar_estado):
+    """Diez solicitudes aprobadas 1, 2, ..., 10 horas después de crearse"""
+    for horas in range(1, 11):
+        solicitud_id = crear_solicitud(cantidad=1, productos=[(1, 1)], paquetes=[])["solicitud_id"]
+        cambiar_estado(solicitud_id, "aprobada")
+        creacion, aprobacion = solicitud_crud.obtener_eventos(db, solicitud_id)
+        creacion.fecha = BASE
+        aprobacion.fecha = BASE + timedelta(hours=horas)
+    # Una rechazada no cuenta
+    rechazada = crear_solicitud(cantidad=1, productos=[(1, 1)], paquetes=[])["solicitud_id"]
+    cambiar_estado(rechazada, "rechazada")
+    db.commit()
+
+
+@pytest.mark.parametrize("ventanas", [True, False])
+def test_tiempos_hasta_aprobacion(db, monkeypatch, aprobadas_con_duraciones, ventanas):
+    monkeypatch.setattr(solicitud_crud, "_soporta_ventanas", lambda bind: ventanas)
+
+    tiempos = solicitud_crud.tiempos_hasta_aprobacion(db)
+
+    assert tiempos["total"] == 10
+    assert tiempos["minimo"] == pytest.approx(3600, abs=1)
+    assert tiempos["maximo"] == pytest.approx(36000, abs=1)
+    assert tiempos["promedio"] == pytest.approx(5.5 * 3600, abs=1)
+    # Rango más cercano: p50 es la 5.ª duración, p90 la 9.ª, p95 y p99 la 10.ª
+    esperados = {"p50": 5, "p90": 9, "p95": 10, "p99": 10}
+    assert tiempos["percentiles"] == {
+        clave: pytest.approx(horas * 3600, abs=1) for clave, horas in esperados.items()
+    }
+
+
+@pytest.mark.parametrize("ventanas", [True, False])
+def test_tiempos_hasta_aprobacion_filtra_por_fecha(db, monkeypatch, aprobadas_con_duraciones, ventanas):
+    monkeypatch.setattr(solicitud_crud, "_soporta_ventanas", lambda bind: ventanas)
+
+    # Aprobadas el 5 de enero: las de 1 a 10 horas caen todas ese día
+    assert solicitud_crud.tiempos_hasta_aprobacion(db, BASE.date(), BASE.date())["total"] == 10
+    vacio = solicitud_crud.tiempos_hasta_aprobacion(db, BASE.date() + timedelta(days=1))
+    assert vacio["total"] == 0
+    assert vacio["promedio"] is None
+    assert vacio["percentiles"] == {"p50": None, "p90": None, "p95": None, "p99": None}
+
+
+def test_tiempo_aprobacion_por_api(client, headers_admin, headers_usuario, aprobadas_con_duraciones):
+    respuesta = client.get("/api/v1/admin/solicitudes/metricas/tiempo-aprobacion", headers=headers_admin)
+    assert respuesta.status_code == 200
+    datos = respuesta.json()
+    assert datos["total_aprobadas"] == 10
+    assert datos["promedio_horas"] == 5.5
+    assert datos["percentiles_horas"] == {"p50": 5.0, "p90": 9.0, "p95": 10.0, "p99": 10.0}
+
+    assert client.get("/api/v1/admin/solicitudes/metricas/tiempo-aprobacion", headers=headers_usuario).status_code == 401
@@ -0,0 +1,175 @@
+"""Importación masiva de productos: lectura CSV/NDJSON, validación por fila, códigos repetidos y lotes"""
+import io
+import json
+import pytest
+from app.crud import importacion_crud, especificaciones_crud
+from app.models.especificacion_models import ProductoAtributo
+from app.models.models import Producto
+
+CATEGORIAS = {1: 1, 2: 2, "sillas": 1, "mesas": 2}
+
+
+def test_formato_de_archivo():
+    assert importacion_crud.formato_de_archivo("catalogo.CSV") == "csv"
+    assert importacion_crud.formato_de_archivo("catalogo.jsonl") == "ndjson"
+    assert importacion_crud.formato_de_archivo("catalogo.txt", "CSV") == "csv"
+    with pytest.raises(ValueError):
+        importacion_crud.formato_de_archivo("catalogo.xlsx")
+
+
+def test_leer_filas():
+    csv = ["codigo_producto, nombre\r\n", "A1,Silla\r\n", "A2,Mesa\r\n"]
+    assert list(importacion_crud.leer_filas(csv, "csv")) == [
+        (2, {"codigo_producto": "A1", "nombre": "Silla"}), (3, {"codigo_producto": "A2", "nombre": "Mesa"})
+    ]
+    ndjson = ['{"codigo_producto": "A1"}\n', "\n", "{roto\n", "[1, 2]\n"]
+    filas = list(importacion_crud.leer_filas(ndjson, "ndjson"))
+    assert filas[0] == (1, {"codigo_producto": "A1"})
+    assert filas[1][0] == 3 and filas[1][1].startswith("JSON inválido")
+    assert filas[2] == (4, "Cada línea debe ser un objeto JSON")
+
+
+def test_validar_fila():
+    producto, errores = importacion_crud.validar_fila({
+        "codigo_producto": " A1 ", "nombre": "Silla", "precio_por_dia": "12,50", "stock_total": "8",
+        "categoria": "Sillas", "requiere_deposito": "sí", "especificaciones": '{"material": "madera"}',
+    }, CATEGORIAS)
+    assert errores == []
+    assert producto["codigo_producto"] == "A1"
+    assert producto["categoria_id"] == 1
+    assert str(producto["precio_por_dia"]) == "12.50"
+    assert producto["stock_disponible"] == 8
+    assert producto["estado"] == "disponible"
+    assert producto["requiere_deposito"] is True
+    assert producto["especificaciones"] == {"material": "madera"}
+
+    # Texto plano en especificaciones se guarda como {"descripcion": ...}
+    producto, _ = importacion_crud.validar_fila({
+        "codigo_producto": "A2", "nombre": "Mesa", "precio_por_dia": 5, "stock_total": 1, "categoria_id": 2,
+        "especificaciones": "plegable",
+    }, CATEGORIAS)
+    assert producto["especificaciones"] == {"descripcion": "plegable"}
+
+
+@pytest.mark.parametrize("cambios, mensaje", [
+    ({"nombre": ""}, "El campo nombre es requerido"),
+    ({"categoria_id": "9"}, "La categoría '9' no existe"),
+    ({"precio_por_dia": "0"}, "El precio por día debe ser mayor a 0"),
+    ({"precio_por_dia": "gratis"}, "precio_por_dia debe ser un número"),
+    ({"stock_disponible": "9"}, "El stock disponible no puede ser mayor al stock total"),
+    ({"stock_total": "muchos"}, "stock_total y stock_disponible deben ser enteros"),
+    ({"estado": "roto"}, "Estado inválido: usa disponible, mantenimiento, inactivo"),
+    ({"categoria_id": "²"}, "La categoría '²' no existe"),
+    ({"codigo_producto": "A" * 51}, "El campo codigo_producto admite como máximo 50 caracteres"),
+    ({"nombre": "Silla " * 40}, "El campo nombre admite como máximo 200 caracteres"),
+    ({"dimensiones": "x" * 101}, "El campo dimensiones admite como máximo 100 caracteres"),
+])
+def test_validar_fila_errores(cambios, mensaje):
+    fila = {"codigo_producto": "A1", "nombre": "Silla", "precio_por_dia": "10", "stock_total": "8", "categoria_id": "1"}
+    producto, errores = importacion_crud.validar_fila({**fila, **cambios}, CATEGORIAS)
+    assert producto is None
+    assert mensaje in errores
+
+
+def _filas(*codigos, **extra):
+    return [(n, {"codigo_producto": c, "nombre": f"Nuevo {c}", "precio_por_dia": "15", "stock_total": "4",
+                 "categoria_id": "1", **extra}) for n, c in enumerate(codigos, start=2)]
+
+
+def test_importar_reporta_repetidos_e_inserta_por_lotes(db):
+    filas = _filas("N1", "N2", "N1", "P0", "N3", "N4", "N5") + [(9, "JSON inválido: x")]
+
+    reporte = importacion_crud.importar_productos(db, filas, lote=2)
+
+    assert reporte["filas"] == 8
+    assert reporte["validas"] == reporte["insertados"] == 5
+    assert reporte["con_errores"] == 3
+    assert {e["fila"]: e["errores"] for e in reporte["errores"]} == {
+        4: ["Código repetido en el archivo (fila 2)"],
+        5: ["Ya existe un producto con este código"],
+        9: ["JSON inválido: x"],
+    }
+    db.expire_all()
+    assert db.query(Producto).count() == 6 + 5
+    assert db.query(Producto).filter_by(codigo_producto="N1").one().stock_disponible == 4
+
+
+def test_dry_run_no_inserta(db):
+    reporte = importacion_crud.importar_productos(db, _filas("N1", "N2"), dry_run=True)
+    assert reporte["validas"] == 2 and reporte["insertados"] == 0
+    assert db.query(Producto).count() == 6
+
+
+def test_lote_rechazado_no_afecta_a_los_demas(db, monkeypatch):
+    original = especificaciones_crud.sincronizar_atributos
+    llamadas = []
+
+    def _falla_segundo_lote(*args, **kwargs):
+        llamadas.append(1)
+        if len(llamadas) == 2:
+            raise RuntimeError("restricción violada")
+        return original(*args, **kwargs)
+
+    monkeypatch.setattr(especificaciones_crud, "sincronizar_atributos", _falla_segundo_lote)
+    reporte = importacion_crud.importar_productos(db, _filas("N1", "N2", "N3", "N4", "N5"), lote=2)
+
+    assert reporte["insertados"] == 3
+    assert [e["codigo_producto"] for e in reporte["errores"]] == ["N3", "N4"]
+    assert reporte["errores"][0]["errores"][0].startswith("Lote rechazado por la base de datos: restricción violada")
+    db.expire_all()
+    importados = db.query(Producto.codigo_producto).filter(Producto.codigo_producto.like("N%"))
+    assert sorted(codigo for (codigo,) in importados) == ["N1", "N2", "N5"]
+
+
+def test_importar_indexa_especificaciones(db, client, headers_admin):
+    client.put("/api/v1/admin/categorias/1/especificaciones", headers=headers_admin,
+               json=[{"clave": "asientos", "tipo": "numero"}])
+    importacion_crud.importar_productos(db, _filas("N1", especificaciones='{"asientos": "12 personas"}'))
+
+    nuevo = db.query(Producto).filter_by(codigo_producto="N1").one()
+    atributo = db.query(ProductoAtributo).filter_by(producto_id=nuevo.producto_id).one()
+    assert (atributo.clave, atributo.valor_numero) == ("asientos", 12.0)
+
+
+# ========== ENDPOINT ==========
+def _subir(client, headers, nombre, contenido, **datos):
+    return client.post("/api/v1/admin/productos/importar", headers=headers, data=datos,
+                       files={"archivo": (nombre, io.BytesIO(contenido.encode("utf-8")), "application/octet-stream")})
+
+
+def test_endpoint_csv_y_ndjson(db, client, headers_admin):
+    csv = "\ufeffcodigo_producto,nombre,precio_por_dia,stock_total,categoria\nC1,Silla,10,3,Sillas\nC2,Mesa,abc,3,Mesas\n"
+    respuesta = _subir(client, headers_admin, "catalogo.csv", csv)
+    assert respuesta.status_code == 200, respuesta.text
+    reporte = respuesta.json()
+    assert (reporte["insertados"], reporte["con_errores"]) == (1, 1)
+    assert reporte["errores"][0]["fila"] == 3
+
+    ndjson = "\n".join(json.dumps({"codigo_producto": c, "nombre": c, "precio_por_dia": 8, "stock_total": 2,
+                                   "categoria_id": 2, "especificaciones": {"color": "negro"}}) for c in ("J1", "J2"))
+    reporte = _subir(client, headers_admin, "catalogo.txt", ndjson, formato="ndjson", dry_run="true").json()
+    assert (reporte["validas"], reporte["insertados"]) == (2, 0)
+    assert _subir(client, headers_admin, "catalogo.txt", ndjson, formato="ndjson").json()["insertados"] == 2
+    db.expire_all()
+    assert db.query(Producto).filter_by(codigo_producto="J1").one().especificaciones == {"color": "negro"}
+
+
+def test_endpoint_vence_el_dashboard(client, headers_admin):
+    def _vencido():
+        clave, = client.get("/api/v1/admin/cache", headers=headers_admin).json()["dashboard"]["claves"]
+        return clave["vencida"]
+
+    client.get("/api/v1/admin/dashboard", headers=headers_admin)
+    assert not _vencido()
+    csv = "codigo_producto,nombre,precio_por_dia,stock_total,categoria_id\nD1,Silla,10,3,1\n"
+    assert _subir(client, headers_admin, "catalogo.csv", csv).json()["insertados"] == 1
+    assert _vencido()
+
+
+def test_endpoint_errores(client, headers_admin, headers_usuario):
+    assert _subir(client, headers_admin, "catalogo.xlsx", "").status_code == 400
+    assert _subir(client, headers_admin, "catalogo.csv", "codigo_producto\n", lote="0").status_code == 400
+    assert _subir(client, headers_usuario, "catalogo.csv", "codigo_producto\n").status_code in (401, 403)
+    latin1 = client.post("/api/v1/admin/productos/importar", headers=headers_admin,
+                         files={"archivo": ("catalogo.csv", io.BytesIO("nombre\nSillón\n".encode("latin-1")), "text/csv")})
+    assert latin1.status_code == 400
@@ -0,0 +1,35 @@
+"""Listado de solicitudes del administrador: filtros y una sola consulta sin líneas"""
+from datetime import date, timedelta
+from app.core.request_metrics import assert_max_queries
+
+
+def test_filtra_por_estado_y_fecha_de_evento(client, headers_admin, crear_solicitud, cambiar_estado):
+    hoy = date.today()
+    primera = crear_solicitud(inicio=hoy + timedelta(days=10), cantidad=1)
+    segunda = crear_solicitud(inicio=hoy + timedelta(days=40), cantidad=1)
+    cambiar_estado(segunda["solicitud_id"], "aprobada")
+
+    def ids(**params):
+        respuesta = client.get("/api/v1/admin/solicitudes", params=params, headers=headers_admin)
+        assert respuesta.status_code == 200, respuesta.text
+        return [s["solicitud_id"] for s in respuesta.json()]
+
+    assert set(ids()) == {primera["solicitud_id"], segunda["solicitud_id"]}
+    assert ids(estado="aprobada") == [segunda["solicitud_id"]]
+    assert ids(evento_hasta=(hoy + timedelta(days=20)).isoformat()) == [primera["solicitud_id"]]
+    assert ids(evento_desde=(hoy + timedelta(days=20)).isoformat()) == [segunda["solicitud_id"]]
+    assert ids(fecha_desde=(hoy + timedelta(days=1)).isoformat()) == []
+    assert ids(usuario_id=99) == []
+
+
+def test_listado_incluye_el_resumen_sin_cargar_lineas(client, headers_admin, crear_solicitud):
+    for _ in range(5):
+        crear_solicitud(cantidad=1)
+
+    respuesta = client.get("/api/v1/admin/solicitudes", headers=headers_admin)
+    fila = respuesta.json()[0]
+    assert fila["total_productos"] == 2
+    assert fila["total_paquetes"] == 1
+    assert fila["estado_pago"] == "pendiente"
+    # Administrador del token y el listado
+    assert_max_queries(respuesta, 2)
@@ -0,0 +1,82 @@
+"""
+Migraciones de Alembic sobre una base SQLite vacía: el esquema resultante
+debe coincidir con los modelos y la cadena debe poder bajarse completa.
+"""
+import os
+import pytest
+from alembic import command
+from alembic.autogenerate import compare_metadata
+from alembic.config import Config
+from alembic.migration import MigrationContext
+from sqlalchemy import create_engine, inspect, text
+from app.core.config import settings
+from app.core.explain import explicar, full_scans
+from app.models import Base
+
+DIRECTORIO_ALEMBIC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "alembic")
+
+
+@pytest.fixture
+def alembic(monkeypatch, tmp_path):
+    """Config de Alembic (sin alembic.ini, para no reconfigurar el logging) y el engine de su base de datos"""
+    url = f"sqlite:///{tmp_path / 'migraciones.db'}"
+    monkeypatch.setattr(settings, "DATABASE_URL", url)
+    config = Config()
+    config.set_main_option("script_location", DIRECTORIO_ALEMBIC)
+    motor = create_engine(url)
+    yield config, motor
+    motor.dispose()
+
+
+def test_upgrade_head_coincide_con_los_modelos(alembic):
+    config, motor = alembic
+    command.upgrade(config, "head")
+    with motor.connect() as conexion:
+        diferencias = compare_metadata(MigrationContext.configure(conexion, opts={"compare_type": True}), Base.metadata)
+    assert diferencias == []
+
+
+def test_downgrade_base_y_upgrade_de_nuevo(alembic):
+    config, motor = alembic
+    command.upgrade(config, "head")
+    command.downgrade(config, "base")
+    assert inspect(motor).get_table_names() == ["alembic_version"]
+    command.upgrade(config, "head")
+    assert "solicitud_eventos" in inspect(motor).get_table_names()
+
+
+def test_base_marcada_en_0001_recibe_los_rellenos(alembic):
+    config, motor = alembic
+    command.upgrade(config, "0001")
+    with motor.begin() as conexion:
+        conexion.execute(text("INSERT INTO usuarios (nombre, apellido, email, password) VALUES ('a', 'b', 'a@b.c', 'x')"))
+        conexion.execute(text("""
+            INSERT INTO solicitudes (usuario_id, numero_solicitud, fecha_evento_inicio, fecha_evento_fin, estado, total_cotizacion, fecha_solicitud)
+            VALUES (1, 'SOL-1', '2026-01-10', '2026-01-12', 'aprobada', 100, '2026-01-01')
+        """))
+        conexion.execute(text("""
+            INSERT INTO pagos (solicitud_id, usuario_id, tipo_pago, metodo_pago, monto, estado_pago)
+            VALUES (1, 1, 'anticipo', 'efectivo', 40, 'completado')
+        """))
+
+    command.upgrade(config, "head")
+    with motor.connect() as conexion:
+        assert conexion.execute(text("SELECT total_pagado, estado_pago FROM solicitudes")).one() == (40, "parcial")
+        eventos = conexion.execute(text("SELECT estado_anterior, estado_nuevo FROM solicitud_eventos ORDER BY evento_id")).all()
+        assert eventos == [(None, "pendiente"), ("pendiente", "aprobada")]
+        assert conexion.execute(text(
+            "SELECT valor FROM configuraciones WHERE clave = 'relacionados_total_solicitudes'"
+        )).scalar() == "0"
+
+
+def test_indices_evitan_recorridos_completos(alembic):
+    config, motor = alembic
+    command.upgrade(config, "head")
+    with motor.connect() as conexion:
+        for sentencia in (
+            "SELECT * FROM productos WHERE estado = 'disponible'",
+            "SELECT * FROM solicitudes WHERE usuario_id = 1 ORDER BY fecha_solicitud DESC",
+            "SELECT * FROM tarjetas_usuario WHERE usuario_id = 1 AND activa = 1",
+        ):
+            assert full_scans(explicar(conexion, sentencia), "sqlite") == [], sentencia
+        assert full_scans(explicar(conexion, "SELECT * FROM productos WHERE nombre = 'x'"), "sqlite") == ["productos"]
@@ -0,0 +1,149 @@
+"""Operaciones masivas de productos y paquetes: UPDATE/DELETE por conjunto, limpieza y rollups por categoría"""
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+import pytest
+from app.crud import analytics_crud
+from app.models.analytics_models import PronosticoDemanda, RecomendacionStock, RollupCategoriaDia
+from app.models.especificacion_models import ProductoAtributo
+from app.models.models import Paquete, Producto
+
+HOY = date.today()
+
+
+def _masivo(client, headers, **operacion):
+    return client.post("/api/v1/admin/productos/masivo", headers=headers, json=operacion)
+
+
+def _precios(db, modelo):
+    db.expire_all()
+    return {fila.producto_id if modelo is Producto else fila.paquete_id: Decimal(fila.precio_por_dia)
+            for fila in db.query(modelo)}
+
+
+def test_precio_por_categoria_y_por_ids(db, client, headers_admin):
+    respuesta = _masivo(client, headers_admin, accion="precio", categoria_id=1, porcentaje=10)
+    assert respuesta.json() == {"accion": "precio", "actualizados": 3}
+    precios = _precios(db, Producto)
+    assert [precios[i] for i in (1, 3, 5)] == [Decimal("11.00"), Decimal("13.20"), Decimal("15.40")]
+    assert precios[2] == 11
+
+    # Ids y categoría se combinan: solo los ids de esa categoría
+    assert _masivo(client, headers_admin, accion="precio", producto_ids=[1, 2, 2], categoria_id=2,
+                   precio_por_dia=50).json()["actualizados"] == 1
+    assert _precios(db, Producto)[2] == 50
+
+
+@pytest.mark.parametrize("operacion", [
+    {"accion": "precio", "producto_ids": [1], "precio_por_dia": 5, "porcentaje": 10},
+    {"accion": "precio", "producto_ids": [1]},
+    {"accion": "precio", "producto_ids": [1], "porcentaje": -100},
+    {"accion": "precio", "producto_ids": [1], "precio_por_dia": 0},
+    {"accion": "estado", "categoria_id": 1, "estado": "roto"},
+    {"accion": "estado", "estado": "inactivo"},
+    {"accion": "categoria", "producto_ids": [1]},
+    {"accion": "categoria", "producto_ids": [1], "nueva_categoria_id": 99},
+    {"accion": "eliminar", "categoria_id": 1},
+    {"accion": "renombrar", "producto_ids": [1]},
+])
+def test_operaciones_invalidas(client, headers_admin, operacion):
+    assert _masivo(client, headers_admin, **operacion).status_code == 400
+
+
+def test_solo_administradores(client, headers_usuario):
+    assert _masivo(client, headers_usuario, accion="estado", producto_ids=[1], estado="inactivo").status_code in (401, 403)
+
+
+def test_estado_cuenta_solo_los_cambios(db, client, headers_admin):
+    assert _masivo(client, headers_admin, accion="estado", producto_ids=[1, 2], estado="mantenimiento").json()["actualizados"] == 2
+    assert _masivo(client, headers_admin, accion="estado", categoria_id=1, estado="mantenimiento").json()["actualizados"] == 2
+    db.expire_all()
+    assert sorted(p.producto_id for p in db.query(Producto).filter_by(estado="mantenimiento")) == [1, 2, 3, 5]
+
+
+def test_mover_categoria_reconstruye_rollups(db, client, headers_admin, crear_solicitud, cambiar_estado):
+    # P1 (categoría 1) y P2 (categoría 2) rentados y aprobados; P1 pasa a la categoría 2
+    cambiar_estado(crear_solicitud(productos=[(1, 5), (2, 2)], paquetes=[])["solicitud_id"], "aprobada")
+    client.put("/api/v1/admin/categorias/2/especificaciones", headers=headers_admin, json=[{"clave": "asientos", "tipo": "numero"}])
+
+    respuesta = _masivo(client, headers_admin, accion="categoria", producto_ids=[1, 2], nueva_categoria_id=2)
+    assert respuesta.json()["actualizados"] == 1
+
+    db.expire_all()
+    rollup = {(f.categoria_id, f.dia): (f.unidades, Decimal(f.ingresos), f.solicitudes)
+              for f in db.query(RollupCategoriaDia) if f.unidades}
+    dia = HOY + timedelta(days=30)
+    assert rollup == {(2, dia): (7, Decimal("210.00"), 1)}
+
+    # El mismo resultado que reconstruir todo el rango
+    analytics_crud.reconstruir_rollups(db, dia, dia)
+    db.expire_all()
+    assert {(f.categoria_id, f.dia): (f.unidades, Decimal(f.ingresos), f.solicitudes)
+            for f in db.query(RollupCategoriaDia) if f.unidades} == rollup
+
+    # Los atributos se vuelven a extraer con el esquema de la categoría destino
+    assert db.query(ProductoAtributo).filter_by(producto_id=1, clave="asientos").one().valor_numero == 4.0
+
+    # Sin productos que cambien no se toca nada
+    assert _masivo(client, headers_admin, accion="categoria", producto_ids=[1], nueva_categoria_id=2).json()["actualizados"] == 0
+
+
+def test_eliminar_limpia_dependientes(db, client, headers_admin, crear_solicitud):
+    crear_solicitud(productos=[(1, 1)], paquetes=[])
+    client.put("/api/v1/admin/categorias/2/especificaciones", headers=headers_admin, json=[{"clave": "material"}])
+    db.add(PronosticoDemanda(producto_id=4, fecha=HOY, unidades=3, generado_en=datetime.now()))
+    db.add(RecomendacionStock(
+        producto_id=4, stock_actual=20, stock_recomendado=25, nivel_servicio=0.95, prob_faltante_actual=0.1,
+        pico_p50=10, pico_p95=24, curva=[], escenarios=100, horizonte_dias=28, generado_en=datetime.now()
+    ))
+    db.commit()
+
+    respuesta = _masivo(client, headers_admin, accion="eliminar", producto_ids=[1, 4, 4, 99])
+    assert respuesta.json() == {"accion": "eliminar", "eliminados": 1, "con_solicitudes": [1], "no_encontrados": [99]}
+
+    db.expire_all()
+    assert db.get(Producto, 4) is None
+    assert db.get(Producto, 1) is not None
+    assert db.query(ProductoAtributo).filter_by(producto_id=4).count() == 0
+    assert db.query(PronosticoDemanda).filter_by(producto_id=4).count() == 0
+    assert db.query(RecomendacionStock).filter_by(producto_id=4).count() == 0
+
+
+# ========== PAQUETES ==========
+def _masivo_paquetes(client, headers, **operacion):
+    return client.post("/api/v1/admin/paquetes/masivo", headers=headers, json=operacion)
+
+
+def test_paquetes_precio_y_activacion(db, client, headers_admin):
+    assert _masivo_paquetes(client, headers_admin, accion="precio", paquete_ids=[1, 2], porcentaje=-25).json()["actualizados"] == 2
+    assert [_precios(db, Paquete)[i] for i in (1, 2, 3)] == [Decimal("75.00"), Decimal("150.00"), Decimal("300.00")]
+
+    assert _masivo_paquetes(client, headers_admin, accion="desactivar", paquete_ids=[1, 2]).json()["actualizados"] == 2
+    assert _masivo_paquetes(client, headers_admin, accion="desactivar", paquete_ids=[2, 3]).json()["actualizados"] == 1
+    assert _masivo_paquetes(client, headers_admin, accion="activar", paquete_ids=[1]).json()["actualizados"] == 1
+    db.expire_all()
+    assert sorted(p.paquete_id for p in db.query(Paquete).filter_by(activo=False)) == [2, 3]
+
+    assert _masivo_paquetes(client, headers_admin, accion="precio", paquete_ids=[1]).status_code == 400
+    assert _masivo_paquetes(client, headers_admin, accion="duplicar", paquete_ids=[1]).status_code == 400
+    assert _masivo_paquetes(client, headers_admin, accion="activar", paquete_ids=[]).status_code == 422
+
+
+def test_paquetes_eliminar(db, client, headers_admin, crear_solicitud):
+    crear_solicitud(productos=[], paquetes=[(1, 1)])
+
+    respuesta = _masivo_paquetes(client, headers_admin, accion="eliminar", paquete_ids=[1, 2, 9])
+    assert respuesta.json() == {"accion": "eliminar", "eliminados": 1, "con_solicitudes": [1], "no_encontrados": [9]}
+    db.expire_all()
+    assert sorted(p.paquete_id for p in db.query(Paquete)) == [1, 3, 4]
+
+
+@pytest.mark.parametrize("accion, vencida", [("precio", False), ("desactivar", True), ("eliminar", True)])
+def test_paquetes_vencen_el_dashboard(client, headers_admin, accion, vencida):
+    def _vencido():
+        clave, = client.get("/api/v1/admin/cache", headers=headers_admin).json()["dashboard"]["claves"]
+        return clave["vencida"]
+
+    client.get("/api/v1/admin/dashboard", headers=headers_admin)
+    operacion = {"porcentaje": 10} if accion == "precio" else {}
+    assert _masivo_paquetes(client, headers_admin, accion=accion, paquete_ids=[2], **operacion).status_code == 200
+    assert _vencido() is vencida
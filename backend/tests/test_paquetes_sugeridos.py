@@ -0,0 +1,98 @@
+"""Paquetes sugeridos por número de invitados: knapsack de cobertura mínima e índice de capacidad"""
+from datetime import date, timedelta
+from itertools import combinations
+import numpy as np
+import pytest
+from app.analytics.cobertura import construir_indice, cobertura_minima, sugerir
+from app.models.models import Paquete
+
+INICIO = date.today() + timedelta(days=30)
+
+
+def _fuerza_bruta(capacidad, precio, personas):
+    """Menor precio de un subconjunto que cubre a los invitados (None si no hay)"""
+    mejores = [
+        sum(precio[i] for i in subconjunto)
+        for r in range(1, len(capacidad) + 1)
+        for subconjunto in combinations(range(len(capacidad)), r)
+        if sum(capacidad[i] for i in subconjunto) >= personas
+    ]
+    return min(mejores) if mejores else None
+
+
+def test_cobertura_minima_igual_a_fuerza_bruta():
+    rng = np.random.default_rng(4)
+    for _ in range(200):
+        n = int(rng.integers(0, 8))
+        capacidad = rng.integers(5, 60, n)
+        precio = rng.integers(10, 500, n).astype(np.float64)
+        personas = int(rng.integers(1, 200))
+
+        elegidos = cobertura_minima(capacidad, precio, personas)
+        esperado = _fuerza_bruta(capacidad.tolist(), precio.tolist(), personas)
+        if esperado is None:
+            assert elegidos is None
+        else:
+            assert len(set(elegidos)) == len(elegidos)
+            assert capacidad[elegidos].sum() >= personas
+            assert precio[elegidos].sum() == pytest.approx(esperado)
+
+
+def test_sugerir_grandes_y_combinacion():
+    indice = construir_indice([
+        (1, "Chico", 20, 100.0), (2, "Mediano", 40, 150.0), (3, "Grande", 80, 400.0),
+        (4, "Salón", 120, 380.0), (5, "Terraza", 30, 90.0),
+    ])
+    assert indice["capacidad"].tolist() == [20, 30, 40, 80, 120]
+
+    def _ids(opciones):
+        return [sorted(int(indice["paquete_id"][i]) for i in opcion) for opcion in opciones]
+
+    # 70 invitados: Terraza + Mediano (240) antes que Salón (380) y Grande (400)
+    assert _ids(sugerir(indice, 70, {1, 2, 3, 4, 5}, limite=5)) == [[2, 5], [4], [3]]
+    assert _ids(sugerir(indice, 70, {1, 2, 3, 4, 5}, limite=2)) == [[2, 5], [4]]
+    # Sin el Mediano, Chico y Terraza suman 50 y no alcanzan: solo quedan los grandes
+    assert _ids(sugerir(indice, 70, {1, 3, 4, 5}, limite=5)) == [[4], [3]]
+    # Capacidad exacta cuenta como suficiente
+    assert _ids(sugerir(indice, 40, {2}, limite=5)) == [[2]]
+    assert sugerir(indice, 500, {1, 2, 3, 4, 5}) == []
+
+
+# ========== ENDPOINT ==========
+def _sugeridos(client, personas, dias=2, **extra):
+    respuesta = client.get("/api/v1/paquetes/sugeridos", params={
+        "personas": personas, "fecha_inicio": INICIO.isoformat(),
+        "fecha_fin": (INICIO + timedelta(days=dias - 1)).isoformat(), **extra
+    })
+    assert respuesta.status_code == 200, respuesta.text
+    return respuesta.json()["sugerencias"]
+
+
+def test_endpoint_sugiere_por_precio(db, client):
+    # K0..K3 (ids 1..4): capacidad 25, 50, 75, 100 y precio 100, 200, 300, 400; K3 con 50 % de descuento
+    db.get(Paquete, 4).descuento_porcentaje = 50
+    db.commit()
+
+    sugerencias = _sugeridos(client, 60, dias=3)
+    assert [[p["paquete_id"] for p in s["paquetes"]] for s in sugerencias] == [[4], [3], [1, 2]]
+    assert sugerencias[0]["precio_por_dia"] == 200.0
+    assert sugerencias[0]["precio_total"] == 600.0
+    assert sugerencias[2]["capacidad_total"] == 75
+
+
+def test_endpoint_excluye_ocupados_e_inactivos(db, client, crear_solicitud):
+    # Paquete 3 comprometido en una solicitud pendiente que se traslapa; paquete 4 inactivo
+    crear_solicitud(inicio=INICIO + timedelta(days=1), productos=[], paquetes=[(3, 1)])
+    db.get(Paquete, 4).activo = False
+    db.commit()
+
+    sugerencias = _sugeridos(client, 60)
+    assert [[p["paquete_id"] for p in s["paquetes"]] for s in sugerencias] == [[1, 2]]
+    assert _sugeridos(client, 80) == []
+
+
+def test_endpoint_fechas_invalidas(client):
+    respuesta = client.get("/api/v1/paquetes/sugeridos", params={
+        "personas": 10, "fecha_inicio": INICIO.isoformat(), "fecha_fin": (INICIO - timedelta(days=1)).isoformat()
+    })
+    assert respuesta.status_code == 400
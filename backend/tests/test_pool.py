@@ -0,0 +1,52 @@
+"""Métricas del pool de conexiones y GET /admin/db/pool"""
+import pytest
+from sqlalchemy import create_engine, exc, text
+from app.core.pool_metrics import Histograma, TimedQueuePool, pool_status
+
+
+def test_histograma_acumula_por_bucket():
+    histograma = Histograma(buckets=(1, 10, 100))
+    for ms in (0.5, 1, 7, 250):
+        histograma.observar(ms)
+
+    datos = histograma.to_dict()
+    assert [b["conteo"] for b in datos["buckets"]] == [2, 1, 0, 1]
+    assert datos["buckets"][-1]["hasta_ms"] == "+Inf"
+    assert datos["total"] == 4
+    assert datos["max_ms"] == 250
+    assert datos["promedio_ms"] == pytest.approx((0.5 + 1 + 7 + 250) / 4, abs=1e-3)
+
+
+def test_pool_registra_checkouts_y_timeouts(tmp_path):
+    motor = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}", poolclass=TimedQueuePool,
+        pool_size=1, max_overflow=0, pool_timeout=0.05
+    )
+    try:
+        ocupada = motor.connect()
+        ocupada.execute(text("SELECT 1"))
+        with pytest.raises(exc.TimeoutError):
+            motor.connect()
+        ocupada.close()
+
+        estado = pool_status(motor)
+        assert estado["pool"] == "TimedQueuePool"
+        assert estado["conexiones_en_uso"] == 0
+        assert estado["metricas"]["timeouts"] == 1
+        assert estado["metricas"]["checkout"]["total"] == 2
+
+        # dispose() recrea el pool pero conserva las métricas
+        motor.dispose()
+        assert motor.pool.metrics.timeouts == 1
+    finally:
+        motor.dispose()
+
+
+def test_endpoint_de_pool(client, headers_admin, headers_usuario):
+    assert client.get("/api/v1/admin/db/pool", headers=headers_usuario).status_code == 401
+
+    datos = client.get("/api/v1/admin/db/pool", headers=headers_admin).json()
+    configuracion = datos["configuracion"]
+    assert configuracion["max_conexiones_por_worker"] == configuracion["pool_size"] + configuracion["max_overflow"]
+    assert "primario" in datos["pools"]
+    assert datos["sesiones"]["requests"] >= 1
@@ -0,0 +1,123 @@
+"""Pronóstico de demanda: tensor de historia, factores estacionales y tabla pronostico_demanda"""
+from datetime import date, timedelta
+import numpy as np
+import pytest
+from app.analytics.pronostico import meses_y_dias_semana, tensor_demanda, ajustar, pronosticar
+from app.crud import analytics_crud
+from app.models.models import Producto
+from app.models.solicitud_models import Solicitud
+
+HOY = date.today()
+
+
+def test_meses_y_dias_semana():
+    meses, dias_semana = meses_y_dias_semana(np.array(["2026-01-05", "2026-01-11", "2026-12-31"], dtype="datetime64[D]"))
+    assert meses.tolist() == [0, 0, 11]
+    assert dias_semana.tolist() == [0, 6, 3]
+
+
+def test_tensor_demanda_igual_a_fuerza_bruta():
+    rng = np.random.default_rng(5)
+    n, n_tipos, n_productos, n_dias = 200, 3, 4, 30
+    tipo = rng.integers(0, n_tipos, n)
+    producto = rng.integers(0, n_productos, n)
+    inicio = rng.integers(0, n_dias, n)
+    fin = np.minimum(inicio + rng.integers(0, 6, n), n_dias - 1)
+    cantidad = rng.integers(1, 10, n).astype(np.float64)
+
+    esperado = np.zeros((n_tipos, n_productos, n_dias))
+    for k in range(n):
+        esperado[tipo[k], producto[k], inicio[k]:fin[k] + 1] += cantidad[k]
+    np.testing.assert_allclose(tensor_demanda(tipo, producto, inicio, fin, cantidad, n_tipos, n_productos, n_dias), esperado)
+
+
+def _dias(n: int) -> np.ndarray:
+    return np.arange(np.datetime64("2024-01-01"), np.datetime64("2024-01-01") + n)
+
+
+def test_demanda_constante_se_pronostica_igual():
+    dias = _dias(730)
+    H = np.zeros((2, 3, dias.size))
+    H[0, 0] = 5
+    H[1, 0] = 1
+    H[1, 2] = 3
+
+    niveles, factor_mes, factor_semana = ajustar(H, dias)
+    np.testing.assert_allclose(factor_mes, 1)
+    np.testing.assert_allclose(factor_semana, 1)
+    futuro = pronosticar(niveles, factor_mes, factor_semana, dias[-1] + 1 + np.arange(14))
+    np.testing.assert_allclose(futuro, [[6] * 14, [0] * 14, [3] * 14])
+
+
+def test_patron_semanal_y_de_temporada():
+    dias = _dias(730)
+    meses, dias_semana = meses_y_dias_semana(dias)
+    # Sábados al triple y diciembre al doble
+    demanda = 10.0 * np.where(dias_semana == 5, 3, 1) * np.where(meses == 11, 2, 1)
+    H = demanda[None, None, :]
+
+    # Sin suavizado se recuperan los factores (el de mes se estima antes de
+    # quitar el efecto del día de la semana, así que varía con los sábados
+    # de cada mes); con suavizado se encogen hacia 1
+    niveles, factor_mes, factor_semana = ajustar(H, dias, suavizado=0)
+    assert factor_semana[0, 5] / factor_semana[0, 0] == pytest.approx(3, rel=0.02)
+    assert factor_mes[0, 11] / factor_mes[0, 5] == pytest.approx(2, rel=0.05)
+    _, factor_mes_suave, factor_semana_suave = ajustar(H, dias)
+    assert 1 < factor_semana_suave[0, 5] < factor_semana[0, 5]
+    assert 1 < factor_mes_suave[0, 11] < factor_mes[0, 11]
+
+    futuro = dias[-1] + 1 + np.arange(365)
+    pronostico = pronosticar(niveles, factor_mes, factor_semana, futuro)[0]
+    meses_f, semana_f = meses_y_dias_semana(futuro)
+    esperado = 10.0 * np.where(semana_f == 5, 3, 1) * np.where(meses_f == 11, 2, 1)
+    np.testing.assert_allclose(pronostico, esperado, rtol=0.1)
+
+
+# ========== GENERACIÓN Y LECTURA ==========
+@pytest.fixture
+def historia(db, crear_solicitud):
+    """Demanda constante en los últimos 60 días: 5 del producto 1 (boda) y 2 del producto 3 (fiesta)"""
+    for tipo_evento, producto in (("boda", (1, 5)), ("fiesta", (3, 2))):
+        solicitud_id = crear_solicitud(tipo_evento=tipo_evento, productos=[producto], paquetes=[])["solicitud_id"]
+        sol = db.get(Solicitud, solicitud_id)
+        sol.fecha_evento_inicio = HOY - timedelta(days=60)
+        sol.fecha_evento_fin = HOY - timedelta(days=1)
+    db.commit()
+
+
+@pytest.mark.parametrize("max_tipos, tipos", [(8, ["boda", "fiesta"]), (1, ["boda", "otros"])])
+def test_generar_pronostico(db, historia, max_tipos, tipos):
+    resumen = analytics_crud.generar_pronostico(db, semanas=2, historia_dias=60, max_tipos=max_tipos, lote=10)
+
+    assert resumen["productos"] == 6
+    assert resumen["dias"] == 14
+    assert resumen["filas"] == 6 * 14
+    assert resumen["tipos_evento"] == tipos
+
+    pronostico = {p["producto_id"]: p for p in analytics_crud.obtener_pronostico(db, HOY, HOY + timedelta(days=13))}
+    assert [f["unidades"] for f in pronostico[1]["pronostico"]] == [5.0] * 14
+    assert [f["unidades"] for f in pronostico[3]["pronostico"]] == [2.0] * 14
+    assert pronostico[2]["pico_esperado"] == 0
+    assert pronostico[1]["dias_con_faltante"] == []
+
+
+def test_regenerar_reemplaza_los_dias_futuros(db, historia):
+    analytics_crud.generar_pronostico(db, semanas=4, historia_dias=60)
+    analytics_crud.generar_pronostico(db, semanas=1, historia_dias=60)
+
+    assert len(analytics_crud.obtener_pronostico(db, HOY, HOY + timedelta(days=60), producto_id=1)[0]["pronostico"]) == 7
+
+
+def test_endpoint_solo_faltantes(db, client, headers_admin, historia):
+    analytics_crud.generar_pronostico(db, semanas=2, historia_dias=60)
+    db.get(Producto, 1).stock_total = 4
+    db.commit()
+
+    respuesta = client.get("/api/v1/admin/analytics/pronostico", headers=headers_admin, params={"solo_faltantes": True})
+    assert respuesta.status_code == 200
+    datos = respuesta.json()
+    assert [p["producto_id"] for p in datos["productos"]] == [1]
+    assert len(datos["productos"][0]["dias_con_faltante"]) == 14
+    assert client.get("/api/v1/admin/analytics/pronostico", headers=headers_admin, params={
+        "desde": HOY.isoformat(), "hasta": (HOY - timedelta(days=1)).isoformat()
+    }).status_code == 400
@@ -0,0 +1,127 @@
+"""Productos relacionados: pares por canasta, puntuaciones, top-K y mantenimiento incremental"""
+from itertools import permutations
+import numpy as np
+import pytest
+from app.analytics import coocurrencia
+from app.crud import recomendaciones_crud
+from app.models.recomendacion_models import CoocurrenciaItem, CoocurrenciaPar, ProductoRelacionado
+
+
+def test_codificar_y_decodificar():
+    codigos = coocurrencia.codificar([0, 1, 0], [7, 7, 3])
+    assert codigos.tolist() == [14, 15, 6]
+    tipos, ids = coocurrencia.decodificar(codigos)
+    assert tipos.tolist() == [0, 1, 0]
+    assert ids.tolist() == [7, 7, 3]
+
+
+def test_pares_por_canasta_igual_a_permutaciones():
+    rng = np.random.default_rng(9)
+    canasta = rng.integers(0, 40, 300)
+    item = rng.integers(0, 25, 300)
+
+    c, i = coocurrencia.canastas_unicas(canasta, item)
+    a, b = coocurrencia.pares_por_canasta(c, i)
+
+    esperado = []
+    for k in sorted(set(canasta.tolist())):
+        esperado.extend(permutations(sorted(set(item[canasta == k].tolist())), 2))
+    assert sorted(zip(a.tolist(), b.tolist())) == sorted(esperado)
+
+    a_unicos, b_unicos, conteo = coocurrencia.contar_pares(a, b)
+    conteos = {}
+    for par in esperado:
+        conteos[par] = conteos.get(par, 0) + 1
+    assert dict(zip(zip(a_unicos.tolist(), b_unicos.tolist()), conteo.tolist())) == conteos
+
+
+def test_pares_sin_canastas():
+    vacio = np.zeros(0, dtype=np.int64)
+    a, b = coocurrencia.pares_por_canasta(vacio, vacio)
+    assert a.size == b.size == 0
+    assert coocurrencia.contar_pares(a, b)[2].size == 0
+
+
+def test_puntuar_y_top_k():
+    lift, jaccard = coocurrencia.puntuar([2, 1, 0], [4, 4, 0], [2, 4, 3], 10)
+    np.testing.assert_allclose(lift, [2.5, 0.625, 0])
+    np.testing.assert_allclose(jaccard, [0.5, 1 / 7, 0])
+
+    origen = np.array([1, 1, 1, 2, 2])
+    indices, posiciones = coocurrencia.top_k(origen, np.array([0.1, 0.9, 0.5, 0.3, 0.7]), 2)
+    assert list(zip(indices.tolist(), posiciones.tolist())) == [(1, 1), (2, 2), (4, 1), (3, 2)]
+
+
+# ========== MANTENIMIENTO POR LAS SOLICITUDES ==========
+def _relacionados(client, producto_id):
+    respuesta = client.get(f"/api/v1/productos/{producto_id}/relacionados")
+    assert respuesta.status_code == 200
+    return [(r["tipo"], r["id"], r["solicitudes_juntos"], r["lift"]) for r in respuesta.json()]
+
+
+@pytest.fixture
+def canastas(crear_solicitud, cambiar_estado):
+    """
+    Cuatro solicitudes aprobadas: {P1, P2, K1}, {P1, P2}, {P1, P3}, {P2, K1}
+    y una pendiente {P1, P3} que no cuenta. La actualización corre como tarea
+    de fondo de cada cambio de estado.
+    """
+    contenido = [([1, 2], [1]), ([1, 2], []), ([1, 3], []), ([2], [1])]
+    ids = []
+    for productos, paquetes in contenido:
+        solicitud_id = crear_solicitud(productos=[(p, 1) for p in productos], paquetes=[(k, 1) for k in paquetes])["solicitud_id"]
+        cambiar_estado(solicitud_id, "aprobada")
+        ids.append(solicitud_id)
+    crear_solicitud(productos=[(1, 1), (3, 1)], paquetes=[])
+    return ids
+
+
+def test_relacionados_tras_aprobar(client, canastas):
+    # total 4; P1 en 3, P2 en 3, K1 en 2. Soporte mínimo 2: P1-P3 (1) y P1-K1 (1) no aparecen
+    assert _relacionados(client, 1) == [("producto", 2, 2, round(2 * 4 / (3 * 3), 4))]
+    assert _relacionados(client, 2) == [
+        ("paquete", 1, 2, round(2 * 4 / (3 * 2), 4)),
+        ("producto", 1, 2, round(2 * 4 / (3 * 3), 4)),
+    ]
+    assert _relacionados(client, 3) == []
+
+
+def test_cancelar_resta_la_canasta(db, client, canastas, cambiar_estado):
+    cambiar_estado(canastas[3], "cancelada")
+
+    # total 3; P2 queda en 2 solicitudes y P2-K1 baja a 1
+    assert _relacionados(client, 2) == [("producto", 1, 2, round(2 * 3 / (3 * 2), 4))]
+    db.expire_all()
+    assert recomendaciones_crud._leer_config(db, recomendaciones_crud.CLAVE_TOTAL_SOLICITUDES) == 3
+    assert db.query(CoocurrenciaItem).filter_by(item_tipo="paquete", item_id=1).one().conteo == 1
+
+
+def test_incremental_igual_a_completo(db, client, canastas, cambiar_estado):
+    cambiar_estado(canastas[2], "cancelada")
+
+    def _contenido():
+        db.expire_all()
+        return (
+            sorted((f.item_tipo, f.item_id, f.conteo) for f in db.query(CoocurrenciaItem)),
+            sorted((f.producto_id, f.item_tipo, f.item_id, f.conteo) for f in db.query(CoocurrenciaPar)),
+            sorted((f.producto_id, f.posicion, f.item_tipo, f.item_id, f.lift) for f in db.query(ProductoRelacionado)),
+        )
+
+    incremental = _contenido()
+    assert recomendaciones_crud.actualizar_relacionados(db)["solicitudes"] == 0
+    resumen = recomendaciones_crud.actualizar_relacionados(db, completo=True)
+    assert resumen["solicitudes"] == 3
+    assert _contenido() == incremental
+
+
+def test_quitar_items(db, client, canastas):
+    assert recomendaciones_crud.quitar_items(db, "paquete", [1]) == 1
+    db.commit()
+
+    assert _relacionados(client, 2) == [("producto", 1, 2, round(2 * 4 / (3 * 3), 4))]
+    assert db.query(CoocurrenciaPar).filter_by(item_tipo="paquete").count() == 0
+
+    recomendaciones_crud.quitar_items(db, "producto", [2])
+    db.commit()
+    assert _relacionados(client, 1) == []
+    assert _relacionados(client, 2) == []
@@ -0,0 +1,61 @@
+"""Ruteo de lecturas a réplicas y lectura-tras-escritura"""
+import itertools
+import pytest
+from sqlalchemy import create_engine
+from starlette.requests import Request
+from app.core import database
+from app.core.database import SessionLocal, engine
+
+
+def _request(token: str = None) -> Request:
+    headers = [(b"authorization", f"Bearer {token}".encode())] if token else []
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": headers})
+
+
+@pytest.fixture
+def replica(monkeypatch, tmp_path):
+    motor = create_engine(f"sqlite:///{tmp_path / 'replica.db'}")
+    monkeypatch.setattr(database, "replica_engines", [motor])
+    monkeypatch.setattr(database, "_replicas_ciclo", itertools.cycle([motor]))
+    monkeypatch.setattr(database, "_escrituras_recientes", {})
+    yield motor
+    motor.dispose()
+
+
+def test_sesion_de_lectura_usa_la_replica(replica):
+    lectura = SessionLocal(info={"solo_lectura": True})
+    normal = SessionLocal()
+    try:
+        assert lectura.get_bind() is replica
+        assert normal.get_bind() is engine
+    finally:
+        lectura.close()
+        normal.close()
+
+
+def test_sin_replicas_todo_va_al_primario():
+    lectura = SessionLocal(info={"solo_lectura": True})
+    try:
+        assert lectura.get_bind() is engine
+    finally:
+        lectura.close()
+
+
+def test_lecturas_fijadas_al_primario_tras_escribir(replica, monkeypatch):
+    monkeypatch.setattr(database.settings, "DB_REPLICA_STICKY_SECONDS", 60)
+    escritor, otro = _request("token-a"), _request("token-b")
+
+    assert not database.requiere_primario(escritor)
+    database.registrar_escritura(escritor)
+    assert database.requiere_primario(escritor)
+    assert not database.requiere_primario(otro)
+    # Los clientes anónimos no se registran
+    database.registrar_escritura(_request())
+    assert not database.requiere_primario(_request())
+
+
+def test_ventana_de_lectura_tras_escritura_vence(replica, monkeypatch):
+    monkeypatch.setattr(database.settings, "DB_REPLICA_STICKY_SECONDS", -1)
+    escritor = _request("token-a")
+    database.registrar_escritura(escritor)
+    assert not database.requiere_primario(escritor)
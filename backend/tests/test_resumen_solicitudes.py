@@ -0,0 +1,72 @@
+"""Resumen desnormalizado de solicitudes: totales de líneas, total pagado y estado de pago"""
+from decimal import Decimal
+import pytest
+from app.crud import solicitud_crud
+from app.models.solicitud_models import EstadoSolicitud, EstadoPagoSolicitud, Solicitud
+
+
+def _pagar(client, headers_usuario, solicitud_id, monto, tipo_pago="anticipo"):
+    respuesta = client.post("/api/v1/me/pagos", headers=headers_usuario, json={
+        "solicitud_id": solicitud_id, "tipo_pago": tipo_pago, "metodo_pago": "efectivo", "monto": monto
+    })
+    assert respuesta.status_code < 400, respuesta.text
+
+
+@pytest.mark.parametrize("pagado, total, estado, esperado", [
+    (0, 100, EstadoSolicitud.pendiente, EstadoPagoSolicitud.pendiente),
+    (40, 100, EstadoSolicitud.aprobada, EstadoPagoSolicitud.parcial),
+    (100, 100, EstadoSolicitud.aprobada, EstadoPagoSolicitud.pagado),
+    (120, 100, EstadoSolicitud.completada, EstadoPagoSolicitud.pagado),
+    (40, 100, EstadoSolicitud.cancelada, EstadoPagoSolicitud.reembolso_pendiente),
+    (0, 100, EstadoSolicitud.rechazada, EstadoPagoSolicitud.pendiente),
+])
+def test_calcular_estado_pago(pagado, total, estado, esperado):
+    assert solicitud_crud.calcular_estado_pago(pagado, total, estado) == esperado
+
+
+def test_pagos_y_cancelacion_actualizan_el_resumen(db, client, headers_usuario, crear_solicitud):
+    solicitud = crear_solicitud(productos=[(1, 2), (2, 1), (3, 1)], paquetes=[(1, 1)])
+    solicitud_id = solicitud["solicitud_id"]
+    total = Decimal(str(solicitud["total_cotizacion"]))
+
+    def resumen():
+        db.expire_all()
+        return db.get(Solicitud, solicitud_id)
+
+    assert (resumen().total_productos, resumen().total_paquetes) == (3, 1)
+
+    _pagar(client, headers_usuario, solicitud_id, 50)
+    assert resumen().total_pagado == Decimal("50.00")
+    assert resumen().estado_pago == EstadoPagoSolicitud.parcial
+
+    _pagar(client, headers_usuario, solicitud_id, float(total - 50), tipo_pago="pago_final")
+    assert resumen().estado_pago == EstadoPagoSolicitud.pagado
+
+    _pagar(client, headers_usuario, solicitud_id, 20, tipo_pago="devolucion_deposito")
+    assert resumen().total_pagado == total - 20
+    assert resumen().estado_pago == EstadoPagoSolicitud.parcial
+
+    assert client.put(f"/api/v1/me/solicitudes/{solicitud_id}/cancelar", headers=headers_usuario).status_code == 200
+    assert resumen().estado_pago == EstadoPagoSolicitud.reembolso_pendiente
+
+
+def test_verificar_resumen_detecta_y_repara_desviaciones(db, client, headers_usuario, crear_solicitud):
+    primera = crear_solicitud()["solicitud_id"]
+    segunda = crear_solicitud()["solicitud_id"]
+    _pagar(client, headers_usuario, segunda, 30)
+
+    db.get(Solicitud, primera).total_productos = 7
+    db.get(Solicitud, segunda).total_pagado = 0
+    db.commit()
+
+    ultimo, revisadas, diferencias = solicitud_crud.verificar_resumen_lote(db, lote=10)
+    assert (ultimo, revisadas) == (segunda, 2)
+    assert {d["solicitud_id"]: set(d["cambios"]) for d in diferencias} == {
+        primera: {"total_productos"},
+        segunda: {"total_pagado"},
+    }
+
+    solicitud_crud.verificar_resumen_lote(db, lote=10, reparar=True)
+    assert solicitud_crud.verificar_resumen_lote(db, lote=10)[2] == []
+    assert db.get(Solicitud, segunda).estado_pago == EstadoPagoSolicitud.parcial
+    assert solicitud_crud.verificar_resumen_lote(db, desde_id=segunda) == (None, 0, [])
@@ -0,0 +1,154 @@
+"""Rollups diarios: mantenimiento incremental en cada cambio de estado y reconstrucción"""
+from datetime import date, timedelta
+from decimal import Decimal
+import pytest
+from app.crud import analytics_crud
+from app.models.analytics_models import (
+    RollupProductoDia, RollupCategoriaDia, RollupPaqueteDia, RollupTipoEventoDia, RollupPagoDia
+)
+from app.models.solicitud_models import EstadoSolicitud
+
+DIA = date.today() + timedelta(days=30)
+ROLLUPS = (
+    (RollupProductoDia, "producto_id"),
+    (RollupCategoriaDia, "categoria_id"),
+    (RollupPaqueteDia, "paquete_id"),
+    (RollupTipoEventoDia, "tipo_evento"),
+)
+
+
+def _contenido(db):
+    """Filas no nulas de cada rollup: {tabla: {(clave, dia): (unidades, ingresos, solicitudes)}}"""
+    db.expire_all()
+    return {
+        modelo.__tablename__: {
+            (getattr(fila, clave), fila.dia): (fila.unidades, Decimal(fila.ingresos), fila.solicitudes)
+            for fila in db.query(modelo)
+            if fila.unidades or fila.ingresos or fila.solicitudes
+        }
+        for modelo, clave in ROLLUPS
+    }
+
+
+@pytest.mark.parametrize("anterior, nuevo, efecto", [
+    (None, EstadoSolicitud.pendiente, 0),
+    (EstadoSolicitud.pendiente, EstadoSolicitud.aprobada, 1),
+    (EstadoSolicitud.pendiente, EstadoSolicitud.rechazada, 0),
+    (EstadoSolicitud.aprobada, EstadoSolicitud.en_proceso, 0),
+    (EstadoSolicitud.en_proceso, EstadoSolicitud.completada, 0),
+    (EstadoSolicitud.aprobada, EstadoSolicitud.cancelada, -1),
+])
+def test_efecto_transicion(anterior, nuevo, efecto):
+    assert analytics_crud.efecto_transicion(anterior, nuevo) == efecto
+
+
+def test_solo_cuentan_las_aprobadas(db, crear_solicitud, cambiar_estado):
+    crear_solicitud(cantidad=3)
+    rechazada = crear_solicitud(cantidad=3)["solicitud_id"]
+    cambiar_estado(rechazada, "rechazada")
+    assert all(not filas for filas in _contenido(db).values())
+
+
+def test_aprobacion_suma_y_upsert_incrementa(db, crear_solicitud, cambiar_estado):
+    for cantidad in (3, 4):
+        cambiar_estado(crear_solicitud(inicio=DIA, cantidad=cantidad)["solicitud_id"], "aprobada")
+
+    contenido = _contenido(db)
+    # Subtotales de línea de la fixture: 10 × cantidad × 3 días para productos, 100 × 3 para el paquete
+    assert contenido["rollup_producto_dia"] == {
+        (1, DIA): (7, Decimal("210"), 2),
+        (2, DIA): (4, Decimal("120"), 2),
+    }
+    assert contenido["rollup_categoria_dia"] == {
+        (1, DIA): (7, Decimal("210"), 2),
+        (2, DIA): (4, Decimal("120"), 2),
+    }
+    assert contenido["rollup_paquete_dia"] == {(1, DIA): (2, Decimal("600"), 2)}
+    assert contenido["rollup_tipo_evento_dia"] == {("boda", DIA): (13, Decimal("930"), 2)}
+
+
+def test_estados_posteriores_no_duplican_y_cancelar_resta(db, crear_solicitud, cambiar_estado):
+    completada = crear_solicitud(inicio=DIA, cantidad=2)["solicitud_id"]
+    cancelada = crear_solicitud(inicio=DIA, cantidad=5, tipo_evento="fiesta")["solicitud_id"]
+    for estado in ("aprobada", "en_proceso", "completada"):
+        cambiar_estado(completada, estado)
+    cambiar_estado(cancelada, "aprobada")
+    cambiar_estado(cancelada, "cancelada")
+
+    contenido = _contenido(db)
+    assert contenido["rollup_producto_dia"] == {
+        (1, DIA): (2, Decimal("60"), 1),
+        (2, DIA): (2, Decimal("60"), 1),
+    }
+    assert contenido["rollup_tipo_evento_dia"] == {("boda", DIA): (5, Decimal("420"), 1)}
+
+
+def test_incremental_igual_a_reconstruccion(db, crear_solicitud, cambiar_estado, client, headers_admin):
+    ids = [
+        crear_solicitud(inicio=DIA + timedelta(days=i), cantidad=1 + i, tipo_evento=tipo)["solicitud_id"]
+        for i, tipo in enumerate(("boda", "fiesta", "boda", "corporativo"))
+    ]
+    cambiar_estado(ids[0], "aprobada")
+    cambiar_estado(ids[1], "aprobada")
+    cambiar_estado(ids[1], "en_proceso")
+    respuesta = client.post("/api/v1/admin/solicitudes/masivo", headers=headers_admin, json={
+        "accion": "aprobar", "solicitud_ids": ids[2:]
+    })
+    assert respuesta.status_code == 200, respuesta.text
+    cambiar_estado(ids[3], "cancelada")
+
+    incremental = _contenido(db)
+    analytics_crud.reconstruir_rollups(db, DIA - timedelta(days=1), DIA + timedelta(days=10))
+    assert _contenido(db) == incremental
+    assert set(incremental["rollup_tipo_evento_dia"]) == {("boda", DIA), ("fiesta", DIA + timedelta(days=1)), ("boda", DIA + timedelta(days=2))}
+
+
+def test_mover_producto_de_categoria_y_cancelar(db, client, headers_admin, crear_solicitud, cambiar_estado):
+    solicitud_id = crear_solicitud(inicio=DIA, productos=[(1, 5)], paquetes=[])["solicitud_id"]
+    cambiar_estado(solicitud_id, "aprobada")
+
+    respuesta = client.put("/api/v1/admin/productos/1", headers=headers_admin, json={"categoria_id": 2})
+    assert respuesta.status_code == 200, respuesta.text
+    # La renta ya contabilizada pasa a la nueva categoría
+    assert _contenido(db)["rollup_categoria_dia"] == {(2, DIA): (5, Decimal("150"), 1)}
+
+    # Al cancelar se resta de la categoría actual sin dejar saldos negativos
+    cambiar_estado(solicitud_id, "cancelada")
+    assert _contenido(db)["rollup_categoria_dia"] == {}
+
+
+def test_pagos_por_tipo_y_devoluciones_en_negativo(db, client, headers_usuario, crear_solicitud):
+    solicitud_id = crear_solicitud()["solicitud_id"]
+    for tipo_pago, monto in (("anticipo", 100), ("anticipo", 50), ("deposito", 80), ("devolucion_deposito", 80)):
+        respuesta = client.post("/api/v1/me/pagos", headers=headers_usuario, json={
+            "solicitud_id": solicitud_id, "tipo_pago": tipo_pago, "metodo_pago": "efectivo", "monto": monto
+        })
+        assert respuesta.status_code == 200, respuesta.text
+
+    def _pagos():
+        db.expire_all()
+        return {(f.tipo_pago, f.dia): (Decimal(f.monto), f.pagos) for f in db.query(RollupPagoDia)}
+
+    hoy = date.today()
+    incremental = _pagos()
+    assert incremental == {
+        ("anticipo", hoy): (Decimal("150"), 2),
+        ("deposito", hoy): (Decimal("80"), 1),
+        ("devolucion_deposito", hoy): (Decimal("-80"), 1),
+    }
+    analytics_crud.reconstruir_rollups(db, hoy, hoy)
+    assert _pagos() == incremental
+
+
+def test_dashboard_lee_los_rollups(client, headers_admin, crear_solicitud, cambiar_estado):
+    cambiar_estado(crear_solicitud(inicio=DIA, cantidad=3)["solicitud_id"], "aprobada")
+    crear_solicitud(inicio=DIA, cantidad=9)
+
+    respuesta = client.get("/api/v1/admin/dashboard", headers=headers_admin)
+    assert respuesta.status_code == 200
+    datos = respuesta.json()
+    # Unidades de productos y subtotales de productos + paquetes de la aprobada
+    assert datos["stats_generales"]["total_pedidos"] == 5
+    assert datos["stats_generales"]["ingresos"] == 450.0
+    assert [(p["producto_id"], p["veces_pedido"]) for p in datos["productos_populares"]] == [(1, 3), (2, 2)]
+    assert [(p["paquete_id"], p["ingresos"]) for p in datos["paquetes_populares"]] == [(1, 300.0)]
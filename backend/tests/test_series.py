@@ -0,0 +1,174 @@
+"""Series de tiempo: agrupación vectorizada por periodo y grupo, e invariantes entre rollups"""
+from datetime import date, timedelta
+import numpy as np
+import pytest
+from app.analytics import series
+
+URL = "/api/v1/admin/analytics/series"
+
+
+def test_inicio_de_periodo():
+    dias = np.array(["2026-01-01", "2026-01-05", "2026-01-07", "2026-01-11", "2026-02-28"], dtype="datetime64[D]")
+
+    assert series.inicio_de_periodo(dias, "dia").tolist() == dias.tolist()
+    # 2026-01-05 es lunes
+    assert series.inicio_de_periodo(dias, "semana").astype(str).tolist() == [
+        "2025-12-29", "2026-01-05", "2026-01-05", "2026-01-05", "2026-02-23"
+    ]
+    assert series.inicio_de_periodo(dias, "mes").astype(str).tolist() == [
+        "2026-01-01", "2026-01-01", "2026-01-01", "2026-01-01", "2026-02-01"
+    ]
+    with pytest.raises(ValueError):
+        series.inicio_de_periodo(dias, "trimestre")
+
+
+def test_periodos_incluye_los_vacios():
+    assert series.periodos(date(2026, 1, 15), date(2026, 4, 2), "mes").astype(str).tolist() == [
+        "2026-01-01", "2026-02-01", "2026-03-01", "2026-04-01"
+    ]
+    assert series.periodos(date(2026, 1, 7), date(2026, 1, 20), "semana").astype(str).tolist() == [
+        "2026-01-05", "2026-01-12", "2026-01-19"
+    ]
+    assert series.periodos(date(2026, 1, 7), date(2026, 1, 9), "dia").size == 3
+
+
+def test_agrupar_serie_igual_a_sumar_fila_por_fila():
+    rng = np.random.default_rng(7)
+    desde, hasta = date(2025, 11, 3), date(2026, 2, 27)
+    dias = [desde + timedelta(days=int(d)) for d in rng.integers(0, (hasta - desde).days + 1, 500)]
+    grupos = [f"g{g}" for g in rng.integers(0, 6, 500)]
+    valores = rng.uniform(0, 100, 500).round(2)
+
+    for bucket in series.BUCKETS:
+        inicios, claves, matriz = series.agrupar_serie(dias, grupos, valores, desde, hasta, bucket)
+        esperado = np.zeros((claves.size, inicios.size))
+        inicio_de = {d: series.inicio_de_periodo(np.array([d], dtype="datetime64[D]"), bucket)[0] for d in set(dias)}
+        for dia, grupo, valor in zip(dias, grupos, valores):
+            esperado[list(claves).index(grupo), list(inicios).index(inicio_de[dia])] += valor
+        np.testing.assert_allclose(matriz, esperado)
+        assert matriz.sum() == pytest.approx(valores.sum())
+
+
+def test_agrupar_serie_sin_filas():
+    inicios, claves, matriz = series.agrupar_serie([], [], [], date(2026, 1, 1), date(2026, 3, 31), "mes")
+    assert inicios.size == 3
+    assert claves.size == 0
+    assert matriz.shape == (0, 3)
+
+
+def test_top_grupos_suma_el_resto_en_otros():
+    claves = np.array(["a", "b", "c", "d"], dtype=object)
+    matriz = np.array([[1, 1], [5, 5], [0, 2], [3, 0]], dtype=float)
+
+    elegidas, recortada, hay_otros = series.top_grupos(claves, matriz, 2)
+    assert hay_otros
+    assert elegidas.tolist() == ["b", "d"]
+    assert recortada.tolist() == [[5, 5], [3, 0], [1, 3]]
+
+    assert series.top_grupos(claves, matriz, 0)[2] is False
+    assert series.top_grupos(claves, matriz, 4)[2] is False
+
+
+def test_como_lista():
+    assert series.como_lista(np.array([1.4, 2.6]), 0) == [1, 3]
+    assert series.como_lista(np.array([1.005, 2.3333]), 2) == [1.0, 2.33]
+
+
+# ========== INVARIANTES POR LA API ==========
+@pytest.fixture
+def rentas(crear_solicitud, cambiar_estado):
+    """Solicitudes aprobadas en tres meses, con varios tipos de evento, categorías y paquetes"""
+    inicio = date.today() + timedelta(days=30)
+    especificacion = [
+        (0, "boda", [(1, 2), (2, 1)], [(1, 1)]),
+        (3, "fiesta", [(3, 4)], []),
+        (35, "boda", [(4, 1), (5, 2)], [(2, 2)]),
+        (70, None, [], [(3, 1)]),
+        (70, "corporativo", [(6, 3)], [(1, 1), (4, 1)]),
+    ]
+    for desplazamiento, tipo_evento, productos, paquetes in especificacion:
+        solicitud = crear_solicitud(inicio=inicio + timedelta(days=desplazamiento), tipo_evento=tipo_evento,
+                                    productos=productos, paquetes=paquetes)
+        cambiar_estado(solicitud["solicitud_id"], "aprobada")
+    # Pendiente: no cuenta
+    crear_solicitud(inicio=inicio, productos=[(1, 1)], paquetes=[])
+    return inicio, inicio + timedelta(days=80)
+
+
+def _serie(client, headers, **parametros):
+    respuesta = client.get(URL, headers=headers, params={"top": 0, **parametros})
+    assert respuesta.status_code == 200, respuesta.text
+    return respuesta.json()
+
+
+def _por_periodo(serie):
+    return np.array([s["valores"] for s in serie["series"]]).sum(axis=0) if serie["series"] else None
+
+
+@pytest.mark.parametrize("metrica", ["ingresos", "unidades"])
+@pytest.mark.parametrize("bucket", ["dia", "semana", "mes"])
+def test_totales_coinciden_entre_agrupaciones(client, headers_admin, rentas, metrica, bucket):
+    desde, hasta = rentas
+    rango = {"metrica": metrica, "bucket": bucket, "desde": desde.isoformat(), "hasta": hasta.isoformat()}
+    total = _serie(client, headers_admin, agrupar_por="ninguno", **rango)
+    por_tipo = _serie(client, headers_admin, agrupar_por="tipo_evento", **rango)
+    por_categoria = _serie(client, headers_admin, agrupar_por="categoria", **rango)
+    por_paquete = _serie(client, headers_admin, agrupar_por="paquete", **rango)
+    por_producto = _serie(client, headers_admin, agrupar_por="producto", **rango)
+
+    totales = np.array(total["series"][0]["valores"])
+    np.testing.assert_allclose(_por_periodo(por_tipo), totales)
+    np.testing.assert_allclose(_por_periodo(por_categoria) + _por_periodo(por_paquete), totales)
+    np.testing.assert_allclose(_por_periodo(por_producto), _por_periodo(por_categoria))
+    assert por_tipo["total"] == total["total"]
+
+
+def test_ingresos_son_subtotales_de_linea(client, headers_admin, rentas):
+    desde, hasta = rentas
+    serie = _serie(client, headers_admin, metrica="ingresos", bucket="mes", agrupar_por="tipo_evento",
+                   desde=desde.isoformat(), hasta=hasta.isoformat())
+    # Subtotales de la fixture, sin IVA: 10 × cantidad × 3 días por producto y 100 × cantidad × 3 por paquete
+    assert {s["grupo"]: s["total"] for s in serie["series"]} == {
+        "boda": 90 + 300 + 90 + 600,
+        "fiesta": 120,
+        "corporativo": 90 + 600,
+        "sin_tipo": 300,
+    }
+    assert serie["total"] == 2190
+
+
+def test_top_y_nombres(client, headers_admin, rentas):
+    desde, hasta = rentas
+    serie = client.get(URL, headers=headers_admin, params={
+        "metrica": "unidades", "agrupar_por": "producto", "top": 2,
+        "desde": desde.isoformat(), "hasta": hasta.isoformat()
+    }).json()
+
+    assert [s["grupo"] for s in serie["series"]] == [3, 6, "otros"]
+    assert [s["nombre"] for s in serie["series"][:2]] == ["Producto 2", "Producto 5"]
+    assert sum(s["total"] for s in serie["series"]) == serie["total"] == 13
+
+
+def test_cobrado_por_tipo_de_pago(client, headers_admin, headers_usuario, crear_solicitud):
+    solicitud_id = crear_solicitud()["solicitud_id"]
+    for tipo_pago, monto in (("anticipo", 100), ("deposito", 40), ("devolucion_deposito", 40)):
+        client.post("/api/v1/me/pagos", headers=headers_usuario, json={
+            "solicitud_id": solicitud_id, "tipo_pago": tipo_pago, "metodo_pago": "efectivo", "monto": monto
+        })
+
+    serie = _serie(client, headers_admin, metrica="cobrado", agrupar_por="tipo_pago", bucket="dia")
+    assert {s["grupo"]: s["total"] for s in serie["series"]} == {
+        "anticipo": 100.0, "deposito": 40.0, "devolucion_deposito": -40.0
+    }
+    assert _serie(client, headers_admin, metrica="cobrado", bucket="dia")["total"] == 100.0
+
+
+@pytest.mark.parametrize("parametros", [
+    {"metrica": "margen"},
+    {"bucket": "trimestre"},
+    {"agrupar_por": "usuario"},
+    {"metrica": "cobrado", "agrupar_por": "categoria"},
+    {"desde": "2026-02-01", "hasta": "2026-01-01"},
+])
+def test_parametros_invalidos(client, headers_admin, parametros):
+    assert client.get(URL, headers=headers_admin, params=parametros).status_code == 400
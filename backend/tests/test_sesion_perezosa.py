@@ -0,0 +1,36 @@
+"""La sesión perezosa solo se abre (y pide conexión al pool) al usarse"""
+from sqlalchemy import text
+from app.core import request_metrics
+from app.core.database import LazySession
+
+
+def test_no_abre_la_sesion_hasta_el_primer_uso():
+    with request_metrics.contar_queries() as stats:
+        sesion = LazySession()
+        assert not sesion.abierta
+        sesion.close()
+        assert stats.sesiones_solicitadas == 1
+        assert stats.sesiones_abiertas == 0
+        assert stats.checkouts == 0
+
+        sesion = LazySession()
+        try:
+            assert sesion.execute(text("SELECT 1")).scalar() == 1
+            assert sesion.abierta
+        finally:
+            sesion.close()
+        assert stats.sesiones_abiertas == 1
+
+
+def test_request_rechazado_antes_de_consultar_no_usa_el_pool(client):
+    respuesta = client.get("/api/v1/admin/dashboard")
+    assert respuesta.status_code in (401, 403)
+    assert respuesta.headers["X-DB-Sesiones"] == "0"
+    assert respuesta.headers["X-DB-Checkouts"] == "0"
+
+
+def test_request_que_consulta_abre_una_sesion(client):
+    respuesta = client.get("/api/v1/productos/1")
+    assert respuesta.status_code == 200
+    assert respuesta.headers["X-DB-Sesiones"] == "1"
+    assert respuesta.headers["X-DB-Checkouts"] == "1"
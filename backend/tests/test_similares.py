@@ -0,0 +1,120 @@
+"""Productos similares: rasgos de texto y especificaciones, matriz TF-IDF y vecinos por similitud coseno"""
+from datetime import date, timedelta
+import numpy as np
+import pytest
+from app.analytics import similitud
+from app.models.models import Producto
+
+INICIO = date.today() + timedelta(days=30)
+
+
+def test_palabras_sin_acentos_ni_vacias():
+    assert similitud.normalizar("Mesa Rectángular ÑANDÚ") == "mesa rectangular nandu"
+    assert similitud.palabras("Silla de Madera para la boda, 45 cm") == ["silla", "madera", "boda", "45"]
+    assert similitud.palabras(None) == []
+
+
+def test_rasgos():
+    lista = similitud.rasgos(
+        "Silla Tiffany", "Silla dorada", {"Color": "Dorado", "medidas": {"alto": 90}, "descripcion": "apilable"}, 3
+    )
+    assert lista.count("silla") == similitud.PESO_NOMBRE + 1
+    assert lista.count("tiffany") == similitud.PESO_NOMBRE
+    assert "color=dorado" in lista and "dorado" in lista
+    assert "apilable" in lista
+    assert not any(r.startswith("medidas") for r in lista)
+    assert lista[-1] == "categoria=3"
+
+    # Especificaciones guardadas como texto JSON o como texto libre
+    assert "color=rojo" in similitud.rasgos("x", None, '{"color": "rojo"}', 1)
+    assert "plegable" in similitud.rasgos("x", None, "plegable", 1)
+
+
+def test_construir_matriz():
+    documentos = [
+        ["silla", "madera", "blanco"],
+        ["silla", "madera", "blanco"],
+        ["mesa", "vidrio"],
+        [],
+    ]
+    matriz = similitud.construir_matriz(documentos, dimension=4096)
+
+    assert matriz.dtype == np.float32
+    np.testing.assert_allclose(np.linalg.norm(matriz[:3], axis=1), 1, rtol=1e-6)
+    assert not matriz[3].any()
+    coseno = matriz @ matriz.T
+    assert coseno[0, 1] == pytest.approx(1, rel=1e-6)
+    assert coseno[0, 2] == 0
+
+
+def test_idf_pesa_mas_los_rasgos_raros():
+    documentos = [["comun", "raro"], ["comun", "raro"], ["comun", "otro"], ["comun", "otro"], ["comun"]]
+    matriz = similitud.construir_matriz(documentos, dimension=4096)
+    coseno = matriz @ matriz.T
+    # Compartir solo "comun" vale menos que compartir también "raro"
+    assert coseno[0, 1] > coseno[0, 4] > 0
+
+
+def test_mas_similares_igual_a_ordenar_todo():
+    rng = np.random.default_rng(8)
+    matriz = rng.random((60, 16)).astype(np.float32)
+    matriz /= np.linalg.norm(matriz, axis=1, keepdims=True)
+    candidatos = rng.random(60) > 0.3
+
+    filas, valores = similitud.mas_similares(matriz, 5, 10, candidatos)
+
+    coseno = matriz @ matriz[5]
+    esperado = [i for i in np.argsort(-coseno, kind="stable") if candidatos[i] and i != 5][:10]
+    assert filas.tolist() == esperado
+    np.testing.assert_allclose(valores, coseno[esperado])
+
+
+def test_mas_similares_descarta_sin_rasgos_comunes():
+    matriz = np.eye(4, dtype=np.float32)
+    matriz[1] = [0.6, 0.8, 0, 0]
+    filas, _ = similitud.mas_similares(matriz, 0, 10)
+    assert filas.tolist() == [1]
+
+
+# ========== ENDPOINT ==========
+# Productos de la fixture: ids impares (P0, P2, P4) son sillas de madera
+# blancas de la categoría 1; ids pares (P1, P3, P5) mesas de plástico de la 2
+def _similares(client, producto_id, **parametros):
+    respuesta = client.get(f"/api/v1/productos/{producto_id}/similares", params=parametros)
+    assert respuesta.status_code == 200, respuesta.text
+    return respuesta.json()
+
+
+def test_similares_prefiere_el_mismo_tipo(client):
+    similares = _similares(client, 1)
+    assert {s["producto_id"] for s in similares[:2]} == {3, 5}
+    assert all(s["similitud"] > similares[2]["similitud"] for s in similares[:2])
+    assert 1 not in [s["producto_id"] for s in similares]
+
+    misma_categoria = _similares(client, 1, misma_categoria=True)
+    assert {s["categoria_id"] for s in misma_categoria} == {1}
+    assert len(_similares(client, 1, limit=1)) == 1
+
+
+def test_similares_excluye_no_disponibles_y_ocupados(db, client, crear_solicitud):
+    db.get(Producto, 5).estado = "mantenimiento"
+    db.commit()
+    # Las 20 unidades del producto 3 comprometidas en una solicitud pendiente
+    crear_solicitud(inicio=INICIO, productos=[(3, 20)], paquetes=[])
+
+    assert 5 not in [s["producto_id"] for s in _similares(client, 1)]
+    fechas = {"fecha_inicio": INICIO.isoformat(), "fecha_fin": (INICIO + timedelta(days=1)).isoformat()}
+    con_fechas = _similares(client, 1, **fechas)
+    assert 3 not in [s["producto_id"] for s in con_fechas]
+    assert all(s["unidades_libres"] == 20 for s in con_fechas)
+    # Fuera de esas fechas vuelve a aparecer
+    despues = {"fecha_inicio": (INICIO + timedelta(days=10)).isoformat(), "fecha_fin": (INICIO + timedelta(days=11)).isoformat()}
+    assert 3 in [s["producto_id"] for s in _similares(client, 1, **despues)]
+
+
+def test_similares_errores(client):
+    assert client.get("/api/v1/productos/999/similares").status_code == 404
+    assert client.get("/api/v1/productos/1/similares", params={"fecha_inicio": INICIO.isoformat()}).status_code == 400
+    assert client.get("/api/v1/productos/1/similares", params={
+        "fecha_inicio": INICIO.isoformat(), "fecha_fin": (INICIO - timedelta(days=1)).isoformat()
+    }).status_code == 400
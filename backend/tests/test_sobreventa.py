@@ -0,0 +1,154 @@
+"""Sobreventa: barrido de carga por producto, ventanas de conflicto y detector sobre las solicitudes"""
+from datetime import date, timedelta
+import logging
+import numpy as np
+import pytest
+from app.analytics.sobreventa import barrer, ventanas_de_conflicto, picos
+from app.crud import analytics_crud
+
+D = date(2026, 3, 2)
+
+
+def _carga_dia_a_dia(producto, inicio, fin, cantidad):
+    """Referencia por fuerza bruta: {(producto, dia): carga}"""
+    carga = {}
+    for p, i, f, c in zip(producto, inicio, fin, cantidad):
+        dia = i
+        while dia <= f:
+            carga[(p, dia)] = carga.get((p, dia), 0) + c
+            dia += timedelta(days=1)
+    return carga
+
+
+def test_barrer_igual_a_fuerza_bruta():
+    rng = np.random.default_rng(3)
+    n = 300
+    producto = rng.integers(1, 6, n).tolist()
+    inicio = [D + timedelta(days=int(x)) for x in rng.integers(0, 60, n)]
+    fin = [i + timedelta(days=int(x)) for i, x in zip(inicio, rng.integers(0, 5, n))]
+    cantidad = rng.integers(1, 10, n).tolist()
+
+    p, t, carga = barrer(producto, inicio, fin, cantidad)
+    esperado = _carga_dia_a_dia(producto, inicio, fin, cantidad)
+
+    # La carga de un registro se mantiene hasta el siguiente cambio del mismo producto
+    for producto_id in set(producto):
+        mascara = p == producto_id
+        dias, cargas = t[mascara], carga[mascara]
+        assert np.all(np.diff(dias.astype(np.int64)) > 0)
+        for dia in (D + timedelta(days=k) for k in range(-1, 70)):
+            k = np.searchsorted(dias, np.datetime64(dia, "D"), side="right") - 1
+            assert (int(cargas[k]) if k >= 0 else 0) == esperado.get((producto_id, dia), 0)
+        assert cargas[-1] == 0
+
+
+def test_ventanas_y_picos():
+    # Producto 1 (stock 10): 6 en D..D+2, 6 en D+2..D+3 y 8 en D+3..D+4 -> exceso en D+2..D+3
+    # Producto 2 (stock 5): 6 en D y 6 en D+7 -> dos ventanas separadas
+    p, t, carga = barrer(
+        [1, 1, 1, 2, 2],
+        [D, D + timedelta(days=2), D + timedelta(days=3), D, D + timedelta(days=7)],
+        [D + timedelta(days=2), D + timedelta(days=3), D + timedelta(days=4), D, D + timedelta(days=7)],
+        [6, 6, 8, 6, 6]
+    )
+    ventanas = ventanas_de_conflicto(p, t, carga, {1: 10, 2: 5})
+
+    def _fechas(ventana):
+        desde, hasta, pico, dia_pico = ventana
+        return desde.item(), hasta.item(), pico, dia_pico.item()
+
+    assert [_fechas(v) for v in ventanas[1]] == [(D + timedelta(days=2), D + timedelta(days=3), 14, D + timedelta(days=3))]
+    assert [_fechas(v) for v in ventanas[2]] == [(D, D, 6, D), (D + timedelta(days=7), D + timedelta(days=7), 6, D + timedelta(days=7))]
+    assert {k: (pico, dia.item()) for k, (pico, dia) in picos(p, t, carga).items()} == {
+        1: (14, D + timedelta(days=3)), 2: (6, D)
+    }
+    assert ventanas_de_conflicto(p, t, carga, {1: 14, 2: 6}) == {}
+
+
+# ========== DETECTOR SOBRE LAS SOLICITUDES ==========
+@pytest.fixture(autouse=True)
+def _sin_avisos_previos(monkeypatch):
+    monkeypatch.setattr(analytics_crud, "_conflictos_avisados", {})
+
+
+def _inicio(dias: int) -> date:
+    return date.today() + timedelta(days=dias)
+
+
+def test_detecta_excedentes_por_orden_de_llegada(db, crear_solicitud):
+    primera = crear_solicitud(inicio=_inicio(10), dias=3, productos=[(1, 12)], paquetes=[])
+    segunda = crear_solicitud(inicio=_inicio(12), dias=3, productos=[(1, 10)], paquetes=[])
+    crear_solicitud(inicio=_inicio(20), dias=2, productos=[(2, 20)], paquetes=[])
+
+    resultado = analytics_crud.detectar_sobreventa(db, dias=30)
+
+    assert [p["producto_id"] for p in resultado["productos"]] == [1]
+    producto = resultado["productos"][0]
+    assert (producto["pico"], producto["stock_total"], producto["fecha_pico"]) == (22, 20, _inicio(12).isoformat())
+    conflicto, = producto["conflictos"]
+    assert (conflicto["desde"], conflicto["hasta"], conflicto["exceso"]) == (_inicio(12).isoformat(), _inicio(12).isoformat(), 2)
+    assert [(s["numero_solicitud"], s["excedente"]) for s in conflicto["solicitudes"]] == [
+        (primera["numero_solicitud"], False), (segunda["numero_solicitud"], True)
+    ]
+
+    # Sin solo_conflictos aparecen también los productos dentro del stock
+    completo = analytics_crud.detectar_sobreventa(db, dias=30, solo_conflictos=False)
+    assert {p["producto_id"]: p["conflictos"] == [] for p in completo["productos"]} == {1: False, 2: True}
+
+
+def test_una_entrada_por_solicitud_y_producto(db, crear_solicitud):
+    # Dos líneas del mismo producto en una solicitud cuentan como una sola entrada
+    doble = crear_solicitud(inicio=_inicio(5), productos=[(1, 8), (1, 8)], paquetes=[])
+    crear_solicitud(inicio=_inicio(5), productos=[(1, 6)], paquetes=[])
+
+    conflicto, = analytics_crud.detectar_sobreventa(db, dias=30)["productos"][0]["conflictos"]
+    assert conflicto["pico"] == 22
+    assert [(s["solicitud_id"], s["cantidad"]) for s in conflicto["solicitudes"]] == [
+        (doble["solicitud_id"], 16), (doble["solicitud_id"] + 1, 6)
+    ]
+
+
+def test_ignora_rechazadas_y_fuera_del_horizonte(db, crear_solicitud, cambiar_estado):
+    rechazada = crear_solicitud(inicio=_inicio(5), productos=[(1, 15)], paquetes=[])["solicitud_id"]
+    cambiar_estado(rechazada, "rechazada")
+    crear_solicitud(inicio=_inicio(5), productos=[(1, 15)], paquetes=[])
+    crear_solicitud(inicio=_inicio(40), productos=[(1, 15)], paquetes=[])
+    crear_solicitud(inicio=_inicio(41), productos=[(1, 15)], paquetes=[])
+
+    assert analytics_crud.detectar_sobreventa(db, dias=30)["productos"] == []
+    assert len(analytics_crud.detectar_sobreventa(db, dias=60)["productos"]) == 1
+
+
+def test_avisa_solo_conflictos_nuevos(db, crear_solicitud, caplog):
+    crear_solicitud(inicio=_inicio(5), productos=[(1, 15)], paquetes=[])
+    crear_solicitud(inicio=_inicio(5), productos=[(1, 15)], paquetes=[])
+
+    def _avisos():
+        registros = [r for r in caplog.records if r.name == "kabe.analytics" and r.levelno == logging.WARNING]
+        caplog.clear()
+        return registros
+
+    with caplog.at_level(logging.WARNING, logger="kabe.analytics"):
+        analytics_crud.detectar_sobreventa(db, dias=30)
+        primero = _avisos()
+        assert len(primero) == 1 and "P0" in primero[0].getMessage()
+
+        analytics_crud.detectar_sobreventa(db, dias=30)
+        assert _avisos() == []
+
+        crear_solicitud(inicio=_inicio(8), productos=[(3, 15)], paquetes=[])
+        crear_solicitud(inicio=_inicio(8), productos=[(3, 15)], paquetes=[])
+        analytics_crud.detectar_sobreventa(db, dias=30)
+        nuevo = _avisos()
+        assert len(nuevo) == 1 and "P2" in nuevo[0].getMessage() and "P0" not in nuevo[0].getMessage()
+
+
+def test_endpoint(client, headers_admin, crear_solicitud):
+    crear_solicitud(inicio=_inicio(5), productos=[(1, 15)], paquetes=[])
+    crear_solicitud(inicio=_inicio(5), productos=[(1, 15)], paquetes=[])
+
+    respuesta = client.get("/api/v1/admin/analytics/sobreventa", headers=headers_admin, params={"dias": 30})
+    assert respuesta.status_code == 200
+    datos = respuesta.json()
+    assert [(p["codigo_producto"], p["pico"]) for p in datos["productos"]] == [("P0", 30)]
+    assert "generated_at" in datos
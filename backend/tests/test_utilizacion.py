@@ -0,0 +1,88 @@
+"""Reporte de utilización: traslape de intervalos, totales por producto y exportación CSV"""
+import csv
+import io
+from datetime import date, timedelta
+import numpy as np
+import pytest
+from app.analytics.utilizacion import calcular_utilizacion, dias_de_traslape
+from app.crud import analytics_crud
+
+DESDE = date.today() + timedelta(days=30)
+HASTA = DESDE + timedelta(days=9)
+
+
+def test_dias_de_traslape():
+    d = date(2026, 3, 1)
+    inicio = [d - timedelta(days=5), d, d + timedelta(days=8), d + timedelta(days=12), d - timedelta(days=3)]
+    fin = [d - timedelta(days=1), d + timedelta(days=2), d + timedelta(days=15), d + timedelta(days=14), d + timedelta(days=20)]
+
+    assert dias_de_traslape(inicio, fin, d, d + timedelta(days=9)).tolist() == [0, 3, 2, 0, 10]
+
+
+def test_calcular_utilizacion():
+    d = date(2026, 3, 1)
+    resultado = calcular_utilizacion(
+        producto_ids=[1, 2, 3],
+        stock_total=[10, 4, 0],
+        fecha_alta=[None, d + timedelta(days=5), None],
+        # La línea del producto 99 ya no existe y se descarta
+        linea_producto=[1, 1, 2, 99, 3],
+        linea_inicio=[d, d + timedelta(days=8), d + timedelta(days=6), d, d],
+        linea_fin=[d + timedelta(days=1), d + timedelta(days=12), d + timedelta(days=7), d, d],
+        linea_cantidad=[5, 3, 4, 100, 1],
+        desde=d, hasta=d + timedelta(days=9)
+    )
+
+    assert resultado["dias_propiedad"].tolist() == [10, 5, 10]
+    assert resultado["unidades_dia_propias"].tolist() == [100, 20, 0]
+    assert resultado["unidades_dia_rentadas"].tolist() == [5 * 2 + 3 * 2, 4 * 2, 1]
+    assert resultado["rentas"].tolist() == [2, 1, 1]
+    # Sin stock la utilización es 0 en vez de dividir entre cero
+    np.testing.assert_allclose(resultado["utilizacion"], [0.16, 0.4, 0])
+
+
+def test_reporte_utilizacion(db, crear_solicitud, cambiar_estado):
+    cambiar_estado(crear_solicitud(inicio=DESDE, dias=3, productos=[(1, 5)], paquetes=[])["solicitud_id"], "aprobada")
+    # Cruza el final del periodo: cuentan 2 de sus 4 días
+    cambiar_estado(crear_solicitud(inicio=HASTA - timedelta(days=1), dias=4, productos=[(1, 2), (3, 1)], paquetes=[])["solicitud_id"], "aprobada")
+    # Pendiente y fuera del periodo: no cuentan
+    crear_solicitud(inicio=DESDE, productos=[(2, 10)], paquetes=[])
+    cambiar_estado(crear_solicitud(inicio=HASTA + timedelta(days=1), productos=[(2, 10)], paquetes=[])["solicitud_id"], "aprobada")
+
+    reporte = analytics_crud.reporte_utilizacion(db, DESDE, HASTA)
+    por_id = {fila["producto_id"]: fila for fila in reporte}
+
+    assert len(reporte) == 6
+    assert [fila["producto_id"] for fila in reporte[:2]] == [1, 3]
+    assert por_id[1]["dias_propiedad"] == 10
+    assert por_id[1]["unidades_dia_propias"] == 200
+    assert por_id[1]["unidades_dia_rentadas"] == 5 * 3 + 2 * 2
+    assert por_id[1]["rentas"] == 2
+    assert por_id[1]["utilizacion"] == pytest.approx(19 / 200)
+    assert por_id[3]["utilizacion"] == pytest.approx(2 / 200)
+    assert por_id[2]["unidades_dia_rentadas"] == 0
+    assert por_id[2]["utilizacion"] == 0
+
+
+def test_endpoints_json_y_csv(client, headers_admin, headers_usuario, crear_solicitud, cambiar_estado):
+    cambiar_estado(crear_solicitud(inicio=DESDE, dias=3, productos=[(1, 5)], paquetes=[])["solicitud_id"], "aprobada")
+    periodo = {"desde": DESDE.isoformat(), "hasta": HASTA.isoformat()}
+
+    respuesta = client.get("/api/v1/admin/analytics/utilizacion", headers=headers_admin, params=periodo)
+    assert respuesta.status_code == 200
+    datos = respuesta.json()
+    assert datos["total"] == 6
+    assert datos["productos"][0]["producto_id"] == 1
+    assert datos["productos"][0]["utilizacion"] == 0.075
+
+    exportado = client.get("/api/v1/admin/analytics/utilizacion.csv", headers=headers_admin, params=periodo)
+    assert exportado.status_code == 200
+    assert exportado.headers["content-type"].startswith("text/csv")
+    filas = list(csv.DictReader(io.StringIO(exportado.text)))
+    assert tuple(filas[0]) == analytics_crud.COLUMNAS_UTILIZACION
+    assert [int(fila["producto_id"]) for fila in filas] == [p["producto_id"] for p in datos["productos"]]
+    assert float(filas[0]["utilizacion"]) == 0.075
+
+    assert client.get("/api/v1/admin/analytics/utilizacion", headers=headers_admin,
+                      params={"desde": HASTA.isoformat(), "hasta": DESDE.isoformat()}).status_code == 400
+    assert client.get("/api/v1/admin/analytics/utilizacion", headers=headers_usuario).status_code == 401